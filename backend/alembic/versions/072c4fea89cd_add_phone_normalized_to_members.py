@@ -0,0 +1,68 @@
+"""add phone_normalized to members and family_members
+
+Revision ID: 072c4fea89cd
+Revises: 782eb58d77ee
+Create Date: 2026-10-18 15:03:27.480912
+
+"""
+import re
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '072c4fea89cd'
+down_revision: Union[str, Sequence[str], None] = '782eb58d77ee'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _normalize(phone):
+    # Mesma regra de app.shared.utils.validators.normalize_phone, congelada nesta revisão
+    digits = re.sub(r"[^0-9]", "", phone or "")
+    if not digits:
+        return None
+    if not (len(digits) >= 12 and digits.startswith("55")):
+        digits = f"55{digits}"
+    return digits if len(digits) >= 12 else None
+
+
+def _backfill(table, unique):
+    conn = op.get_bind()
+    rows = conn.execute(sa.text(f"SELECT id, phone FROM {table} WHERE phone IS NOT NULL ORDER BY id")).fetchall()
+    seen = set()
+    updates = []
+    for row_id, phone in rows:
+        normalized = _normalize(phone)
+        if not normalized:
+            continue
+        if unique:
+            # Telefone repetido: fica com o cadastro mais antigo, os demais ficam sem a forma canônica
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+        updates.append({"id": row_id, "phone_normalized": normalized})
+    if updates:
+        conn.execute(sa.text(f"UPDATE {table} SET phone_normalized = :phone_normalized WHERE id = :id"), updates)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('members', sa.Column('phone_normalized', sa.String(length=20), nullable=True, comment='Telefone em E.164, mantido a partir de phone'))
+    op.add_column('family_members', sa.Column('phone_normalized', sa.String(length=20), nullable=True, comment='Telefone em E.164, mantido a partir de phone'))
+
+    _backfill('members', unique=True)
+    _backfill('family_members', unique=False)
+
+    op.create_index('ix_members_phone_normalized', 'members', ['phone_normalized'], unique=True)
+    op.create_index('ix_family_members_phone_normalized', 'family_members', ['phone_normalized'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_family_members_phone_normalized', table_name='family_members')
+    op.drop_index('ix_members_phone_normalized', table_name='members')
+    op.drop_column('family_members', 'phone_normalized')
+    op.drop_column('members', 'phone_normalized')
@@ -0,0 +1,58 @@
+"""canonicalize phone_normalized with the ninth digit
+
+Revision ID: 182bc8906ab7
+Revises: ae046abd65df
+Create Date: 2026-10-18 20:12:44.903117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '182bc8906ab7'
+down_revision: Union[str, Sequence[str], None] = 'ae046abd65df'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _with_ninth_digit(phone):
+    # Mesma regra de app.shared.utils.validators.normalize_phone, congelada nesta revisão
+    if len(phone) == 12 and phone.startswith("55") and phone[4] in "6789":
+        return phone[:4] + "9" + phone[4:]
+    return None
+
+
+def _canonicalize(table, unique):
+    conn = op.get_bind()
+    rows = conn.execute(
+        sa.text(f"SELECT id, phone_normalized FROM {table} WHERE phone_normalized IS NOT NULL ORDER BY id")
+    ).fetchall()
+    taken = {phone for _row_id, phone in rows}
+    updates = []
+    for row_id, phone in rows:
+        canonical = _with_ninth_digit(phone)
+        if not canonical:
+            continue
+        if unique:
+            # As duas grafias já estão gravadas: fica a que já era canônica, a outra permanece como está
+            if canonical in taken:
+                continue
+            taken.add(canonical)
+        updates.append({"id": row_id, "phone_normalized": canonical})
+    if updates:
+        conn.execute(sa.text(f"UPDATE {table} SET phone_normalized = :phone_normalized WHERE id = :id"), updates)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _canonicalize('members', unique=True)
+    _canonicalize('family_members', unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Sem volta: a forma sem o nono dígito continua sendo encontrada por phone_variants
+    pass
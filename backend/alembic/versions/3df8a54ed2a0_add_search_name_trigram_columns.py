@@ -0,0 +1,74 @@
+"""add normalized search_name columns with trigram indexes
+
+Revision ID: 3df8a54ed2a0
+Revises: 4801c4382f2d
+Create Date: 2026-10-18 18:21:07.114902
+
+"""
+from typing import Sequence, Union
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3df8a54ed2a0'
+down_revision: Union[str, Sequence[str], None] = '4801c4382f2d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabela, colunas de origem, tamanho da coluna search_name)
+SEARCH_TABLES = (
+    ('members', ('full_name',), 255),
+    ('lodges', ('lodge_name', 'lodge_number'), 300),
+    ('visitors', ('full_name',), 255),
+)
+
+
+def _normalize(text):
+    # Cópia congelada de normalize_search_text: a migração não deve mudar se o utilitário mudar
+    if not text:
+        return None
+    decomposed = unicodedata.normalize('NFKD', text)
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(stripped.casefold().split()) or None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+    if is_postgres:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    for table_name, sources, length in SEARCH_TABLES:
+        op.add_column(table_name, sa.Column('search_name', sa.String(length=length), nullable=True))
+
+        table = sa.table(table_name, sa.column('id', sa.Integer), sa.column('search_name', sa.String),
+                         *(sa.column(source, sa.String) for source in sources))
+        rows = bind.execute(sa.select(table.c.id, *(table.c[source] for source in sources))).all()
+        updates = [
+            {'row_id': row[0], 'value': _normalize(' '.join(part for part in row[1:] if part))}
+            for row in rows
+        ]
+        if updates:
+            bind.execute(
+                table.update().where(table.c.id == sa.bindparam('row_id')).values(search_name=sa.bindparam('value')),
+                updates,
+            )
+
+        index_name = f'ix_{table_name}_search_name_trgm'
+        if is_postgres:
+            op.create_index(index_name, table_name, ['search_name'], unique=False,
+                            postgresql_using='gin', postgresql_ops={'search_name': 'gin_trgm_ops'})
+        else:
+            op.create_index(index_name, table_name, ['search_name'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name, _sources, _length in reversed(SEARCH_TABLES):
+        op.drop_index(f'ix_{table_name}_search_name_trgm', table_name=table_name)
+        op.drop_column(table_name, 'search_name')
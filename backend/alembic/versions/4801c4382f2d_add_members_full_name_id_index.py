@@ -0,0 +1,28 @@
+"""add members (full_name, id) index for keyset listing
+
+Revision ID: 4801c4382f2d
+Revises: 50cddd55d84d
+Create Date: 2026-10-18 17:02:44.518230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4801c4382f2d'
+down_revision: Union[str, Sequence[str], None] = '50cddd55d84d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_members_full_name_id', 'members', ['full_name', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_members_full_name_id', table_name='members')
@@ -0,0 +1,72 @@
+"""add member_import_jobs and member_import_staging_rows
+
+Revision ID: 50cddd55d84d
+Revises: 072c4fea89cd
+Create Date: 2026-10-18 15:41:09.227315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '50cddd55d84d'
+down_revision: Union[str, Sequence[str], None] = '072c4fea89cd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('member_import_jobs',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lodge_id', sa.Integer(), nullable=True),
+    sa.Column('requested_by_id', sa.Integer(), nullable=True, comment='Id do usuário (membro/webmaster/super admin)'),
+    sa.Column('requested_by_type', sa.String(length=30), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='Valor de MemberImportJobStatus'),
+    sa.Column('total_files', sa.Integer(), nullable=False),
+    sa.Column('parsed_files', sa.Integer(), nullable=False),
+    sa.Column('total_rows', sa.Integer(), nullable=False),
+    sa.Column('valid_rows', sa.Integer(), nullable=False),
+    sa.Column('processed_rows', sa.Integer(), nullable=False),
+    sa.Column('created_count', sa.Integer(), nullable=False),
+    sa.Column('updated_count', sa.Integer(), nullable=False),
+    sa.Column('skipped_count', sa.Integer(), nullable=False),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['lodge_id'], ['lodges.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_member_import_jobs_id'), 'member_import_jobs', ['id'], unique=False)
+    op.create_index(op.f('ix_member_import_jobs_lodge_id'), 'member_import_jobs', ['lodge_id'], unique=False)
+    op.create_table('member_import_staging_rows',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('file_name', sa.String(length=255), nullable=False),
+    sa.Column('data', sa.JSON(), nullable=False, comment='ImportMemberRow serializado'),
+    sa.Column('is_valid', sa.Boolean(), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False, comment='PENDENTE, IMPORTADO, IGNORADO'),
+    sa.Column('member_id', sa.Integer(), nullable=True),
+    sa.Column('error', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['member_import_jobs.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_member_import_staging_rows_id'), 'member_import_staging_rows', ['id'], unique=False)
+    op.create_index('ix_member_import_staging_rows_job_status', 'member_import_staging_rows', ['job_id', 'status'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_member_import_staging_rows_job_status', table_name='member_import_staging_rows')
+    op.drop_index(op.f('ix_member_import_staging_rows_id'), table_name='member_import_staging_rows')
+    op.drop_table('member_import_staging_rows')
+    op.drop_index(op.f('ix_member_import_jobs_lodge_id'), table_name='member_import_jobs')
+    op.drop_index(op.f('ix_member_import_jobs_id'), table_name='member_import_jobs')
+    op.drop_table('member_import_jobs')
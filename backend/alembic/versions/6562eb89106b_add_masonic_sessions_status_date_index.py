@@ -0,0 +1,29 @@
+"""add masonic_sessions status/date index
+
+Revision ID: 6562eb89106b
+Revises: dd563d8f79cc
+Create Date: 2026-10-18 13:41:07.318264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6562eb89106b'
+down_revision: Union[str, Sequence[str], None] = 'dd563d8f79cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Agendador do ciclo de vida: UPDATEs por faixa de (status, session_date)
+    op.create_index('ix_masonic_sessions_status_date', 'masonic_sessions', ['status', 'session_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_masonic_sessions_status_date', table_name='masonic_sessions')
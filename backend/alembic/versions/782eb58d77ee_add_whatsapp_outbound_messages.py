@@ -0,0 +1,45 @@
+"""add whatsapp_outbound_messages
+
+Revision ID: 782eb58d77ee
+Revises: 6562eb89106b
+Create Date: 2026-10-18 14:22:51.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '782eb58d77ee'
+down_revision: Union[str, Sequence[str], None] = '6562eb89106b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('whatsapp_outbound_messages',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('instance_name', sa.String(length=100), nullable=False),
+    sa.Column('remote_jid', sa.String(length=100), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False, comment='Corpo do POST /message/sendText'),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_whatsapp_outbound_messages_id'), 'whatsapp_outbound_messages', ['id'], unique=False)
+    op.create_index('ix_whatsapp_outbound_messages_status_next_attempt', 'whatsapp_outbound_messages', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_whatsapp_outbound_messages_status_next_attempt', table_name='whatsapp_outbound_messages')
+    op.drop_index(op.f('ix_whatsapp_outbound_messages_id'), table_name='whatsapp_outbound_messages')
+    op.drop_table('whatsapp_outbound_messages')
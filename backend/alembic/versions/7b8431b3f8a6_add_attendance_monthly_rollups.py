@@ -0,0 +1,81 @@
+"""add attendance monthly rollups
+
+Revision ID: 7b8431b3f8a6
+Revises: 7c00d816d40d
+Create Date: 2026-10-18 11:26:53.104577
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b8431b3f8a6'
+down_revision: Union[str, Sequence[str], None] = '7c00d816d40d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_monthly_rollups',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lodge_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('period_start', sa.Date(), nullable=False, comment='Primeiro dia do mês consolidado'),
+    sa.Column('sessions_held', sa.Integer(), nullable=False),
+    sa.Column('present_count', sa.Integer(), nullable=False),
+    sa.Column('justified_count', sa.Integer(), nullable=False),
+    sa.Column('absent_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['lodge_id'], ['lodges.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('lodge_id', 'member_id', 'period_start', name='_lodge_member_period_rollup_uc')
+    )
+    op.create_index(op.f('ix_attendance_monthly_rollups_id'), 'attendance_monthly_rollups', ['id'], unique=False)
+    op.create_index(op.f('ix_attendance_monthly_rollups_member_id'), 'attendance_monthly_rollups', ['member_id'], unique=False)
+
+    # Backfill a partir do histórico: obreiros ativos + quem tem registro de presença no mês
+    op.execute(sa.text("""
+        INSERT INTO attendance_monthly_rollups
+            (lodge_id, member_id, period_start, sessions_held, present_count, justified_count, absent_count)
+        WITH held AS (
+            SELECT lodge_id, CAST(date_trunc('month', session_date) AS DATE) AS period_start, COUNT(*) AS sessions_held
+            FROM masonic_sessions
+            WHERE status IN ('REALIZADA', 'ENCERRADA')
+            GROUP BY 1, 2
+        ),
+        counts AS (
+            SELECT s.lodge_id, CAST(date_trunc('month', s.session_date) AS DATE) AS period_start, a.member_id,
+                   SUM(CASE WHEN a.attendance_status = 'Presente' THEN 1 ELSE 0 END) AS present_count,
+                   SUM(CASE WHEN a.attendance_status = 'Justificado' THEN 1 ELSE 0 END) AS justified_count
+            FROM session_attendances a
+            JOIN masonic_sessions s ON s.id = a.session_id
+            WHERE s.status IN ('REALIZADA', 'ENCERRADA') AND a.member_id IS NOT NULL
+            GROUP BY 1, 2, 3
+        ),
+        members AS (
+            SELECT h.lodge_id, h.period_start, m.member_id
+            FROM held h
+            JOIN member_lodge_associations m ON m.lodge_id = h.lodge_id AND m.status = 'Ativo'
+            UNION
+            SELECT lodge_id, period_start, member_id FROM counts
+        )
+        SELECT m.lodge_id, m.member_id, m.period_start, h.sessions_held,
+               COALESCE(c.present_count, 0), COALESCE(c.justified_count, 0),
+               GREATEST(h.sessions_held - COALESCE(c.present_count, 0) - COALESCE(c.justified_count, 0), 0)
+        FROM members m
+        JOIN held h ON h.lodge_id = m.lodge_id AND h.period_start = m.period_start
+        LEFT JOIN counts c ON c.lodge_id = m.lodge_id AND c.period_start = m.period_start AND c.member_id = m.member_id
+    """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attendance_monthly_rollups_member_id'), table_name='attendance_monthly_rollups')
+    op.drop_index(op.f('ix_attendance_monthly_rollups_id'), table_name='attendance_monthly_rollups')
+    op.drop_table('attendance_monthly_rollups')
@@ -0,0 +1,83 @@
+"""add anniversary index
+
+Revision ID: 7c00d816d40d
+Revises: d0852a36f060
+Create Date: 2026-10-18 10:41:07.552913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c00d816d40d'
+down_revision: Union[str, Sequence[str], None] = 'd0852a36f060'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('anniversary_index',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('lodge_id', sa.Integer(), nullable=False),
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('family_member_id', sa.Integer(), nullable=True),
+    sa.Column('kind', sa.String(length=30), nullable=False, comment='Valor de AnniversaryKindEnum'),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Integer(), nullable=False),
+    sa.Column('original_date', sa.Date(), nullable=False),
+    sa.Column('display_name', sa.String(length=255), nullable=False),
+    sa.Column('member_name', sa.String(length=255), nullable=False),
+    sa.Column('relationship_type', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['family_member_id'], ['family_members.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['lodge_id'], ['lodges.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['member_id'], ['members.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_anniversary_index_id'), 'anniversary_index', ['id'], unique=False)
+    op.create_index(op.f('ix_anniversary_index_member_id'), 'anniversary_index', ['member_id'], unique=False)
+    op.create_index('ix_anniversary_index_lodge_month_day_kind', 'anniversary_index', ['lodge_id', 'month', 'day', 'kind'], unique=False)
+
+    # Backfill: uma linha por loja ativa do obreiro e data comemorativa
+    active = """
+        FROM member_lodge_associations a
+        JOIN members m ON m.id = a.member_id
+        WHERE a.status = 'Ativo'
+    """
+    columns = "(lodge_id, member_id, family_member_id, kind, month, day, original_date, display_name, member_name, relationship_type)"
+    for kind, column in (('aniversario', 'm.birth_date'), ('casamento', 'm.marriage_date')):
+        op.execute(sa.text(f"""
+            INSERT INTO anniversary_index {columns}
+            SELECT a.lodge_id, m.id, NULL, '{kind}', EXTRACT(MONTH FROM {column}), EXTRACT(DAY FROM {column}),
+                   {column}, m.full_name, m.full_name, NULL
+            {active} AND {column} IS NOT NULL
+        """))
+    op.execute(sa.text(f"""
+        INSERT INTO anniversary_index {columns}
+        SELECT a.lodge_id, m.id, NULL,
+               CASE e.event_type WHEN 'INITIATION' THEN 'iniciacao' WHEN 'ELEVATION' THEN 'elevacao' ELSE 'exaltacao' END,
+               EXTRACT(MONTH FROM e.session_date), EXTRACT(DAY FROM e.session_date),
+               e.session_date, m.full_name, m.full_name, NULL
+        {active.replace("WHERE", "JOIN masonic_events e ON e.member_id = m.id WHERE")}
+          AND e.event_type IN ('INITIATION', 'ELEVATION', 'EXALTATION') AND e.session_date IS NOT NULL
+    """))
+    op.execute(sa.text(f"""
+        INSERT INTO anniversary_index {columns}
+        SELECT a.lodge_id, m.id, f.id, 'aniversario_familiar', EXTRACT(MONTH FROM f.birth_date), EXTRACT(DAY FROM f.birth_date),
+               f.birth_date, f.full_name, m.full_name, CAST(f.relationship_type AS VARCHAR)
+        {active.replace("WHERE", "JOIN family_members f ON f.member_id = m.id WHERE")}
+          AND f.birth_date IS NOT NULL AND (f.is_deceased IS NULL OR f.is_deceased = false)
+    """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_anniversary_index_lodge_month_day_kind', table_name='anniversary_index')
+    op.drop_index(op.f('ix_anniversary_index_member_id'), table_name='anniversary_index')
+    op.drop_index(op.f('ix_anniversary_index_id'), table_name='anniversary_index')
+    op.drop_table('anniversary_index')
@@ -0,0 +1,62 @@
+"""add obedience -> lodge closure table and hierarchy indexes
+
+Revision ID: ae046abd65df
+Revises: 3df8a54ed2a0
+Create Date: 2026-10-18 19:05:31.672410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ae046abd65df'
+down_revision: Union[str, Sequence[str], None] = '3df8a54ed2a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Mesma regra de obedience_hierarchy_service.rebuild_closure, congelada em SQL
+BACKFILL_CLOSURE = """
+WITH RECURSIVE obedience_tree (ancestor_id, obedience_id, depth) AS (
+    SELECT id, id, 0 FROM obediences
+    UNION ALL
+    SELECT obedience_tree.ancestor_id, child.id, obedience_tree.depth + 1
+    FROM obedience_tree JOIN obediences AS child ON child.parent_obedience_id = obedience_tree.obedience_id
+    WHERE obedience_tree.depth < 10
+)
+INSERT INTO obedience_lodge_closure (obedience_id, lodge_id, depth)
+SELECT obedience_tree.ancestor_id, lodges.id, MIN(obedience_tree.depth)
+FROM obedience_tree
+JOIN lodges ON lodges.obedience_id = obedience_tree.obedience_id OR lodges.subobedience_id = obedience_tree.obedience_id
+GROUP BY obedience_tree.ancestor_id, lodges.id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_obediences_parent_obedience_id'), 'obediences', ['parent_obedience_id'], unique=False)
+    op.create_index(op.f('ix_lodges_obedience_id'), 'lodges', ['obedience_id'], unique=False)
+    op.create_index(op.f('ix_lodges_subobedience_id'), 'lodges', ['subobedience_id'], unique=False)
+    op.create_table(
+        'obedience_lodge_closure',
+        sa.Column('obedience_id', sa.Integer(), nullable=False),
+        sa.Column('lodge_id', sa.Integer(), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False, comment='0 = loja ligada diretamente à obediência'),
+        sa.ForeignKeyConstraint(['lodge_id'], ['lodges.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['obedience_id'], ['obediences.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('obedience_id', 'lodge_id'),
+    )
+    op.create_index(op.f('ix_obedience_lodge_closure_lodge_id'), 'obedience_lodge_closure', ['lodge_id'], unique=False)
+    op.execute(BACKFILL_CLOSURE)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_obedience_lodge_closure_lodge_id'), table_name='obedience_lodge_closure')
+    op.drop_table('obedience_lodge_closure')
+    op.drop_index(op.f('ix_lodges_subobedience_id'), table_name='lodges')
+    op.drop_index(op.f('ix_lodges_obedience_id'), table_name='lodges')
+    op.drop_index(op.f('ix_obediences_parent_obedience_id'), table_name='obediences')
@@ -0,0 +1,48 @@
+"""backfill cashless wallet balance from ledger
+
+Revision ID: d0852a36f060
+Revises: 4782bb063bdc
+Create Date: 2026-10-18 09:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0852a36f060'
+down_revision: Union[str, Sequence[str], None] = '4782bb063bdc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Wallet.balance passa a ser mantido na mesma transação de cada lançamento.
+    # Carteiras existentes recebem o saldo re-derivado do Ledger.
+    op.execute(
+        sa.text(
+            """
+            UPDATE cashless_wallets
+            SET balance = COALESCE((
+                SELECT SUM(
+                    CASE
+                        WHEN t.type IN ('Crédito PIX', 'Crédito Maquininha', 'Crédito Dinheiro', 'Ajuste Crédito')
+                        THEN t.amount
+                        ELSE -t.amount
+                    END
+                )
+                FROM cashless_wallet_transactions t
+                WHERE t.wallet_id = cashless_wallets.id
+            ), 0)
+            """
+        )
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Nada a desfazer: o saldo continua consistente com o Ledger.
+    pass
@@ -0,0 +1,40 @@
+"""add attendance and membership composite indexes
+
+Revision ID: dd563d8f79cc
+Revises: 7b8431b3f8a6
+Create Date: 2026-10-18 12:03:18.722640
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dd563d8f79cc'
+down_revision: Union[str, Sequence[str], None] = '7b8431b3f8a6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Check-in, previsão de presença e estatísticas: presença por sessão + membro/visitante
+    op.create_index('ix_session_attendances_session_member', 'session_attendances', ['session_id', 'member_id'], unique=False)
+    op.create_index('ix_session_attendances_session_visitor', 'session_attendances', ['session_id', 'visitor_id'], unique=False)
+    # Histórico de presença de um membro (analytics, certificados)
+    op.create_index('ix_session_attendances_member_id', 'session_attendances', ['member_id'], unique=False)
+    # Quadro ativo da loja (dashboard, relatórios, estatísticas)
+    op.create_index('ix_member_lodge_associations_lodge_status', 'member_lodge_associations', ['lodge_id', 'status'], unique=False)
+    # Sessões de uma loja por período (calendário, próxima sessão, estatísticas)
+    op.create_index('ix_masonic_sessions_lodge_date', 'masonic_sessions', ['lodge_id', 'session_date'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_masonic_sessions_lodge_date', table_name='masonic_sessions')
+    op.drop_index('ix_member_lodge_associations_lodge_status', table_name='member_lodge_associations')
+    op.drop_index('ix_session_attendances_member_id', table_name='session_attendances')
+    op.drop_index('ix_session_attendances_session_visitor', table_name='session_attendances')
+    op.drop_index('ix_session_attendances_session_member', table_name='session_attendances')
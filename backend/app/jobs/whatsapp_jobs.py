@@ -1,15 +1,22 @@
+import asyncio
 import logging
+import os
 from datetime import date, timedelta, datetime
 from database import SessionLocal
 from app.modules.core.models import Lodge
-from app.modules.members.models import Member
+from app.modules.members.models import AnniversaryKindEnum, Member
+from app.modules.members.services import anniversary_service
 from app.modules.sessions.models import MasonicSession
 from app.modules.sessions.services.session_service import get_presence_forecast
 from app.modules.communication.services.evolution_client import evolution_client
+from app.modules.communication.services import whatsapp_outbox_service
 from app.shared.tenant_context import TenantContextManager
 
 logger = logging.getLogger(__name__)
 
+# Lojas lendo o banco ao mesmo tempo no poller (cada uma ocupa uma conexão do pool em uma thread)
+MAX_PARALLEL_LODGES = int(os.getenv("WHATSAPP_POLL_MAX_PARALLEL_LODGES", "8"))
+
 DEFAULT_WHATSAPP_SETTINGS = {
     "birthdays": {
         "enabled": True,
@@ -30,37 +37,44 @@ def round_time_to_nearest_interval(dt: datetime, interval_minutes: int = 30) ->
     minute = (dt.minute // interval_minutes) * interval_minutes
     return f"{dt.hour:02d}:{minute:02d}"
 
-async def process_birthdays(db, lodge: Lodge, settings: dict, current_time_str: str, today: date):
+def build_birthday_messages(db, lodge: Lodge, settings: dict, current_time_str: str, today: date) -> list[tuple[str, str]]:
+    """Mensagens (remote_jid, texto) de aniversário da loja para este horário. Apenas leitura."""
     b_settings = settings.get("birthdays", {})
     if not b_settings.get("enabled"):
-        return
+        return []
         
     target_time = b_settings.get("time")
     if target_time != current_time_str:
-        return
+        return []
         
-    members = db.query(Member).filter(
-        Member.lodge_id == lodge.id,
-        db.func.extract('month', Member.birth_date) == today.month,
-        db.func.extract('day', Member.birth_date) == today.day,
-        Member.phone != None
-    ).all()
+    # Aniversariantes do dia lidos do índice de aniversários (lodge_id, month, day, kind)
+    birthdays = anniversary_service.get_anniversaries_between(
+        db, lodge.id, today, today, kinds=[AnniversaryKindEnum.BIRTHDAY]
+    )
+    member_ids = [b["member_id"] for b in birthdays]
+    members = (
+        db.query(Member.full_name, Member.phone_normalized)
+        .filter(Member.id.in_(member_ids), Member.phone_normalized.isnot(None))
+        .all()
+        if member_ids
+        else []
+    )
     
     template = b_settings.get("message_template", DEFAULT_WHATSAPP_SETTINGS["birthdays"]["message_template"])
     
+    messages = []
     for member in members:
-        phone_full = member.phone
-        remote_jid = f"{phone_full}@s.whatsapp.net"
+        remote_jid = f"{member.phone_normalized}@s.whatsapp.net"
         first_name = member.full_name.split(" ")[0]
-        
         msg = template.replace("{first_name}", first_name).replace("{lodge_name}", lodge.lodge_name)
-        await evolution_client.send_message(remote_jid, msg)
-        logger.info(f"Mensagem de aniversário enviada para {first_name} ({phone_full}) via SaaS Config")
+        messages.append((remote_jid, msg))
+    return messages
 
-async def process_session_bumps(db, lodge: Lodge, settings: dict, current_time_str: str, today: date):
+def build_session_bump_messages(db, lodge: Lodge, settings: dict, current_time_str: str, today: date) -> list[tuple[str, str]]:
+    """Lembretes (remote_jid do grupo, texto) das próximas sessões da loja para este horário. Apenas leitura."""
     sb_settings = settings.get("session_bumps", {})
     if not sb_settings.get("enabled") or not lodge.whatsapp_group_id:
-        return
+        return []
         
     days_before = sb_settings.get("days_before", [])
     times = sb_settings.get("times", [])
@@ -79,6 +93,11 @@ async def process_session_bumps(db, lodge: Lodge, settings: dict, current_time_s
     
     template = sb_settings.get("message_template", DEFAULT_WHATSAPP_SETTINGS["session_bumps"]["message_template"])
     
+    group_jid = lodge.whatsapp_group_id
+    if not group_jid.endswith("@g.us"):
+        group_jid = f"{group_jid}@g.us"
+
+    messages = []
     for session in sessions:
         days_until = (session.session_date - today).days
         
@@ -104,48 +123,85 @@ async def process_session_bumps(db, lodge: Lodge, settings: dict, current_time_s
                               .replace("{time}", time_str)\
                               .replace("{confirmed_masons}", str(confirmed_masons))\
                               .replace("{confirmed_guests}", str(confirmed_guests))
-                
-                group_jid = lodge.whatsapp_group_id
-                if not group_jid.endswith("@g.us"):
-                    group_jid = f"{group_jid}@g.us"
-                    
-                await evolution_client.send_message(group_jid, msg)
-                logger.info(f"Bump SaaS enviado para a Loja {lodge.id} (Sessão {session.id}) às {current_time_str}")
+                messages.append((group_jid, msg))
             finally:
                 TenantContextManager.set_lodge_id(None)
+    return messages
+
+
+def _active_lodge_ids() -> list[int]:
+    db = SessionLocal()
+    try:
+        return [
+            lodge_id for (lodge_id,) in db.query(Lodge.id).filter(
+                Lodge.is_active == True,
+                Lodge.whatsapp_notifications_enabled == True
+            )
+        ]
+    finally:
+        db.close()
+
+
+def _collect_lodge_messages(lodge_id: int, current_time_str: str, today: date) -> dict[str, list[tuple[str, str]]]:
+    """Leituras de uma loja, executadas em thread com sessão própria (nunca no event loop)."""
+    db = SessionLocal()
+    try:
+        lodge = db.query(Lodge).filter(Lodge.id == lodge_id).first()
+        if not lodge:
+            return {}
+        # Usa o JSON da Loja ou o Default se estiver vazio
+        settings = lodge.whatsapp_settings or DEFAULT_WHATSAPP_SETTINGS
+        return {
+            "aniversários": build_birthday_messages(db, lodge, settings, current_time_str, today),
+            "bumps de sessão": build_session_bump_messages(db, lodge, settings, current_time_str, today),
+        }
+    finally:
+        db.close()
+
+
+async def process_lodge(lodge_id: int, current_time_str: str, today: date, db_slots: asyncio.Semaphore):
+    """Processa uma loja isoladamente: erro ou lentidão dela não afeta as demais."""
+    try:
+        # O semáforo limita só as leituras (conexões do pool); os envios têm limite próprio no cliente
+        async with db_slots:
+            batches = await asyncio.to_thread(_collect_lodge_messages, lodge_id, current_time_str, today)
+
+        for kind, messages in batches.items():
+            if messages:
+                sent = await evolution_client.send_messages(messages)
+                logger.info(f"WhatsApp ({kind}) Loja {lodge_id}: {sent}/{len(messages)} enviadas às {current_time_str}")
+    except Exception as e:
+        logger.error(f"Erro no poll_whatsapp_jobs para a Loja {lodge_id}: {e}", exc_info=True)
 
 
 async def poll_whatsapp_jobs():
     """
     Master Polling Job: Executado a cada 30 minutos.
     Varre as lojas com whatsapp_notifications_enabled e dispara os jobs granulares de acordo com whatsapp_settings.
+    As lojas são processadas em paralelo (no máximo MAX_PARALLEL_LODGES lendo o banco ao mesmo tempo),
+    com as consultas em threads para não travar o event loop da API.
     """
     now = datetime.now()
     current_time_str = round_time_to_nearest_interval(now, 30)
     today = now.date()
     logger.info(f"Executando poll_whatsapp_jobs para o horário base: {current_time_str}")
     
-    db = SessionLocal()
     try:
-        lodges = db.query(Lodge).filter(
-            Lodge.is_active == True,
-            Lodge.whatsapp_notifications_enabled == True
-        ).all()
-        
-        for lodge in lodges:
-            # Usa o JSON da Loja ou o Default se estiver vazio
-            settings = lodge.whatsapp_settings or DEFAULT_WHATSAPP_SETTINGS
-            
-            # Aniversários
-            await process_birthdays(db, lodge, settings, current_time_str, today)
-            
-            # Sessões (Bumps)
-            await process_session_bumps(db, lodge, settings, current_time_str, today)
-            
+        lodge_ids = await asyncio.to_thread(_active_lodge_ids)
     except Exception as e:
         logger.error(f"Erro no poll_whatsapp_jobs: {e}")
-    finally:
-        db.close()
+        return
+
+    db_slots = asyncio.Semaphore(MAX_PARALLEL_LODGES)
+    await asyncio.gather(*(process_lodge(lodge_id, current_time_str, today, db_slots) for lodge_id in lodge_ids))
+
+
+async def retry_whatsapp_outbox():
+    """Reenvia as mensagens da fila persistente cuja próxima tentativa (backoff exponencial) venceu."""
+    try:
+        await whatsapp_outbox_service.retry_pending_messages()
+    except Exception as e:
+        logger.error(f"Erro no retry_whatsapp_outbox: {e}")
 
 
 def setup_whatsapp_jobs(scheduler):
@@ -157,3 +213,10 @@ def setup_whatsapp_jobs(scheduler):
         id="master_whatsapp_poller",
         replace_existing=True
     )
+    scheduler.add_job(
+        retry_whatsapp_outbox,
+        'interval',
+        minutes=1,
+        id="whatsapp_outbox_retry",
+        replace_existing=True
+    )
@@ -481,16 +481,22 @@ def logout(
     jti = payload.get("jti")
     if jti:
         from app.modules.access_control.models import RevokedAccessToken
+        from app.shared.security.token_revocation import revoked_token_index
         from datetime import datetime, UTC
         from config import settings
         from datetime import timedelta
-        expires_at = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        # A revogação só precisa durar até o exp do próprio token
+        if payload.get("exp"):
+            expires_at = datetime.fromtimestamp(payload["exp"], UTC)
+        else:
+            expires_at = datetime.now(UTC) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
         
         exists = db.query(RevokedAccessToken).filter(RevokedAccessToken.jti == jti).first()
         if not exists:
             db_revoked = RevokedAccessToken(jti=jti, expires_at=expires_at)
             db.add(db_revoked)
             db.commit()
+        revoked_token_index.add(jti, expires_at)
 
     # Limpar cookie
     response.delete_cookie("refresh_token")
@@ -613,7 +619,12 @@ def update_email_first_access(data: FirstAccessUpdateEmailRequest, db: Session =
 def first_access_register(data: FirstAccessRegisterRequest, db: Session = Depends(get_db)):
     from models.models import Member, Lodge, Obedience, RegistrationStatusEnum, LodgeMemberAssociation, ObedienceMemberAssociation
     from app.modules.access_control.utils.password_utils import hash_password
+    from app.modules.members.services.member_service import get_member_id_by_phone
     import secrets
+
+    # Telefone é único entre os obreiros (busca exata pela forma canônica E.164)
+    if data.phone and get_member_id_by_phone(db, data.phone):
+        raise HTTPException(status_code=400, detail="Este telefone já está sendo utilizado por outra conta.")
     
     obedience = None
     if data.obedience_id:
@@ -6,6 +6,7 @@ import dependencies
 from app.modules.access_control.schemas import permission_schema
 from app.modules.access_control.services import permission_service
 from app.core.logger import logger
+from app.shared.security.cache import user_context_cache
 
 router = APIRouter(
     prefix="/permissions",
@@ -112,3 +113,12 @@ def delete_permission(
         
     logger.info("Permissão excluída com sucesso", extra={"extra_data": {"permission_id": permission_id}})
     return db_permission
+
+
+@router.get(
+    "/cache/stats",
+    summary="Estatísticas do Cache de Credenciais",
+    description="Retorna tamanho, acertos (hits) e falhas (misses) do cache em memória de credenciais resolvidas. Acesso restrito a Super Admins."
+)
+def read_user_context_cache_stats(current_user: dict = Depends(get_current_super_admin)):
+    return user_context_cache.stats()
@@ -195,3 +195,31 @@ def get_active_role_name(member: models.Member, entity_id: int, entity_type: str
             return association.role.name
 
     return None
+
+
+def purge_expired_tokens(db: Session) -> tuple[int, int]:
+    """
+    Remove do banco os Access Tokens revogados e os Refresh Tokens que já expiraram,
+    mantendo as tabelas de denylist/sessões pequenas. Retorna (access_removidos, refresh_removidos).
+    """
+    from datetime import UTC, datetime
+
+    from app.shared.security.token_revocation import revoked_token_index
+
+    now = datetime.now(UTC)
+    revoked_deleted = (
+        db.query(models.RevokedAccessToken)
+        .filter(models.RevokedAccessToken.expires_at < now)
+        .delete(synchronize_session=False)
+    )
+    refresh_deleted = (
+        db.query(models.RefreshToken).filter(models.RefreshToken.expires_at < now).delete(synchronize_session=False)
+    )
+    db.commit()
+    revoked_token_index.prune()
+
+    logger.info(
+        "Limpeza de tokens expirados concluída",
+        extra={"extra_data": {"revoked_access_tokens": revoked_deleted, "refresh_tokens": refresh_deleted}},
+    )
+    return revoked_deleted, refresh_deleted
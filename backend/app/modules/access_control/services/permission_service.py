@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session
 
 from app.modules.access_control.schemas import permission_schema
+from app.shared.security.cache import user_context_cache
 from models import models
 
 
@@ -41,6 +42,7 @@ def update_permission(
         setattr(db_permission, key, value)
 
     db.commit()
+    user_context_cache.invalidate_all()
     db.refresh(db_permission)
     return db_permission
 
@@ -53,4 +55,5 @@ def delete_permission(db: Session, permission_id: int) -> models.Permission | No
 
     db.delete(db_permission)
     db.commit()
+    user_context_cache.invalidate_all()
     return db_permission
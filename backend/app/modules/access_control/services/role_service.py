@@ -1,6 +1,7 @@
 from sqlalchemy.orm import Session, joinedload
 
 from app.modules.access_control.schemas import role_schema
+from app.shared.security.cache import user_context_cache
 from models import models
 
 
@@ -54,6 +55,7 @@ def update_role(db: Session, role_id: int, role_update: role_schema.RoleUpdate)
         db_role.permissions = permissions
 
     db.commit()
+    user_context_cache.invalidate_all()
     db.refresh(db_role)
     return db_role
 
@@ -66,4 +68,5 @@ def delete_role(db: Session, role_id: int) -> models.Role | None:
 
     db.delete(db_role)
     db.commit()
+    user_context_cache.invalidate_all()
     return db_role
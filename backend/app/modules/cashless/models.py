@@ -48,7 +48,7 @@ class Wallet(BaseModel):
     id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     cashless_user_id = Column(String(36), ForeignKey("cashless_users.id"), nullable=False)
     lodge_id = Column(Integer, ForeignKey("lodges.id"), nullable=False, index=True)
-    balance = Column(Numeric(10, 2), nullable=False, default=0.00, comment="Saldo atual. Atualizado via trigger ou sum dinâmico")
+    balance = Column(Numeric(10, 2), nullable=False, default=0.00, comment="Saldo materializado. Atualizado na mesma transação de cada WalletTransaction e reconciliado com o Ledger")
     allow_negative_balance = Column(Boolean, nullable=False, default=False, comment="Permite Pós-Pago (Fatura) se True")
     
     cashless_user = relationship("CashlessUser", back_populates="wallet")
@@ -1,6 +1,7 @@
 from decimal import Decimal
 from typing import Optional
 
+from sqlalchemy import case, func
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 from passlib.context import CryptContext
@@ -55,29 +56,116 @@ def create_cashless_user_and_wallet(db: Session, user_data: CashlessUserCreate,
     return new_user
 
 
-def get_dynamic_balance(db: Session, user_id: str, lodge_id: int) -> Decimal:
+# Tipos de lançamento que somam ao saldo; todos os demais subtraem.
+CREDIT_TRANSACTION_TYPES = (
+    WalletTransactionTypeEnum.CREDITO_PIX,
+    WalletTransactionTypeEnum.CREDITO_MAQUININHA,
+    WalletTransactionTypeEnum.CREDITO_DINHEIRO,
+    WalletTransactionTypeEnum.AJUSTE_CREDITO,
+)
+
+
+def signed_amount(tx_type: WalletTransactionTypeEnum, amount: Decimal) -> Decimal:
+    """Retorna o valor com sinal (positivo para créditos, negativo para débitos)."""
+    return amount if tx_type in CREDIT_TRANSACTION_TYPES else -amount
+
+
+def record_wallet_transaction(db: Session, wallet: Wallet, **tx_fields) -> WalletTransaction:
+    """
+    Insere um lançamento no Ledger e atualiza o saldo materializado da carteira
+    na mesma transação. Não faz commit: o chamador controla a fronteira transacional.
+
+    O incremento é feito via UPDATE atômico (balance = balance + delta), de forma que
+    lançamentos concorrentes na mesma carteira não se sobrescrevem.
+    """
+    tx = WalletTransaction(wallet_id=wallet.id, **tx_fields)
+    db.add(tx)
+
+    delta = signed_amount(tx.type, Decimal(tx.amount or 0))
+    db.query(Wallet).filter(Wallet.id == wallet.id).update(
+        {Wallet.balance: Wallet.balance + delta}, synchronize_session=False
+    )
+    db.expire(wallet, ["balance"])
+    return tx
+
+
+def compute_ledger_balance(db: Session, wallet_id: str) -> Decimal:
+    """
+    Recalcula o saldo a partir do Ledger com uma única agregação SQL.
+    Usado como fallback e pelo reconciliador; o caminho quente usa Wallet.balance.
+    """
+    signed = case(
+        (WalletTransaction.type.in_(CREDIT_TRANSACTION_TYPES), WalletTransaction.amount),
+        else_=-WalletTransaction.amount,
+    )
+    total = db.query(func.coalesce(func.sum(signed), 0)).filter(WalletTransaction.wallet_id == wallet_id).scalar()
+    return Decimal(total).quantize(Decimal("0.01"))
+
+
+def get_dynamic_balance(db: Session, user_id: str, lodge_id: int, from_ledger: bool = False) -> Decimal:
+    """
+    Retorna o saldo atual da carteira.
+
+    Por padrão lê o saldo materializado em Wallet.balance (O(1)). Com from_ledger=True,
+    recalcula via SUM no Ledger (fallback para auditoria/diagnóstico).
+    """
     wallet = db.query(Wallet).filter(Wallet.cashless_user_id == user_id, Wallet.lodge_id == lodge_id).first()
     if not wallet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wallet not found for this user.")
 
-    # Dynamic Ledger SUM calculation
-    credit_types = [
-        WalletTransactionTypeEnum.CREDITO_PIX,
-        WalletTransactionTypeEnum.CREDITO_MAQUININHA,
-        WalletTransactionTypeEnum.CREDITO_DINHEIRO,
-        WalletTransactionTypeEnum.AJUSTE_CREDITO
-    ]
-    
-    transactions = db.query(WalletTransaction).filter(WalletTransaction.wallet_id == wallet.id).all()
-    
-    balance = Decimal("0.00")
-    for tx in transactions:
-        if tx.type in credit_types:
-            balance += tx.amount
-        else:
-            balance -= tx.amount
+    if from_ledger:
+        return compute_ledger_balance(db, wallet.id)
+
+    return Decimal(wallet.balance or 0)
 
-    return balance
+
+def reconcile_wallet_balances(db: Session, lodge_id: Optional[int] = None, fix: bool = False) -> list[dict]:
+    """
+    Re-deriva o saldo de todas as carteiras a partir do Ledger e reporta divergências
+    em relação ao saldo materializado.
+
+    Uma única consulta agrupada calcula o saldo de todas as carteiras. Se fix=True,
+    corrige Wallet.balance para o valor do Ledger e faz commit.
+    """
+    signed = case(
+        (WalletTransaction.type.in_(CREDIT_TRANSACTION_TYPES), WalletTransaction.amount),
+        else_=-WalletTransaction.amount,
+    )
+    ledger_totals = (
+        db.query(WalletTransaction.wallet_id.label("wallet_id"), func.sum(signed).label("ledger_balance"))
+        .group_by(WalletTransaction.wallet_id)
+        .subquery()
+    )
+
+    query = db.query(Wallet.id, Wallet.lodge_id, Wallet.balance, ledger_totals.c.ledger_balance).outerjoin(
+        ledger_totals, ledger_totals.c.wallet_id == Wallet.id
+    )
+    if lodge_id is not None:
+        query = query.filter(Wallet.lodge_id == lodge_id)
+
+    drifts = []
+    for wallet_id, wallet_lodge_id, stored, ledger in query.all():
+        stored_balance = Decimal(stored or 0).quantize(Decimal("0.01"))
+        ledger_balance = Decimal(ledger or 0).quantize(Decimal("0.01"))
+        if stored_balance != ledger_balance:
+            drifts.append(
+                {
+                    "wallet_id": wallet_id,
+                    "lodge_id": wallet_lodge_id,
+                    "stored_balance": stored_balance,
+                    "ledger_balance": ledger_balance,
+                    "drift": stored_balance - ledger_balance,
+                }
+            )
+
+    if fix and drifts:
+        for drift in drifts:
+            db.query(Wallet).filter(Wallet.id == drift["wallet_id"]).update(
+                {Wallet.balance: drift["ledger_balance"]}, synchronize_session=False
+            )
+        db.commit()
+
+    return drifts
 
 
 def process_manual_transaction(db: Session, tx_data: ManualTransactionRequest, lodge_id: int) -> WalletTransaction:
@@ -100,17 +188,16 @@ def process_manual_transaction(db: Session, tx_data: ManualTransactionRequest, l
         if not operator.pin or not verify_pin(tx_data.pin_seguranca, operator.pin):
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="PIN inválido.")
             
-    # 3. Create Transaction
-    new_tx = WalletTransaction(
-        wallet_id=wallet.id,
+    # 3. Create Transaction (Ledger + saldo materializado na mesma transação)
+    new_tx = record_wallet_transaction(
+        db,
+        wallet,
         lodge_id=lodge_id,
         type=tx_data.tipo,
         amount=tx_data.valor,
         operator_id=operator.id
     )
-    
-    db.add(new_tx)
-    
+
     db.commit()
     db.refresh(new_tx)
     return new_tx
@@ -146,14 +233,14 @@ def process_mercadopago_webhook(db: Session, payload: WebhookPayload) -> Mercado
             if wallet:
                 # In a real scenario we'd query MP API to verify the payment and get real amount.
                 # Here we assume a valid payment payload
-                tx = WalletTransaction(
-                    wallet_id=wallet.id,
+                record_wallet_transaction(
+                    db,
+                    wallet,
                     lodge_id=wallet.lodge_id,
                     type=WalletTransactionTypeEnum.CREDITO_PIX,
                     amount=Decimal("0.00"),  # Stub value. Real value would come from MP API
                     gateway_id=event_id
                 )
-                db.add(tx)
                 webhook.status = WebhookStatusEnum.PROCESSED
             else:
                 webhook.status = WebhookStatusEnum.FAILED
@@ -205,8 +292,8 @@ def process_order(db: Session, order_data: OrderCreate, lodge_id: int) -> Order:
             "unit_price": product.price
         })
 
-    # b) Ver se tem saldo
-    balance = get_dynamic_balance(db, order_data.usuario_id, lodge_id)
+    # b) Ver se tem saldo (saldo materializado; a carteira já está travada com FOR UPDATE)
+    balance = Decimal(wallet.balance or 0)
     if balance < total and not wallet.allow_negative_balance:
         db.rollback()
         raise HTTPException(status_code=400, detail="Saldo insuficiente")
@@ -242,14 +329,14 @@ def process_order(db: Session, order_data: OrderCreate, lodge_id: int) -> Order:
             db.add(stock_mov)
             
         # d) Insira a saída na tabela Transacoes_Carteira
-        tx = WalletTransaction(
-            wallet_id=wallet.id,
+        record_wallet_transaction(
+            db,
+            wallet,
             lodge_id=lodge_id,
             type=WalletTransactionTypeEnum.DEBITO_CONSUMO,
-            amount=total, 
+            amount=total,
             order_id=new_order.id
         )
-        db.add(tx)
         
         db.commit()
         
@@ -6,7 +6,9 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
     String,
     Text,
 )
@@ -117,3 +119,20 @@ class MessageAttachment(BaseModel):
     file_name = Column(String(255), nullable=False)
 
     message = relationship("EntityMessage", back_populates="attachments")
+
+
+class WhatsAppOutboundMessage(BaseModel):
+    """Fila persistente de envios para a Evolution API que falharam (reenviados com backoff exponencial)."""
+
+    __tablename__ = "whatsapp_outbound_messages"
+    id = Column(Integer, primary_key=True, index=True)
+    instance_name = Column(String(100), nullable=False)
+    remote_jid = Column(String(100), nullable=False)
+    payload = Column(JSON, nullable=False, comment="Corpo do POST /message/sendText")
+    status = Column(String(20), nullable=False, default="PENDING")  # PENDING, SENT, FAILED
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+    sent_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_whatsapp_outbound_messages_status_next_attempt", "status", "next_attempt_at"),)
@@ -1,10 +1,41 @@
+import asyncio
 import httpx
 import os
 import logging
-from typing import Optional
+import time
+from typing import Iterable, Optional
 
 logger = logging.getLogger(__name__)
 
+# Respostas que valem nova tentativa (limite de taxa e falhas do servidor/instância)
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """
+    Limitador de taxa (token bucket) para uma instância da Evolution API.
+    Permite rajadas de até `capacity` envios e sustenta `rate` envios por segundo.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
 class EvolutionAPIClient:
     def __init__(self):
         self.base_url = os.getenv("EVOLUTION_API_URL", "http://evolution_api:8080")
@@ -14,38 +45,108 @@ class EvolutionAPIClient:
             "apikey": self.api_key,
             "Content-Type": "application/json"
         }
+        self.max_concurrency = int(os.getenv("EVOLUTION_MAX_CONCURRENCY", "10"))
+        self.rate_per_second = float(os.getenv("EVOLUTION_RATE_PER_SECOND", "5"))
+        self.burst = int(os.getenv("EVOLUTION_RATE_BURST", "10"))
+
+        # Criados sob demanda, dentro do event loop que faz os envios
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Cliente HTTP de longa duração: conexões keep-alive reaproveitadas entre envios."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(10.0, connect=5.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _get_bucket(self, instance_name: str) -> TokenBucket:
+        bucket = self._buckets.get(instance_name)
+        if bucket is None:
+            bucket = self._buckets[instance_name] = TokenBucket(self.rate_per_second, self.burst)
+        return bucket
+
+    async def aclose(self) -> None:
+        """Fecha o pool de conexões (desligamento da aplicação)."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post_text(self, payload: dict, instance_name: Optional[str] = None) -> tuple[bool, Optional[str], bool]:
+        """
+        POST /message/sendText respeitando o limite de concorrência e a taxa da instância.
+        Retorna (sucesso, erro, vale_nova_tentativa). Não persiste nada.
+        """
+        instance_name = instance_name or self.instance_name
+        client = self._get_client()
+        await self._get_bucket(instance_name).acquire()
+        async with self._semaphore:
+            try:
+                response = await client.post(f"/message/sendText/{instance_name}", json=payload)
+                response.raise_for_status()
+                return True, None, False
+            except httpx.HTTPStatusError as e:
+                return False, str(e), e.response.status_code in RETRYABLE_STATUS_CODES
+            except httpx.HTTPError as e:
+                # Timeout, conexão recusada etc.
+                return False, str(e) or e.__class__.__name__, True
+
+    async def _send(self, payload: dict, success_log: str) -> bool:
+        ok, error, retryable = await self.post_text(payload)
+        if ok:
+            logger.info(success_log)
+            return True
+
+        logger.error(f"Erro ao enviar mensagem via Evolution API para {payload['number']}: {error}")
+        # Lazy import para evitar import circular (a fila reenvia usando este cliente)
+        from app.modules.communication.services import whatsapp_outbox_service
+
+        try:
+            await asyncio.to_thread(
+                whatsapp_outbox_service.enqueue_failed_message, self.instance_name, payload, error, retryable
+            )
+        except Exception as e:
+            logger.error(f"Falha ao registrar envio na fila de reenvio: {e}")
+        return False
 
     async def send_message(self, remote_jid: str, text: str, delay: int = 1000) -> bool:
         """
         Envia uma mensagem de texto via Evolution API.
-        
+        Falhas entram na fila persistente de reenvio (whatsapp_outbound_messages).
+
         Args:
             remote_jid: O número de destino com o sufixo (ex: 5511999999999@s.whatsapp.net ou 120363@g.us para grupos)
             text: O conteúdo da mensagem
             delay: Tempo simulado de digitação
         """
-        url = f"{self.base_url}/message/sendText/{self.instance_name}"
         payload = {
             "number": remote_jid,
             "text": text,
             "delay": delay
         }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, headers=self.headers, timeout=10.0)
-                response.raise_for_status()
-                logger.info(f"Mensagem enviada com sucesso para {remote_jid}")
-                return True
-        except Exception as e:
-            logger.error(f"Erro ao enviar mensagem via Evolution API: {e}")
-            return False
-            
+        return await self._send(payload, f"Mensagem enviada com sucesso para {remote_jid}")
+
+    async def send_messages(self, messages: Iterable[tuple[str, str]], delay: int = 1000) -> int:
+        """
+        Envia um lote de mensagens (remote_jid, texto) em paralelo, limitado pelo semáforo e pela
+        taxa da instância. Retorna quantas foram entregues; as demais ficam na fila de reenvio.
+        """
+        results = await asyncio.gather(*(self.send_message(jid, text, delay) for jid, text in messages))
+        return sum(results)
+
     async def reply_message(self, remote_jid: str, text: str, message_id: str, delay: int = 1000, mentions: Optional[list[str]] = None) -> bool:
         """
         Envia uma mensagem de texto respondendo a uma mensagem específica ("bump").
         """
-        url = f"{self.base_url}/message/sendText/{self.instance_name}"
         options = {
             "quoted": {
                 "key": {
@@ -53,28 +154,19 @@ class EvolutionAPIClient:
                 }
             }
         }
-        
+
         if mentions:
             options["mentions"] = {
                 "everyOne": False,
                 "mentioned": mentions
             }
-            
+
         payload = {
             "number": remote_jid,
             "text": text,
             "delay": delay,
             "options": options
         }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload, headers=self.headers, timeout=10.0)
-                response.raise_for_status()
-                logger.info(f"Resposta enviada com sucesso para {remote_jid}")
-                return True
-        except Exception as e:
-            logger.error(f"Erro ao enviar resposta via Evolution API: {e}")
-            return False
+        return await self._send(payload, f"Resposta enviada com sucesso para {remote_jid}")
 
 evolution_client = EvolutionAPIClient()
@@ -0,0 +1,117 @@
+import asyncio
+import logging
+from datetime import UTC, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.communication.models import WhatsAppOutboundMessage
+from app.modules.communication.services.evolution_client import evolution_client
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 6
+BASE_BACKOFF_SECONDS = 30
+# Tempo em que uma mensagem reservada por um worker fica invisível aos demais
+CLAIM_LEASE = timedelta(minutes=5)
+BATCH_SIZE = 200
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Backoff exponencial: 30s, 1min, 2min, 4min, 8min..."""
+    return timedelta(seconds=BASE_BACKOFF_SECONDS * 2 ** max(attempts - 1, 0))
+
+
+def enqueue_failed_message(
+    instance_name: str,
+    payload: dict,
+    error: Optional[str],
+    retryable: bool,
+    session_factory: sessionmaker = SessionLocal,
+) -> None:
+    """
+    Registra um envio que falhou. Erros definitivos (ex: 400/401) ficam como FAILED para auditoria;
+    os demais voltam a ser tentados após o backoff. Abre a própria sessão (chamado fora do request).
+    """
+    now = datetime.now(UTC)
+    db = session_factory()
+    try:
+        db.add(
+            WhatsAppOutboundMessage(
+                instance_name=instance_name,
+                remote_jid=payload["number"],
+                payload=payload,
+                status="PENDING" if retryable else "FAILED",
+                attempts=1,
+                next_attempt_at=now + backoff_delay(1) if retryable else None,
+                last_error=error,
+            )
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def _claim_due_messages(session_factory: sessionmaker, now: datetime, limit: int) -> list[tuple[int, str, dict]]:
+    """Reserva as mensagens vencidas empurrando next_attempt_at (lease) para outro worker não pegá-las."""
+    db = session_factory()
+    try:
+        due = (
+            db.query(WhatsAppOutboundMessage)
+            .filter(WhatsAppOutboundMessage.status == "PENDING", WhatsAppOutboundMessage.next_attempt_at <= now)
+            .order_by(WhatsAppOutboundMessage.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        claimed = [(message.id, message.instance_name, message.payload) for message in due]
+        for message in due:
+            message.next_attempt_at = now + CLAIM_LEASE
+        db.commit()
+        return claimed
+    finally:
+        db.close()
+
+
+def _record_results(session_factory: sessionmaker, results: dict[int, tuple], now: datetime) -> dict[str, int]:
+    summary = {"sent": 0, "retrying": 0, "failed": 0}
+    db = session_factory()
+    try:
+        messages = db.query(WhatsAppOutboundMessage).filter(WhatsAppOutboundMessage.id.in_(list(results))).all()
+        for message in messages:
+            ok, error, retryable = results[message.id]
+            message.attempts += 1
+            if ok:
+                message.status, message.sent_at, message.next_attempt_at = "SENT", now, None
+                summary["sent"] += 1
+            elif retryable and message.attempts < MAX_ATTEMPTS:
+                message.next_attempt_at = now + backoff_delay(message.attempts)
+                message.last_error = error
+                summary["retrying"] += 1
+            else:
+                message.status, message.next_attempt_at, message.last_error = "FAILED", None, error
+                summary["failed"] += 1
+        db.commit()
+        return summary
+    finally:
+        db.close()
+
+
+async def retry_pending_messages(
+    session_factory: sessionmaker = SessionLocal, client=evolution_client, now: Optional[datetime] = None
+) -> dict[str, int]:
+    """
+    Reenvia em paralelo as mensagens cuja próxima tentativa venceu.
+    O acesso ao banco roda em threads para não bloquear o event loop.
+    """
+    now = now or datetime.now(UTC)
+    claimed = await asyncio.to_thread(_claim_due_messages, session_factory, now, BATCH_SIZE)
+    if not claimed:
+        return {"sent": 0, "retrying": 0, "failed": 0}
+
+    outcomes = await asyncio.gather(*(client.post_text(payload, instance) for _, instance, payload in claimed))
+    results = {message_id: outcome for (message_id, _, _), outcome in zip(claimed, outcomes)}
+    summary = await asyncio.to_thread(_record_results, session_factory, results, now)
+    logger.info(f"Fila de reenvio WhatsApp: {summary}")
+    return summary
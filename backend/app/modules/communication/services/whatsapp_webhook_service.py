@@ -0,0 +1,267 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.modules.communication.services.evolution_client import evolution_client
+from app.modules.core.models import Lodge
+from app.modules.members.models import Member
+from app.modules.sessions.models import MasonicSession, SessionAttendance
+from app.shared.tenant_context import TenantContextManager
+from app.modules.members.services.member_service import get_member_id_by_phone
+from app.shared.utils.validators import normalize_phone
+from database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+AGENDA_PATTERN = re.compile(r"^#\s*AGENDA")
+VOU_PATTERN = re.compile(r"^#\s*VOU\s*(?:\+\s*(\d+))?")
+
+QUEUE_MAX_SIZE = 1000
+WORKER_COUNT = 4
+
+
+def _group_key(group_id: str) -> str:
+    return group_id.strip().removesuffix("@g.us")
+
+
+class WhatsAppLookupCache:
+    """
+    Mapas em memória usados pelo webhook: grupo (JID) -> loja e telefone E.164 -> obreiro.
+    O de grupos é carregado inteiro; o de telefones memoriza cada busca exata no índice
+    de phone_normalized. Ambos são invalidados no commit de alterações relevantes e,
+    por segurança (escritas fora do ORM), descartados após ttl_seconds.
+    """
+
+    def __init__(self, ttl_seconds: float = 600.0):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._groups: Optional[dict[str, int]] = None
+        self._phones: Optional[dict[str, Optional[int]]] = None
+        self._groups_loaded_at = 0.0
+        self._phones_loaded_at = 0.0
+
+    def _expired(self, loaded_at: float) -> bool:
+        return time.monotonic() - loaded_at > self.ttl_seconds
+
+    def lodge_for_group(self, db: Session, remote_jid: str) -> Optional[int]:
+        with self._lock:
+            if self._groups is None or self._expired(self._groups_loaded_at):
+                rows = db.query(Lodge.id, Lodge.whatsapp_group_id).filter(Lodge.whatsapp_group_id.isnot(None))
+                self._groups = {_group_key(group_id): lodge_id for lodge_id, group_id in rows if group_id}
+                self._groups_loaded_at = time.monotonic()
+            return self._groups.get(_group_key(remote_jid))
+
+    def member_for_phone(self, db: Session, phone: str) -> Optional[int]:
+        key = normalize_phone(phone)
+        if not key:
+            return None
+        with self._lock:
+            if self._phones is None or self._expired(self._phones_loaded_at):
+                self._phones = {}
+                self._phones_loaded_at = time.monotonic()
+            if key not in self._phones:
+                # Números desconhecidos também são memorizados (None) até a próxima invalidação
+                self._phones[key] = get_member_id_by_phone(db, key)
+            return self._phones[key]
+
+    def invalidate(self, groups: bool = True, phones: bool = True) -> None:
+        with self._lock:
+            if groups:
+                self._groups = None
+            if phones:
+                self._phones = None
+
+
+lookup_cache = WhatsAppLookupCache()
+
+
+def parse_command(payload: dict) -> Optional[dict]:
+    """
+    Extrai do webhook um comando (#AGENDA / #VOU) enviado em grupo. Sem acesso ao banco:
+    roda no próprio request, que só enfileira. Retorna None se a mensagem deve ser ignorada.
+    """
+    if not isinstance(payload, dict) or payload.get("event") != "messages.upsert":
+        return None
+
+    data = payload.get("data", {})
+    message = data.get("message", {})
+    key = data.get("key", {})
+
+    remote_jid = key.get("remoteJid", "")
+    participant = key.get("participant", "")
+    if not remote_jid.endswith("@g.us") or not participant:
+        return None
+
+    text = message.get("conversation") or message.get("extendedTextMessage", {}).get("text", "")
+    text_upper = text.upper().strip()
+
+    vou_match = VOU_PATTERN.search(text_upper)
+    if AGENDA_PATTERN.search(text_upper):
+        action, guests = "agenda", 0
+    elif vou_match:
+        action, guests = "presence", int(vou_match.group(1) or 0)
+    else:
+        return None
+
+    return {
+        "action": action,
+        "guests_count": guests,
+        "remote_jid": remote_jid,
+        "participant": participant,
+        "message_id": key.get("id"),
+    }
+
+
+def build_reply(command: dict) -> Optional[dict]:
+    """Executa o comando no banco (em thread, sessão própria) e devolve a resposta a enviar."""
+    from app.modules.sessions.services.session_service import get_presence_forecast
+
+    db = SessionLocal()
+    try:
+        lodge_id = lookup_cache.lodge_for_group(db, command["remote_jid"])
+        if not lodge_id:
+            logger.warning(f"Mensagem recebida do grupo {command['remote_jid']}, mas não está vinculado a nenhuma Loja.")
+            return None
+
+        # Ativa o contexto Multi-tenant para a Loja atual
+        TenantContextManager.set_lodge_id(lodge_id)
+
+        next_session = db.query(MasonicSession).filter(
+            MasonicSession.lodge_id == lodge_id,
+            MasonicSession.session_date >= date.today()
+        ).order_by(MasonicSession.session_date.asc()).first()
+        if not next_session:
+            return None
+        session_date_str = next_session.session_date.strftime('%d/%m/%Y')
+
+        if command["action"] == "agenda":
+            forecast = get_presence_forecast(db, next_session.id)
+            text = (
+                f"📊 *Previsão para o Jantar* (Sessão de {session_date_str}):\n\n"
+                f"🤵 Maçons confirmados: {forecast['confirmed_members'] + forecast['confirmed_visitors']}\n"
+                f"👨‍👩‍👧 Acompanhantes: {forecast['confirmed_guests']}\n"
+                f"Total esperado: *{forecast['total_expected']} pessoas*"
+            )
+            return {"text": text, "mentions": None}
+
+        sender_phone_full = command["participant"].split("@")[0]  # ex: 5511999999999
+        guests_count = command["guests_count"]
+        member_id = lookup_cache.member_for_phone(db, sender_phone_full)
+        if member_id:
+            # Upsert na tabela de presenças
+            attendance = db.query(SessionAttendance).filter(
+                SessionAttendance.session_id == next_session.id,
+                SessionAttendance.member_id == member_id
+            ).first()
+            if attendance:
+                attendance.attendance_status = "Confirmado"
+                attendance.guests_count = guests_count
+            else:
+                db.add(SessionAttendance(
+                    session_id=next_session.id,
+                    member_id=member_id,
+                    attendance_status="Confirmado",
+                    guests_count=guests_count
+                ))
+            db.commit()
+
+        guest_text = f" com {guests_count} acompanhante(s)" if guests_count > 0 else ""
+        text = f"@{sender_phone_full} confirmando o registro da sua participação{guest_text} na próxima sessão ({session_date_str})! ✅"
+        return {"text": text, "mentions": [command["participant"]]}
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        TenantContextManager.set_lodge_id(None)
+        db.close()
+
+
+# --- Fila de processamento ---
+# O webhook só valida e enfileira; os workers consultam o banco em threads e respondem no grupo.
+
+_queue: Optional[asyncio.Queue] = None
+_workers: list[asyncio.Task] = []
+
+
+async def _worker():
+    while True:
+        command = await _queue.get()
+        try:
+            reply = await asyncio.to_thread(build_reply, command)
+            if reply:
+                await evolution_client.reply_message(
+                    remote_jid=command["remote_jid"],
+                    text=reply["text"],
+                    message_id=command["message_id"],
+                    mentions=reply["mentions"],
+                )
+        except Exception as e:
+            logger.error(f"Erro processando mensagem do WhatsApp: {e}", exc_info=True)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers() -> asyncio.Queue:
+    global _queue
+    if _queue is None:
+        _queue = asyncio.Queue(maxsize=QUEUE_MAX_SIZE)
+    if not _workers:
+        _workers.extend(asyncio.create_task(_worker()) for _ in range(WORKER_COUNT))
+    return _queue
+
+
+def enqueue_command(command: dict) -> bool:
+    """Enfileira o comando para os workers. Retorna False se a fila estiver cheia."""
+    try:
+        _ensure_workers().put_nowait(command)
+        return True
+    except asyncio.QueueFull:
+        logger.warning(f"Fila do webhook WhatsApp cheia; comando descartado ({command['remote_jid']}).")
+        return False
+
+
+async def stop_workers() -> None:
+    """Encerra os workers (desligamento da aplicação)."""
+    global _queue
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+    _queue = None
+
+
+# --- Invalidação automática dos mapas ---
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_lookup_changes(session, flush_context):
+    pending = session.info.setdefault("whatsapp_lookup_invalidations", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Lodge) and (obj not in session.dirty or inspect(obj).attrs.whatsapp_group_id.history.has_changes()):
+            pending.add("groups")
+        elif isinstance(obj, Member) and (obj not in session.dirty or inspect(obj).attrs.phone_normalized.history.has_changes()):
+            pending.add("phones")
+
+
+def mark_phone_lookup_stale(session: Session) -> None:
+    """Agenda a invalidação dos telefones para o commit (escritas bulk/Core não passam pelo after_flush)."""
+    session.info.setdefault("whatsapp_lookup_invalidations", set()).add("phones")
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_lookup_invalidations(session):
+    pending = session.info.pop("whatsapp_lookup_invalidations", None)
+    if pending:
+        lookup_cache.invalidate(groups="groups" in pending, phones="phones" in pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_lookup_invalidations(session):
+    session.info.pop("whatsapp_lookup_invalidations", None)
@@ -10,6 +10,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Time,
@@ -17,9 +18,11 @@ from sqlalchemy import (
     Text,
 )
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from app.shared.base_model import BaseModel, RiteEnum
+from database import Base
+from app.shared.utils.validators import normalize_search_text
 
 
 class ObedienceTypeEnum(enum.StrEnum):
@@ -33,7 +36,7 @@ class Obedience(BaseModel):
     name = Column(String(255), unique=True, nullable=False)
     acronym = Column(String(50), unique=True, nullable=True)
     type = Column(SQLAlchemyEnum(ObedienceTypeEnum, values_callable=lambda x: [e.value for e in x]), nullable=False)
-    parent_obedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=True)
+    parent_obedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=True, index=True)
     cnpj = Column(String(18), unique=True, nullable=True)
     email = Column(String(255), nullable=True)
     phone = Column(String(20), nullable=True)
@@ -72,12 +75,13 @@ class Lodge(BaseModel):
     lodge_title = Column(String(50), nullable=True, default="ARLS")
     lodge_code = Column(String(36), unique=True, index=True, nullable=False)
     lodge_number = Column(String(255))
+    search_name = Column(String(300), nullable=True, comment="Nome e número normalizados para busca, mantidos a partir deles")
     foundation_date = Column(Date, nullable=True)
     rite = Column(
         SQLAlchemyEnum(RiteEnum, values_callable=lambda x: [e.value for e in x]), nullable=True, default=RiteEnum.REAA
     )
-    obedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=False)
-    subobedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=True)
+    obedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=False, index=True)
+    subobedience_id = Column(Integer, ForeignKey("obediences.id"), nullable=True, index=True)
     cnpj = Column(String(18), unique=True, nullable=True)
     email = Column(String(255), nullable=True)
     phone = Column(String(20), nullable=True)
@@ -152,8 +156,34 @@ class Lodge(BaseModel):
         CheckConstraint("latitude >= -90 AND latitude <= 90", name="chk_lodge_latitude"),
         CheckConstraint("longitude >= -180 AND longitude <= 180", name="chk_lodge_longitude"),
         CheckConstraint("user_limit > 0", name="chk_lodge_user_limit"),
+        Index(
+            "ix_lodges_search_name_trgm",
+            "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        ),
     )
 
+    @validates("lodge_name", "lodge_number")
+    def _sync_search_name(self, key, value):
+        name = value if key == "lodge_name" else self.lodge_name
+        number = value if key == "lodge_number" else self.lodge_number
+        self.search_name = normalize_search_text(" ".join(part for part in (name, number) if part))
+        return value
+
+
+class ObedienceLodgeClosure(Base):
+    """
+    Fecho transitivo obediência -> loja: uma linha para cada obediência e cada loja subordinada a ela,
+    direta ou indiretamente (via subobediências), com a distância em níveis. Para relatórios por obediência.
+    Mantido por app/modules/core/services/obedience_hierarchy_service.py; nunca editar diretamente.
+    """
+
+    __tablename__ = "obedience_lodge_closure"
+    obedience_id = Column(Integer, ForeignKey("obediences.id", ondelete="CASCADE"), primary_key=True)
+    lodge_id = Column(Integer, ForeignKey("lodges.id", ondelete="CASCADE"), primary_key=True, index=True)
+    depth = Column(Integer, nullable=False, comment="0 = loja ligada diretamente à obediência")
+
 
 class Administration(BaseModel):
     __tablename__ = "administrations"
@@ -1,10 +1,12 @@
 import calendar
-from datetime import date, datetime, timedelta
+from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, or_
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 
+from app.modules.core.services import dashboard_service
+from app.modules.members.services import anniversary_service, member_service
 from database import get_db
 from dependencies import get_current_user_payload
 from models import models
@@ -19,287 +21,7 @@ def get_dashboard_stats(db: Session = Depends(get_db), payload: dict = Depends(g
     if not lodge_id:
         raise HTTPException(status_code=400, detail="User is not associated with any lodge context")
 
-    today = date.today()
-
-    # 1. Total Active Members
-    total_members = (
-        db.query(models.Member)
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-        )
-        .count()
-    )
-
-    # 2. Next Events (limit 5)
-    next_events = (
-        db.query(models.Event)
-        .filter(models.Event.lodge_id == lodge_id, models.Event.start_time >= datetime.now())
-        .order_by(models.Event.start_time)
-        .limit(5)
-        .all()
-    )
-
-    # 3. Upcoming Birthdays & Anniversaries (Next 30 days)
-    active_member_dates = (
-        db.query(
-            models.Member.full_name,
-            models.Member.birth_date,
-            models.Member.marriage_date,
-            models.Member.initiation_data,
-            models.Member.elevation_data,
-            models.Member.exaltation_data,
-        )
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-        )
-        .all()
-    )
-
-    active_family_dates = (
-        db.query(
-            models.FamilyMember.full_name,
-            models.FamilyMember.birth_date,
-            models.FamilyMember.relationship_type,
-            models.Member.full_name.label("member_name"),
-        )
-        .join(models.Member)
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-            models.FamilyMember.is_deceased == False
-        )
-        .all()
-    )
-
-    upcoming_birthdays = []
-    limit_date = today + timedelta(days=30)
-
-    def get_next_occurrence(date_obj, reference_date):
-        if not date_obj:
-            return None
-        try:
-            this_year = date_obj.replace(year=reference_date.year)
-        except ValueError:
-            this_year = date_obj.replace(year=reference_date.year, day=28)
-
-        if this_year < reference_date:
-            try:
-                this_year = date_obj.replace(year=reference_date.year + 1)
-            except ValueError:
-                this_year = date_obj.replace(year=reference_date.year + 1, day=28)
-        return this_year
-
-    for m in active_member_dates:
-        # Member Birthday
-        bday = get_next_occurrence(m.birth_date, today)
-        if bday and today <= bday <= limit_date:
-            upcoming_birthdays.append({"name": f"Ir. {m.full_name}", "date": bday, "type": "aniversario"})
-
-        # Wedding Anniversary
-        wedding_day = get_next_occurrence(m.marriage_date, today)
-        if wedding_day and today <= wedding_day <= limit_date:
-            upcoming_birthdays.append({"name": f"Ir. {m.full_name}", "date": wedding_day, "type": "casamento"})
-
-        # Masonic Anniversaries
-        initiation = get_next_occurrence(extract_masonic_date(m.initiation_data), today)
-        if initiation and today <= initiation <= limit_date:
-            upcoming_birthdays.append({"name": f"Ir. {m.full_name}", "date": initiation, "type": "iniciacao"})
-
-        elevation = get_next_occurrence(extract_masonic_date(m.elevation_data), today)
-        if elevation and today <= elevation <= limit_date:
-            upcoming_birthdays.append({"name": f"Ir. {m.full_name}", "date": elevation, "type": "elevacao"})
-
-        exaltation = get_next_occurrence(extract_masonic_date(m.exaltation_data), today)
-        if exaltation and today <= exaltation <= limit_date:
-            upcoming_birthdays.append({"name": f"Ir. {m.full_name}", "date": exaltation, "type": "exaltacao"})
-
-    # Family Birthdays
-    for fm in active_family_dates:
-        fm_bday = get_next_occurrence(fm.birth_date, today)
-        if fm_bday and today <= fm_bday <= limit_date:
-            rel_type = fm.relationship_type.value if hasattr(fm.relationship_type, "value") else str(fm.relationship_type)
-            upcoming_birthdays.append(
-                {
-                    "name": f"{fm.full_name} ({rel_type} do Ir. {fm.member_name})",
-                    "date": fm_bday,
-                    "type": "aniversario_familiar",
-                }
-            )
-
-    upcoming_birthdays.sort(key=lambda x: x["date"])
-
-    # 4. Notices (Active)
-    active_notices_query = (
-        db.query(models.Notice)
-        .filter(
-            models.Notice.lodge_id == lodge_id,
-            models.Notice.is_active,
-            or_(models.Notice.expiration_date is None, models.Notice.expiration_date >= today),
-        )
-        .order_by(models.Notice.created_at.desc())
-    )  # Order by most recent
-
-    active_notices_count = active_notices_query.count()
-    active_notices_list = active_notices_query.limit(5).all()
-
-    active_notices_data = []
-    for n in active_notices_list:
-        active_notices_data.append(
-            {
-                "id": n.id,
-                "title": n.title,
-                "content": n.content,
-                "date_posted": n.created_at,
-                "expiration_date": n.expiration_date,
-                "lodge_id": n.lodge_id,
-            }
-        )
-
-    # 5. Next Session
-    next_session = (
-        db.query(models.MasonicSession)
-        .filter(
-            models.MasonicSession.lodge_id == lodge_id,
-            models.MasonicSession.session_date >= today,
-            models.MasonicSession.status != "CANCELADA",
-        )
-        .order_by(models.MasonicSession.session_date)
-        .first()
-    )
-
-    # 6. Classifieds Count
-    classifieds_count = (
-        db.query(models.Classified)
-        .filter(models.Classified.lodge_id == lodge_id, models.Classified.status == "Ativo")
-        .count()
-    )
-
-    # 7. Dining Scale (Next ones)
-    dining_scale_records = (
-        db.query(models.DiningScale)
-        .join(models.Member)
-        .filter(models.DiningScale.lodge_id == lodge_id, models.DiningScale.date >= today)
-        .order_by(models.DiningScale.date)
-        .limit(5)
-        .all()
-    )
-
-    dining_scale = []
-    for ds in dining_scale_records:
-        dining_scale.append({"position": ds.position, "name": ds.member.full_name, "date": ds.date})
-
-    # 8. Lodge Members Stats (Optimized Widget)
-    degree_counts = (
-        db.query(
-            models.Member.degree,
-            models.Member.is_installed,
-            func.count(models.Member.id)
-        )
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-        )
-        .group_by(models.Member.degree, models.Member.is_installed)
-        .all()
-    )
-
-    ms_apprentices = 0
-    ms_fellows = 0
-    ms_masters = 0
-    total_active_members = 0
-
-    for degree, is_installed, count in degree_counts:
-        total_active_members += count
-        if degree == 1:
-            ms_apprentices += count
-        elif degree == 2:
-            ms_fellows += count
-        elif degree and degree >= 3:
-            ms_masters += count
-
-    lodge_members_stats = {
-        "total": total_active_members,
-        "masters": ms_masters,
-        "fellows": ms_fellows,
-        "apprentices": ms_apprentices,
-    }
-
-    # 9. Lodge Info (For "Minha Loja" Widget)
-    lodge = db.query(models.Lodge).filter(models.Lodge.id == lodge_id).first()
-
-    lodge_info = {}
-    if lodge:
-        # Determine Potência and Subpotência
-        # Logic: If obedience has a parent, Parent is Potência, Obedience is Jurisdicionada (Subpotência).
-        # If no parent, Obedience is Potência.
-
-        potencia = ""
-        subpotencia = ""
-
-        if lodge.obedience:
-            potencia = lodge.obedience.name
-
-        if hasattr(lodge, "subobedience") and lodge.subobedience:
-            subpotencia = lodge.subobedience.name
-
-        # Format Session Day/Time
-        session_day_str = lodge.session_day.value if hasattr(lodge.session_day, "value") else str(lodge.session_day)
-        session_time_str = lodge.session_time.strftime("%H:%M") if lodge.session_time else ""
-
-        # Rite value
-        rite_str = lodge.rite.value if hasattr(lodge.rite, "value") else str(lodge.rite)
-
-        # Address Composite
-        address_parts = []
-        if lodge.street_address:
-            address_parts.append(lodge.street_address)
-        if lodge.street_number:
-            address_parts.append(lodge.street_number)
-        if lodge.neighborhood:
-            address_parts.append(lodge.neighborhood)
-        if lodge.city:
-            address_parts.append(lodge.city)
-        if lodge.state:
-            address_parts.append(lodge.state)
-        if lodge.zip_code:
-            address_parts.append(f"CEP {lodge.zip_code}")
-
-        full_address = ", ".join(filter(None, address_parts))
-
-        lodge_info = {
-            "name": lodge.lodge_name,
-            "number": lodge.lodge_number,
-            "rite": rite_str,
-            "session_day": session_day_str,
-            "session_time": session_time_str,
-            "potencia": potencia,
-            "subpotencia": subpotencia,
-            "foundation_date": lodge.foundation_date.strftime("%d/%m/%Y") if lodge.foundation_date else "",
-            "address": full_address,
-            "email": lodge.email,
-            "cnpj": lodge.cnpj,
-            "id": lodge.id,
-            "logo_url": f"{lodge.logo_path}" if lodge.logo_path else None,
-        }
-
-    return {
-        "total_members": total_members,
-        "next_events": next_events,
-        "upcoming_birthdays": upcoming_birthdays[:5],  # Limit to 5
-        "active_notices_count": active_notices_count,
-        "active_notices": active_notices_data,
-        "next_session": next_session,
-        "classifieds_count": classifieds_count,
-        "dining_scale": dining_scale,
-        "lodge_members_stats": lodge_members_stats,
-        "lodge_info": lodge_info,
-    }
+    return dashboard_service.get_dashboard_snapshot(db, lodge_id)
 
 
 @router.get("/calendar")
@@ -331,40 +53,8 @@ def get_calendar_events(
         .all()
     )
 
-    # 3. Birthdays and Masonic Dates (Initiation, Elevation, Exaltation)
-    active_member_dates = (
-        db.query(
-            models.Member.full_name,
-            models.Member.birth_date,
-            models.Member.marriage_date,
-            models.Member.initiation_data,
-            models.Member.elevation_data,
-            models.Member.exaltation_data,
-        )
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-        )
-        .all()
-    )
-
-    active_family_dates = (
-        db.query(
-            models.FamilyMember.full_name,
-            models.FamilyMember.birth_date,
-            models.FamilyMember.relationship_type,
-            models.Member.full_name.label("member_name"),
-        )
-        .join(models.Member)
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
-            models.FamilyMember.is_deceased == False
-        )
-        .all()
-    )
+    # 3. Birthdays and Masonic Dates (Initiation, Elevation, Exaltation) - via anniversary index
+    anniversaries = anniversary_service.get_anniversaries_for_month(db, lodge_id, year, month)
 
     calendar_events = []
 
@@ -380,99 +70,9 @@ def get_calendar_events(
             {"date": e.start_time.day, "title": e.title, "type": "evento", "full_date": e.start_time.date()}
         )
 
-    # Map Member Dates
-    for m in active_member_dates:
-        # Birthday
-        if m.birth_date and m.birth_date.month == month:
-            day = m.birth_date.day
-            try:
-                event_date = date(year, month, day)
-                calendar_events.append(
-                    {
-                        "date": day,
-                        "title": f"Ir. {m.full_name}",
-                        "type": "aniversario",
-                        "full_date": event_date,
-                    }
-                )
-            except ValueError:
-                if month == 2 and day == 29:
-                    calendar_events.append(
-                        {
-                            "date": 28,
-                            "title": f"Ir. {m.full_name}",
-                            "type": "aniversario",
-                            "full_date": date(year, month, 28),
-                        }
-                    )
-
-        # Wedding Anniversary
-        if m.marriage_date and m.marriage_date.month == month:
-            day = m.marriage_date.day
-            try:
-                event_date = date(year, month, day)
-                calendar_events.append(
-                    {"date": day, "title": f"Ir. {m.full_name}", "type": "casamento", "full_date": event_date}
-                )
-            except ValueError:
-                if month == 2 and day == 29:
-                    calendar_events.append(
-                        {
-                            "date": 28,
-                            "title": f"Ir. {m.full_name}",
-                            "type": "casamento",
-                            "full_date": date(year, month, 28),
-                        }
-                    )
-
-        # Masonic Birthdays (Initiation, Elevation, Exaltation)
-        initiation_dt = extract_masonic_date(m.initiation_data)
-        if initiation_dt and initiation_dt.month == month:
-            calendar_events.append(
-                {
-                    "date": initiation_dt.day,
-                    "title": f"Ir. {m.full_name}",
-                    "type": "iniciacao",
-                    "full_date": date(year, month, initiation_dt.day),
-                }
-            )
-
-        elevation_dt = extract_masonic_date(m.elevation_data)
-        if elevation_dt and elevation_dt.month == month:
-            calendar_events.append(
-                {
-                    "date": elevation_dt.day,
-                    "title": f"Ir. {m.full_name}",
-                    "type": "elevacao",
-                    "full_date": date(year, month, elevation_dt.day),
-                }
-            )
-
-        exaltation_dt = extract_masonic_date(m.exaltation_data)
-        if exaltation_dt and exaltation_dt.month == month:
-            calendar_events.append(
-                {
-                    "date": exaltation_dt.day,
-                    "title": f"Ir. {m.full_name}",
-                    "type": "exaltacao",
-                    "full_date": date(year, month, exaltation_dt.day),
-                }
-            )
-
-    # Family Birthdays
-    for fm in active_family_dates:
-        if fm.birth_date and fm.birth_date.month == month:
-            rel_type = (
-                fm.relationship_type.value if hasattr(fm.relationship_type, "value") else str(fm.relationship_type)
-            )
-            calendar_events.append(
-                {
-                    "date": fm.birth_date.day,
-                    "title": f"{fm.full_name} ({rel_type} do Ir. {fm.member_name})",
-                    "type": "aniversario_familiar",
-                    "full_date": date(year, month, fm.birth_date.day),
-                }
-            )
+    # Map Member and Family Dates
+    for a in anniversaries:
+        calendar_events.append({"date": a["date"].day, "title": a["title"], "type": a["type"], "full_date": a["date"]})
 
     # Sort by date
     calendar_events.sort(key=lambda x: x["date"])
@@ -480,51 +80,54 @@ def get_calendar_events(
     return calendar_events
 
 @router.get("/members")
-def get_lodge_members(db: Session = Depends(get_db), payload: dict = Depends(get_current_user_payload)):
+def get_lodge_members(
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=200),
+    cursor: str | None = None,
+    db: Session = Depends(get_db),
+    payload: dict = Depends(get_current_user_payload),
+):
+    """
+    Obreiros ativos da loja, em ordem alfabética. Com `limit`, pagina por cursor: o cursor da
+    próxima página vem no cabeçalho X-Next-Cursor (o corpo continua sendo a lista).
+    """
     lodge_id = payload.get("lodge_id")
 
     if not lodge_id:
         raise HTTPException(status_code=400, detail="User is not associated with any lodge context")
 
-    active_members = (
-        db.query(models.Member)
-        .join(models.MemberLodgeAssociation)
-        .filter(
-            models.MemberLodgeAssociation.lodge_id == lodge_id,
-            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
+    fields = ["id", "full_name", "cim", "email", "phone", "profile_picture_path", "degree", "is_installed"]
+    try:
+        rows, next_cursor = member_service.list_members_page(
+            db, cursor=cursor, limit=limit, fields=fields, lodge_id=lodge_id, active_only=True
         )
-        .all()
-    )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
     members_list_data = []
-
-    for m in active_members:
-        # Count degrees
-        deg_val = m.degree
-        
+    for m in rows:
+        deg_val = m["degree"]
         if deg_val == 1:
             deg_str = "Aprendiz"
         elif deg_val == 2:
             deg_str = "Companheiro"
         elif deg_val and deg_val >= 3:
-            deg_str = "Mestre Instalado" if getattr(m, 'is_installed', False) else "Mestre"
+            deg_str = "Mestre Instalado" if m["is_installed"] else "Mestre"
         else:
             deg_str = "Desconhecido"
 
-        # Prepare list item
         members_list_data.append(
             {
-                "id": m.id,
-                "full_name": m.full_name,
-                "cim": m.cim,
-                "email": m.email,
-                "phone": m.phone,
-                "profile_picture_path": m.profile_picture_path,
+                "id": m["id"],
+                "full_name": m["full_name"],
+                "cim": m["cim"],
+                "email": m["email"],
+                "phone": m["phone"],
+                "profile_picture_path": m["profile_picture_path"],
                 "degree": deg_str,
             }
         )
 
-    # Sort members list alphabetically
-    members_list_data.sort(key=lambda x: x["full_name"])
-
     return members_list_data
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import or_
 from sqlalchemy.orm import Session
 
 from app.modules.core.schemas.external_lodge_schema import ExternalLodgeResponse
+from app.modules.core.services import search_service
+from app.shared.utils.validators import normalize_search_text
 from database import get_db
 from models.models import Lodge
 
@@ -21,11 +22,14 @@ def search_external_lodges(
     Busca lojas na base de dados principal (Sigma DB).
     Retorna lojas ativas e inativas para fins de cadastro de visitante.
     """
-    search_term = f"%{query}%"
+    term = normalize_search_text(query)
+    if not term:
+        return []
 
     lodges = (
         db.query(Lodge)
-        .filter(or_(Lodge.lodge_name.ilike(search_term), Lodge.lodge_number.ilike(search_term)))
+        .filter(search_service.text_match(db, Lodge.search_name, term))
+        .order_by(search_service.text_rank(db, Lodge.search_name, term).desc(), Lodge.lodge_name)
         .limit(20)
         .all()
     )
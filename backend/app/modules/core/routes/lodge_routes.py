@@ -295,36 +295,9 @@ def confirm_lodge_import(
     db: Session = Depends(database.get_db),
     current_user: dict = Depends(dependencies.get_current_super_admin),
 ):
-    saved_count = 0
-    from app.modules.core.models import Obedience
-    all_obediences = db.query(Obedience).all()
-    potency_map = {o.acronym.lower(): o.id for o in all_obediences if o.acronym and not o.parent_obedience_id}
-    subpotency_map = {o.acronym.lower(): o.id for o in all_obediences if o.acronym and o.parent_obedience_id}
-    
-    for row in request_data.rows:
-        if not row.is_valid:
-            continue
-            
-        potency_id = potency_map.get(row.potency_acronym.lower()) if row.potency_acronym else None
-        subpotency_id = subpotency_map.get(row.subpotency_acronym.lower()) if row.subpotency_acronym else None
-        
-        lodge_create = lodge_schema.LodgeCreate(
-            lodge_name=row.name,
-            lodge_number=row.number,
-            obedience_id=potency_id,
-            subobedience_id=subpotency_id,
-            cnpj=row.cnpj,
-            technical_contact_email=row.technical_contact_email,
-            technical_contact_name=row.technical_contact_name,
-        )
-        try:
-            lodge_service.create_lodge(db=db, lodge=lodge_create)
-            saved_count += 1
-        except Exception as e:
-            print(f"Erro ao salvar loja {row.name}: {e}")
-            pass
-            
-    return {"message": f"{saved_count} lojas importadas com sucesso.", "imported_count": saved_count}
+    counts = lodge_service.import_lodges(db, request_data.rows)
+    saved_count = counts["created"] + counts["updated"]
+    return {"message": f"{saved_count} lojas importadas com sucesso.", "imported_count": saved_count, **counts}
 
 
 @router.post("/{lodge_id}/upload_asset", summary="Upload de Asset Genérico da Loja")
@@ -498,36 +471,9 @@ def confirm_lodge_import(
     db: Session = Depends(database.get_db),
     current_user: dict = Depends(dependencies.get_current_super_admin),
 ):
-    saved_count = 0
-    from app.modules.core.models import Obedience
-    all_obediences = db.query(Obedience).all()
-    potency_map = {o.acronym.lower(): o.id for o in all_obediences if o.acronym and not o.parent_obedience_id}
-    subpotency_map = {o.acronym.lower(): o.id for o in all_obediences if o.acronym and o.parent_obedience_id}
-    
-    for row in request_data.rows:
-        if not row.is_valid:
-            continue
-            
-        potency_id = potency_map.get(row.potency_acronym.lower()) if row.potency_acronym else None
-        subpotency_id = subpotency_map.get(row.subpotency_acronym.lower()) if row.subpotency_acronym else None
-        
-        lodge_create = lodge_schema.LodgeCreate(
-            lodge_name=row.name,
-            lodge_number=row.number,
-            obedience_id=potency_id,
-            subobedience_id=subpotency_id,
-            cnpj=row.cnpj,
-            technical_contact_email=row.technical_contact_email,
-            technical_contact_name=row.technical_contact_name,
-        )
-        try:
-            lodge_service.create_lodge(db=db, lodge=lodge_create)
-            saved_count += 1
-        except Exception as e:
-            print(f"Error creating lodge {row.name}: {e}")
-            
-    db.commit()
-    return {"message": "Importação concluída.", "saved_count": saved_count}
+    counts = lodge_service.import_lodges(db, request_data.rows)
+    saved_count = counts["created"] + counts["updated"]
+    return {"message": "Importação concluída.", "saved_count": saved_count, **counts}
 
 @router.post("/{lodge_id}/logo", summary="Upload do Logo da Loja")
 def upload_lodge_logo(
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.modules.core.schemas.search_schema import SearchResult
+from app.modules.core.services import search_service
+from database import get_db
+from dependencies import get_tenant_user_payload
+from app.shared.tenant_context import TenantContextManager
+
+router = APIRouter(prefix="/search", tags=["Busca"])
+
+
+@router.get(
+    "",
+    response_model=list[SearchResult],
+    summary="Busca global",
+    description=(
+        "Busca por nome (sem distinção de acentos ou maiúsculas) ou CIM em obreiros, lojas e visitantes, "
+        "restrita ao escopo do usuário e ordenada por relevância."
+    ),
+)
+def search(
+    q: str = Query(..., min_length=search_service.MIN_TERM_LENGTH, max_length=100, description="Termo de busca"),
+    types: list[str] | None = Query(None, description=f"Tipos: {', '.join(search_service.SEARCH_TYPES)}"),
+    limit: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_tenant_user_payload),
+):
+    # Aceita tanto ?types=member&types=lodge quanto ?types=member,lodge
+    selected = [item.strip() for value in types or [] for item in value.split(",") if item.strip()]
+    invalid = sorted(set(selected) - set(search_service.SEARCH_TYPES))
+    if invalid:
+        raise HTTPException(status_code=422, detail=f"Tipos de busca inválidos: {', '.join(invalid)}")
+
+    # Escopo do tenant do token; None = super admin, sem restrição
+    lodge_ids = TenantContextManager.get_accessible_lodges(db)
+    if lodge_ids is None and current_user.get("user_type") != "super_admin":
+        raise HTTPException(status_code=403, detail="Usuário não associado a um contexto de loja.")
+    return search_service.search(db, q, types=selected or None, lodge_ids=lodge_ids, limit=limit)
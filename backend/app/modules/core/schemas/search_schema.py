@@ -0,0 +1,11 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SearchResult(BaseModel):
+    type: Literal["member", "lodge", "external_lodge", "visitor"]
+    id: int
+    title: str
+    subtitle: str | None = None
+    score: float
@@ -2,6 +2,8 @@ from fastapi import HTTPException
 from sqlalchemy.orm import Session, joinedload
 
 from app.modules.core.schemas import administration_schema
+from app.shared.security.cache import user_context_cache
+from app.shared.security.constants import UserTypeEnum
 from models import models
 
 
@@ -70,6 +72,7 @@ def create_administration(
             _create_officer_entry(db, db_admin, officer.role_id, officer.member_id, lodge_id)
 
     db.commit()
+    _invalidate_officers([officer.member_id for officer in data.officers or []])
     db.refresh(db_admin)
     return db_admin
 
@@ -105,20 +108,26 @@ def update_administration(
         db_admin.is_current = data.is_current
 
     # 3. Handle Officers Update (Full Replacement Strategy for simplicity)
+    affected_members = []
     if data.officers is not None:
         # Remove existing officers for this administration
         # Note: This deletes the history record. If we wanted to keep "audit", we might soft delete or handle differently.
         # But for "Definition of Execution", replacement makes sense.
+        previous_officers = db.query(models.RoleHistory.member_id).filter(models.RoleHistory.administration_id == admin_id)
+        # Outgoing officers lose their role, so their cached context is stale
+        affected_members = [member_id for (member_id,) in previous_officers]
         db.query(models.RoleHistory).filter(models.RoleHistory.administration_id == admin_id).delete()
 
         # Add new ones
         for officer in data.officers:
             _create_officer_entry(db, db_admin, officer.role_id, officer.member_id, lodge_id)
+            affected_members.append(officer.member_id)
 
         # Optional: Ask user if they want to update dates of existing records?
         # For now, we assume the RoleHistory record matches the Admin dates exactly.
 
     db.commit()
+    _invalidate_officers(affected_members)
     db.refresh(db_admin)
     return db_admin
 
@@ -147,3 +156,9 @@ def _create_officer_entry(db: Session, admin: models.Administration, role_id: in
         end_date=admin.end_date,
     )
     db.add(new_role_history)
+
+
+def _invalidate_officers(member_ids: list[int]):
+    # Only after the commit: a request reading in between would cache the old board again
+    for member_id in set(member_ids):
+        user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
@@ -0,0 +1,267 @@
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import event, func, inspect, or_, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.modules.members.services import anniversary_service
+from app.shared.security.cache import TTLCache
+from models import models
+
+# Snapshot do dashboard por loja. TTL curto: o dashboard é aberto por todos os obreiros
+# minutos antes das sessões, e as escritas relevantes invalidam a entrada da loja no commit.
+dashboard_cache = TTLCache(max_size=512, ttl_seconds=60.0)
+
+ANNIVERSARY_WINDOW_DAYS = 30
+
+# Modelos com lodge_id cujas escritas alteram algum widget do dashboard daquela loja
+_LODGE_SCOPED_MODELS = (
+    models.Notice,
+    models.Event,
+    models.MasonicSession,
+    models.Classified,
+    models.DiningScale,
+    models.MemberLodgeAssociation,
+)
+# Modelos sem lodge_id direto (o obreiro pode pertencer a várias lojas): invalidam tudo
+_GLOBAL_MODELS = (models.Member, models.FamilyMember, models.MasonicEvent)
+
+_ALL_LODGES = "*"
+
+
+def _row_to_dict(obj) -> Dict[str, Any]:
+    """Converte uma instância ORM em dict com suas colunas (nada de objetos de sessão no cache)."""
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _get_upcoming_anniversaries(db: Session, lodge_id: int, today: date) -> list:
+    """Aniversários civis, de casamento, maçônicos e de familiares: leitura por faixa no índice de aniversários."""
+    limit_date = today + timedelta(days=ANNIVERSARY_WINDOW_DAYS)
+    return [
+        {"name": entry["title"], "date": entry["date"], "type": entry["type"]}
+        for entry in anniversary_service.get_anniversaries_between(db, lodge_id, today, limit_date)
+    ]
+
+
+def _build_lodge_info(lodge) -> Dict[str, Any]:
+    if not lodge:
+        return {}
+
+    # Potência = obediência da loja; Subpotência = obediência jurisdicionada (quando houver)
+    potencia = lodge.obedience.name if lodge.obedience else ""
+    subpotencia = lodge.subobedience.name if lodge.subobedience else ""
+
+    session_day_str = lodge.session_day.value if hasattr(lodge.session_day, "value") else str(lodge.session_day)
+    session_time_str = lodge.session_time.strftime("%H:%M") if lodge.session_time else ""
+    rite_str = lodge.rite.value if hasattr(lodge.rite, "value") else str(lodge.rite)
+
+    address_parts = [
+        lodge.street_address,
+        lodge.street_number,
+        lodge.neighborhood,
+        lodge.city,
+        lodge.state,
+        f"CEP {lodge.zip_code}" if lodge.zip_code else None,
+    ]
+
+    return {
+        "name": lodge.lodge_name,
+        "number": lodge.lodge_number,
+        "rite": rite_str,
+        "session_day": session_day_str,
+        "session_time": session_time_str,
+        "potencia": potencia,
+        "subpotencia": subpotencia,
+        "foundation_date": lodge.foundation_date.strftime("%d/%m/%Y") if lodge.foundation_date else "",
+        "address": ", ".join(filter(None, address_parts)),
+        "email": lodge.email,
+        "cnpj": lodge.cnpj,
+        "id": lodge.id,
+        "logo_url": f"{lodge.logo_path}" if lodge.logo_path else None,
+    }
+
+
+def build_dashboard_snapshot(db: Session, lodge_id: int) -> Dict[str, Any]:
+    """Calcula todos os widgets do dashboard de uma loja (sem cache)."""
+    today = date.today()
+
+    # 1. Obreiros ativos por grau (o total sai da mesma agregação)
+    degree_counts = (
+        db.query(models.Member.degree, func.count(models.Member.id))
+        .join(models.MemberLodgeAssociation)
+        .filter(
+            models.MemberLodgeAssociation.lodge_id == lodge_id,
+            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
+        )
+        .group_by(models.Member.degree)
+        .all()
+    )
+    lodge_members_stats = {"total": 0, "masters": 0, "fellows": 0, "apprentices": 0}
+    for degree, count in degree_counts:
+        lodge_members_stats["total"] += count
+        if degree == 1:
+            lodge_members_stats["apprentices"] += count
+        elif degree == 2:
+            lodge_members_stats["fellows"] += count
+        elif degree and degree >= 3:
+            lodge_members_stats["masters"] += count
+
+    # 2. Próximos eventos
+    next_events = (
+        db.query(models.Event)
+        .filter(models.Event.lodge_id == lodge_id, models.Event.start_time >= datetime.now())
+        .order_by(models.Event.start_time)
+        .limit(5)
+        .all()
+    )
+
+    # 3. Aniversários (próximos 30 dias)
+    upcoming_birthdays = _get_upcoming_anniversaries(db, lodge_id, today)
+
+    # 4. Avisos ativos: total via função de janela, na mesma consulta da listagem
+    active_notices = (
+        db.query(models.Notice, func.count().over().label("total"))
+        .filter(
+            models.Notice.lodge_id == lodge_id,
+            models.Notice.is_active,
+            or_(models.Notice.expiration_date.is_(None), models.Notice.expiration_date >= today),
+        )
+        .order_by(models.Notice.created_at.desc())
+        .limit(5)
+        .all()
+    )
+    active_notices_count = active_notices[0].total if active_notices else 0
+
+    # 5. Próxima sessão
+    next_session = (
+        db.query(models.MasonicSession)
+        .filter(
+            models.MasonicSession.lodge_id == lodge_id,
+            models.MasonicSession.session_date >= today,
+            models.MasonicSession.status != "CANCELADA",
+        )
+        .order_by(models.MasonicSession.session_date)
+        .first()
+    )
+
+    # 6. Escala do ágape, já com o nome do obreiro
+    dining_scale = (
+        db.query(models.DiningScale.position, models.DiningScale.date, models.Member.full_name)
+        .join(models.Member)
+        .filter(models.DiningScale.lodge_id == lodge_id, models.DiningScale.date >= today)
+        .order_by(models.DiningScale.date)
+        .limit(5)
+        .all()
+    )
+
+    # 7. Loja (com obediências) + total de classificados ativos como subconsulta escalar
+    classifieds_count = (
+        select(func.count(models.Classified.id))
+        .where(models.Classified.lodge_id == lodge_id, models.Classified.status == "Ativo")
+        .scalar_subquery()
+    )
+    lodge_row = (
+        db.query(models.Lodge, classifieds_count)
+        .options(joinedload(models.Lodge.obedience), joinedload(models.Lodge.subobedience))
+        .filter(models.Lodge.id == lodge_id)
+        .first()
+    )
+    lodge, classifieds_total = lodge_row if lodge_row else (None, 0)
+
+    return {
+        "total_members": lodge_members_stats["total"],
+        "next_events": [_row_to_dict(e) for e in next_events],
+        "upcoming_birthdays": upcoming_birthdays[:5],
+        "active_notices_count": active_notices_count,
+        "active_notices": [
+            {
+                "id": n.id,
+                "title": n.title,
+                "content": n.content,
+                "date_posted": n.created_at,
+                "expiration_date": n.expiration_date,
+                "lodge_id": n.lodge_id,
+            }
+            for n, _ in active_notices
+        ],
+        "next_session": _row_to_dict(next_session) if next_session else None,
+        "classifieds_count": classifieds_total or 0,
+        "dining_scale": [{"position": ds.position, "name": ds.full_name, "date": ds.date} for ds in dining_scale],
+        "lodge_members_stats": lodge_members_stats,
+        "lodge_info": _build_lodge_info(lodge),
+    }
+
+
+def get_dashboard_snapshot(db: Session, lodge_id: int) -> Dict[str, Any]:
+    """Snapshot do dashboard servido do cache por loja; recalculado no miss ou após invalidação."""
+    snapshot = dashboard_cache.get(lodge_id)
+    if snapshot is None:
+        snapshot = build_dashboard_snapshot(db, lodge_id)
+        dashboard_cache.set(lodge_id, snapshot)
+    return snapshot
+
+
+def invalidate_dashboard(lodge_id: Optional[int] = None) -> None:
+    """Invalida o snapshot de uma loja (ou de todas, se lodge_id for None)."""
+    if lodge_id is None:
+        dashboard_cache.invalidate_all()
+    else:
+        dashboard_cache.invalidate(lodge_id)
+
+
+# --- Invalidação automática ---
+# As escritas são coletadas no flush e aplicadas só no commit (rollback descarta),
+# cobrindo todas as rotas/serviços sem chamadas explícitas espalhadas.
+
+
+def _pending_invalidations(session: Session) -> Set:
+    return session.info.setdefault("dashboard_invalidations", set())
+
+
+def mark_dashboard_stale(session: Session, lodge_id: Optional[int] = None) -> None:
+    """Agenda a invalidação para o commit (escritas bulk/Core não passam pelo after_flush)."""
+    _pending_invalidations(session).add(_ALL_LODGES if lodge_id is None else lodge_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_dashboard_invalidations(session, flush_context):
+    pending = _pending_invalidations(session)
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _GLOBAL_MODELS):
+            pending.add(_ALL_LODGES)
+        elif isinstance(obj, _LODGE_SCOPED_MODELS):
+            pending.add(obj.lodge_id)
+        elif isinstance(obj, models.Lodge):
+            pending.add(obj.id)
+
+
+def _collect_bulk_invalidation(update_context):
+    mapper = update_context.mapper
+    if mapper is None:
+        return
+    entity = mapper.class_
+    if issubclass(entity, (*_GLOBAL_MODELS, *_LODGE_SCOPED_MODELS, models.Lodge)):
+        # Updates/deletes em massa não expõem as linhas afetadas: invalida todas as lojas
+        _pending_invalidations(update_context.session).add(_ALL_LODGES)
+
+
+event.listen(Session, "after_bulk_update", _collect_bulk_invalidation)
+event.listen(Session, "after_bulk_delete", _collect_bulk_invalidation)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_dashboard_invalidations(session):
+    pending = session.info.pop("dashboard_invalidations", None)
+    if not pending:
+        return
+    if _ALL_LODGES in pending:
+        invalidate_dashboard()
+        return
+    for lodge_id in pending:
+        if lodge_id is not None:
+            invalidate_dashboard(lodge_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dashboard_invalidations(session):
+    session.info.pop("dashboard_invalidations", None)
@@ -5,6 +5,9 @@ from sqlalchemy.orm import Session
 
 from app.modules.access_control.services import auth_service
 from app.modules.core.schemas import lodge_schema
+from app.modules.core.services import obedience_hierarchy_service, search_service
+from app.shared.utils.bulk import query_in
+from app.shared.utils.validators import normalize_search_text
 from models import models
 
 
@@ -22,11 +25,10 @@ def get_lodges(db: Session, skip: int = 0, limit: int = 100, obedience_id: int |
     if obedience_id:
         # Check if the lodge belongs directly to the obedience or as a subobedience
         query = query.filter(or_(models.Lodge.obedience_id == obedience_id, models.Lodge.subobedience_id == obedience_id))
-    if search:
-        query = query.filter(or_(
-            models.Lodge.lodge_name.ilike(f"%{search}%"),
-            models.Lodge.lodge_number.ilike(f"%{search}%")
-        ))
+    term = normalize_search_text(search)
+    if term:
+        # search_name holds the normalized "name number", so this is accent-insensitive and index-backed
+        query = query.filter(search_service.text_match(db, models.Lodge.search_name, term))
     return query.offset(skip).limit(limit).all()
 
 
@@ -104,3 +106,79 @@ def delete_lodge(db: Session, lodge_id: int) -> models.Lodge | None:
     db.delete(db_lodge)
     db.commit()
     return db_lodge
+
+
+def import_lodges(db: Session, rows) -> dict:
+    """
+    Upserts lodges from a confirmed import preview and returns created/updated/skipped counts.
+
+    Existing lodges are prefetched in two IN queries (by CNPJ and by number) and updated together
+    with bulk_update_mappings. New lodges still go through create_lodge one by one, since each one
+    provisions its webmaster account and initial assets; a failure skips only that row.
+    """
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    valid_rows = [row for row in rows if row.is_valid]
+    counts["skipped"] += len(rows) - len(valid_rows)
+
+    obediences = db.query(models.Obedience.id, models.Obedience.acronym, models.Obedience.parent_obedience_id).filter(
+        models.Obedience.acronym.isnot(None)
+    )
+    potency_map, subpotency_map = {}, {}
+    for obedience_id, acronym, parent_id in obediences:
+        (subpotency_map if parent_id else potency_map)[acronym.lower()] = obedience_id
+
+    Lodge = models.Lodge
+    query = db.query(Lodge.id, Lodge.lodge_name, Lodge.lodge_number, Lodge.obedience_id, Lodge.subobedience_id, Lodge.cnpj)
+    by_cnpj, by_number = {}, {}
+    for lodge in query_in(query, Lodge.cnpj, {row.cnpj for row in valid_rows if row.cnpj}):
+        by_cnpj[lodge.cnpj] = dict(lodge._mapping)
+    for lodge in query_in(query, Lodge.lodge_number, {row.number for row in valid_rows if row.number}):
+        record = by_cnpj.get(lodge.cnpj) or dict(lodge._mapping)
+        by_number.setdefault((lodge.lodge_number, lodge.obedience_id), record)
+
+    updates, new_rows = {}, []
+    for row in valid_rows:
+        potency_id = potency_map.get(row.potency_acronym.lower()) if row.potency_acronym else None
+        subpotency_id = subpotency_map.get(row.subpotency_acronym.lower()) if row.subpotency_acronym else None
+        existing = (row.cnpj and by_cnpj.get(row.cnpj)) or by_number.get((row.number, potency_id))
+        if existing is None:
+            new_rows.append((row, potency_id, subpotency_id))
+            continue
+
+        wanted = {"lodge_name": row.name, "subobedience_id": subpotency_id}
+        # A CNPJ already owned by another lodge would violate the unique constraint
+        if row.cnpj and by_cnpj.get(row.cnpj, existing) is existing:
+            wanted["cnpj"] = row.cnpj
+        diff = {field: value for field, value in wanted.items() if value and existing[field] != value}
+        if "lodge_name" in diff:
+            # bulk_update_mappings skips the @validates hook that keeps search_name in sync
+            diff["search_name"] = normalize_search_text(f"{diff['lodge_name']} {existing['lodge_number'] or ''}")
+        if diff:
+            existing.update(diff)
+            updates.setdefault(existing["id"], {"id": existing["id"]}).update(diff)
+        counts["updated"] += 1
+
+    if updates:
+        db.bulk_update_mappings(Lodge, list(updates.values()))
+        if any("subobedience_id" in update for update in updates.values()):
+            obedience_hierarchy_service.mark_hierarchy_stale(db)
+    db.commit()
+
+    for row, potency_id, subpotency_id in new_rows:
+        try:
+            lodge_create = lodge_schema.LodgeCreate(
+                lodge_name=row.name,
+                lodge_number=row.number,
+                obedience_id=potency_id,
+                subobedience_id=subpotency_id,
+                cnpj=row.cnpj,
+                technical_contact_email=row.technical_contact_email,
+                technical_contact_name=row.technical_contact_name,
+            )
+            create_lodge(db=db, lodge=lodge_create)
+            counts["created"] += 1
+        except Exception as e:
+            print(f"Error importing lodge {row.name}: {e}")
+            counts["skipped"] += 1
+
+    return counts
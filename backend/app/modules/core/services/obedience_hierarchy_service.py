@@ -0,0 +1,168 @@
+"""
+Hierarquia obediência -> subobediências -> lojas.
+
+As lojas subordinadas a uma obediência (diretamente, como subobediência ou por qualquer nível de
+subobediências abaixo dela) são resolvidas em uma única consulta com CTE recursiva e guardadas
+em cache por obediência. Qualquer escrita que mude a hierarquia (Lodge.obedience_id,
+Lodge.subobedience_id, Obedience.parent_obedience_id, inclusão/exclusão de lojas ou obediências)
+invalida o cache no commit e regrava a tabela de fecho (ObedienceLodgeClosure) na mesma transação.
+"""
+
+from typing import FrozenSet, Optional
+
+from sqlalchemy import delete, event, func, insert, inspect, literal_column, or_, select, text
+from sqlalchemy.orm import Session
+
+from app.shared.security.cache import TTLCache
+from models import models
+
+# Proteção contra ciclos em parent_obedience_id (dado inconsistente não pode travar a consulta)
+MAX_HIERARCHY_DEPTH = 10
+
+# A hierarquia quase nunca muda e as escritas invalidam explicitamente; o TTL é só uma rede de segurança
+hierarchy_cache = TTLCache(max_size=1024, ttl_seconds=3600.0)
+
+_HIERARCHY_ATTRS = {
+    models.Lodge: ("obedience_id", "subobedience_id"),
+    models.Obedience: ("parent_obedience_id",),
+}
+
+
+def _obedience_tree(root_id: Optional[int] = None):
+    """
+    CTE recursiva (ancestor_id, obedience_id, depth): cada obediência e todas as suas descendentes.
+    Com `root_id`, parte apenas dessa obediência; sem ele, de todas (usado no fecho).
+    """
+    anchor = select(
+        models.Obedience.id.label("ancestor_id"),
+        models.Obedience.id.label("obedience_id"),
+        literal_column("0").label("depth"),
+    )
+    if root_id is not None:
+        anchor = anchor.where(models.Obedience.id == root_id)
+    tree = anchor.cte("obedience_tree", recursive=True)
+    child = models.Obedience.__table__.alias("child_obedience")
+    return tree.union_all(
+        select(tree.c.ancestor_id, child.c.id, tree.c.depth + 1)
+        .join(child, child.c.parent_obedience_id == tree.c.obedience_id)
+        .where(tree.c.depth < MAX_HIERARCHY_DEPTH)
+    )
+
+
+def _lodges_join(tree):
+    return or_(models.Lodge.obedience_id == tree.c.obedience_id, models.Lodge.subobedience_id == tree.c.obedience_id)
+
+
+def resolve_subordinate_lodges(db: Session, obedience_id: int) -> FrozenSet[int]:
+    """Consulta (sem cache) os IDs de todas as lojas abaixo da obediência, em qualquer nível."""
+    tree = _obedience_tree(obedience_id)
+    rows = db.execute(select(models.Lodge.id).join(tree, _lodges_join(tree)).distinct())
+    return frozenset(row[0] for row in rows)
+
+
+def get_subordinate_lodges(db: Session, obedience_id: int) -> FrozenSet[int]:
+    """
+    IDs das lojas abaixo da obediência, servidos do cache por obediência. Uma sessão com mudanças de
+    hierarquia ainda não commitadas consulta direto: o cache é do processo e só guarda dado commitado.
+    """
+    if db.info.get("obedience_hierarchy_stale"):
+        return resolve_subordinate_lodges(db, obedience_id)
+    lodge_ids = hierarchy_cache.get(obedience_id)
+    if lodge_ids is None:
+        lodge_ids = resolve_subordinate_lodges(db, obedience_id)
+        # A consulta pode ter disparado o autoflush de uma mudança de hierarquia
+        if not db.info.get("obedience_hierarchy_stale"):
+            hierarchy_cache.set(obedience_id, lodge_ids)
+    return lodge_ids
+
+
+def invalidate_hierarchy() -> None:
+    """Descarta todo o cache: uma mudança em um nível afeta todas as obediências acima dele."""
+    hierarchy_cache.invalidate_all()
+
+
+def _lock_closure(db: Session) -> None:
+    """
+    Serializa as regravações do fecho até o commit. No PostgreSQL o modo SHARE ROW EXCLUSIVE conflita
+    consigo mesmo mas não com leituras: uma segunda transação espera a primeira e, em read committed,
+    seu DELETE já enxerga as linhas gravadas por ela (sem violar a chave primária no INSERT).
+    Nos demais bancos o próprio DELETE sem filtro já trava a tabela inteira.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE obedience_lodge_closure IN SHARE ROW EXCLUSIVE MODE"))
+
+
+def rebuild_closure(db: Session) -> int:
+    """Regrava a tabela de fecho obediência -> loja a partir da hierarquia atual. Não faz commit."""
+    _lock_closure(db)
+    tree = _obedience_tree()
+    rows = (
+        select(tree.c.ancestor_id, models.Lodge.id, func.min(tree.c.depth))
+        .join(tree, _lodges_join(tree))
+        .group_by(tree.c.ancestor_id, models.Lodge.id)
+    )
+    db.execute(delete(models.ObedienceLodgeClosure), execution_options={"synchronize_session": False})
+    result = db.execute(
+        insert(models.ObedienceLodgeClosure).from_select(["obedience_id", "lodge_id", "depth"], rows)
+    )
+    return result.rowcount
+
+
+# --- Invalidação automática ---
+# Mudanças na hierarquia são detectadas a cada flush; antes do commit o fecho é regravado
+# na mesma transação e, após o commit, o cache é descartado (rollback descarta a marcação).
+
+
+def mark_hierarchy_stale(session: Session) -> None:
+    """Agenda a atualização para escritas feitas fora do unit of work (bulk/Core)."""
+    session.info["obedience_hierarchy_stale"] = True
+
+
+def _changes_hierarchy(obj, is_dirty: bool) -> bool:
+    attrs = _HIERARCHY_ATTRS.get(type(obj))
+    if attrs is None:
+        return False
+    if not is_dirty:
+        return True
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_hierarchy_changes(session, flush_context):
+    if session.info.get("obedience_hierarchy_stale"):
+        return
+    changed = any(_changes_hierarchy(obj, False) for obj in (*session.new, *session.deleted)) or any(
+        _changes_hierarchy(obj, True) for obj in session.dirty
+    )
+    if changed:
+        mark_hierarchy_stale(session)
+
+
+def _collect_bulk_hierarchy_change(update_context):
+    mapper = update_context.mapper
+    if mapper is not None and mapper.class_ in _HIERARCHY_ATTRS:
+        # Updates/deletes em massa não expõem as colunas alteradas
+        mark_hierarchy_stale(update_context.session)
+
+
+event.listen(Session, "after_bulk_update", _collect_bulk_hierarchy_change)
+event.listen(Session, "after_bulk_delete", _collect_bulk_hierarchy_change)
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_closure(session):
+    session.flush()
+    if session.info.get("obedience_hierarchy_stale"):
+        rebuild_closure(session)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_hierarchy_invalidation(session):
+    if session.info.pop("obedience_hierarchy_stale", None):
+        invalidate_hierarchy()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_hierarchy_changes(session):
+    session.info.pop("obedience_hierarchy_stale", None)
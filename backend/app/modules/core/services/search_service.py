@@ -0,0 +1,163 @@
+"""
+Busca textual de obreiros, lojas e visitantes pelas colunas `search_name`.
+
+As colunas guardam o nome já normalizado (sem acentos, minúsculo), mantido pelos próprios modelos,
+então a busca nunca aplica função sobre a coluna. No PostgreSQL o `LIKE '%termo%'` é atendido pelos
+índices GIN de trigramas (pg_trgm), o operador `%` tolera pequenos erros de digitação e `similarity()`
+ordena os resultados. Nos demais bancos (SQLite dos testes) o mesmo LIKE funciona sem índice e a
+ordenação usa a posição do termo: nome exato, prefixo, início de palavra e, por fim, trecho.
+"""
+
+from sqlalchemy import case, func, literal, or_, select
+from sqlalchemy.orm import Session
+
+from app.shared.utils.validators import normalize_search_text
+from models import models
+
+SEARCH_TYPES = ("member", "lodge", "external_lodge", "visitor")
+MIN_TERM_LENGTH = 2
+
+
+def _uses_trigram(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def text_match(db: Session, column, term: str):
+    """Condição "contém `term`" sobre uma coluna normalizada; `term` já deve vir normalizado."""
+    condition = column.like(f"%{_escape_like(term)}%", escape="\\")
+    if _uses_trigram(db):
+        condition = or_(condition, column.op("%")(term))
+    return condition
+
+
+def text_rank(db: Session, column, term: str):
+    """Expressão de relevância (0 a 1) de `column` para `term`, usada no ORDER BY."""
+    if _uses_trigram(db):
+        return func.similarity(column, term)
+    escaped = _escape_like(term)
+    return case(
+        (column == term, 1.0),
+        (column.like(f"{escaped}%", escape="\\"), 0.8),
+        (column.like(f"% {escaped}%", escape="\\"), 0.6),
+        else_=0.4,
+    )
+
+
+def _lodge_subtitle(number, city, state) -> str | None:
+    parts = []
+    if number:
+        parts.append(f"Nº {number}")
+    if city:
+        parts.append(f"{city}/{state}" if state else city)
+    return " - ".join(parts) or None
+
+
+def _search_members(db: Session, raw: str, term: str, lodge_ids: list[int] | None, limit: int) -> list[dict]:
+    score = case((models.Member.cim == raw, 1.0), else_=text_rank(db, models.Member.search_name, term)).label("score")
+    query = db.query(models.Member.id, models.Member.full_name, models.Member.cim, score).filter(
+        or_(text_match(db, models.Member.search_name, term), models.Member.cim == raw)
+    )
+    if lodge_ids is not None:
+        query = query.filter(
+            models.Member.id.in_(
+                select(models.MemberLodgeAssociation.member_id).where(
+                    models.MemberLodgeAssociation.lodge_id.in_(lodge_ids)
+                )
+            )
+        )
+    rows = query.order_by(score.desc(), models.Member.full_name).limit(limit).all()
+    return [
+        {"type": "member", "id": row.id, "title": row.full_name, "subtitle": f"CIM {row.cim}" if row.cim else None, "score": float(row.score)}
+        for row in rows
+    ]
+
+
+def _search_lodges(
+    db: Session, term: str, lodge_ids: list[int] | None, limit: int, external: bool
+) -> list[dict]:
+    if external and lodge_ids is None:
+        # Sem escopo de tenant todas as lojas já aparecem como "lodge"
+        return []
+    score = text_rank(db, models.Lodge.search_name, term).label("score")
+    query = db.query(
+        models.Lodge.id, models.Lodge.lodge_name, models.Lodge.lodge_number, models.Lodge.city, models.Lodge.state, score
+    ).filter(text_match(db, models.Lodge.search_name, term))
+    if lodge_ids is not None:
+        in_scope = models.Lodge.id.in_(lodge_ids) if lodge_ids else literal(False)
+        query = query.filter(~in_scope if external else in_scope)
+    rows = query.order_by(score.desc(), models.Lodge.lodge_name).limit(limit).all()
+    return [
+        {
+            "type": "external_lodge" if external else "lodge",
+            "id": row.id,
+            "title": row.lodge_name,
+            "subtitle": _lodge_subtitle(row.lodge_number, row.city, row.state),
+            "score": float(row.score),
+        }
+        for row in rows
+    ]
+
+
+def _search_visitors(db: Session, raw: str, term: str, lodge_ids: list[int] | None, limit: int) -> list[dict]:
+    score = case((models.Visitor.cim == raw, 1.0), else_=text_rank(db, models.Visitor.search_name, term)).label("score")
+    query = db.query(
+        models.Visitor.id, models.Visitor.full_name, models.Visitor.cim, models.Visitor.manual_lodge_name, score
+    ).filter(or_(text_match(db, models.Visitor.search_name, term), models.Visitor.cim == raw))
+    if lodge_ids is not None:
+        # Visitantes são globais; o tenant enxerga os que já estiveram em sessões das suas lojas
+        query = query.filter(
+            models.Visitor.id.in_(
+                select(models.SessionAttendance.visitor_id)
+                .join(models.MasonicSession, models.MasonicSession.id == models.SessionAttendance.session_id)
+                .where(models.MasonicSession.lodge_id.in_(lodge_ids))
+            )
+        )
+    rows = query.order_by(score.desc(), models.Visitor.full_name).limit(limit).all()
+    return [
+        {
+            "type": "visitor",
+            "id": row.id,
+            "title": row.full_name,
+            "subtitle": " - ".join(part for part in (f"CIM {row.cim}" if row.cim else None, row.manual_lodge_name) if part) or None,
+            "score": float(row.score),
+        }
+        for row in rows
+    ]
+
+
+def search(
+    db: Session,
+    query: str,
+    types: list[str] | None = None,
+    lodge_ids: list[int] | None = None,
+    limit: int = 20,
+) -> list[dict]:
+    """
+    Busca `query` nos tipos pedidos (todos por padrão) e devolve até `limit` resultados, do mais
+    relevante para o menos relevante.
+
+    `lodge_ids` é o escopo do usuário (None = sem restrição): obreiros associados a essas lojas,
+    as próprias lojas, as demais lojas como `external_lodge` e os visitantes que passaram por elas.
+    """
+    raw = (query or "").strip()
+    term = normalize_search_text(raw)
+    if not term or len(term) < MIN_TERM_LENGTH:
+        return []
+
+    selected = set(types or SEARCH_TYPES)
+    results: list[dict] = []
+    if "member" in selected:
+        results += _search_members(db, raw, term, lodge_ids, limit)
+    if "lodge" in selected:
+        results += _search_lodges(db, term, lodge_ids, limit, external=False)
+    if "external_lodge" in selected:
+        results += _search_lodges(db, term, lodge_ids, limit, external=True)
+    if "visitor" in selected:
+        results += _search_visitors(db, raw, term, lodge_ids, limit)
+
+    results.sort(key=lambda item: (-item["score"], item["title"]))
+    return results[:limit]
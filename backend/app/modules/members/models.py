@@ -7,16 +7,18 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
     UniqueConstraint,
 )
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy import Column, Integer, String, Date, ForeignKey, Boolean, Enum, JSON
 
 from app.shared.base_model import BaseModel
+from app.shared.utils.validators import normalize_phone, normalize_search_text
 
 
 class RelationshipTypeEnum(enum.StrEnum):
@@ -57,12 +59,31 @@ class EventTypeEnum(enum.StrEnum):
     DISMISSAL = "Desligamento"
 
 
+class AnniversaryKindEnum(enum.StrEnum):
+    BIRTHDAY = "aniversario"
+    WEDDING = "casamento"
+    INITIATION = "iniciacao"
+    ELEVATION = "elevacao"
+    EXALTATION = "exaltacao"
+    FAMILY_BIRTHDAY = "aniversario_familiar"
+
+
+class MemberImportJobStatus(enum.StrEnum):
+    PENDING = "PENDENTE"
+    PARSING = "PROCESSANDO"
+    READY = "PRONTO"
+    IMPORTING = "IMPORTANDO"
+    COMPLETED = "CONCLUIDO"
+    FAILED = "FALHOU"
+
+
 class Member(BaseModel):
     __tablename__ = "members"
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String(255), unique=True, nullable=False, index=True)
     password_hash = Column(String(255), nullable=False)
     full_name = Column(String(255), nullable=False)
+    search_name = Column(String(255), nullable=True, comment="full_name normalizado para busca, mantido a partir de full_name")
     cpf = Column(String(14), unique=True, nullable=True, index=True)
     identity_document = Column(String(50), nullable=True)
     birth_date = Column(Date, nullable=True)
@@ -74,6 +95,7 @@ class Member(BaseModel):
     state = Column(String(2), nullable=True)
     zip_code = Column(String(9), nullable=True)
     phone = Column(String(20), nullable=True)
+    phone_normalized = Column(String(20), nullable=True, comment="Telefone em E.164, mantido a partir de phone")
     place_of_birth = Column(String(100), nullable=True)
     nationality = Column(String(100), nullable=True)
     religion = Column(String(100), nullable=True)
@@ -110,6 +132,29 @@ class Member(BaseModel):
     diplomas = relationship("Diploma", back_populates="member", cascade="all, delete-orphan")
     collecting_lodge = relationship("Lodge", foreign_keys=[collecting_lodge_id])
 
+    __table_args__ = (
+        Index("ix_members_phone_normalized", "phone_normalized", unique=True),
+        # Listagem paginada por cursor (keyset) em ordem alfabética
+        Index("ix_members_full_name_id", "full_name", "id"),
+        # Busca por trecho do nome (trigramas no PostgreSQL; índice comum nos demais bancos)
+        Index(
+            "ix_members_search_name_trgm",
+            "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        ),
+    )
+
+    @validates("phone")
+    def _sync_phone_normalized(self, key, phone):
+        self.phone_normalized = normalize_phone(phone)
+        return phone
+
+    @validates("full_name")
+    def _sync_search_name(self, key, full_name):
+        self.search_name = normalize_search_text(full_name)
+        return full_name
+
 
 class MemberLodgeAssociation(BaseModel):
     __tablename__ = "member_lodge_associations"
@@ -134,6 +179,7 @@ class MemberLodgeAssociation(BaseModel):
     __table_args__ = (
         UniqueConstraint("member_id", "lodge_id", name="_member_lodge_uc"),
         CheckConstraint("end_date IS NULL OR end_date >= start_date", name="chk_lodge_assoc_dates"),
+        Index("ix_member_lodge_associations_lodge_status", "lodge_id", "status"),
     )
 
 
@@ -188,10 +234,19 @@ class FamilyMember(BaseModel):
     birth_date = Column(Date, nullable=True)
     email = Column(String(255), nullable=True)
     phone = Column(String(20), nullable=True)
+    phone_normalized = Column(String(20), nullable=True, comment="Telefone em E.164, mantido a partir de phone")
     is_deceased = Column(Boolean, default=False)
     member_id = Column(Integer, ForeignKey("members.id"), nullable=False)
     member = relationship("Member", back_populates="family_members")
 
+    # Não é único: familiares de obreiros diferentes podem compartilhar o mesmo telefone
+    __table_args__ = (Index("ix_family_members_phone_normalized", "phone_normalized"),)
+
+    @validates("phone")
+    def _sync_phone_normalized(self, key, phone):
+        self.phone_normalized = normalize_phone(phone)
+        return phone
+
 
 class RoleHistory(BaseModel):
     __tablename__ = "role_history"
@@ -243,3 +298,69 @@ class MasonicEvent(BaseModel):
     diploma = relationship("Diploma", back_populates="masonic_event", uselist=False, cascade="all, delete-orphan")
     member = relationship("Member", back_populates="masonic_history")
     lodge = relationship("Lodge")
+
+
+class AnniversaryIndex(BaseModel):
+    """
+    Índice derivado das datas comemorativas dos obreiros ativos de cada loja (uma linha por loja/data).
+    Mantido a partir de Member, FamilyMember, MasonicEvent e MemberLodgeAssociation
+    (ver app/modules/members/services/anniversary_service.py); nunca editar diretamente.
+    """
+
+    __tablename__ = "anniversary_index"
+    id = Column(Integer, primary_key=True, index=True)
+    lodge_id = Column(Integer, ForeignKey("lodges.id", ondelete="CASCADE"), nullable=False)
+    member_id = Column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False, index=True)
+    family_member_id = Column(Integer, ForeignKey("family_members.id", ondelete="CASCADE"), nullable=True)
+    kind = Column(String(30), nullable=False, comment="Valor de AnniversaryKindEnum")
+    month = Column(Integer, nullable=False)
+    day = Column(Integer, nullable=False)
+    original_date = Column(Date, nullable=False)
+    display_name = Column(String(255), nullable=False)
+    member_name = Column(String(255), nullable=False)
+    relationship_type = Column(String(50), nullable=True)
+
+    __table_args__ = (Index("ix_anniversary_index_lodge_month_day_kind", "lodge_id", "month", "day", "kind"),)
+
+
+class MemberImportJob(BaseModel):
+    """
+    Importação de obreiros em segundo plano: os arquivos são processados em um pool de processos,
+    as linhas extraídas ficam em MemberImportStagingRow e a confirmação grava em lotes.
+    O progresso é acompanhado por polling (GET /members/import/jobs/{id}).
+    """
+
+    __tablename__ = "member_import_jobs"
+    id = Column(Integer, primary_key=True, index=True)
+    lodge_id = Column(Integer, ForeignKey("lodges.id", ondelete="CASCADE"), nullable=True, index=True)
+    requested_by_id = Column(Integer, nullable=True, comment="Id do usuário (membro/webmaster/super admin)")
+    requested_by_type = Column(String(30), nullable=True)
+    status = Column(String(20), nullable=False, default="PENDENTE", comment="Valor de MemberImportJobStatus")
+    total_files = Column(Integer, nullable=False, default=0)
+    parsed_files = Column(Integer, nullable=False, default=0)
+    total_rows = Column(Integer, nullable=False, default=0)
+    valid_rows = Column(Integer, nullable=False, default=0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    created_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)
+    skipped_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    rows = relationship("MemberImportStagingRow", back_populates="job", cascade="all, delete-orphan")
+
+
+class MemberImportStagingRow(BaseModel):
+    __tablename__ = "member_import_staging_rows"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("member_import_jobs.id", ondelete="CASCADE"), nullable=False)
+    file_name = Column(String(255), nullable=False)
+    data = Column(JSON, nullable=False, comment="ImportMemberRow serializado")
+    is_valid = Column(Boolean, nullable=False, default=False)
+    status = Column(String(20), nullable=False, default="PENDENTE", comment="PENDENTE, IMPORTADO, IGNORADO")
+    member_id = Column(Integer, ForeignKey("members.id", ondelete="SET NULL"), nullable=True)
+    error = Column(Text, nullable=True)
+
+    job = relationship("MemberImportJob", back_populates="rows")
+
+    __table_args__ = (Index("ix_member_import_staging_rows_job_status", "job_id", "status"),)
@@ -6,6 +6,8 @@ import dependencies
 from app.modules.members.schemas import member_role_schema
 from models import models
 from app.core.logger import logger
+from app.shared.security.cache import user_context_cache
+from app.shared.security.constants import UserTypeEnum
 
 router = APIRouter(
     prefix="/members",
@@ -99,6 +101,7 @@ def assign_role_to_member(
             logger.info("Novo cargo atribuído ao membro em Obediência", extra={"extra_data": {"member_id": member_id, "obedience_id": assignment.obedience_id}})
 
     db.commit()
+    user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
     return {"message": "Role assigned successfully"}
 
 
@@ -156,4 +159,5 @@ def manage_permission_exception(
         logger.info("Exceção de permissão criada para membro", extra={"extra_data": {"member_id": member_id, "permission_id": exception_data.permission_id}})
 
     db.commit()
+    user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
     return {"message": "Permission exception updated successfully"}
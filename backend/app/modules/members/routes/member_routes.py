@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session
 
 import database
 import dependencies
@@ -156,6 +156,8 @@ def create_member(
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="CPF já cadastrado.")
         if "ix_members_cim" in error_msg or "UNIQUE constraint failed: members.cim" in error_msg:
             raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="CIM já cadastrado.")
+        if "ix_members_phone_normalized" in error_msg or "UNIQUE constraint failed: members.phone_normalized" in error_msg:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Telefone já cadastrado.")
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error_msg)
 
 
@@ -172,75 +174,61 @@ def read_members(
     current_user: dict = Depends(dependencies.get_current_user_payload),
 ):
     """Retrieve members. SuperAdmins see all, Webmasters and Members see their lodge's."""
-    user_type = current_user.get("user_type")
+    return member_service.list_members(db, skip=skip, limit=limit, **_member_list_scope(current_user))
+
 
+def _member_list_scope(current_user: dict) -> dict:
+    """Filtro da listagem conforme o usuário: tudo (super admin), a obediência ou a loja do contexto."""
+    user_type = current_user.get("user_type")
     if user_type == "super_admin":
-        members = (
-            db.query(Member)
-            .options(joinedload(Member.role_history).joinedload(RoleHistory.role))
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
-    elif user_type == "webmaster":
+        return {}
+    if user_type == "webmaster":
         obedience_id = current_user.get("obedience_id") or current_user.get("potencia_id")
-        lodge_id = current_user.get("lodge_id")
-        
         if obedience_id:
-            members = (
-                db.query(Member)
-                .join(models.MemberObedienceAssociation, Member.id == models.MemberObedienceAssociation.member_id)
-                .filter(models.MemberObedienceAssociation.obedience_id == obedience_id)
-                .options(joinedload(Member.role_history).joinedload(RoleHistory.role))
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-        elif lodge_id:
-            members = member_service.get_members_by_lodge(db, lodge_id=lodge_id, skip=skip, limit=limit)
-        else:
-            members = (
-                db.query(Member)
-                .options(joinedload(Member.role_history).joinedload(RoleHistory.role))
-                .offset(skip)
-                .limit(limit)
-                .all()
-            )
-    elif user_type == "member":
+            return {"obedience_id": obedience_id}
+        lodge_id = current_user.get("lodge_id")
+        return {"lodge_id": lodge_id} if lodge_id else {}
+    if user_type == "member":
         lodge_id = current_user.get("lodge_id")
         if not lodge_id:
             raise HTTPException(status_code=403, detail="Usuário não associado a um contexto de loja.")
+        return {"lodge_id": lodge_id}
+    raise HTTPException(status_code=403, detail="Não autorizado.")
 
-        members = member_service.get_members_by_lodge(db, lodge_id=lodge_id, skip=skip, limit=limit)
-    else:
-        raise HTTPException(status_code=403, detail="Não autorizado.")
 
-    # Convert to list response with computed active_role
-    result = []
-    for member in members:
-        member_dict = {
-            "id": member.id,
-            "full_name": member.full_name,
-            "email": member.email,
-            "cim": member.cim,
-            "degree": member.degree,
-            "status": member.status,
-            "registration_status": member.registration_status,
-            "profile_picture_path": member.profile_picture_path,
-            "phone": member.phone,
-            "birth_date": member.birth_date,
-            "active_role": None,
-        }
-
-        # Find active role (where end_date is None)
-        if member.role_history:
-            active_role_entry = next((rh for rh in member.role_history if rh.end_date is None), None)
-            if active_role_entry and active_role_entry.role:
-                member_dict["active_role"] = active_role_entry.role.name
-
-        result.append(member_dict)
-
-    return result
+@router.get(
+    "/page",
+    response_model=member_schema.MemberListPage,
+    response_model_exclude_unset=True,
+    summary="Listar Membros (cursor)",
+    description=(
+        "Listagem paginada por cursor, ordenada por nome. Envie o `next_cursor` recebido para obter a página "
+        "seguinte. `fields` (ex: `id,full_name,active_role`) limita os campos retornados."
+    ),
+)
+def read_members_page(
+    cursor: str | None = None,
+    limit: int = 50,
+    fields: str | None = None,
+    db: Session = Depends(database.get_db),
+    current_user: dict = Depends(dependencies.get_current_user_payload),
+):
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit deve estar entre 1 e 200.")
+    selected = None
+    if fields:
+        selected = [field.strip() for field in fields.split(",") if field.strip()]
+        unknown = set(selected) - set(member_service.MEMBER_LIST_FIELDS)
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(sorted(unknown))}.")
+
+    try:
+        items, next_cursor = member_service.list_members_page(
+            db, cursor=cursor, limit=limit, fields=selected, **_member_list_scope(current_user)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @router.get(
@@ -299,6 +287,16 @@ def read_member(
         raise HTTPException(status_code=403, detail="Not authorized")
 
 
+def _ensure_phone_available(db: Session, phone: str | None, member_id: int) -> None:
+    """409 se o telefone (com ou sem o nono dígito) já pertence a outro membro."""
+    if not phone:
+        return
+    try:
+        member_service.ensure_phone_available(db, phone, member_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+
 @router.put(
     "/{member_id}",
     response_model=member_schema.MemberResponse,
@@ -331,6 +329,7 @@ def update_member(
         masonic_history_data = update_data.pop('masonic_history', None)
         decorations_data = update_data.pop('decorations', None)
 
+        _ensure_phone_available(db, update_data.get("phone"), member_id)
         for key, value in update_data.items():
             setattr(db_member, key, value)
             
@@ -398,6 +397,7 @@ def update_member(
         masonic_history_data = update_data.pop('masonic_history', None)
         decorations_data = update_data.pop('decorations', None)
 
+        _ensure_phone_available(db, update_data.get("phone"), member_id)
         for key, value in update_data.items():
             setattr(db_member, key, value)
             
@@ -450,6 +450,7 @@ def update_member(
         from app.modules.members.schemas.member_schema import MemberSelfUpdate
 
         self_update_data = MemberSelfUpdate(**member.model_dump(exclude_unset=True))
+        _ensure_phone_available(db, self_update_data.phone, member_id)
         
         for key, value in self_update_data.model_dump(exclude_unset=True).items():
             if key == "password":
@@ -594,9 +595,12 @@ def delete_role_history(
         raise HTTPException(status_code=403, detail="Not authorized")
 
 
+import asyncio
 import os
 
 from fastapi import File, UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 @router.post(
@@ -678,7 +682,7 @@ from fastapi import File, UploadFile
 async def upload_profile_picture(
     member_id: int,
     file: UploadFile = File(..., description="Arquivo de imagem da foto de perfil"),
-    db: Session = Depends(database.get_db),
+    db: AsyncSession = Depends(database.get_async_db),
     current_user: dict = Depends(dependencies.get_current_user_payload),
 ):
     """Upload a profile picture for a member."""
@@ -691,38 +695,23 @@ async def upload_profile_picture(
             raise HTTPException(status_code=403, detail="Webmaster not associated with a lodge")
 
         # Verify member belongs to the lodge
-        db_member = member_service.get_member_in_lodge(db, member_id=member_id, lodge_id=lodge_id)
+        db_member = await db.scalar(
+            select(Member)
+            .join(MemberLodgeAssociation)
+            .where(Member.id == member_id, MemberLodgeAssociation.lodge_id == lodge_id)
+            .limit(1)
+        )
         if not db_member:
             raise HTTPException(status_code=404, detail="Member not found in this lodge")
 
-        # Get lodge code
-        db.query(Lodge).filter(Lodge.id == lodge_id).first()
-
-    elif user_type == "super_admin":
-        db_member = db.query(Member).filter(Member.id == member_id).first()
-        if not db_member:
-            raise HTTPException(status_code=404, detail="Member not found")
-
-        # Get lodge code from member's association
-        association = db.query(MemberLodgeAssociation).filter(MemberLodgeAssociation.member_id == member_id).first()
-        if association:
-            db.query(Lodge).filter(Lodge.id == association.lodge_id).first()
-        else:
-            pass
-    elif user_type == "member":
-        # ABAC Ownership verification
-        verify_resource_ownership(current_user, member_id)
+    elif user_type in ("super_admin", "member"):
+        if user_type == "member":
+            # ABAC Ownership verification
+            verify_resource_ownership(current_user, member_id)
 
-        db_member = db.query(Member).filter(Member.id == member_id).first()
+        db_member = await db.get(Member, member_id)
         if not db_member:
             raise HTTPException(status_code=404, detail="Member not found")
-
-        # Get lodge code (similar to super_admin logic)
-        association = db.query(MemberLodgeAssociation).filter(MemberLodgeAssociation.member_id == member_id).first()
-        if association:
-            db.query(Lodge).filter(Lodge.id == association.lodge_id).first()
-        else:
-            pass
     else:
         raise HTTPException(status_code=403, detail="Not authorized")
 
@@ -751,14 +740,15 @@ async def upload_profile_picture(
 
     # Get lodge to access lodge_number
     if user_type == "webmaster":
-        lodge_for_upload = db.query(Lodge).filter(Lodge.id == lodge_id).first()
+        lodge_for_upload = await db.get(Lodge, lodge_id)
     else:
         # For super_admin, get lodge from member's association
-        association = db.query(MemberLodgeAssociation).filter(MemberLodgeAssociation.member_id == member_id).first()
-        if association:
-            lodge_for_upload = db.query(Lodge).filter(Lodge.id == association.lodge_id).first()
-        else:
-            lodge_for_upload = None
+        lodge_for_upload = await db.scalar(
+            select(Lodge)
+            .join(MemberLodgeAssociation, MemberLodgeAssociation.lodge_id == Lodge.id)
+            .where(MemberLodgeAssociation.member_id == member_id)
+            .limit(1)
+        )
 
     if not lodge_for_upload:
         raise HTTPException(status_code=400, detail="Cannot determine lodge for member")
@@ -766,7 +756,6 @@ async def upload_profile_picture(
     # Use lodge_number for directory name (e.g., loja_2181)
     lodge_number = lodge_for_upload.lodge_number if lodge_for_upload.lodge_number else str(lodge_for_upload.id)
     directory = STORAGE_DIR / f"loja_{lodge_number}" / "users" / "profile_pictures"
-    directory.mkdir(parents=True, exist_ok=True)
 
     # Get file extension
     file_extension = os.path.splitext(file.filename)[1]
@@ -774,9 +763,12 @@ async def upload_profile_picture(
     new_filename = f"{db_member.cim}{file_extension}"
     file_path = directory / new_filename
 
-    # Save file using validated contents
-    with open(file_path, "wb") as buffer:
-        buffer.write(file_contents)
+    # Save file using validated contents (disk I/O off the event loop)
+    def _write_file():
+        directory.mkdir(parents=True, exist_ok=True)
+        file_path.write_bytes(file_contents)
+
+    await asyncio.to_thread(_write_file)
 
     # Update member profile_picture_path in DB
     # Store path relative to storage mount: /storage/lodges/loja_{lodge_number}/users/profile_pictures/{cim}.ext
@@ -784,8 +776,7 @@ async def upload_profile_picture(
 
     # Update using service or direct DB update (since we already have the object)
     db_member.profile_picture_path = relative_path
-    db.commit()
-    db.refresh(db_member)
+    await db.commit()
 
     return {"filename": new_filename, "path": relative_path}
 
@@ -896,180 +887,136 @@ def confirm_import(
         else:
             raise HTTPException(status_code=403, detail="Não autorizado")
 
-    lodge_id = context.lodge_id
-
-    saved_count = 0
-    from app.modules.members.models import RegistrationStatusEnum, MasonicEvent, MemberLodgeAssociation, Member, FamilyMember, Decoration
-    from app.modules.access_control.utils.password_utils import hash_password
-    import secrets
-
-    for row in request_data.rows:
-        if row.is_valid:
-            existing = None
-            if row.cim:
-                existing = member_service.get_member_by_cim(db, row.cim)
-            if not existing and row.email:
-                existing = db.query(Member).filter(Member.email == row.email).first()
-
-            if existing:
-                # Update existing member
-                if row.name: existing.full_name = row.name
-                if row.email: existing.email = row.email
-                if row.degree: existing.degree = row.degree
-                if row.cpf: existing.cpf = row.cpf
-                if row.marital_status: existing.marital_status = row.marital_status
-                if row.father_name: existing.father_name = row.father_name
-                if row.mother_name: existing.mother_name = row.mother_name
-                if row.blood_type: existing.blood_type = row.blood_type
-                if getattr(row, "birth_date", None): existing.birth_date = row.birth_date
-                if getattr(row, "place_of_birth", None): existing.place_of_birth = row.place_of_birth
-                if getattr(row, "education_level", None): existing.education_level = row.education_level
-                if getattr(row, "occupation", None): existing.occupation = row.occupation
-                if getattr(row, "phone", None): existing.phone = row.phone
-                if getattr(row, "zip_code", None): existing.zip_code = row.zip_code
-                if getattr(row, "street_address", None): existing.street_address = row.street_address
-                if getattr(row, "neighborhood", None): existing.neighborhood = row.neighborhood
-                if getattr(row, "city", None): existing.city = row.city
-                
-                db.flush()
-                # Recreate masonic history
-                if row.masonic_history:
-                    db.query(MasonicEvent).filter(MasonicEvent.member_id == existing.id).delete()
-                    for ev in row.masonic_history:
-                        db_ev = MasonicEvent(
-                            member_id=existing.id,
-                            event_type=ev.get("event_type"),
-                            session_date=ev.get("session_date"),
-                            entry_date=ev.get("entry_date"),
-                            process_number=ev.get("process_number"),
-                            registry_number=ev.get("registry_number"),
-                            placet_number=ev.get("placet_number"),
-                            quit_placet_number=ev.get("quit_placet_number"),
-                            # Missing lodge_id mapping, but we don't strictly need it right now for raw import
-                        )
-                        db.add(db_ev)
-
-                # Ensure the member is associated with the lodge
-                if lodge_id:
-                    assoc = db.query(MemberLodgeAssociation).filter(
-                        MemberLodgeAssociation.member_id == existing.id,
-                        MemberLodgeAssociation.lodge_id == lodge_id
-                    ).first()
-                    if not assoc:
-                        new_assoc = MemberLodgeAssociation(
-                            member_id=existing.id,
-                            lodge_id=lodge_id,
-                        )
-                        db.add(new_assoc)
-                        
-                m_id = existing.id
-                
-                # Save Family Members
-                if hasattr(row, 'family_members') and row.family_members:
-                    db.query(FamilyMember).filter(FamilyMember.member_id == m_id).delete()
-                    for fm in row.family_members:
-                        db_fm = FamilyMember(
-                            member_id=m_id,
-                            relationship_type=fm.get("relationship_type"),
-                            full_name=fm.get("full_name"),
-                            birth_date=fm.get("birth_date"),
-                            phone=fm.get("phone")
-                        )
-                        db.add(db_fm)
-
-                # Save Decorations
-                if hasattr(row, 'decorations') and row.decorations:
-                    db.query(Decoration).filter(Decoration.member_id == m_id).delete()
-                    for dec in row.decorations:
-                        db_dec = Decoration(
-                            member_id=m_id,
-                            title=dec.get("title"),
-                            award_date=dec.get("award_date"),
-                            remarks=dec.get("remarks")
-                        )
-                        db.add(db_dec)
-                        
-                db.commit()
-                saved_count += 1
-            else:
-                # Create new member
-                new_member = Member(
-                    tenant_id=context.tenant_id,
-                    cim=row.cim,
-                    full_name=row.name,
-                    email=row.email,
-                    cpf=row.cpf,
-                    degree=row.degree,
-                    marital_status=row.marital_status,
-                    father_name=row.father_name,
-                    mother_name=row.mother_name,
-                    blood_type=row.blood_type,
-                    birth_date=getattr(row, "birth_date", None),
-                    place_of_birth=getattr(row, "place_of_birth", None),
-                    education_level=getattr(row, "education_level", None),
-                    occupation=getattr(row, "occupation", None),
-                    phone=getattr(row, "phone", None),
-                    zip_code=getattr(row, "zip_code", None),
-                    street_address=getattr(row, "street_address", None),
-                    neighborhood=getattr(row, "neighborhood", None),
-                    city=getattr(row, "city", None),
-                    password_hash=hash_password(secrets.token_urlsafe(16)),
-                    registration_status=RegistrationStatusEnum.PENDING
-                )
-                db.add(new_member)
-                db.flush()
-                
-                if row.masonic_history:
-                    for ev in row.masonic_history:
-                        db_ev = MasonicEvent(
-                            member_id=new_member.id,
-                            event_type=ev.get("event_type"),
-                            session_date=ev.get("session_date"),
-                            entry_date=ev.get("entry_date"),
-                            process_number=ev.get("process_number"),
-                            registry_number=ev.get("registry_number"),
-                            placet_number=ev.get("placet_number"),
-                            quit_placet_number=ev.get("quit_placet_number"),
-                        )
-                        db.add(db_ev)
-
-                if lodge_id:
-                    new_assoc = MemberLodgeAssociation(
-                        member_id=new_member.id,
-                        lodge_id=lodge_id,
-                    )
-                    db.add(new_assoc)
-
-                m_id = new_member.id
-                
-                # Save Family Members
-                if hasattr(row, 'family_members') and row.family_members:
-                    for fm in row.family_members:
-                        db_fm = FamilyMember(
-                            member_id=m_id,
-                            relationship_type=fm.get("relationship_type"),
-                            full_name=fm.get("full_name"),
-                            birth_date=fm.get("birth_date"),
-                            phone=fm.get("phone")
-                        )
-                        db.add(db_fm)
-
-                # Save Decorations
-                if hasattr(row, 'decorations') and row.decorations:
-                    for dec in row.decorations:
-                        db_dec = Decoration(
-                            member_id=m_id,
-                            title=dec.get("title"),
-                            award_date=dec.get("award_date"),
-                            remarks=dec.get("remarks")
-                        )
-                        db.add(db_dec)
-
-                db.commit()
-                db.refresh(new_member)
-                saved_count += 1
-
-    return {"message": f"{saved_count} membros importados/atualizados com sucesso."}
+    from app.modules.members.services.member_bulk_upsert_service import MemberBulkUpsertService
+
+    service = MemberBulkUpsertService(db, lodge_id=context.lodge_id)
+    service.upsert(request_data.rows)
+    db.commit()
+
+    saved_count = service.counts["created"] + service.counts["updated"]
+    return {"message": f"{saved_count} membros importados/atualizados com sucesso.", **service.counts}
+
+
+# --- Importação em segundo plano (jobs) ---
+# O upload só registra o job; a leitura roda num pool de processos e a confirmação grava em lotes.
+# O cliente acompanha pelo GET /import/jobs/{job_id}.
+
+from fastapi import BackgroundTasks, Query
+from app.modules.members.schemas.import_schemas import ImportJobResponse, ImportStagingRowResponse
+from app.modules.members.services import member_import_job_service
+
+IMPORT_ALLOWED_ROLES = ["Secretário", "Secretário Adjunto", "Chanceler", "Chanceler Adjunto", "Venerável Mestre"]
+
+
+def _ensure_can_import(context: dependencies.UserContext) -> None:
+    if context.user_type in ["super_admin", "webmaster"]:
+        return
+    if context.user_type == "member":
+        from datetime import date
+        active_roles = [
+            rh.role.name for rh in context.user.role_history
+            if (rh.end_date is None or rh.end_date >= date.today()) and rh.role
+        ]
+        if any(role in IMPORT_ALLOWED_ROLES for role in active_roles):
+            return
+    raise HTTPException(status_code=403, detail="Não autorizado")
+
+
+def _get_job_or_404(db: Session, job_id: int, context: dependencies.UserContext):
+    lodge_id = None if context.user_type == "super_admin" else context.lodge_id
+    job = member_import_job_service.get_import_job(db, job_id, lodge_id=lodge_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Importação não encontrada.")
+    return job
+
+
+@router.post(
+    "/import/jobs",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Iniciar Importação em Segundo Plano",
+    description="Recebe arquivos PDF (fichas) ou Excel e agenda a leitura. Acompanhe o progresso pelo id retornado.",
+)
+async def start_import_job(
+    background_tasks: BackgroundTasks,
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(database.get_async_db),
+    context: dependencies.UserContext = Depends(dependencies.get_current_active_user_with_permissions),
+):
+    _ensure_can_import(context)
+    job, staged_files = await member_import_job_service.create_import_job(
+        db, files, lodge_id=context.lodge_id, requested_by_id=context.user.id, requested_by_type=context.user_type
+    )
+    background_tasks.add_task(member_import_job_service.run_parse_job, job.id, staged_files)
+    return job
+
+
+@router.get(
+    "/import/jobs/{job_id}",
+    response_model=ImportJobResponse,
+    summary="Progresso da Importação",
+)
+def get_import_job(
+    job_id: int,
+    db: Session = Depends(database.get_db),
+    context: dependencies.UserContext = Depends(dependencies.get_current_active_user_with_permissions),
+):
+    _ensure_can_import(context)
+    return _get_job_or_404(db, job_id, context)
+
+
+@router.get(
+    "/import/jobs/{job_id}/rows",
+    response_model=List[ImportStagingRowResponse],
+    summary="Linhas Extraídas da Importação",
+    description="Pré-visualização paginada das linhas lidas (e do resultado de cada uma após a confirmação).",
+)
+def get_import_job_rows(
+    job_id: int,
+    skip: int = 0,
+    limit: int = Query(100, le=500),
+    only_invalid: bool = False,
+    db: Session = Depends(database.get_db),
+    context: dependencies.UserContext = Depends(dependencies.get_current_active_user_with_permissions),
+):
+    _ensure_can_import(context)
+    job = _get_job_or_404(db, job_id, context)
+    return member_import_job_service.get_staging_rows(db, job.id, skip=skip, limit=limit, only_invalid=only_invalid)
+
+
+@router.post(
+    "/import/jobs/{job_id}/confirm",
+    response_model=ImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Confirmar Importação em Segundo Plano",
+    description="Grava as linhas válidas em lotes. Obreiros existentes (CIM, e-mail ou telefone) são atualizados.",
+)
+def confirm_import_job(
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    request: Request,
+    db: Session = Depends(database.get_db),
+    context: dependencies.UserContext = Depends(dependencies.get_current_active_user_with_permissions),
+):
+    _ensure_can_import(context)
+    job = _get_job_or_404(db, job_id, context)
+    try:
+        job = member_import_job_service.start_confirmation(db, job)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    log_action(
+        db=db,
+        user_id=context.user.id,
+        user_type=context.user_type,
+        action="CONFIRM_MEMBER_IMPORT",
+        resource_type="MEMBER_IMPORT_JOB",
+        resource_id=job.id,
+        details={"lodge_id": job.lodge_id, "valid_rows": job.valid_rows},
+        ip_address=request.client.host if request.client else None
+    )
+    background_tasks.add_task(member_import_job_service.run_confirm_job, job.id)
+    return job
+
 @router.post(
     "/{member_id}/lodge-associations",
     response_model=member_schema.MemberLodgeAssociationResponse,
@@ -1,5 +1,6 @@
+from datetime import datetime
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, computed_field
 
 class ImportMemberRow(BaseModel):
     cim: Optional[str] = None
@@ -42,3 +43,44 @@ class ImportPreviewResponse(BaseModel):
 
 class ImportConfirmRequest(BaseModel):
     rows: List[ImportMemberRow]
+
+
+class ImportJobResponse(BaseModel):
+    id: int
+    lodge_id: Optional[int] = None
+    status: str
+    total_files: int
+    parsed_files: int
+    total_rows: int
+    valid_rows: int
+    processed_rows: int
+    created_count: int
+    updated_count: int
+    skipped_count: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+    @computed_field
+    @property
+    def progress(self) -> float:
+        """Percentual da etapa atual: leitura dos arquivos e, depois da confirmação, gravação das linhas."""
+        if self.status in ("IMPORTANDO", "CONCLUIDO"):
+            done, total = self.processed_rows, self.total_rows
+        else:
+            done, total = self.parsed_files, self.total_files
+        return round(100.0 * done / total, 1) if total else 0.0
+
+
+class ImportStagingRowResponse(BaseModel):
+    id: int
+    file_name: str
+    status: str
+    is_valid: bool
+    member_id: Optional[int] = None
+    error: Optional[str] = None
+    data: ImportMemberRow
+
+    model_config = ConfigDict(from_attributes=True)
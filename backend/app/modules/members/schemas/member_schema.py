@@ -448,6 +448,36 @@ class MemberListResponse(BaseModel):
     }
 
 
+class MemberListItem(BaseModel):
+    """Item da listagem paginada por cursor. Com `fields`, só os campos pedidos vêm na resposta."""
+
+    id: int | None = Field(None, description="ID interno")
+    full_name: str | None = Field(None, description="Nome do irmão")
+    email: str | None = Field(None, description="E-mail")
+    status: MemberStatusEnum | None = Field(None, description="Status do irmão")
+    degree: int | None = Field(None, description="Grau do irmão (1-33)", ge=1, le=33)
+    is_installed: bool | None = Field(None, description="Flag Mestre Instalado")
+    registration_status: RegistrationStatusEnum | None = Field(None, description="Status do cadastro")
+    profile_picture_path: str | None = Field(None, description="Caminho foto perfil")
+    phone: str | None = Field(None, description="Telefone")
+    birth_date: date | None = Field(None, description="Data de nascimento")
+    active_role: str | None = Field(None, description="Cargo atual na loja")
+
+
+class MemberListPage(BaseModel):
+    items: list[MemberListItem]
+    next_cursor: str | None = Field(None, description="Cursor da próxima página (ausente na última)")
+
+    model_config = {
+        "json_schema_extra": {
+            "example": {
+                "items": [{"id": 10, "full_name": "João da Silva", "active_role": "Venerável Mestre"}],
+                "next_cursor": "WyJKb8OjbyBkYSBTaWx2YSIsIDEwXQ",
+            }
+        }
+    }
+
+
 class MemberResponse(MemberBase):
     id: int = Field(..., description="ID interno")
     created_at: datetime = Field(..., description="Data de criação")
@@ -0,0 +1,238 @@
+import calendar
+from datetime import date, timedelta
+from typing import Iterable, List, Optional
+
+from sqlalchemy import and_, delete, event, insert, or_
+from sqlalchemy.orm import Session
+
+from models import models
+
+MASONIC_EVENT_KINDS = {
+    models.EventTypeEnum.INITIATION: models.AnniversaryKindEnum.INITIATION,
+    models.EventTypeEnum.ELEVATION: models.AnniversaryKindEnum.ELEVATION,
+    models.EventTypeEnum.EXALTATION: models.AnniversaryKindEnum.EXALTATION,
+}
+
+# Escritas nesses modelos alteram as datas comemorativas do obreiro (atributo com o id do obreiro)
+_SOURCE_MODELS = {
+    models.Member: "id",
+    models.FamilyMember: "member_id",
+    models.MasonicEvent: "member_id",
+    models.MemberLodgeAssociation: "member_id",
+}
+
+
+def _index_row(assoc, kind, ref_date: date, display_name: str, family_member_id=None, relationship_type=None) -> dict:
+    return {
+        "lodge_id": assoc.lodge_id,
+        "member_id": assoc.id,
+        "family_member_id": family_member_id,
+        "kind": str(kind),
+        "month": ref_date.month,
+        "day": ref_date.day,
+        "original_date": ref_date,
+        "display_name": display_name,
+        "member_name": assoc.full_name,
+        "relationship_type": relationship_type,
+    }
+
+
+def _index_rows(db: Session, member_ids: Optional[Iterable[int]] = None, lodge_id: Optional[int] = None) -> List[dict]:
+    """Monta as linhas do índice para os obreiros ativos filtrados por id e/ou loja (3 consultas, sem N+1)."""
+    assoc_query = (
+        db.query(
+            models.MemberLodgeAssociation.lodge_id,
+            models.Member.id,
+            models.Member.full_name,
+            models.Member.birth_date,
+            models.Member.marriage_date,
+        )
+        .join(models.Member, models.Member.id == models.MemberLodgeAssociation.member_id)
+        .filter(models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE)
+    )
+    if member_ids is not None:
+        assoc_query = assoc_query.filter(models.MemberLodgeAssociation.member_id.in_(list(member_ids)))
+    if lodge_id is not None:
+        assoc_query = assoc_query.filter(models.MemberLodgeAssociation.lodge_id == lodge_id)
+    associations = assoc_query.all()
+    if not associations:
+        return []
+
+    active_ids = {a.id for a in associations}
+    masonic_dates = (
+        db.query(models.MasonicEvent.member_id, models.MasonicEvent.event_type, models.MasonicEvent.session_date)
+        .filter(
+            models.MasonicEvent.member_id.in_(active_ids),
+            models.MasonicEvent.event_type.in_(list(MASONIC_EVENT_KINDS)),
+            models.MasonicEvent.session_date.isnot(None),
+        )
+        .all()
+    )
+    family_dates = (
+        db.query(
+            models.FamilyMember.id,
+            models.FamilyMember.member_id,
+            models.FamilyMember.full_name,
+            models.FamilyMember.relationship_type,
+            models.FamilyMember.birth_date,
+        )
+        .filter(
+            models.FamilyMember.member_id.in_(active_ids),
+            models.FamilyMember.is_deceased == False,  # noqa: E712
+            models.FamilyMember.birth_date.isnot(None),
+        )
+        .all()
+    )
+
+    masonic_by_member, family_by_member = {}, {}
+    for row in masonic_dates:
+        masonic_by_member.setdefault(row.member_id, []).append(row)
+    for row in family_dates:
+        family_by_member.setdefault(row.member_id, []).append(row)
+
+    rows = []
+    for assoc in associations:
+        if assoc.birth_date:
+            rows.append(_index_row(assoc, models.AnniversaryKindEnum.BIRTHDAY, assoc.birth_date, assoc.full_name))
+        if assoc.marriage_date:
+            rows.append(_index_row(assoc, models.AnniversaryKindEnum.WEDDING, assoc.marriage_date, assoc.full_name))
+        for ev in masonic_by_member.get(assoc.id, []):
+            rows.append(_index_row(assoc, MASONIC_EVENT_KINDS[ev.event_type], ev.session_date, assoc.full_name))
+        for fm in family_by_member.get(assoc.id, []):
+            rel_type = fm.relationship_type.value if hasattr(fm.relationship_type, "value") else str(fm.relationship_type)
+            rows.append(
+                _index_row(assoc, models.AnniversaryKindEnum.FAMILY_BIRTHDAY, fm.birth_date, fm.full_name, fm.id, rel_type)
+            )
+    return rows
+
+
+def refresh_member_anniversaries(db: Session, member_ids: Iterable[int]) -> int:
+    """Regrava as linhas do índice dos obreiros informados (em todas as lojas). Não faz commit."""
+    member_ids = list(set(member_ids))
+    if not member_ids:
+        return 0
+    db.execute(
+        delete(models.AnniversaryIndex).where(models.AnniversaryIndex.member_id.in_(member_ids)),
+        execution_options={"synchronize_session": False},
+    )
+    rows = _index_rows(db, member_ids=member_ids)
+    if rows:
+        db.execute(insert(models.AnniversaryIndex), rows)
+    return len(rows)
+
+
+def rebuild_anniversary_index(db: Session, lodge_id: Optional[int] = None) -> int:
+    """Reconstrói o índice de uma loja (ou de todas). Usado no backfill e na tarefa agendada de consistência."""
+    stmt = delete(models.AnniversaryIndex)
+    if lodge_id is not None:
+        stmt = stmt.where(models.AnniversaryIndex.lodge_id == lodge_id)
+    db.execute(stmt, execution_options={"synchronize_session": False})
+    rows = _index_rows(db, lodge_id=lodge_id)
+    if rows:
+        db.execute(insert(models.AnniversaryIndex), rows)
+    db.commit()
+    return len(rows)
+
+
+def _month_segments(start: date, end: date):
+    """Quebra [start, end] em trechos (ano, mês, dia_inicial, dia_final) dentro de cada mês."""
+    current = start
+    while current <= end:
+        last_day = calendar.monthrange(current.year, current.month)[1]
+        segment_end = min(end, date(current.year, current.month, last_day))
+        yield current.year, current.month, current.day, segment_end.day
+        current = segment_end + timedelta(days=1)
+
+
+def _display_title(row) -> str:
+    if row.kind == models.AnniversaryKindEnum.FAMILY_BIRTHDAY:
+        return f"{row.display_name} ({row.relationship_type} do Ir. {row.member_name})"
+    return f"Ir. {row.display_name}"
+
+
+def get_anniversaries_between(
+    db: Session, lodge_id: int, start: date, end: date, kinds: Optional[Iterable[str]] = None
+) -> List[dict]:
+    """
+    Datas comemorativas da loja com ocorrência entre start e end (inclusive), ordenadas por data.
+    Leitura por faixa no índice (lodge_id, month, day); 29/02 ocorre em 28/02 nos anos não bissextos.
+    """
+    segments = list(_month_segments(start, end))
+    if not segments:
+        return []
+
+    conditions = []
+    for year, month, first_day, last_day in segments:
+        if month == 2 and last_day == 28 and not calendar.isleap(year):
+            last_day = 29
+        conditions.append(
+            and_(
+                models.AnniversaryIndex.month == month,
+                models.AnniversaryIndex.day.between(first_day, last_day),
+            )
+        )
+
+    query = db.query(models.AnniversaryIndex).filter(models.AnniversaryIndex.lodge_id == lodge_id, or_(*conditions))
+    if kinds is not None:
+        query = query.filter(models.AnniversaryIndex.kind.in_([str(k) for k in kinds]))
+
+    results = []
+    for row in query.all():
+        for year, month, first_day, last_day in segments:
+            if row.month != month:
+                continue
+            day = min(row.day, calendar.monthrange(year, month)[1])
+            if first_day <= day <= last_day:
+                results.append(
+                    {
+                        "member_id": row.member_id,
+                        "family_member_id": row.family_member_id,
+                        "type": row.kind,
+                        "title": _display_title(row),
+                        "date": date(year, month, day),
+                    }
+                )
+    results.sort(key=lambda x: x["date"])
+    return results
+
+
+def get_anniversaries_for_month(
+    db: Session, lodge_id: int, year: int, month: int, kinds: Optional[Iterable[str]] = None
+) -> List[dict]:
+    last_day = calendar.monthrange(year, month)[1]
+    return get_anniversaries_between(db, lodge_id, date(year, month, 1), date(year, month, last_day), kinds)
+
+
+# --- Manutenção automática ---
+# Os obreiros afetados são coletados a cada flush; antes do commit, suas linhas do índice
+# são regravadas na mesma transação (rollback descarta tudo junto).
+
+
+def _pending_members(session: Session) -> set:
+    return session.info.setdefault("anniversary_pending_members", set())
+
+
+def mark_members_changed(session: Session, member_ids: Iterable[int]) -> None:
+    """Agenda a regravação do índice para escritas feitas fora do unit of work (bulk/Core)."""
+    _pending_members(session).update(member_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_anniversary_changes(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        attr = _SOURCE_MODELS.get(type(obj))
+        if attr is not None and getattr(obj, attr, None) is not None:
+            _pending_members(session).add(getattr(obj, attr))
+
+
+@event.listens_for(Session, "before_commit")
+def _refresh_anniversary_index(session):
+    session.flush()
+    pending = session.info.pop("anniversary_pending_members", None)
+    if pending:
+        refresh_member_anniversaries(session, pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_anniversary_changes(session):
+    session.info.pop("anniversary_pending_members", None)
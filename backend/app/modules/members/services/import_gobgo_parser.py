@@ -2,6 +2,99 @@ import re
 from typing import List, Optional, Dict, Any
 from app.modules.members.schemas.import_schemas import ImportMemberRow
 
+# Padrões compilados uma única vez (o parser roda milhares de vezes numa importação em lote)
+
+# --- Limpeza de valores ---
+_GARBAGE_CHARS = re.compile(r'[^a-zA-Z0-9À-Úà-ú\s/\-.,ºª()]')
+# Sobras do PDF (marcas d'água, numeração) no fim e no começo do valor, removidas de uma vez
+_TRAILING_NOISE = re.compile(r'(?:\s+(?:\d\.?|[A-Z]:|\d{1,2}(?:\s+\d{1,2})+))+$')
+_LEADING_DIGITS = re.compile(r'^(?:\d+\s+)+')
+_TITLE_EXCEPTIONS = r'(?:de|da|do|das|dos|e)'
+# Inicial de cada palavra (exceto preposições isoladas) e letras após parênteses/hífen
+_TITLE_INITIAL = re.compile(rf'(?:^|(?<=\s))(?!{_TITLE_EXCEPTIONS}(?:\s|$))[a-z]|(?<=[\(\)-])[a-z]')
+_NON_DIGITS = re.compile(r'\D')
+_LODGE_STRING = re.compile(r'^(\d+)\s*[^\w\s]+\s*(.+)$')
+
+# --- Campos simples ---
+_CIM = re.compile(r'CIM\s+(\d+)\s*\|')
+_NAME = re.compile(r'Nome\s+(.*?)(?:\n|$)', re.IGNORECASE)
+_EMAIL = re.compile(r'Email[\s\S]{0,30}?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)', re.IGNORECASE)
+_CPF = re.compile(r'CPF\s+([\d\.\-\*]+)')
+_RG = re.compile(r'RG\s+([\d\.\-\*a-zA-Z\s]+)')
+_DEGREE = re.compile(r'CIM\s+\d+\s*\|\s*([^|]+)\s*\|')
+_MARITAL = re.compile(r'Estado Civil\s+(.*?)(?:\n|$)')
+_FATHER = re.compile(r'Pai\s+(.*?)(?:\n|$)')
+_MOTHER = re.compile(r'M.e\s+(.*?)(?:\n|$)')
+_BIRTH_DATE = re.compile(r'Data Nascimento\s+([\d/]{10})')
+_PLACE_OF_BIRTH = re.compile(r'Naturalidade\s+(.*?)(?:\n|$)')
+_OCCUPATION = re.compile(r'Profiss.o\s+(.*?)(?:\n|$)')
+_EDUCATION = re.compile(r'Escolaridade\s+(.*?)(?:\n|$)')
+_MOBILE = re.compile(r'Celular\s+([\d\(\)\s\-]+)')
+_PHONE = re.compile(r'Telefone\s+([\d\(\)\s\-]+)')
+_ZIP_CODE = re.compile(r'CEP\s+([\d\-]+)')
+_STREET = re.compile(r'Rua\s+(.*?)(?:\n|$)')
+_NEIGHBORHOOD = re.compile(r'Bairro\s+(.*?)(?:\n|$)')
+_CITY = re.compile(r'Cidade\s+(.*?)(?:\n|$)')
+_MOTHER_LODGE = re.compile(r'Loja M.e:\s*(.*?)(?:\n|$)')
+_COLLECTING_LODGE = re.compile(r'Loja de Recolhimento:\s*(.*?)(?:\n|$)')
+_INITIATION_PLACET = re.compile(r'Placete Inicia..o\s+(.*?)(?:\n|$)')
+
+# --- Seções ---
+# Cabeçalhos localizados numa única varredura do texto; cada extrator começa a busca no seu cabeçalho
+# (o lookahead da inicial descarta de imediato as posições que não podem abrir um cabeçalho)
+_SECTION_HEADERS = re.compile(
+    r'(?=[IEFDT])(?:'
+    r'(?P<INITIATION>Inicia..o \(Grau 1\))'
+    r'|(?P<ELEVATION>Eleva..o \(Grau 2\))'
+    r'|(?P<EXALTATION>Exalta..o \(Grau 3\))'
+    r'|(?P<INSTALLATION>Instala..o \(Grau)'
+    r'|(?P<AFFILIATION>FILIA..ES)'
+    r'|(?P<DISMISSAL>DESLIGAMENTOS)'
+    r'|(?P<DIPLOMAS>T.TULOS E DIPLOMAS)'
+    r'|(?P<FAMILY>FAM.LIA))',
+    re.DOTALL | re.IGNORECASE,
+)
+_BLOCK_END = r'.*?(?=\n\s*\n|\n[A-ZÀ-Ú ]+\s*\(Grau|\nFILIA.ES|\nDESLIGAMENTOS|\n[A-ZÀ-Ú ]+$|\Z)'
+_BLOCK_FLAGS = re.DOTALL | re.MULTILINE | re.IGNORECASE
+_MASONIC_BLOCKS = {
+    "INITIATION": re.compile(r'Inicia..o \(Grau 1\)' + _BLOCK_END, _BLOCK_FLAGS),
+    "ELEVATION": re.compile(r'Eleva..o \(Grau 2\)' + _BLOCK_END, _BLOCK_FLAGS),
+    "EXALTATION": re.compile(r'Exalta..o \(Grau 3\)' + _BLOCK_END, _BLOCK_FLAGS),
+    "INSTALLATION": re.compile(r'Instala..o \(Grau' + _BLOCK_END, _BLOCK_FLAGS),
+}
+_BLOCK_SESSION_DATE = re.compile(r'Data\s+S[\s\S]{0,15}?o\s+([\d/]{10})', re.IGNORECASE)
+_BLOCK_ENTRY_DATE = re.compile(r'Data\s+E[\s\S]{0,15}?a\s+([\d/]{10})', re.IGNORECASE)
+_BLOCK_PROCESS = re.compile(r'Processo\s+(.*?)(?=\n|Registro|Loja|Data|$)', re.IGNORECASE)
+_BLOCK_REGISTRY = re.compile(r'Registro\s+(.*?)(?=\n|Loja|Data|Processo|$)', re.IGNORECASE)
+_BLOCK_LODGE = re.compile(r'Loja\s+(.*?)(?=\n|Data|Processo|Registro|CIM|$)', re.IGNORECASE)
+
+_TABLE_END = r'\n(.*?)(?=\n[A-ZÀ-Ú ]+\n|\Z)'
+_TABULAR_SECTIONS = {
+    "AFFILIATION": re.compile(r'FILIA..ES' + _TABLE_END, _BLOCK_FLAGS),
+    "DISMISSAL": re.compile(r'DESLIGAMENTOS' + _TABLE_END, _BLOCK_FLAGS),
+}
+_TABULAR_HEADER_LINE = re.compile(
+    r'^(?:Loja|Data|Processo|Registro|Status|Entrada|Nenhuma(?:\s+informa..o.*)?)$|^(?:Loja\s+Data.*)$', re.IGNORECASE
+)
+_DATE = re.compile(r'(\d{2}/\d{2}/\d{4})')
+_ROW_STATUS = re.compile(r'(ATIVO|INATIVO|REGULAR|IRREGULAR|DESLIGADO|SUSPENSO)$', re.IGNORECASE)
+_ROW_REGISTRY = re.compile(r'(\d+)\s*$')
+
+_DIPLOMAS = re.compile(r'T.TULOS E DIPLOMAS' + _TABLE_END, _BLOCK_FLAGS)
+_DIPLOMA_HEADER_LINE = re.compile(
+    r'^(?:T.tulo|Loja|Data|Registro|Nenhuma(?:\s+informa..o.*)?)$|^(?:Loja\s+Data\s+Registro)$|^(?:T.tulo\s+Loja\s+Data\s+Registro)$',
+    re.IGNORECASE,
+)
+_DIPLOMA_TITLE = re.compile(r'^(.*?)(APRENDIZ|COMPANHEIRO|MA.OM)\s+(.*)$', re.IGNORECASE)
+
+_FAMILY = re.compile(r'FAM.LIA\n(.*?)(?=\nEmitido em|\Z)', re.DOTALL | re.IGNORECASE)
+_SPOUSE = re.compile(r'C.njuge\s+(.*?)(?:\n|$)', re.IGNORECASE)
+_SPOUSE_BIRTH_DATE = re.compile(r'C.njuge.*?Nascimento\s+([\d/]{10})', re.DOTALL | re.IGNORECASE)
+_SPOUSE_PHONE = re.compile(r'C.njuge.*?Telefone\s+(.*?)(?:\n|$)', re.DOTALL | re.IGNORECASE)
+_CHILDREN_HEADER = re.compile(r'Filho\(a\)\s+Nascimento\s+Status', re.IGNORECASE)
+_CHILD = re.compile(r'^([A-ZÀ-Ú ]+?)\s+([\d/]{10})', re.MULTILINE)
+
+
 def sanitize_masked_data(value: str) -> Optional[str]:
     if not value: return None
     if "***" in value: return None
@@ -16,35 +109,19 @@ def parse_date(date_str: str) -> str:
 def to_title_case(text: str) -> str:
     if not text:
         return text
-    exceptions = ["de", "da", "do", "das", "dos", "e"]
-    words = re.split(r'(\s+)', text.lower())
-    result = []
-    for w in words:
-        if w.strip() in exceptions:
-            result.append(w)
-        else:
-            def cap_match(m):
-                return m.group(1) + m.group(2).upper()
-            w = re.sub(r'(^|[\(\)-])([a-z])', cap_match, w)
-            result.append(w)
-            
-    res = "".join(result)
-    res = res.replace("(N ", "(Nº ")
-    return res
+    res = _TITLE_INITIAL.sub(lambda m: m.group(0).upper(), text.lower())
+    return res.replace("(N ", "(Nº ")
 
 def clean_garbage(val: str) -> str:
     if not val: return val
-    val = re.sub(r'[^a-zA-Z0-9À-Úà-ú\s/\-.,ºª()]', '', val).strip()
-    prev = ""
-    while val != prev:
-        prev = val
-        val = re.sub(r'\s+(?:\d\.?|[A-Z]:|\d{1,2}(?:\s+\d{1,2})+)$', '', val)
-        val = re.sub(r'^\d+\s+', '', val) # Strip leading digits like '0 2 '
+    val = _GARBAGE_CHARS.sub('', val).strip()
+    val = _TRAILING_NOISE.sub('', val)
+    val = _LEADING_DIGITS.sub('', val) # Strip leading digits like '0 2 '
     return val.strip()
 
 def format_international_phone(phone_str: str) -> Optional[str]:
     if not phone_str or phone_str == 'ù': return None
-    digits = re.sub(r'\D', '', phone_str)
+    digits = _NON_DIGITS.sub('', phone_str)
     if len(digits) >= 10:
         if not digits.startswith('55'):
             digits = '55' + digits
@@ -53,260 +130,276 @@ def format_international_phone(phone_str: str) -> Optional[str]:
 
 def format_lodge_string(lodge: str) -> str:
     if not lodge: return lodge
-    match = re.match(r'^(\d+)\s*[^\w\s]+\s*(.+)$', lodge)
+    match = _LODGE_STRING.match(lodge)
     if match:
         numero = match.group(1).strip()
         nome = match.group(2).strip()
         return f"Loja {nome}, nº {numero}"
     return lodge
 
+
+def split_sections(text: str) -> Dict[str, int]:
+    """Posição da primeira ocorrência de cada cabeçalho de seção, numa única passada pelo texto."""
+    sections: Dict[str, int] = {}
+    for match in _SECTION_HEADERS.finditer(text):
+        sections.setdefault(match.lastgroup, match.start())
+    return sections
+
+
+def _search_from(pattern: re.Pattern, text: str, sections: Dict[str, int], section: str) -> Optional[re.Match]:
+    start = sections.get(section)
+    return pattern.search(text, start) if start is not None else None
+
+
+def _extract_masonic_block(text: str, sections: Dict[str, int], event_type: str) -> Optional[Dict[str, Any]]:
+    block_match = _search_from(_MASONIC_BLOCKS[event_type], text, sections, event_type)
+    if not block_match: return None
+    block_text = block_match.group(0)
+    data = {}
+    ds_match = _BLOCK_SESSION_DATE.search(block_text)
+    if ds_match: data['session_date'] = parse_date(ds_match.group(1))
+    de_match = _BLOCK_ENTRY_DATE.search(block_text)
+    if de_match: data['entry_date'] = parse_date(de_match.group(1))
+    proc_match = _BLOCK_PROCESS.search(block_text)
+    if proc_match: data['process_number'] = clean_garbage(proc_match.group(1).strip())
+    reg_match = _BLOCK_REGISTRY.search(block_text)
+    if reg_match: data['registry_number'] = clean_garbage(reg_match.group(1).strip())
+    loja_match = _BLOCK_LODGE.search(block_text)
+    if loja_match: data['raw_lodge_name'] = to_title_case(clean_garbage(loja_match.group(1).strip()))
+    return data
+
+
+def _add_masonic_event(row: ImportMemberRow, text: str, sections: Dict[str, int], event_type: str) -> None:
+    block = _extract_masonic_block(text, sections, event_type)
+    if not block: return
+    mapped = {
+        "event_type": event_type,
+        "session_date": block.get("session_date"),
+        "entry_date": block.get("entry_date"),
+        "process_number": block.get("process_number"),
+        "registry_number": block.get("registry_number"),
+        "raw_lodge_name": block.get("raw_lodge_name")
+    }
+    if event_type == "INITIATION" and row.initiation_certificate:
+        mapped["placet_number"] = row.initiation_certificate
+    row.masonic_history.append(mapped)
+
+
+def _parse_tabular_events(row: ImportMemberRow, text: str, sections: Dict[str, int], event_type: str) -> None:
+    # ITERATIVE BLOCKS (AFFILIATIONS, DISMISSALS)
+    match = _search_from(_TABULAR_SECTIONS[event_type], text, sections, event_type)
+    if not match: return
+    block = match.group(1).strip()
+    lines = [ln.strip() for ln in block.split('\n') if ln.strip()]
+    for line in lines:
+        if _TABULAR_HEADER_LINE.match(line):
+            continue
+
+        date_match = _DATE.search(line)
+        if not date_match:
+            continue
+
+        date_str = date_match.group(1)
+        before_date = line[:date_match.start()].strip()
+        after_date = line[date_match.end():].strip()
+
+        ev = {"event_type": event_type}
+        ev["raw_lodge_name"] = format_lodge_string(to_title_case(clean_garbage(before_date)))
+        if event_type == "AFFILIATION":
+            ev["entry_date"] = parse_date(date_str)
+        else:
+            ev["session_date"] = parse_date(date_str)
+
+        status_match = _ROW_STATUS.search(after_date)
+        if status_match:
+            after_date = after_date[:status_match.start()].strip()
+
+        reg_match = _ROW_REGISTRY.search(after_date)
+        if reg_match:
+            ev["registry_number"] = reg_match.group(1)
+            after_date = after_date[:reg_match.start()].strip()
+
+        if after_date:
+            ev["process_number"] = clean_garbage(after_date)
+
+        row.masonic_history.append(ev)
+
+
+def _parse_diplomas(row: ImportMemberRow, text: str, sections: Dict[str, int]) -> None:
+    # TITLES AND DIPLOMAS
+    dip_match = _search_from(_DIPLOMAS, text, sections, "DIPLOMAS")
+    if not dip_match: return
+    block = dip_match.group(1).strip()
+    lines = [ln.strip() for ln in block.split('\n') if ln.strip()]
+    for line in lines:
+        if _DIPLOMA_HEADER_LINE.match(line):
+            continue
+
+        date_match = _DATE.search(line)
+        if date_match:
+            date_str = date_match.group(1)
+            parts = line.split(date_str)
+            title_and_lodge = parts[0].strip()
+            registry = parts[1].strip() if len(parts) > 1 else ""
+
+            m = _DIPLOMA_TITLE.match(title_and_lodge)
+            if m:
+                title = m.group(1) + m.group(2)
+                lodge = m.group(3)
+            else:
+                title = title_and_lodge
+                lodge = ""
+
+            dec = {}
+            dec["title"] = clean_garbage(title)
+            dec["award_date"] = parse_date(date_str)
+
+            remarks_parts = []
+            if lodge:
+                remarks_parts.append(f"Loja: {clean_garbage(lodge)}")
+            if registry:
+                remarks_parts.append(f"Registro: {clean_garbage(registry)}")
+
+            if remarks_parts:
+                dec["remarks"] = ", ".join(remarks_parts)
+
+            row.decorations.append(dec)
+
+
+def _parse_family(row: ImportMemberRow, text: str, sections: Dict[str, int]) -> None:
+    # FAMILY MEMBERS
+    fam_match = _search_from(_FAMILY, text, sections, "FAMILY")
+    if not fam_match: return
+    block = fam_match.group(1)
+
+    # Spouse
+    c_match = _SPOUSE.search(block)
+    if c_match and c_match.group(1).strip() and not c_match.group(1).strip().startswith('ù'):
+        spouse = {"relationship_type": "Esposa", "full_name": to_title_case(clean_garbage(c_match.group(1)))}
+
+        b_match = _SPOUSE_BIRTH_DATE.search(block)
+        if b_match: spouse["birth_date"] = parse_date(b_match.group(1))
+
+        t_match = _SPOUSE_PHONE.search(block)
+        if t_match and t_match.group(1).strip() and not t_match.group(1).strip().startswith('ù'):
+            spouse["phone"] = format_international_phone(t_match.group(1).strip())
+
+        row.family_members.append(spouse)
+
+    # Children
+    child_split = _CHILDREN_HEADER.split(block)
+    if len(child_split) > 1:
+        child_text = child_split[1]
+        for match in _CHILD.finditer(child_text):
+            name = match.group(1).strip()
+            bdate = match.group(2)
+            if name and name != 'C': # Ignore random single letter C from PDF formatting
+                row.family_members.append({
+                    "relationship_type": "Filho",
+                    "full_name": to_title_case(clean_garbage(name)),
+                    "birth_date": parse_date(bdate)
+                })
+
+
 def extract_gob_go_data(text: str) -> Optional[ImportMemberRow]:
     if "FICHA CADASTRAL" not in text and "GRANDE ORIENTE" not in text:
         return None
-        
+
     row = ImportMemberRow()
     warnings = []
-    
+
     # BASIC FIELDS
-    cim_match = re.search(r'CIM\s+(\d+)\s*\|', text)
+    cim_match = _CIM.search(text)
     if cim_match: row.cim = cim_match.group(1).strip()
-    
-    name_match = re.search(r'Nome\s+(.*?)(?:\n|$)', text, re.IGNORECASE)
+
+    name_match = _NAME.search(text)
     if name_match: row.name = to_title_case(clean_garbage(name_match.group(1)))
-        
-    email_match = re.search(r'Email[\s\S]{0,30}?([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)', text, re.IGNORECASE)
+
+    email_match = _EMAIL.search(text)
     if email_match: row.email = email_match.group(1).strip()
-        
-    cpf_match = re.search(r'CPF\s+([\d\.\-\*]+)', text)
+
+    cpf_match = _CPF.search(text)
     if cpf_match:
         val = sanitize_masked_data(cpf_match.group(1))
         row.cpf = val
         if not val and "***" in cpf_match.group(1):
             warnings.append("CPF continha máscara (***) e não foi importado.")
-            
-    rg_match = re.search(r'RG\s+([\d\.\-\*a-zA-Z\s]+)', text)
+
+    rg_match = _RG.search(text)
     if rg_match:
         rg_raw = rg_match.group(1).split(' - ')[0].strip() if ' - ' in rg_match.group(1) else rg_match.group(1).strip()
         val = sanitize_masked_data(rg_raw)
         row.rg = val
         if not val and "***" in rg_raw:
             warnings.append("RG continha máscara (***) e não foi importado.")
-            
-    degree_match = re.search(r'CIM\s+\d+\s*\|\s*([^|]+)\s*\|', text)
+
+    degree_match = _DEGREE.search(text)
     if degree_match:
         degree_str = degree_match.group(1).strip().lower()
         if 'aprendiz' in degree_str: row.degree = '1'
         elif 'companheiro' in degree_str: row.degree = '2'
         elif 'mestre' in degree_str: row.degree = '3'
-            
-    marital_match = re.search(r'Estado Civil\s+(.*?)(?:\n|$)', text)
+
+    marital_match = _MARITAL.search(text)
     if marital_match: row.marital_status = marital_match.group(1).strip()
-        
-    father_match = re.search(r'Pai\s+(.*?)(?:\n|$)', text)
+
+    father_match = _FATHER.search(text)
     if father_match: row.father_name = to_title_case(clean_garbage(father_match.group(1)))
-        
-    mother_match = re.search(r'M.e\s+(.*?)(?:\n|$)', text)
+
+    mother_match = _MOTHER.search(text)
     if mother_match: row.mother_name = to_title_case(clean_garbage(mother_match.group(1)))
-    
+
     # NEW PERSONAL FIELDS
-    bd_match = re.search(r'Data Nascimento\s+([\d/]{10})', text)
+    bd_match = _BIRTH_DATE.search(text)
     if bd_match: row.birth_date = parse_date(bd_match.group(1))
-    
-    pb_match = re.search(r'Naturalidade\s+(.*?)(?:\n|$)', text)
+
+    pb_match = _PLACE_OF_BIRTH.search(text)
     if pb_match: row.place_of_birth = to_title_case(clean_garbage(pb_match.group(1)))
-    
-    prof_match = re.search(r'Profiss.o\s+(.*?)(?:\n|$)', text)
+
+    prof_match = _OCCUPATION.search(text)
     if prof_match: row.occupation = to_title_case(clean_garbage(prof_match.group(1)))
-    
-    edu_match = re.search(r'Escolaridade\s+(.*?)(?:\n|$)', text)
+
+    edu_match = _EDUCATION.search(text)
     if edu_match: row.education_level = to_title_case(clean_garbage(edu_match.group(1)))
-    
-    phone_match = re.search(r'Celular\s+([\d\(\)\s\-]+)', text)
+
+    phone_match = _MOBILE.search(text)
     if phone_match: row.phone = format_international_phone(phone_match.group(1).strip())
     else:
-        phone_alt = re.search(r'Telefone\s+([\d\(\)\s\-]+)', text)
+        phone_alt = _PHONE.search(text)
         if phone_alt: row.phone = format_international_phone(phone_alt.group(1).strip())
-        
-    cep_match = re.search(r'CEP\s+([\d\-]+)', text)
+
+    cep_match = _ZIP_CODE.search(text)
     if cep_match: row.zip_code = cep_match.group(1).strip()
-    
-    rua_match = re.search(r'Rua\s+(.*?)(?:\n|$)', text)
+
+    rua_match = _STREET.search(text)
     if rua_match: row.street_address = clean_garbage(rua_match.group(1))
-    
-    bairro_match = re.search(r'Bairro\s+(.*?)(?:\n|$)', text)
+
+    bairro_match = _NEIGHBORHOOD.search(text)
     if bairro_match: row.neighborhood = to_title_case(clean_garbage(bairro_match.group(1)))
-    
-    cidade_match = re.search(r'Cidade\s+(.*?)(?:\n|$)', text)
+
+    cidade_match = _CITY.search(text)
     if cidade_match: row.city = to_title_case(clean_garbage(cidade_match.group(1)))
 
     # LODGE INFO
-    mother_lodge_match = re.search(r'Loja M.e:\s*(.*?)(?:\n|$)', text)
+    mother_lodge_match = _MOTHER_LODGE.search(text)
     if mother_lodge_match: row.mother_lodge = format_lodge_string(to_title_case(clean_garbage(mother_lodge_match.group(1))))
-    
-    collect_lodge_match = re.search(r'Loja de Recolhimento:\s*(.*?)(?:\n|$)', text)
+
+    collect_lodge_match = _COLLECTING_LODGE.search(text)
     if collect_lodge_match: row.collecting_lodge = format_lodge_string(to_title_case(clean_garbage(collect_lodge_match.group(1))))
-        
-    placet_match = re.search(r'Placete Inicia..o\s+(.*?)(?:\n|$)', text)
+
+    placet_match = _INITIATION_PLACET.search(text)
     if placet_match: row.initiation_certificate = placet_match.group(1).strip()
-        
-    # MASONIC HISTORY BLOCKS
-    def extract_masonic_block(regex_name: str) -> Optional[Dict[str, Any]]:
-        pattern = rf'{regex_name}.*?(?=\n\s*\n|\n[A-ZÀ-Ú ]+\s*\(Grau|\nFILIA.ES|\nDESLIGAMENTOS|\n[A-ZÀ-Ú ]+$|\Z)'
-        block_match = re.search(pattern, text, flags=re.DOTALL | re.MULTILINE | re.IGNORECASE)
-        if not block_match: return None
-        block_text = block_match.group(0)
-        data = {}
-        ds_match = re.search(r'Data\s+S[\s\S]{0,15}?o\s+([\d/]{10})', block_text, re.IGNORECASE)
-        if ds_match: data['session_date'] = parse_date(ds_match.group(1))
-        de_match = re.search(r'Data\s+E[\s\S]{0,15}?a\s+([\d/]{10})', block_text, re.IGNORECASE)
-        if de_match: data['entry_date'] = parse_date(de_match.group(1))
-        proc_match = re.search(r'Processo\s+(.*?)(?=\n|Registro|Loja|Data|$)', block_text, re.IGNORECASE)
-        if proc_match: data['process_number'] = clean_garbage(proc_match.group(1).strip())
-        reg_match = re.search(r'Registro\s+(.*?)(?=\n|Loja|Data|Processo|$)', block_text, re.IGNORECASE)
-        if reg_match: data['registry_number'] = clean_garbage(reg_match.group(1).strip())
-        loja_match = re.search(r'Loja\s+(.*?)(?=\n|Data|Processo|Registro|CIM|$)', block_text, re.IGNORECASE)
-        if loja_match: data['raw_lodge_name'] = to_title_case(clean_garbage(loja_match.group(1).strip()))
-        return data
-
-    def add_event(event_type_enum: str, regex: str):
-        block = extract_masonic_block(regex)
-        if not block: return
-        mapped = {
-            "event_type": event_type_enum,
-            "session_date": block.get("session_date"),
-            "entry_date": block.get("entry_date"),
-            "process_number": block.get("process_number"),
-            "registry_number": block.get("registry_number"),
-            "raw_lodge_name": block.get("raw_lodge_name") 
-        }
-        if event_type_enum == "INITIATION" and row.initiation_certificate:
-            mapped["placet_number"] = row.initiation_certificate
-        row.masonic_history.append(mapped)
-
-    add_event("INITIATION", r'Inicia..o \(Grau 1\)')
-    add_event("ELEVATION", r'Eleva..o \(Grau 2\)')
-    add_event("EXALTATION", r'Exalta..o \(Grau 3\)')
-    add_event("INSTALLATION", r'Instala..o \(Grau')
-    
-    # ITERATIVE BLOCKS (AFFILIATIONS, DISMISSALS)
-    def parse_tabular_events(header_regex, event_type):
-        match = re.search(header_regex + r'\n(.*?)(?=\n[A-ZÀ-Ú ]+\n|\Z)', text, flags=re.DOTALL | re.MULTILINE | re.IGNORECASE)
-        if match:
-            block = match.group(1).strip()
-            lines = [ln.strip() for ln in block.split('\n') if ln.strip()]
-            for line in lines:
-                if re.match(r'^(?:Loja|Data|Processo|Registro|Status|Entrada|Nenhuma(?:\s+informa..o.*)?)$', line, re.IGNORECASE):
-                    continue
-                if re.match(r'^(?:Loja\s+Data.*)$', line, re.IGNORECASE):
-                    continue
-                
-                date_match = re.search(r'(\d{2}/\d{2}/\d{4})', line)
-                if not date_match:
-                    continue
-                    
-                date_str = date_match.group(1)
-                before_date = line[:date_match.start()].strip()
-                after_date = line[date_match.end():].strip()
-                
-                ev = {"event_type": event_type}
-                ev["raw_lodge_name"] = format_lodge_string(to_title_case(clean_garbage(before_date)))
-                if event_type == "AFFILIATION":
-                    ev["entry_date"] = parse_date(date_str)
-                else:
-                    ev["session_date"] = parse_date(date_str)
-                    
-                status_match = re.search(r'(ATIVO|INATIVO|REGULAR|IRREGULAR|DESLIGADO|SUSPENSO)$', after_date, re.IGNORECASE)
-                if status_match:
-                    after_date = after_date[:status_match.start()].strip()
-                    
-                reg_match = re.search(r'(\d+)\s*$', after_date)
-                if reg_match:
-                    ev["registry_number"] = reg_match.group(1)
-                    after_date = after_date[:reg_match.start()].strip()
-                    
-                if after_date:
-                    ev["process_number"] = clean_garbage(after_date)
-                    
-                row.masonic_history.append(ev)
-
-    parse_tabular_events(r'FILIA..ES', "AFFILIATION")
-    parse_tabular_events(r'DESLIGAMENTOS', "DISMISSAL")
 
-    # TITLES AND DIPLOMAS
-    dip_match = re.search(r'T.TULOS E DIPLOMAS\n(.*?)(?=\n[A-ZÀ-Ú ]+\n|\Z)', text, flags=re.DOTALL | re.MULTILINE | re.IGNORECASE)
-    if dip_match:
-        block = dip_match.group(1).strip()
-        lines = [ln.strip() for ln in block.split('\n') if ln.strip()]
-        for line in lines:
-            if re.match(r'^(?:T.tulo|Loja|Data|Registro|Nenhuma(?:\s+informa..o.*)?)$', line, re.IGNORECASE):
-                continue
-            if re.match(r'^(?:Loja\s+Data\s+Registro)$', line, re.IGNORECASE):
-                continue
-            if re.match(r'^(?:T.tulo\s+Loja\s+Data\s+Registro)$', line, re.IGNORECASE):
-                continue
-            
-            date_match = re.search(r'(\d{2}/\d{2}/\d{4})', line)
-            if date_match:
-                date_str = date_match.group(1)
-                parts = line.split(date_str)
-                title_and_lodge = parts[0].strip()
-                registry = parts[1].strip() if len(parts) > 1 else ""
-                
-                m = re.match(r'^(.*?)(APRENDIZ|COMPANHEIRO|MA.OM)\s+(.*)$', title_and_lodge, re.IGNORECASE)
-                if m:
-                    title = m.group(1) + m.group(2)
-                    lodge = m.group(3)
-                else:
-                    title = title_and_lodge
-                    lodge = ""
-                
-                dec = {}
-                dec["title"] = clean_garbage(title)
-                dec["award_date"] = parse_date(date_str)
-                
-                remarks_parts = []
-                if lodge:
-                    remarks_parts.append(f"Loja: {clean_garbage(lodge)}")
-                if registry:
-                    remarks_parts.append(f"Registro: {clean_garbage(registry)}")
-                
-                if remarks_parts:
-                    dec["remarks"] = ", ".join(remarks_parts)
-                    
-                row.decorations.append(dec)
+    sections = split_sections(text)
 
-    # FAMILY MEMBERS
-    fam_match = re.search(r'FAM.LIA\n(.*?)(?=\nEmitido em|\Z)', text, re.DOTALL | re.IGNORECASE)
-    if fam_match:
-        block = fam_match.group(1)
-        
-        # Spouse
-        c_match = re.search(r'C.njuge\s+(.*?)(?:\n|$)', block, re.IGNORECASE)
-        if c_match and c_match.group(1).strip() and not c_match.group(1).strip().startswith('ù'):
-            spouse = {"relationship_type": "Esposa", "full_name": to_title_case(clean_garbage(c_match.group(1)))}
-            
-            b_match = re.search(r'C.njuge.*?Nascimento\s+([\d/]{10})', block, re.DOTALL | re.IGNORECASE)
-            if b_match: spouse["birth_date"] = parse_date(b_match.group(1))
-            
-            t_match = re.search(r'C.njuge.*?Telefone\s+(.*?)(?:\n|$)', block, re.DOTALL | re.IGNORECASE)
-            if t_match and t_match.group(1).strip() and not t_match.group(1).strip().startswith('ù'):
-                spouse["phone"] = format_international_phone(t_match.group(1).strip())
-                
-            row.family_members.append(spouse)
-            
-        # Children
-        child_split = re.split(r'Filho\(a\)\s+Nascimento\s+Status', block, flags=re.IGNORECASE)
-        if len(child_split) > 1:
-            child_text = child_split[1]
-            for match in re.finditer(r'^([A-ZÀ-Ú ]+?)\s+([\d/]{10})', child_text, re.MULTILINE):
-                name = match.group(1).strip()
-                bdate = match.group(2)
-                if name and name != 'C': # Ignore random single letter C from PDF formatting
-                    row.family_members.append({
-                        "relationship_type": "Filho",
-                        "full_name": to_title_case(clean_garbage(name)),
-                        "birth_date": parse_date(bdate)
-                    })
+    # MASONIC HISTORY BLOCKS
+    for event_type in ("INITIATION", "ELEVATION", "EXALTATION", "INSTALLATION"):
+        _add_masonic_event(row, text, sections, event_type)
+
+    _parse_tabular_events(row, text, sections, "AFFILIATION")
+    _parse_tabular_events(row, text, sections, "DISMISSAL")
+    _parse_diplomas(row, text, sections)
+    _parse_family(row, text, sections)
 
     row.warnings = warnings
     return row
@@ -0,0 +1,354 @@
+"""
+Gravação em lote de obreiros vindos da importação (fichas GOB-GO / planilhas).
+
+Por bloco de linhas: os cadastros existentes são buscados por CIM, e-mail e telefone em consultas IN
+(só as colunas comparadas, sem carregar objetos ORM), novos e alterados são gravados com
+bulk_insert_mappings / bulk_update_mappings e os históricos (eventos maçônicos, familiares e
+condecorações) são mesclados: itens iguais ficam, os alterados são atualizados, só o que sumiu
+da ficha é apagado.
+
+As escritas em massa não passam pelo after_flush, então o índice de aniversários, o cache do
+dashboard e o mapa de telefones do WhatsApp são agendados explicitamente para o commit.
+Nenhum método faz commit.
+"""
+
+import enum
+import secrets
+from datetime import date
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.modules.access_control.utils.password_utils import hash_password
+from app.modules.communication.services.whatsapp_webhook_service import mark_phone_lookup_stale
+from app.modules.core.services.dashboard_service import mark_dashboard_stale
+from app.modules.members.models import (
+    Decoration,
+    FamilyMember,
+    MasonicEvent,
+    Member,
+    MemberLodgeAssociation,
+    RegistrationStatusEnum,
+)
+from app.modules.members.schemas.import_schemas import ImportMemberRow
+from app.modules.members.services.anniversary_service import mark_members_changed
+from app.shared.utils.bulk import DEFAULT_CHUNK_SIZE, chunked, query_in
+from app.shared.utils.validators import normalize_phone, normalize_search_text, phone_variants
+
+# Campos da ficha copiados para o cadastro (só sobrescrevem quando vierem preenchidos)
+MEMBER_FIELDS = {
+    "name": "full_name",
+    "email": "email",
+    "cpf": "cpf",
+    "marital_status": "marital_status",
+    "father_name": "father_name",
+    "mother_name": "mother_name",
+    "blood_type": "blood_type",
+    "place_of_birth": "place_of_birth",
+    "education_level": "education_level",
+    "occupation": "occupation",
+    "zip_code": "zip_code",
+    "street_address": "street_address",
+    "neighborhood": "neighborhood",
+    "city": "city",
+}
+
+_PREFETCH_COLUMNS = (
+    Member.id,
+    Member.cim,
+    Member.email,
+    Member.phone,
+    Member.phone_normalized,
+    Member.degree,
+    Member.birth_date,
+    *(getattr(Member, target) for target in MEMBER_FIELDS.values() if target != "email"),
+)
+
+
+class RowOutcome(NamedTuple):
+    """Resultado de uma linha: obreiro gravado ou motivo de ter sido ignorada."""
+
+    member_id: Optional[int]
+    error: Optional[str] = None
+
+
+def _as_date(value) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+# --- Históricos: montagem dos registros e chave de comparação ---
+
+
+def _masonic_events(row: ImportMemberRow) -> List[dict]:
+    return [
+        {
+            "event_type": ev.get("event_type"),
+            "session_date": _as_date(ev.get("session_date")),
+            "entry_date": _as_date(ev.get("entry_date")),
+            "process_number": ev.get("process_number"),
+            "registry_number": ev.get("registry_number"),
+            "placet_number": ev.get("placet_number"),
+            "quit_placet_number": ev.get("quit_placet_number"),
+        }
+        for ev in row.masonic_history
+        if ev.get("event_type")
+    ]
+
+
+def _family_members(row: ImportMemberRow) -> List[dict]:
+    return [
+        {
+            "relationship_type": fm.get("relationship_type"),
+            "full_name": fm.get("full_name"),
+            "birth_date": _as_date(fm.get("birth_date")),
+            "phone": fm.get("phone"),
+            "phone_normalized": normalize_phone(fm.get("phone")),
+        }
+        for fm in row.family_members
+        if fm.get("full_name") and fm.get("relationship_type")
+    ]
+
+
+def _decorations(row: ImportMemberRow) -> List[dict]:
+    return [
+        {
+            "title": dec.get("title"),
+            "award_date": _as_date(dec.get("award_date")),
+            "remarks": dec.get("remarks"),
+        }
+        for dec in row.decorations
+        if dec.get("title") and _as_date(dec.get("award_date"))
+    ]
+
+
+def _same(current, value) -> bool:
+    """Compara o valor lido do banco com o da ficha (enums voltam como membros; a ficha traz nome ou valor)."""
+    if isinstance(current, enum.Enum):
+        return value in (current, current.name, current.value)
+    return current == value
+
+
+class _ChildCollection(NamedTuple):
+    model: type
+    build: Callable[[ImportMemberRow], List[dict]]
+    key: Callable[[dict], tuple]
+
+
+_CHILD_COLLECTIONS = (
+    _ChildCollection(
+        MasonicEvent, _masonic_events,
+        lambda ev: (getattr(ev["event_type"], "name", ev["event_type"]), ev["session_date"]),
+    ),
+    _ChildCollection(
+        FamilyMember, _family_members,
+        lambda fm: (getattr(fm["relationship_type"], "value", fm["relationship_type"]), fm["full_name"].casefold()),
+    ),
+    _ChildCollection(Decoration, _decorations, lambda dec: (dec["title"], dec["award_date"])),
+)
+
+
+class MemberBulkUpsertService:
+    """
+    Grava linhas de importação em blocos de `chunk_size`. O mesmo CIM/e-mail/telefone repetido
+    no lote resolve para o mesmo obreiro (as linhas seguintes atualizam o cadastro recém-criado).
+    """
+
+    def __init__(self, db: Session, lodge_id: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.db = db
+        self.lodge_id = lodge_id
+        self.chunk_size = chunk_size
+        self.counts = {"created": 0, "updated": 0, "skipped": 0}
+
+    def upsert(self, rows: Iterable[ImportMemberRow]) -> List[RowOutcome]:
+        """Grava as linhas e devolve um RowOutcome por linha, na mesma ordem. Acumula self.counts."""
+        outcomes: List[RowOutcome] = []
+        for chunk in chunked(rows, self.chunk_size):
+            outcomes.extend(self._upsert_chunk(chunk))
+        return outcomes
+
+    # --- Obreiros ---
+
+    def _prefetch(self, rows: Sequence[ImportMemberRow]) -> List[dict]:
+        query = self.db.query(*_PREFETCH_COLUMNS)
+        found: Dict[int, dict] = {}
+        for column, values in (
+            (Member.cim, {row.cim for row in rows if row.cim}),
+            (Member.email, {row.email for row in rows if row.email}),
+            (Member.cpf, {row.cpf for row in rows if row.cpf}),
+            (Member.phone_normalized, {v for row in rows for v in phone_variants(row.phone)}),
+        ):
+            for record in query_in(query, column, values, self.chunk_size):
+                found.setdefault(record.id, dict(record._mapping))
+        return sorted(found.values(), key=lambda record: record["id"])
+
+    def _upsert_chunk(self, rows: List[ImportMemberRow]) -> List[RowOutcome]:
+        outcomes: List[Optional[RowOutcome]] = [None] * len(rows)
+        pending = []
+        for position, row in enumerate(rows):
+            if not row.is_valid:
+                outcomes[position] = RowOutcome(None, "; ".join(row.errors) or None)
+                self.counts["skipped"] += 1
+            else:
+                pending.append((position, row))
+        if not pending:
+            return outcomes
+
+        by_cim, by_email, by_cpf, by_phone = {}, {}, {}, {}
+
+        def register(record: dict) -> None:
+            if record.get("cim"):
+                by_cim.setdefault(record["cim"], record)
+            if record.get("email"):
+                by_email.setdefault(record["email"], record)
+            if record.get("cpf"):
+                by_cpf.setdefault(record["cpf"], record)
+            if record.get("phone_normalized"):
+                by_phone.setdefault(record["phone_normalized"], record)
+
+        def phone_owner(phone) -> Optional[dict]:
+            return next((by_phone[v] for v in phone_variants(phone) if v in by_phone), None)
+
+        for record in self._prefetch([row for _, row in pending]):
+            register(record)
+
+        new_records: List[dict] = []
+        changes: Dict[int, dict] = {}
+        phones_changed = False
+        touched = []  # (posição, linha, registro)
+        for position, row in pending:
+            record = (row.cim and by_cim.get(row.cim)) or (row.email and by_email.get(row.email)) or phone_owner(row.phone)
+            if record is None:
+                if not row.email:
+                    outcomes[position] = RowOutcome(None, "E-mail obrigatório para novo cadastro.")
+                    self.counts["skipped"] += 1
+                    continue
+                record = {
+                    "cim": row.cim,
+                    "email": row.email,
+                    "password_hash": hash_password(secrets.token_urlsafe(16)),
+                    "registration_status": RegistrationStatusEnum.PENDING,
+                    "degree": 1,
+                    "birth_date": None,
+                    "phone": None,
+                    "phone_normalized": None,
+                    "search_name": None,
+                    **{target: None for target in MEMBER_FIELDS.values() if target != "email"},
+                }
+                new_records.append(record)
+                self.counts["created"] += 1
+            else:
+                self.counts["updated"] += 1
+
+            diff = self._member_diff(record, row, by_email, by_cpf, phone_owner)
+            if "phone_normalized" in diff:
+                phones_changed = True
+            record.update(diff)
+            if "id" in record and diff:
+                changes.setdefault(record["id"], {"id": record["id"]}).update(diff)
+            register(record)
+            touched.append((position, row, record))
+
+        if new_records:
+            # return_defaults devolve os ids gerados nos próprios dicts (RETURNING em lote no PostgreSQL)
+            self.db.bulk_insert_mappings(Member, new_records, return_defaults=True)
+            phones_changed = phones_changed or any(record["phone_normalized"] for record in new_records)
+        if changes:
+            self.db.bulk_update_mappings(Member, list(changes.values()))
+
+        member_ids = {record["id"] for _, _, record in touched}
+        self._associate(member_ids)
+        for collection in _CHILD_COLLECTIONS:
+            self._merge_children(collection, touched)
+
+        mark_members_changed(self.db, member_ids)
+        mark_dashboard_stale(self.db)
+        if phones_changed:
+            mark_phone_lookup_stale(self.db)
+
+        for position, _, record in touched:
+            outcomes[position] = RowOutcome(record["id"])
+        return outcomes
+
+    @staticmethod
+    def _member_diff(record: dict, row: ImportMemberRow, by_email: dict, by_cpf: dict, phone_owner) -> dict:
+        """Campos da ficha que diferem do cadastro. Valores vazios nunca apagam o que já existe."""
+        wanted = {target: getattr(row, source) for source, target in MEMBER_FIELDS.items() if getattr(row, source)}
+        # E-mail ou CPF de outro cadastro violaria o índice único: mantém o atual
+        if "email" in wanted and by_email.get(wanted["email"], record) is not record:
+            del wanted["email"]
+        if "cpf" in wanted and by_cpf.get(wanted["cpf"], record) is not record:
+            del wanted["cpf"]
+        if row.cim and not record.get("cim"):
+            wanted["cim"] = row.cim
+        if row.degree:
+            wanted["degree"] = int(row.degree)
+        if _as_date(row.birth_date):
+            wanted["birth_date"] = _as_date(row.birth_date)
+        owner = phone_owner(row.phone)
+        if row.phone and (owner is None or owner is record):
+            wanted["phone"] = row.phone
+            wanted["phone_normalized"] = normalize_phone(row.phone)
+        diff = {field: value for field, value in wanted.items() if record.get(field) != value}
+        # Colunas derivadas que o @validates do modelo manteria (bulk não passa pelos validadores)
+        if "full_name" in diff:
+            diff["search_name"] = normalize_search_text(diff["full_name"])
+        return diff
+
+    def _associate(self, member_ids: set) -> None:
+        if self.lodge_id is None or not member_ids:
+            return
+        query = self.db.query(MemberLodgeAssociation.member_id).filter(MemberLodgeAssociation.lodge_id == self.lodge_id)
+        associated = {member_id for (member_id,) in query_in(query, MemberLodgeAssociation.member_id, member_ids)}
+        missing = sorted(member_ids - associated)
+        if missing:
+            self.db.bulk_insert_mappings(
+                MemberLodgeAssociation, [{"member_id": member_id, "lodge_id": self.lodge_id} for member_id in missing]
+            )
+
+    # --- Históricos ---
+
+    def _merge_children(self, collection: _ChildCollection, touched: list) -> None:
+        """
+        Mescla a coleção dos obreiros cuja ficha a trouxe preenchida (fichas sem a seção não apagam nada).
+        Itens são pareados pela chave da coleção; campos alterados viram UPDATE e os que sobraram, DELETE.
+        """
+        incoming: Dict[int, List[dict]] = {}
+        for _, row, record in touched:
+            items = collection.build(row)
+            if items:
+                incoming[record["id"]] = items
+        if not incoming:
+            return
+
+        model = collection.model
+        fields = list(next(iter(incoming.values()))[0])
+        existing: Dict[tuple, List[dict]] = {}
+        query = self.db.query(model.id, model.member_id, *(getattr(model, field) for field in fields))
+        for child in query_in(query.order_by(model.id), model.member_id, incoming, self.chunk_size):
+            child = dict(child._mapping)
+            existing.setdefault((child["member_id"], collection.key(child)), []).append(child)
+
+        inserts, updates = [], []
+        for member_id, items in incoming.items():
+            for item in items:
+                matches = existing.get((member_id, collection.key(item)))
+                if not matches:
+                    inserts.append({"member_id": member_id, **item})
+                    continue
+                current = matches.pop(0)
+                diff = {field: value for field, value in item.items() if not _same(current[field], value)}
+                if diff:
+                    updates.append({"id": current["id"], **diff})
+
+        stale_ids = [child["id"] for matches in existing.values() for child in matches]
+        for chunk in chunked(stale_ids, self.chunk_size):
+            self.db.query(model).filter(model.id.in_(chunk)).delete(synchronize_session=False)
+        if updates:
+            self.db.bulk_update_mappings(model, updates)
+        if inserts:
+            self.db.bulk_insert_mappings(model, inserts)
@@ -0,0 +1,392 @@
+"""
+Importação de obreiros em segundo plano.
+
+Fluxo: upload (gravado em disco em blocos) -> leitura das fichas num pool de processos
+(um arquivo por worker) -> linhas persistidas em member_import_staging_rows -> confirmação
+gravando em lotes com consultas em conjunto (IN) em vez de várias consultas por linha.
+O progresso fica no próprio MemberImportJob e é consultado por polling.
+"""
+
+import asyncio
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import UTC, date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.core.logger import logger
+from app.modules.members.models import MemberImportJob, MemberImportJobStatus, MemberImportStagingRow
+from app.modules.members.schemas.import_schemas import ImportMemberRow
+from app.modules.members.services.member_bulk_upsert_service import MemberBulkUpsertService
+from database import SessionLocal
+
+PARSE_WORKERS = int(os.getenv("MEMBER_IMPORT_PARSE_WORKERS", str(min(4, os.cpu_count() or 1))))
+CONFIRM_CHUNK_SIZE = 100
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Ancorado no módulo (como o storage de member_routes), não no diretório de trabalho do processo;
+# fica fora do /storage servido publicamente pelo main.py
+IMPORT_STORAGE_DIR = Path(__file__).resolve().parent.parent / "storage" / "imports" / "members"
+
+# Cabeçalhos aceitos nas planilhas (minúsculos) -> campo de ImportMemberRow
+EXCEL_HEADERS = {
+    "cim": "cim",
+    "nome": "name",
+    "nome completo": "name",
+    "email": "email",
+    "e-mail": "email",
+    "cpf": "cpf",
+    "rg": "rg",
+    "grau": "degree",
+    "estado civil": "marital_status",
+    "pai": "father_name",
+    "mãe": "mother_name",
+    "tipo sanguíneo": "blood_type",
+    "data nascimento": "birth_date",
+    "data de nascimento": "birth_date",
+    "naturalidade": "place_of_birth",
+    "escolaridade": "education_level",
+    "profissão": "occupation",
+    "telefone": "phone",
+    "celular": "phone",
+    "cep": "zip_code",
+    "endereço": "street_address",
+    "rua": "street_address",
+    "bairro": "neighborhood",
+    "cidade": "city",
+}
+
+
+# --- Pool de processos (leitura das fichas) ---
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+        return _parse_pool
+
+
+def shutdown_parse_pool() -> None:
+    """Encerra o pool de leitura (desligamento da aplicação)."""
+    global _parse_pool
+    with _pool_lock:
+        if _parse_pool is not None:
+            _parse_pool.shutdown(cancel_futures=True)
+            _parse_pool = None
+
+
+# --- Leitura dos arquivos (executada nos processos do pool) ---
+
+
+def _split_fichas(pages: List[str]) -> List[str]:
+    """Agrupa as páginas por ficha: cada 'FICHA CADASTRAL' inicia um novo obreiro (PDFs com várias fichas)."""
+    fichas: List[List[str]] = []
+    for page in pages:
+        if "FICHA CADASTRAL" in page or not fichas:
+            fichas.append([])
+        fichas[-1].append(page)
+    return ["\n".join(ficha) for ficha in fichas]
+
+
+def _parse_pdf(path: str) -> List[ImportMemberRow]:
+    import pdfplumber
+
+    from app.modules.members.services.import_gobgo_parser import extract_gob_go_data
+
+    with pdfplumber.open(path) as pdf:
+        pages = [page.extract_text() or "" for page in pdf.pages]
+    rows = []
+    for text in _split_fichas(pages):
+        row = extract_gob_go_data(text)
+        if row is not None:
+            rows.append(row)
+    return rows
+
+
+def _parse_excel(path: str) -> List[ImportMemberRow]:
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        sheet = workbook.active
+        lines = sheet.iter_rows(values_only=True)
+        header = next(lines, None) or ()
+        fields = [EXCEL_HEADERS.get(str(cell).strip().lower()) if cell is not None else None for cell in header]
+        rows = []
+        for line in lines:
+            values = {}
+            for field, value in zip(fields, line):
+                if field and value not in (None, ""):
+                    values[field] = value.strftime("%Y-%m-%d") if isinstance(value, (date, datetime)) else str(value).strip()
+            if values:
+                rows.append(ImportMemberRow(**values))
+        return rows
+    finally:
+        workbook.close()
+
+
+def validate_import_row(row: ImportMemberRow) -> ImportMemberRow:
+    errors = []
+    if not row.name:
+        errors.append("Nome não encontrado.")
+    if not row.cim and not row.email:
+        errors.append("Informe o CIM ou o e-mail para identificar o obreiro.")
+    if row.degree and not str(row.degree).isdigit():
+        errors.append(f"Grau inválido: {row.degree}.")
+    row.errors = errors
+    row.is_valid = not errors
+    return row
+
+
+def parse_import_file(path: str) -> List[dict]:
+    """Lê um PDF (fichas GOB-GO) ou planilha Excel. Função de módulo para poder rodar no pool de processos."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".pdf":
+        rows = _parse_pdf(path)
+    elif suffix in (".xlsx", ".xlsm"):
+        rows = _parse_excel(path)
+    else:
+        raise ValueError(f"Formato não suportado: {suffix or 'sem extensão'}.")
+    return [validate_import_row(row).model_dump() for row in rows]
+
+
+# --- Criação e leitura do job ---
+
+
+async def create_import_job(
+    db: AsyncSession, files: List[UploadFile], lodge_id: Optional[int], requested_by_id: int, requested_by_type: str
+) -> tuple[MemberImportJob, List[tuple[str, str]]]:
+    """
+    Registra o job e grava os uploads em disco em blocos (sem carregar os arquivos inteiros em memória).
+    Roda no event loop: usa a sessão assíncrona e faz a escrita em disco numa thread.
+    Retorna o job e a lista (caminho, nome original) a ser entregue a run_parse_job.
+    """
+    job = MemberImportJob(
+        lodge_id=lodge_id,
+        requested_by_id=requested_by_id,
+        requested_by_type=requested_by_type,
+        status=MemberImportJobStatus.PENDING,
+        total_files=len(files),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+
+    job_dir = IMPORT_STORAGE_DIR / f"job_{job.id}"
+    await asyncio.to_thread(job_dir.mkdir, parents=True, exist_ok=True)
+    staged = []
+    for position, upload in enumerate(files):
+        original_name = Path(upload.filename or f"arquivo_{position}").name
+        target = job_dir / f"{position:04d}_{original_name}"
+        with target.open("wb") as out:
+            while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+                await asyncio.to_thread(out.write, chunk)
+        staged.append((str(target), original_name))
+    return job, staged
+
+
+def get_import_job(db: Session, job_id: int, lodge_id: Optional[int] = None) -> Optional[MemberImportJob]:
+    """Busca o job; com lodge_id, só retorna se pertencer à loja."""
+    query = db.query(MemberImportJob).filter(MemberImportJob.id == job_id)
+    if lodge_id is not None:
+        query = query.filter(MemberImportJob.lodge_id == lodge_id)
+    return query.first()
+
+
+def get_staging_rows(
+    db: Session, job_id: int, skip: int = 0, limit: int = 100, only_invalid: bool = False
+) -> List[MemberImportStagingRow]:
+    query = db.query(MemberImportStagingRow).filter(MemberImportStagingRow.job_id == job_id)
+    if only_invalid:
+        query = query.filter(MemberImportStagingRow.is_valid.is_(False))
+    return query.order_by(MemberImportStagingRow.id).offset(skip).limit(limit).all()
+
+
+def _finish(job: MemberImportJob, status: MemberImportJobStatus, error: Optional[str] = None) -> None:
+    job.status = status
+    job.error = error
+    job.finished_at = datetime.now(UTC)
+
+
+# --- Etapa 1: leitura (tarefa em segundo plano) ---
+
+
+def run_parse_job(job_id: int, files: List[tuple[str, str]], session_factory: sessionmaker = SessionLocal) -> None:
+    """
+    Distribui os arquivos no pool de processos e grava as linhas de cada um assim que fica pronto,
+    atualizando o progresso. Um arquivo ilegível vira uma linha inválida, sem interromper os demais.
+    """
+    db = session_factory()
+    try:
+        job = db.get(MemberImportJob, job_id)
+        job.status = MemberImportJobStatus.PARSING
+        db.commit()
+
+        pool = _get_parse_pool()
+        futures = {pool.submit(parse_import_file, path): name for path, name in files}
+        for future in as_completed(futures):
+            file_name = futures[future]
+            try:
+                rows = future.result()
+            except Exception as e:
+                logger.warning(
+                    "Falha ao ler arquivo de importação",
+                    extra={"extra_data": {"job_id": job_id, "file": file_name, "error": str(e)}},
+                )
+                rows = [ImportMemberRow(errors=[f"Falha ao ler o arquivo: {e}"]).model_dump()]
+
+            db.add_all(
+                MemberImportStagingRow(job_id=job_id, file_name=file_name, data=row, is_valid=row["is_valid"])
+                for row in rows
+            )
+            job.parsed_files += 1
+            job.total_rows += len(rows)
+            job.valid_rows += sum(1 for row in rows if row["is_valid"])
+            db.commit()
+
+        job.status = MemberImportJobStatus.READY
+        db.commit()
+        logger.info(
+            "Arquivos de importação processados",
+            extra={"extra_data": {"job_id": job_id, "rows": job.total_rows, "valid": job.valid_rows}},
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error("Erro ao processar importação", extra={"extra_data": {"job_id": job_id, "error": str(e)}})
+        job = db.get(MemberImportJob, job_id)
+        if job:
+            _finish(job, MemberImportJobStatus.FAILED, str(e))
+            db.commit()
+    finally:
+        db.close()
+        if files:
+            shutil.rmtree(Path(files[0][0]).parent, ignore_errors=True)
+
+
+# --- Etapa 2: confirmação (gravação em lotes) ---
+
+
+def upsert_member_rows(db: Session, lodge_id: Optional[int], staged_rows: Iterable[MemberImportStagingRow]) -> dict:
+    """
+    Grava um lote de linhas pelo MemberBulkUpsertService e registra status/member_id/erro em cada uma.
+    Retorna as contagens do lote. Não faz commit.
+    """
+    staged_rows = list(staged_rows)
+    service = MemberBulkUpsertService(db, lodge_id, chunk_size=CONFIRM_CHUNK_SIZE)
+    outcomes = service.upsert(ImportMemberRow(**{**staged.data, "is_valid": staged.is_valid}) for staged in staged_rows)
+    for staged, outcome in zip(staged_rows, outcomes):
+        staged.status = "IMPORTADO" if outcome.member_id else "IGNORADO"
+        staged.member_id, staged.error = outcome.member_id, outcome.error
+    db.flush()
+    return service.counts
+
+
+def start_confirmation(db: Session, job: MemberImportJob) -> MemberImportJob:
+    """
+    Marca o job para confirmação. Só jobs já lidos (PRONTO) podem ser confirmados.
+    A troca PRONTO -> IMPORTANDO é um único UPDATE condicional: em confirmações simultâneas
+    (duplo clique) só uma enfileira o job, a outra recebe ValueError.
+    """
+    claimed = (
+        db.query(MemberImportJob)
+        .filter(MemberImportJob.id == job.id, MemberImportJob.status == MemberImportJobStatus.READY)
+        .update({MemberImportJob.status: MemberImportJobStatus.IMPORTING}, synchronize_session=False)
+    )
+    db.commit()
+    if not claimed:
+        db.refresh(job)
+        raise ValueError(f"Importação não está pronta para confirmação (status: {job.status}).")
+    db.refresh(job)
+    return job
+
+
+def _import_chunk(db: Session, job: MemberImportJob, chunk: List[MemberImportStagingRow]) -> dict:
+    """Grava o lote numa transação; se falhar, refaz linha a linha (savepoints) para isolar as problemáticas."""
+    chunk_ids = [staged.id for staged in chunk]
+    try:
+        counts = upsert_member_rows(db, job.lodge_id, chunk)
+        db.commit()
+        return counts
+    except Exception as e:
+        db.rollback()
+        logger.warning(
+            "Lote de importação com erro; gravando linha a linha",
+            extra={"extra_data": {"job_id": job.id, "error": str(e)}},
+        )
+
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    for staged in db.query(MemberImportStagingRow).filter(MemberImportStagingRow.id.in_(chunk_ids)).order_by(
+        MemberImportStagingRow.id
+    ):
+        try:
+            with db.begin_nested():
+                row_counts = upsert_member_rows(db, job.lodge_id, [staged])
+            for key, value in row_counts.items():
+                counts[key] += value
+        except Exception as e:
+            staged.status, staged.error = "IGNORADO", str(e)
+            counts["skipped"] += 1
+    db.commit()
+    return counts
+
+
+def run_confirm_job(job_id: int, session_factory: sessionmaker = SessionLocal) -> None:
+    """Percorre as linhas pendentes em lotes de CONFIRM_CHUNK_SIZE (keyset por id), com commit e progresso por lote."""
+    db = session_factory()
+    try:
+        job = db.get(MemberImportJob, job_id)
+        last_id = 0
+        while True:
+            chunk = (
+                db.query(MemberImportStagingRow)
+                .filter(
+                    MemberImportStagingRow.job_id == job_id,
+                    MemberImportStagingRow.status == "PENDENTE",
+                    MemberImportStagingRow.id > last_id,
+                )
+                .order_by(MemberImportStagingRow.id)
+                .limit(CONFIRM_CHUNK_SIZE)
+                .all()
+            )
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+            counts = _import_chunk(db, job, chunk)
+            job.processed_rows += len(chunk)
+            job.created_count += counts["created"]
+            job.updated_count += counts["updated"]
+            job.skipped_count += counts["skipped"]
+            db.commit()
+
+        _finish(job, MemberImportJobStatus.COMPLETED)
+        db.commit()
+        logger.info(
+            "Importação de obreiros concluída",
+            extra={
+                "extra_data": {
+                    "job_id": job_id,
+                    "created": job.created_count,
+                    "updated": job.updated_count,
+                    "skipped": job.skipped_count,
+                }
+            },
+        )
+    except Exception as e:
+        db.rollback()
+        logger.error("Erro ao confirmar importação", extra={"extra_data": {"job_id": job_id, "error": str(e)}})
+        job = db.get(MemberImportJob, job_id)
+        if job:
+            _finish(job, MemberImportJobStatus.FAILED, str(e))
+            db.commit()
+    finally:
+        db.close()
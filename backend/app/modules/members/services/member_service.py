@@ -1,11 +1,18 @@
+import base64
+import json
 from datetime import date
+from typing import Iterable
 
+from sqlalchemy import select, tuple_
 from sqlalchemy.orm import Session, joinedload
 
 from app.modules.access_control.utils.password_utils import hash_password
 from app.modules.members.schemas import member_schema
 from models import models
 from app.core.logger import logger
+from app.shared.security.cache import user_context_cache
+from app.shared.security.constants import UserTypeEnum
+from app.shared.utils.validators import phone_variants
 
 
 def get_members_by_lodge(db: Session, lodge_id: int, skip: int = 0, limit: int = 100) -> list[models.Member]:
@@ -23,6 +30,120 @@ def get_members_by_lodge(db: Session, lodge_id: int, skip: int = 0, limit: int =
     return members
 
 
+# --- Listagem (projeção de colunas, sem carregar objetos ORM) ---
+
+MEMBER_LIST_FIELDS = (
+    "id",
+    "full_name",
+    "email",
+    "status",
+    "degree",
+    "is_installed",
+    "registration_status",
+    "profile_picture_path",
+    "phone",
+    "birth_date",
+    "active_role",
+)
+
+
+def active_role_subquery(lodge_id: int | None = None):
+    """Nome do cargo em aberto do obreiro (na loja, se informada), como subconsulta correlacionada."""
+    query = (
+        select(models.Role.name)
+        .join(models.RoleHistory, models.RoleHistory.role_id == models.Role.id)
+        .where(models.RoleHistory.member_id == models.Member.id, models.RoleHistory.end_date.is_(None))
+    )
+    if lodge_id is not None:
+        query = query.where(models.RoleHistory.lodge_id == lodge_id)
+    return (
+        query.order_by(models.RoleHistory.start_date.desc(), models.RoleHistory.id.desc())
+        .limit(1)
+        .correlate(models.Member)
+        .scalar_subquery()
+    )
+
+
+def _member_list_query(
+    db: Session,
+    fields: Iterable[str],
+    lodge_id: int | None = None,
+    obedience_id: int | None = None,
+    active_only: bool = False,
+):
+    columns = [
+        active_role_subquery(lodge_id).label(field) if field == "active_role" else getattr(models.Member, field)
+        for field in fields
+    ]
+    query = db.query(*columns)
+    if lodge_id is not None:
+        query = query.join(models.MemberLodgeAssociation).filter(models.MemberLodgeAssociation.lodge_id == lodge_id)
+        if active_only:
+            query = query.filter(models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE)
+    elif obedience_id is not None:
+        query = query.join(models.MemberObedienceAssociation).filter(
+            models.MemberObedienceAssociation.obedience_id == obedience_id
+        )
+    return query.order_by(models.Member.full_name, models.Member.id)
+
+
+def list_members(
+    db: Session, skip: int = 0, limit: int = 100, lodge_id: int | None = None, obedience_id: int | None = None
+) -> list[dict]:
+    """Listagem simplificada por offset (compatibilidade), já com o cargo ativo resolvido no SQL."""
+    query = _member_list_query(db, MEMBER_LIST_FIELDS, lodge_id=lodge_id, obedience_id=obedience_id)
+    return [dict(row._mapping) for row in query.offset(skip).limit(limit)]
+
+
+def encode_member_cursor(full_name: str, member_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([full_name, member_id]).encode()).decode().rstrip("=")
+
+
+def decode_member_cursor(cursor: str) -> tuple[str, int]:
+    """Inverso de encode_member_cursor. Levanta ValueError para cursores inválidos."""
+    try:
+        full_name, member_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception as e:
+        raise ValueError("Cursor inválido.") from e
+    if not isinstance(full_name, str) or not isinstance(member_id, int):
+        raise ValueError("Cursor inválido.")
+    return full_name, member_id
+
+
+def list_members_page(
+    db: Session,
+    cursor: str | None = None,
+    limit: int | None = 50,
+    fields: Iterable[str] | None = None,
+    lodge_id: int | None = None,
+    obedience_id: int | None = None,
+    active_only: bool = False,
+) -> tuple[list[dict], str | None]:
+    """
+    Página da listagem ordenada por (full_name, id), com paginação por cursor (keyset): cada página
+    continua do último item da anterior pelo índice, sem o custo crescente do OFFSET.
+    `fields` restringe as colunas selecionadas; limit=None traz o restante de uma vez.
+    Retorna (itens, cursor da próxima página ou None). Levanta ValueError para limit < 1.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError("limit deve ser maior que zero.")
+    fields = list(MEMBER_LIST_FIELDS if fields is None else fields)
+    # full_name e id sustentam o cursor: selecionados sempre, devolvidos só se pedidos
+    selected = list(dict.fromkeys([*fields, "full_name", "id"]))
+    query = _member_list_query(db, selected, lodge_id=lodge_id, obedience_id=obedience_id, active_only=active_only)
+    if cursor:
+        query = query.filter(tuple_(models.Member.full_name, models.Member.id) > tuple_(*decode_member_cursor(cursor)))
+
+    if limit is not None:
+        query = query.limit(limit + 1)
+    rows = [dict(row._mapping) for row in query]
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_member_cursor(rows[-1]["full_name"], rows[-1]["id"])
+    return [{field: row[field] for field in fields} for row in rows], next_cursor
+
+
 def get_member_in_lodge(db: Session, member_id: int, lodge_id: int) -> models.Member | None:
     """Busca um membro único caso ele esteja associado à loja especificada."""
     return (
@@ -38,6 +159,35 @@ def get_member_by_cim(db: Session, cim: str) -> models.Member | None:
     return db.query(models.Member).filter(models.Member.cim == cim).first()
 
 
+def get_member_id_by_phone(db: Session, phone: str) -> int | None:
+    """
+    Busca exata (indexada) pelo telefone canônico. Aceita qualquer formato de entrada,
+    inclusive o JID do WhatsApp sem o nono dígito.
+    """
+    variants = phone_variants(phone)
+    if not variants:
+        return None
+    return (
+        db.query(models.Member.id)
+        .filter(models.Member.phone_normalized.in_(variants))
+        .order_by(models.Member.id)
+        .limit(1)
+        .scalar()
+    )
+
+
+def ensure_phone_available(db: Session, phone: str | None, member_id: int | None = None) -> None:
+    """Impede que o telefone (em qualquer grafia) seja gravado em um segundo cadastro."""
+    if get_member_id_by_phone(db, phone) not in (None, member_id):
+        raise ValueError("Telefone já cadastrado.")
+
+
+def get_member_by_phone(db: Session, phone: str) -> models.Member | None:
+    """Busca um membro pelo telefone (ver get_member_id_by_phone)."""
+    member_id = get_member_id_by_phone(db, phone)
+    return db.get(models.Member, member_id) if member_id else None
+
+
 def create_member_for_lodge(db: Session, member_data: member_schema.MemberCreateWithAssociation) -> models.Member:
     """Cria um novo membro e o associa automaticamente a uma loja (contexto do Webmaster)."""
     password = member_data.password
@@ -218,6 +368,8 @@ def associate_member_to_lodge(
             db.add(new_role)
 
     db.commit()
+    if association_data.role_id:
+        user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
     db.refresh(db_member)
     return db_member
 
@@ -238,6 +390,9 @@ def update_member_in_lodge(
     masonic_history_data = update_data.pop('masonic_history', None)
     decorations_data = update_data.pop('decorations', None)
 
+    if update_data.get("phone"):
+        ensure_phone_available(db, update_data["phone"], member_id)
+
     for key, value in update_data.items():
         setattr(db_member, key, value)
 
@@ -297,6 +452,7 @@ def add_role_to_member(
     )
     db.add(role_history)
     db.commit()
+    user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
     db.refresh(role_history)
     logger.info("Cargo adicionado ao histórico do membro", extra={"extra_data": {"member_id": member_id, "role_id": role_data.role_id}})
     return role_history
@@ -319,5 +475,6 @@ def delete_role_history(db: Session, member_id: int, role_history_id: int, lodge
 
     db.delete(role_history)
     db.commit()
+    user_context_cache.invalidate_user(UserTypeEnum.MEMBER, member_id)
     logger.info("Cargo removido do histórico do membro", extra={"extra_data": {"member_id": member_id, "role_history_id": role_history_id}})
     return True
@@ -7,6 +7,7 @@ from sqlalchemy import (
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -16,9 +17,10 @@ from sqlalchemy import (
     func,
 )
 from sqlalchemy import Enum as SQLAlchemyEnum
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from app.shared.base_model import BaseModel
+from app.shared.utils.validators import normalize_search_text
 
 
 class SessionTypeEnum(enum.StrEnum):
@@ -142,6 +144,11 @@ class MasonicSession(BaseModel):
     attendances = relationship("SessionAttendance", back_populates="session", cascade="all, delete-orphan")
     balaustre_file_path = Column(String(500), nullable=True)
 
+    __table_args__ = (
+        Index("ix_masonic_sessions_lodge_date", "lodge_id", "session_date"),
+        Index("ix_masonic_sessions_status_date", "status", "session_date"),
+    )
+
 
 class CheckInMethodEnum(enum.StrEnum):
     MANUAL = "MANUAL"
@@ -174,11 +181,18 @@ class SessionAttendance(BaseModel):
     member = relationship("Member", backref="session_attendances")
     visitor = relationship("Visitor", backref="session_attendances")
 
+    __table_args__ = (
+        Index("ix_session_attendances_session_member", "session_id", "member_id"),
+        Index("ix_session_attendances_session_visitor", "session_id", "visitor_id"),
+        Index("ix_session_attendances_member_id", "member_id"),
+    )
+
 
 class Visitor(BaseModel):
     __tablename__ = "visitors"
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(255), nullable=False)
+    search_name = Column(String(255), nullable=True, comment="full_name normalizado para busca, mantido a partir de full_name")
     cim = Column(String(50), unique=True, nullable=False, index=True)
     degree = Column(Integer, nullable=False, default=1)
     is_installed = Column(Boolean, nullable=False, default=False)
@@ -197,6 +211,20 @@ class Visitor(BaseModel):
         default=TrustLevelEnum.VERIFICADO,
     )
 
+    __table_args__ = (
+        Index(
+            "ix_visitors_search_name_trgm",
+            "search_name",
+            postgresql_using="gin",
+            postgresql_ops={"search_name": "gin_trgm_ops"},
+        ),
+    )
+
+    @validates("full_name")
+    def _sync_search_name(self, key, full_name):
+        self.search_name = normalize_search_text(full_name)
+        return full_name
+
 
 class Visit(BaseModel):
     __tablename__ = "visits"
@@ -268,3 +296,23 @@ class AbsenceJustification(BaseModel):
     reviewed_by = relationship("Member", foreign_keys=[reviewed_by_id])
     
     __table_args__ = (UniqueConstraint("session_id", "member_id", name="_member_session_absence_uc"),)
+
+
+class AttendanceMonthlyRollup(BaseModel):
+    """
+    Consolidado mensal de assiduidade por (loja, obreiro): sessões realizadas/encerradas no mês
+    e quantas o obreiro esteve presente, justificado ou ausente.
+    Mantido por app/modules/sessions/services/attendance_rollup_service.py; nunca editar diretamente.
+    """
+
+    __tablename__ = "attendance_monthly_rollups"
+    id = Column(Integer, primary_key=True, index=True)
+    lodge_id = Column(Integer, ForeignKey("lodges.id", ondelete="CASCADE"), nullable=False)
+    member_id = Column(Integer, ForeignKey("members.id", ondelete="CASCADE"), nullable=False, index=True)
+    period_start = Column(Date, nullable=False, comment="Primeiro dia do mês consolidado")
+    sessions_held = Column(Integer, nullable=False, default=0)
+    present_count = Column(Integer, nullable=False, default=0)
+    justified_count = Column(Integer, nullable=False, default=0)
+    absent_count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (UniqueConstraint("lodge_id", "member_id", "period_start", name="_lodge_member_period_rollup_uc"),)
@@ -1,6 +1,8 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from database import get_db
+from models import models
+from app.shared.security.constants import UserTypeEnum
 from dependencies import get_current_active_user_with_permissions, UserContext, require_permission
 from app.modules.sessions.services import attendance_service, attendance_analytics_service
 
@@ -17,7 +19,29 @@ def lodge_attendance_dashboard(
     db: Session = Depends(get_db),
     current_user: UserContext = Depends(require_permission("view_reports"))
 ):
-    return attendance_service.get_lodge_attendance_stats(db, lodge_id, period_months)
+    return attendance_analytics_service.get_lodge_attendance_overview(db, lodge_id, period_months)
+
+@router.get(
+    "/obedience/{obedience_id}",
+    summary="Estatísticas das Lojas da Obediência",
+    description="Retorna, em uma única passada, as estatísticas de presença de todas as lojas ativas da obediência (federadas ou jurisdicionadas)."
+)
+def obedience_attendance_dashboard(
+    obedience_id: int,
+    period_months: int = 12,
+    db: Session = Depends(get_db),
+    current_user: UserContext = Depends(require_permission("view_reports"))
+):
+    if current_user.user_type != UserTypeEnum.SUPER_ADMIN and current_user.obedience_id != obedience_id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso negado aos dados desta obediência.")
+
+    lodge_ids = [
+        lodge_id
+        for (lodge_id,) in db.query(models.Lodge.id)
+        .join(models.ObedienceLodgeClosure, models.ObedienceLodgeClosure.lodge_id == models.Lodge.id)
+        .filter(models.ObedienceLodgeClosure.obedience_id == obedience_id, models.Lodge.is_active == True)
+    ]
+    return attendance_service.get_lodges_attendance_stats(db, lodge_ids, period_months)
 
 @router.get(
     "/member",
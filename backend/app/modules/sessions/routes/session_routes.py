@@ -6,7 +6,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy.orm.attributes import flag_modified
 
 from app.modules.sessions.schemas import masonic_session_schema, session_attendance_schema, visitor_checkin_schema, forecast_schema
-from app.modules.sessions.services import session_service
+from app.modules.sessions.services import attendance_service, session_service
 from database import get_db
 from dependencies import get_current_user_payload, require_module
 from models import models
@@ -378,7 +378,7 @@ async def regenerate_balaustre_text_endpoint(
     current_user_payload: dict = Depends(get_current_user_payload),
 ):
     # Retrieve the session first to update overrides
-    session = session_service.get_session_by_id(db, session_id, current_user_payload)
+    session = session_service.get_session_for_update(db, session_id, current_user_payload)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
@@ -556,7 +556,7 @@ def get_lodge_attendance_stats_endpoint(
     if not lodge_id:
         raise HTTPException(status_code=403, detail="Usuário não associado a uma loja.")
 
-    return session_service.get_lodge_attendance_stats(db=db, lodge_id=lodge_id, period_months=period_months)
+    return attendance_service.get_lodge_attendance_stats(db=db, lodge_id=lodge_id, period_months=period_months)
 
 
 @router.post(
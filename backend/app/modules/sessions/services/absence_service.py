@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from datetime import datetime
 from models import models
 from app.modules.sessions.schemas import attendance_schema
+from app.modules.sessions.services import attendance_rollup_service
 from dependencies import UserContext
 
 def submit_absence_justification(db: Session, session_id: int, justification_data: attendance_schema.AbsenceJustificationCreate, current_user: UserContext) -> models.AbsenceJustification:
@@ -80,6 +81,7 @@ def update_justification_status(db: Session, justification_id: int, update_data:
             
         attendance_record.attendance_status = "Justificado"
         attendance_record.check_in_method = "MANUAL"
+        attendance_rollup_service.refresh_session_rollup(db, masonic_session)
 
     db.commit()
     db.refresh(justification)
@@ -1,52 +1,47 @@
 from datetime import date, timedelta
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from models import models
+from app.modules.sessions.services.attendance_rollup_service import month_start
 
-def get_member_attendance_stats(db: Session, member_id: int, period_months: int = 12) -> dict:
-    end_date = date.today()
-    start_date = end_date - timedelta(days=period_months * 30)
 
+def _period_start(period_months: int) -> date:
+    # Consolidado é mensal: a janela começa no mês que contém (hoje - X*30 dias)
+    return month_start(date.today() - timedelta(days=period_months * 30))
+
+
+def get_member_attendance_stats(db: Session, member_id: int, period_months: int = 12) -> dict:
     # Pegar lojas em que o membro está ativo
-    associations = db.query(models.MemberLodgeAssociation).filter(
-        models.MemberLodgeAssociation.member_id == member_id,
-        models.MemberLodgeAssociation.status == "Ativo"
-    ).all()
-    
-    if not associations:
+    lodge_ids = [
+        lodge_id
+        for (lodge_id,) in db.query(models.MemberLodgeAssociation.lodge_id).filter(
+            models.MemberLodgeAssociation.member_id == member_id,
+            models.MemberLodgeAssociation.status == "Ativo"
+        )
+    ]
+
+    if not lodge_ids:
         return {"attendance_rate": 0, "achievements": []}
-        
-    lodge_ids = [a.lodge_id for a in associations]
 
-    # Sessões realizadas nessas lojas
-    sessions = (
-        db.query(models.MasonicSession)
+    # Soma no máximo period_months linhas por loja do consolidado mensal
+    total_sessions, present_count = (
+        db.query(
+            func.coalesce(func.sum(models.AttendanceMonthlyRollup.sessions_held), 0),
+            func.coalesce(
+                func.sum(models.AttendanceMonthlyRollup.present_count + models.AttendanceMonthlyRollup.justified_count), 0
+            ),
+        )
         .filter(
-            models.MasonicSession.lodge_id.in_(lodge_ids),
-            models.MasonicSession.session_date >= start_date,
-            models.MasonicSession.session_date <= end_date,
-            models.MasonicSession.status.in_(["REALIZADA", "ENCERRADA"]),
+            models.AttendanceMonthlyRollup.member_id == member_id,
+            models.AttendanceMonthlyRollup.lodge_id.in_(lodge_ids),
+            models.AttendanceMonthlyRollup.period_start >= _period_start(period_months),
         )
-        .all()
+        .one()
     )
 
-    total_sessions = len(sessions)
     if total_sessions == 0:
          return {"attendance_rate": 0, "achievements": [], "total_sessions": 0, "present_sessions": 0}
 
-    session_ids = [s.id for s in sessions]
-
-    # Presenças do membro
-    attendances = (
-        db.query(models.SessionAttendance)
-        .filter(
-            models.SessionAttendance.session_id.in_(session_ids),
-            models.SessionAttendance.member_id == member_id,
-            models.SessionAttendance.attendance_status.in_(["Presente", "Justificado"])
-        )
-        .all()
-    )
-
-    present_count = len(attendances)
     attendance_rate = (present_count / total_sessions) * 100
 
     achievements = []
@@ -61,3 +56,61 @@ def get_member_attendance_stats(db: Session, member_id: int, period_months: int
         "present_sessions": present_count,
         "achievements": achievements
     }
+
+
+def get_lodge_attendance_overview(db: Session, lodge_id: int, period_months: int = 12) -> dict:
+    """
+    Estatísticas de presença da loja lidas do consolidado mensal (mesmo formato de
+    attendance_service.get_lodge_attendance_stats). Visitantes não entram na média.
+    """
+    rollup = models.AttendanceMonthlyRollup
+    period_filter = (rollup.lodge_id == lodge_id, rollup.period_start >= _period_start(period_months))
+
+    # sessions_held se repete em cada linha de obreiro do mês: uma por mês basta
+    sessions_per_month = (
+        db.query(func.max(rollup.sessions_held)).filter(*period_filter).group_by(rollup.period_start).all()
+    )
+    total_sessions = sum(held for (held,) in sessions_per_month)
+    if total_sessions == 0:
+        return {"total_sessions": 0, "average_attendance": 0.0, "member_stats": []}
+
+    member_rows = (
+        db.query(
+            models.Member.id,
+            models.Member.full_name,
+            func.sum(rollup.sessions_held),
+            func.sum(rollup.present_count),
+        )
+        .join(rollup, rollup.member_id == models.Member.id)
+        .join(
+            models.MemberLodgeAssociation,
+            (models.MemberLodgeAssociation.member_id == models.Member.id)
+            & (models.MemberLodgeAssociation.lodge_id == lodge_id),
+        )
+        .filter(*period_filter, models.MemberLodgeAssociation.status == "Ativo")
+        .group_by(models.Member.id, models.Member.full_name)
+        .all()
+    )
+
+    member_stats = []
+    total_presences = 0
+    for member_id, member_name, member_sessions, present in member_rows:
+        total_presences += present
+        member_stats.append(
+            {
+                "member_id": member_id,
+                "member_name": member_name,
+                "total_sessions": member_sessions,
+                "present_sessions": present,
+                "attendance_rate": round((present / member_sessions) * 100, 2) if member_sessions else 0.0,
+            }
+        )
+
+    # Ordenar por taxa de presença (decrescente)
+    member_stats.sort(key=lambda x: x["attendance_rate"], reverse=True)
+
+    return {
+        "total_sessions": total_sessions,
+        "average_attendance": round(total_presences / total_sessions, 2),
+        "member_stats": member_stats,
+    }
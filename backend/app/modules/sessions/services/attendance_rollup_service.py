@@ -0,0 +1,110 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlalchemy import case, delete, func, insert
+from sqlalchemy.orm import Session
+
+from models import models
+
+# Apenas sessões nesses status contam para a assiduidade
+COUNTED_SESSION_STATUSES = ["REALIZADA", "ENCERRADA"]
+
+
+def month_start(value: date) -> date:
+    return value.replace(day=1)
+
+
+def _next_month(value: date) -> date:
+    return (value.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def refresh_attendance_rollup(db: Session, lodge_id: int, period_start: date) -> int:
+    """
+    Recalcula o consolidado de um único mês de uma loja (todas as linhas de obreiros daquele mês).
+    O custo é proporcional às sessões do mês, não ao histórico. Não faz commit.
+
+    A linha da loja é travada (SELECT ... FOR UPDATE) até o commit: recálculos simultâneos da mesma
+    loja são serializados, e o DELETE do segundo já enxerga as linhas gravadas pelo primeiro, em vez
+    de o INSERT colidir com _lodge_member_period_rollup_uc.
+    """
+    period_start = month_start(period_start)
+    period_end = _next_month(period_start)
+    db.flush()
+    db.query(models.Lodge.id).filter(models.Lodge.id == lodge_id).with_for_update().scalar()
+
+    db.execute(
+        delete(models.AttendanceMonthlyRollup).where(
+            models.AttendanceMonthlyRollup.lodge_id == lodge_id,
+            models.AttendanceMonthlyRollup.period_start == period_start,
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+    session_filter = (
+        models.MasonicSession.lodge_id == lodge_id,
+        models.MasonicSession.session_date >= period_start,
+        models.MasonicSession.session_date < period_end,
+        models.MasonicSession.status.in_(COUNTED_SESSION_STATUSES),
+    )
+    sessions_held = db.query(func.count(models.MasonicSession.id)).filter(*session_filter).scalar() or 0
+    if not sessions_held:
+        return 0
+
+    attendance_counts = (
+        db.query(
+            models.SessionAttendance.member_id,
+            func.sum(case((models.SessionAttendance.attendance_status == "Presente", 1), else_=0)),
+            func.sum(case((models.SessionAttendance.attendance_status == "Justificado", 1), else_=0)),
+        )
+        .join(models.SessionAttendance.session)
+        .filter(*session_filter, models.SessionAttendance.member_id.isnot(None))
+        .group_by(models.SessionAttendance.member_id)
+        .all()
+    )
+    counts = {member_id: (present or 0, justified or 0) for member_id, present, justified in attendance_counts}
+
+    # Obreiros ativos sem nenhum registro no mês também entram (ausentes em todas as sessões)
+    active_member_ids = {
+        member_id
+        for (member_id,) in db.query(models.MemberLodgeAssociation.member_id).filter(
+            models.MemberLodgeAssociation.lodge_id == lodge_id,
+            models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE,
+        )
+    }
+
+    rows = []
+    for member_id in active_member_ids | set(counts):
+        present, justified = counts.get(member_id, (0, 0))
+        rows.append(
+            {
+                "lodge_id": lodge_id,
+                "member_id": member_id,
+                "period_start": period_start,
+                "sessions_held": sessions_held,
+                "present_count": present,
+                "justified_count": justified,
+                "absent_count": max(sessions_held - present - justified, 0),
+            }
+        )
+    if rows:
+        db.execute(insert(models.AttendanceMonthlyRollup), rows)
+    return len(rows)
+
+
+def refresh_session_rollup(db: Session, session: models.MasonicSession) -> int:
+    """Recalcula o mês da sessão (após mudança de status ou correção de presença). Não faz commit."""
+    return refresh_attendance_rollup(db, session.lodge_id, session.session_date)
+
+
+def rebuild_attendance_rollups(db: Session, lodge_id: Optional[int] = None) -> int:
+    """Reconstrói todos os meses com sessões realizadas/encerradas de uma loja (ou de todas)."""
+    query = db.query(models.MasonicSession.lodge_id, models.MasonicSession.session_date).filter(
+        models.MasonicSession.status.in_(COUNTED_SESSION_STATUSES)
+    )
+    if lodge_id is not None:
+        query = query.filter(models.MasonicSession.lodge_id == lodge_id)
+
+    buckets = {(row_lodge_id, month_start(session_date)) for row_lodge_id, session_date in query}
+    total = sum(refresh_attendance_rollup(db, row_lodge_id, period_start) for row_lodge_id, period_start in buckets)
+    db.commit()
+    return total
@@ -1,9 +1,11 @@
 from datetime import datetime, timedelta, date
 from fastapi import HTTPException, status
 from geopy.distance import geodesic  # Dependência para cálculo de distância
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session, joinedload
 
 from app.modules.sessions.schemas import attendance_schema
+from app.modules.sessions.services import attendance_rollup_service
 from models import models
 
 # --- Helper Functions ---
@@ -128,6 +130,7 @@ def record_manual_attendance(
         )
         db.add(audit_log)
 
+    attendance_rollup_service.refresh_session_rollup(db, session)
     db.commit()
     db.refresh(attendance_record)
     return attendance_record
@@ -525,90 +528,185 @@ def record_totem_attendance(
     return attendance_record
 
 
-def get_lodge_attendance_stats(db: Session, lodge_id: int, period_months: int = 12) -> dict:
+def get_lodges_attendance_stats(db: Session, lodge_ids: list[int], period_months: int = 12) -> dict[int, dict]:
     """
-    Calcula estatísticas de presença da loja para os últimos X meses.
+    Calcula estatísticas de presença de várias lojas (ex.: painel da Obediência) para os últimos X meses.
+    Tudo é agregado no banco (GROUP BY), em 3 consultas independentemente do número de lojas/obreiros.
+    Retorna {lodge_id: {"total_sessions", "average_attendance", "member_stats"}}.
     """
     # 1. Definir período
     end_date = date.today()
     start_date = end_date - timedelta(days=period_months * 30)
 
-    # 2. Buscar sessões realizadas/encerradas no período
-    sessions = (
-        db.query(models.MasonicSession)
-        .filter(
-            models.MasonicSession.lodge_id == lodge_id,
-            models.MasonicSession.session_date >= start_date,
-            models.MasonicSession.session_date <= end_date,
-            models.MasonicSession.status.in_(["REALIZADA", "ENCERRADA"]),
-        )
-        .all()
-    )
+    lodge_ids = list(set(lodge_ids))
+    stats = {lodge_id: {"total_sessions": 0, "average_attendance": 0.0, "member_stats": []} for lodge_id in lodge_ids}
+    if not lodge_ids:
+        return stats
 
-    total_sessions = len(sessions)
-    if total_sessions == 0:
-        return {"total_sessions": 0, "average_attendance": 0.0, "member_stats": []}
-
-    # 3. Calcular média de presença por sessão
-    total_attendance_count = 0
-    session_ids = [s.id for s in sessions]
+    session_filter = (
+        models.MasonicSession.lodge_id.in_(lodge_ids),
+        models.MasonicSession.session_date >= start_date,
+        models.MasonicSession.session_date <= end_date,
+        models.MasonicSession.status.in_(["REALIZADA", "ENCERRADA"]),
+    )
 
-    # Busca todas as presenças dessas sessões
-    all_attendances = (
-        db.query(models.SessionAttendance)
-        .filter(
-            models.SessionAttendance.session_id.in_(session_ids),
-            models.SessionAttendance.attendance_status == "Presente",
+    # 2. Sessões realizadas/encerradas no período, por loja
+    sessions_per_lodge = dict(
+        db.query(models.MasonicSession.lodge_id, func.count(models.MasonicSession.id))
+        .filter(*session_filter)
+        .group_by(models.MasonicSession.lodge_id)
+        .all()
+    )
+    if not sessions_per_lodge:
+        return stats
+
+    # 3. Presenças por (loja, membro); member_id nulo = visitantes, que só entram na média da loja
+    presence_counts = (
+        db.query(
+            models.MasonicSession.lodge_id,
+            models.SessionAttendance.member_id,
+            func.count(models.SessionAttendance.id),
         )
+        .join(models.SessionAttendance.session)
+        .filter(*session_filter, models.SessionAttendance.attendance_status == "Presente")
+        .group_by(models.MasonicSession.lodge_id, models.SessionAttendance.member_id)
         .all()
     )
-
-    total_attendance_count = len(all_attendances)
-    average_attendance = total_attendance_count / total_sessions if total_sessions > 0 else 0
-
-    # 4. Calcular estatísticas por membro
-    # Primeiro, buscar membros ativos da loja
+    total_presences = {}
+    member_presences = {}
+    for lodge_id, member_id, count in presence_counts:
+        total_presences[lodge_id] = total_presences.get(lodge_id, 0) + count
+        if member_id is not None:
+            member_presences[(lodge_id, member_id)] = count
+
+    # 4. Membros ativos de cada loja (apenas as colunas usadas)
     active_members = (
-        db.query(models.Member)
-        .join(models.MemberLodgeAssociation)
-        .filter(models.MemberLodgeAssociation.lodge_id == lodge_id, models.MemberLodgeAssociation.status == "Ativo")
+        db.query(models.MemberLodgeAssociation.lodge_id, models.Member.id, models.Member.full_name)
+        .join(models.Member, models.Member.id == models.MemberLodgeAssociation.member_id)
+        .filter(
+            models.MemberLodgeAssociation.lodge_id.in_(list(sessions_per_lodge)),
+            models.MemberLodgeAssociation.status == "Ativo",
+        )
         .all()
     )
 
-    member_stats = []
-    for member in active_members:
-        # Contar presenças deste membro nas sessões do período
-        member_presence_count = sum(1 for a in all_attendances if a.member_id == member.id)
+    for lodge_id, total_sessions in sessions_per_lodge.items():
+        stats[lodge_id]["total_sessions"] = total_sessions
+        stats[lodge_id]["average_attendance"] = round(total_presences.get(lodge_id, 0) / total_sessions, 2)
 
-        attendance_rate = (member_presence_count / total_sessions) * 100
-
-        member_stats.append(
+    for lodge_id, member_id, member_name in active_members:
+        total_sessions = sessions_per_lodge[lodge_id]
+        member_presence_count = member_presences.get((lodge_id, member_id), 0)
+        stats[lodge_id]["member_stats"].append(
             {
-                "member_id": member.id,
-                "member_name": member.full_name,
+                "member_id": member_id,
+                "member_name": member_name,
                 "total_sessions": total_sessions,
                 "present_sessions": member_presence_count,
-                "attendance_rate": round(attendance_rate, 2),
+                "attendance_rate": round((member_presence_count / total_sessions) * 100, 2),
             }
         )
 
     # Ordenar por taxa de presença (decrescente)
-    member_stats.sort(key=lambda x: x["attendance_rate"], reverse=True)
+    for lodge_stats in stats.values():
+        lodge_stats["member_stats"].sort(key=lambda x: x["attendance_rate"], reverse=True)
+
+    return stats
+
+
+def get_lodge_attendance_stats(db: Session, lodge_id: int, period_months: int = 12) -> dict:
+    """
+    Calcula estatísticas de presença da loja para os últimos X meses.
+    """
+    return get_lodges_attendance_stats(db, [lodge_id], period_months)[lodge_id]
 
-    return {
-        "total_sessions": total_sessions,
-        "average_attendance": round(average_attendance, 2),
-        "member_stats": member_stats,
+
+def _prefetch_totem_context(db: Session, session: models.MasonicSession, lodge_id: int, user_ids: set[int]) -> dict:
+    """
+    Carrega com consultas IN tudo o que o sync em lote precisa: vínculos com a loja, membros
+    (para visitantes), visitantes por CIM e presenças já existentes na sessão.
+    """
+    lodge_member_ids = {
+        member_id
+        for (member_id,) in db.query(models.MemberLodgeAssociation.member_id).filter(
+            models.MemberLodgeAssociation.member_id.in_(user_ids),
+            models.MemberLodgeAssociation.lodge_id == lodge_id,
+        )
     }
+    outsider_ids = user_ids - lodge_member_ids
+    members = (
+        {m.id: m for m in db.query(models.Member).filter(models.Member.id.in_(outsider_ids))} if outsider_ids else {}
+    )
+    cims = {m.cim for m in members.values() if m.cim}
+    visitors = {v.cim: v for v in db.query(models.Visitor).filter(models.Visitor.cim.in_(cims))} if cims else {}
+
+    visitor_ids = [v.id for v in visitors.values()]
+    attendances = {}
+    for record in db.query(models.SessionAttendance).filter(
+        models.SessionAttendance.session_id == session.id,
+        or_(
+            models.SessionAttendance.member_id.in_(lodge_member_ids),
+            models.SessionAttendance.visitor_id.in_(visitor_ids),
+        ),
+    ):
+        key = ("member", record.member_id) if record.member_id else ("visitor", record.visitor_id)
+        attendances.setdefault(key, record)
+
+    return {"lodge_member_ids": lodge_member_ids, "members": members, "visitors": visitors, "attendances": attendances}
+
+
+def _apply_totem_check_in(
+    db: Session, session: models.MasonicSession, context: dict, user_id: int, timestamp_local: datetime
+) -> models.SessionAttendance:
+    """Aplica um check-in já decodificado sobre o contexto pré-carregado (sem consultas nem commit)."""
+    if user_id in context["lodge_member_ids"]:
+        key = ("member", user_id)
+        member_id, visitor = user_id, None
+    else:
+        user_as_member = context["members"].get(user_id)
+        if not user_as_member:
+            raise ValueError(f"Usuário não encontrado: {user_id}")
+        if not user_as_member.cim:
+            raise ValueError(f"Usuário sem CIM não pode ser registrado como visitante: {user_id}")
+
+        visitor = context["visitors"].get(user_as_member.cim)
+        if not visitor:
+            visitor = models.Visitor(
+                full_name=user_as_member.full_name,
+                cim=user_as_member.cim,
+                degree=user_as_member.degree,
+                trust_level="Certificado",
+            )
+            db.add(visitor)
+            context["visitors"][user_as_member.cim] = visitor
+        key = ("visitor", id(visitor) if visitor.id is None else visitor.id)
+        member_id = None
+
+    attendance_record = context["attendances"].get(key)
+    if not attendance_record:
+        attendance_record = models.SessionAttendance(session=session, member_id=member_id, visitor=visitor)
+        db.add(attendance_record)
+        context["attendances"][key] = attendance_record
+
+    if attendance_record.attendance_status != "Presente":
+        attendance_record.attendance_status = "Presente"
+        attendance_record.check_in_method = "TOTEM"
+        # Use the offline timestamp
+        attendance_record.check_in_datetime = timestamp_local
+    return attendance_record
 
 
 def record_bulk_totem_attendance(db: Session, bulk_data: attendance_schema.TotemBulkRequest) -> dict:
     """
     Sincroniza uma lista de check-ins coletados offline pelo Totem.
     Ignora a expiração do JWT (verify_exp=False) confiando na leitura local do totem.
+
+    Todos os tokens são decodificados antes, as consultas são feitas em lote (IN) e o lote é gravado
+    em uma única transação. Só se essa gravação falhar os itens são reaplicados um a um, cada um
+    em seu próprio savepoint, para isolar os que falharam. Retorna o resultado de cada item.
     """
-    import jwt
-    from app.modules.access_control.utils.auth_utils import SECRET_KEY, ALGORITHM
+    from jose import jwt
+    from config import settings
     
     session = (
         db.query(models.MasonicSession)
@@ -624,76 +722,61 @@ def record_bulk_totem_attendance(db: Session, bulk_data: attendance_schema.Totem
             status_code=status.HTTP_404_NOT_FOUND, detail="Nenhuma sessão ativa/realizada encontrada para o Totem."
         )
 
-    success_count = 0
-    errors = []
+    results = [{"index": index, "user_id": None, "status": "error", "detail": None} for index in range(len(bulk_data.check_ins))]
+    decoded = []
 
-    for item in bulk_data.check_ins:
+    # 1. Decodifica todos os tokens (sem I/O)
+    for index, item in enumerate(bulk_data.check_ins):
         try:
             # Decode bypassing expiration
-            payload = jwt.decode(item.jwt_token, SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False})
-            user_id = payload.get("user_id")
-            if not user_id:
-                errors.append(f"Token sem user_id: {item.jwt_token[:10]}...")
-                continue
-                
-            # Identifica membro ou visitante
-            is_lodge_member = (
-                db.query(models.MemberLodgeAssociation)
-                .filter(
-                    models.MemberLodgeAssociation.member_id == user_id,
-                    models.MemberLodgeAssociation.lodge_id == bulk_data.lodge_id,
-                )
-                .first()
-            )
-            
-            visitor_id = None
-            if not is_lodge_member:
-                user_as_member = db.query(models.Member).filter(models.Member.id == user_id).first()
-                if not user_as_member:
-                    errors.append(f"Usuário não encontrado: {user_id}")
-                    continue
-                
-                visitor = db.query(models.Visitor).filter(models.Visitor.cim == user_as_member.cim).first()
-                if not visitor:
-                    visitor = models.Visitor(
-                        full_name=user_as_member.full_name,
-                        cim=user_as_member.cim,
-                        degree=user_as_member.degree,
-                        trust_level="Certificado",
-                    )
-                    db.add(visitor)
-                    db.flush()
-                visitor_id = visitor.id
-
-            attendance_record = (
-                db.query(models.SessionAttendance)
-                .filter(
-                    models.SessionAttendance.session_id == session.id,
-                    models.SessionAttendance.member_id == (user_id if is_lodge_member else None),
-                    models.SessionAttendance.visitor_id == visitor_id
-                )
-                .first()
+            payload = jwt.decode(
+                item.jwt_token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM], options={"verify_exp": False}
             )
-
-            if not attendance_record:
-                attendance_record = models.SessionAttendance(
-                    session_id=session.id, 
-                    member_id=(user_id if is_lodge_member else None),
-                    visitor_id=visitor_id
-                )
-                db.add(attendance_record)
-
-            if attendance_record.attendance_status != "Presente":
-                attendance_record.attendance_status = "Presente"
-                attendance_record.check_in_method = "TOTEM"
-                # Use the offline timestamp
-                attendance_record.check_in_datetime = item.timestamp_local
-
-            db.commit()
-            success_count += 1
-
         except Exception as e:
+            results[index]["detail"] = f"Erro ao processar token: {str(e)}"
+            continue
+        user_id = payload.get("user_id")
+        if not user_id:
+            results[index]["detail"] = f"Token sem user_id: {item.jwt_token[:10]}..."
+            continue
+        results[index]["user_id"] = user_id
+        decoded.append((index, user_id, item.timestamp_local))
+
+    def apply_all(use_savepoints: bool):
+        context = _prefetch_totem_context(db, session, bulk_data.lodge_id, {user_id for _, user_id, _ in decoded})
+        for index, user_id, timestamp_local in decoded:
+            snapshot = {name: dict(context[name]) for name in ("visitors", "attendances")}
+            try:
+                if use_savepoints:
+                    with db.begin_nested():
+                        _apply_totem_check_in(db, session, context, user_id, timestamp_local)
+                        db.flush()
+                else:
+                    _apply_totem_check_in(db, session, context, user_id, timestamp_local)
+                results[index].update(status="ok", detail=None)
+            except Exception as e:
+                if use_savepoints:
+                    # Visitante/presença criados no savepoint desfeito saíram da sessão: um check-in
+                    # posterior do mesmo obreiro precisa criá-los de novo, não alterar o objeto descartado
+                    context.update(snapshot)
+                results[index].update(status="error", detail=str(e))
+
+    # 2. Caminho rápido: tudo em um flush/commit
+    if decoded:
+        apply_all(use_savepoints=False)
+        try:
+            db.flush()
+        except Exception:
+            # 3. Algum item quebrou o flush: refaz item a item isolando as falhas em savepoints
             db.rollback()
-            errors.append(f"Erro ao processar token: {str(e)}")
+            apply_all(use_savepoints=True)
+
+    success_count = sum(1 for r in results if r["status"] == "ok")
+
+    # Check-ins sincronizados após o fim da sessão alteram o consolidado mensal
+    if success_count and session.status in attendance_rollup_service.COUNTED_SESSION_STATUSES:
+        attendance_rollup_service.refresh_session_rollup(db, session)
+    db.commit()
 
-    return {"processed": len(bulk_data.check_ins), "success": success_count, "errors": errors}
+    errors = [r["detail"] for r in results if r["status"] == "error"]
+    return {"processed": len(bulk_data.check_ins), "success": success_count, "errors": errors, "results": results}
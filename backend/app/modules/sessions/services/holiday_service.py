@@ -1,6 +1,9 @@
 import datetime
+import threading
 import holidays
-from typing import Optional, List
+from functools import lru_cache
+from typing import Dict, Optional, List, Tuple
+from sqlalchemy import event, inspect
 from sqlalchemy.orm import Session
 from app.modules.sessions.models import LodgeRecess
 
@@ -10,20 +13,101 @@ def is_custom_holiday(date: datetime.date, lodge: Lodge) -> tuple[bool, str]:
     """
     Verifica se a data cai em algum feriado customizado da Loja (ex: Feriado Maçônico da obediência).
     """
-    if not lodge or not lodge.custom_holidays:
+    if not lodge:
         return False, ""
-        
-    for ch in lodge.custom_holidays:
-        if isinstance(ch, dict) and ch.get("month") == date.month and ch.get("day") == date.day:
-            return True, ch.get("name", "Feriado Customizado")
-    return False, ""
+    name = holiday_calendar.custom_holidays(lodge, date.year).get(date)
+    return (True, name) if name else (False, "")
+
+@lru_cache(maxsize=32)
+def national_holidays(year: int) -> dict[datetime.date, str]:
+    """
+    Tabela {data: nome} dos feriados nacionais do ano, calculada uma vez por processo.
+    Montar holidays.BR é caro; a tabela do ano é imutável, então pode ser memoizada.
+    """
+    return dict(holidays.BR(years=year))
+
 
 def is_national_holiday(date: datetime.date) -> bool:
     """
     Verifica se a data é um feriado nacional no Brasil.
     """
-    br_holidays = holidays.BR(years=date.year)
-    return date in br_holidays
+    return date in national_holidays(date.year)
+
+
+def _custom_holiday_dates(custom_holidays, year: int) -> dict[datetime.date, str]:
+    dates = {}
+    for ch in custom_holidays or []:
+        if not isinstance(ch, dict):
+            continue
+        try:
+            day = datetime.date(year, int(ch.get("month")), int(ch.get("day")))
+        except (TypeError, ValueError):
+            # Entrada incompleta ou 29/02 em ano não bissexto
+            continue
+        dates.setdefault(day, ch.get("name", "Feriado Customizado"))
+    return dates
+
+
+class HolidayCalendar:
+    """
+    Calendário de feriados do processo, memoizado por (loja, ano).
+    Cada entrada é um {data: motivo} já mesclado (nacionais + customizados da loja), de modo que
+    toda verificação é um lookup O(1). Invalidado no commit de alterações em Lodge.custom_holidays.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._custom: Dict[Tuple[int, int], dict] = {}
+        self._merged: Dict[Tuple[Optional[int], int], dict] = {}
+
+    def custom_holidays(self, lodge: Lodge, year: int) -> dict[datetime.date, str]:
+        """Feriados customizados da loja no ano: {data: nome}."""
+        if lodge.id is None:
+            return _custom_holiday_dates(lodge.custom_holidays, year)
+        key = (lodge.id, year)
+        dates = self._custom.get(key)
+        if dates is None:
+            dates = _custom_holiday_dates(lodge.custom_holidays, year)
+            with self._lock:
+                self._custom[key] = dates
+        return dates
+
+    def for_lodge(self, lodge: Optional[Lodge], year: int) -> dict[datetime.date, str]:
+        """Feriados da loja no ano (nacionais têm precedência): {data: motivo da supressão}."""
+        key = (lodge.id if lodge else None, year)
+        # Loja ainda sem id (não persistida) não entra no cache
+        cacheable = lodge is None or lodge.id is not None
+        merged = self._merged.get(key) if cacheable else None
+        if merged is not None:
+            return merged
+
+        merged = {}
+        if lodge:
+            merged.update({day: f"Feriado Maçônico: {name}" for day, name in self.custom_holidays(lodge, year).items()})
+        merged.update({day: f"Feriado Nacional: {name}" for day, name in national_holidays(year).items()})
+        if cacheable:
+            with self._lock:
+                self._merged[key] = merged
+        return merged
+
+    def is_holiday(self, lodge: Optional[Lodge], date: datetime.date) -> bool:
+        return date in self.for_lodge(lodge, date.year)
+
+    def invalidate_lodge(self, lodge_id: int) -> None:
+        with self._lock:
+            for cache in (self._custom, self._merged):
+                for key in [k for k in cache if k[0] == lodge_id]:
+                    del cache[key]
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._custom.clear()
+            self._merged.clear()
+
+
+# Instância global compartilhada pela aplicação
+holiday_calendar = HolidayCalendar()
+
 
 def get_recess_for_date(db: Session, lodge_id: int, date: datetime.date) -> Optional[LodgeRecess]:
     """
@@ -36,23 +120,51 @@ def get_recess_for_date(db: Session, lodge_id: int, date: datetime.date) -> Opti
         LodgeRecess.end_date >= date
     ).first()
 
+def suppression_reason(
+    date: datetime.date, recesses: List[LodgeRecess], lodge_holidays: dict[datetime.date, str]
+) -> tuple[bool, str]:
+    """
+    Regra de supressão sobre dados já carregados (recessos da loja e seu calendário de feriados do ano).
+    Usada em lote pelo projetor de sessões; should_suppress_session é a versão avulsa.
+    """
+    for recess in recesses:
+        if recess.start_date <= date <= recess.end_date:
+            return True, f"Férias da Loja: {recess.description or 'Sem descrição'}"
+
+    reason = lodge_holidays.get(date)
+    if reason:
+        return True, reason
+
+    return False, ""
+
+
 def should_suppress_session(db: Session, lodge_id: int, date: datetime.date) -> tuple[bool, str]:
     """
     Avalia se uma sessão planejada para esta data deve ser suprimida.
     Retorna (booleano, motivo).
     """
     recess = get_recess_for_date(db, lodge_id, date)
-    if recess:
-        return True, f"Férias da Loja: {recess.description or 'Sem descrição'}"
-    
-    if is_national_holiday(date):
-        br_holidays = holidays.BR(years=date.year)
-        holiday_name = br_holidays.get(date)
-        return True, f"Feriado Nacional: {holiday_name}"
-        
     lodge = db.query(Lodge).filter(Lodge.id == lodge_id).first()
-    is_custom, custom_name = is_custom_holiday(date, lodge)
-    if is_custom:
-        return True, f"Feriado Maçônico: {custom_name}"
-        
-    return False, ""
+    return suppression_reason(date, [recess] if recess else [], holiday_calendar.for_lodge(lodge, date.year))
+
+
+# --- Invalidação automática ---
+# Lojas com custom_holidays alterado são coletadas no flush e invalidadas só no commit.
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_holiday_changes(session, flush_context):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, Lodge) and (obj in session.deleted or inspect(obj).attrs.custom_holidays.history.has_changes()):
+            session.info.setdefault("holiday_calendar_lodges", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_holiday_invalidations(session):
+    for lodge_id in session.info.pop("holiday_calendar_lodges", ()):
+        holiday_calendar.invalidate_lodge(lodge_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_holiday_invalidations(session):
+    session.info.pop("holiday_calendar_lodges", None)
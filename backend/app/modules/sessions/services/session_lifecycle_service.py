@@ -0,0 +1,259 @@
+from datetime import date, datetime, time, timedelta
+from time import perf_counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.modules.sessions.services import attendance_rollup_service
+from models import models
+
+# --- Regras de ciclo de vida (única fonte: leituras e agendador usam as mesmas janelas) ---
+# AGENDADA -> EM_ANDAMENTO: START_LEAD antes do início
+# EM_ANDAMENTO -> REALIZADA: no fim da sessão (end_time, ou início + DEFAULT_DURATION)
+# REALIZADA -> ENCERRADA: AUTO_CLOSE_AFTER após o início (aprovação tácita da ata)
+DEFAULT_START_TIME = time(20, 0)
+START_LEAD = timedelta(hours=2)
+DEFAULT_DURATION = timedelta(hours=3)
+AUTO_CLOSE_AFTER = timedelta(days=14)
+
+# Status que evoluem sozinhos com o tempo (e para onde); os demais só mudam por ação do usuário
+_NEXT_STATUS = {"AGENDADA": "EM_ANDAMENTO", "EM_ANDAMENTO": "REALIZADA", "REALIZADA": "ENCERRADA"}
+AUTOMATIC_STATUSES = tuple(_NEXT_STATUS)
+
+
+def session_windows(session_date: date, start_time: Optional[time], end_time: Optional[time]) -> Dict[str, datetime]:
+    """Instantes de cada transição automática de uma sessão."""
+    start = datetime.combine(session_date, start_time or DEFAULT_START_TIME)
+    end = datetime.combine(session_date, end_time) if end_time else start + DEFAULT_DURATION
+    if end <= start:
+        # Sessão que atravessa a meia-noite
+        end += timedelta(days=1)
+    return {
+        "EM_ANDAMENTO": start - START_LEAD,
+        "REALIZADA": end,
+        "ENCERRADA": start + AUTO_CLOSE_AFTER,
+    }
+
+
+def next_transition(session: models.MasonicSession, status: Optional[str] = None) -> Optional[Tuple[datetime, str]]:
+    """(instante, próximo status) da próxima transição automática, ou None se o status é final/manual."""
+    target = _NEXT_STATUS.get(status or session.status)
+    if target is None:
+        return None
+    return session_windows(session.session_date, session.start_time, session.end_time)[target], target
+
+
+def derive_status(session: models.MasonicSession, now: Optional[datetime] = None) -> str:
+    """
+    Status efetivo da sessão em `now`, aplicando em cadeia as transições vencidas.
+    Puro: não altera a sessão. Uma AGENDADA esquecida pula direto para REALIZADA, como antes.
+    """
+    now = now or datetime.now()
+    status = session.status
+    transition = next_transition(session, status)
+    while transition and transition[0] <= now:
+        status = transition[1]
+        transition = next_transition(session, status)
+    return status
+
+
+def apply_display_status(sessions: List[models.MasonicSession], now: Optional[datetime] = None) -> None:
+    """
+    Ajusta o status exibido quando o agendador está atrasado, sem marcar a sessão como alterada
+    (nada é gravado; um commit posterior na mesma sessão do banco não persiste o valor derivado).
+    """
+    now = now or datetime.now()
+    for session in sessions:
+        derived = derive_status(session, now)
+        if derived != session.status:
+            set_committed_value(session, "status", derived)
+
+
+def _create_attendance_records(db: Session, sessions: List[models.MasonicSession]) -> int:
+    """Registros 'Ausente' iniciais para os obreiros das lojas das sessões iniciadas (em lote)."""
+    if not sessions:
+        return 0
+    session_ids = [s.id for s in sessions]
+    lodge_ids = {s.lodge_id for s in sessions}
+
+    members_by_lodge: Dict[int, set] = {}
+    for lodge_id, member_id in db.query(
+        models.MemberLodgeAssociation.lodge_id, models.MemberLodgeAssociation.member_id
+    ).filter(models.MemberLodgeAssociation.lodge_id.in_(lodge_ids)):
+        members_by_lodge.setdefault(lodge_id, set()).add(member_id)
+
+    existing = set(
+        db.query(models.SessionAttendance.session_id, models.SessionAttendance.member_id).filter(
+            models.SessionAttendance.session_id.in_(session_ids),
+            models.SessionAttendance.member_id.isnot(None),
+        )
+    )
+
+    rows = [
+        {"session_id": s.id, "member_id": member_id, "attendance_status": "Ausente"}
+        for s in sessions
+        for member_id in members_by_lodge.get(s.lodge_id, ())
+        if (s.id, member_id) not in existing
+    ]
+    if rows:
+        db.execute(insert(models.SessionAttendance), rows)
+    return len(rows)
+
+
+def _bulk_transition(db: Session, from_statuses, target: str, date_bound: date) -> Tuple[int, List]:
+    """
+    UPDATE por faixa (status, session_date) para sessões cuja transição venceu em qualquer horário
+    possível do dia. Devolve (linhas alteradas, pares distintos (lodge_id, session_date, status anterior)).
+    """
+    filters = (
+        models.MasonicSession.status.in_(from_statuses),
+        models.MasonicSession.session_date <= date_bound,
+    )
+    # Em regime normal a faixa está vazia; a leitura prévia (pelo mesmo índice) alimenta o consolidado
+    affected = (
+        db.query(models.MasonicSession.lodge_id, models.MasonicSession.session_date, models.MasonicSession.status)
+        .filter(*filters)
+        .distinct()
+        .all()
+    )
+    if not affected:
+        return 0, []
+    result = db.execute(
+        update(models.MasonicSession).where(*filters).values(status=target),
+        execution_options={"synchronize_session": False},
+    )
+    return result.rowcount, affected
+
+
+def apply_due_transitions(db: Session, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Aplica todas as transições vencidas em uma única transação e faz commit.
+
+    Sessões cuja transição venceu mesmo no pior caso de horário (término no dia seguinte, início
+    às 23:59) mudam por UPDATEs em faixa sobre (status, session_date), sem serem carregadas.
+    Só a fronteira (últimos 15 dias até amanhã) é avaliada sessão a sessão, com um UPDATE por
+    status de destino. Sessões iniciadas ganham os registros de presença; os meses das que passaram
+    a contar para a assiduidade têm o consolidado recalculado. Retorna o total por novo status.
+    """
+    now = now or datetime.now()
+    today = now.date()
+    counts: Dict[str, int] = {}
+
+    # 1. Faixas vencidas: ENCERRADA até hoje - 15 dias, REALIZADA até anteontem
+    closed_until = today - AUTO_CLOSE_AFTER - timedelta(days=1)
+    closed_count, closed = _bulk_transition(db, AUTOMATIC_STATUSES, "ENCERRADA", closed_until)
+    realized_count, realized = _bulk_transition(
+        db, ("AGENDADA", "EM_ANDAMENTO"), "REALIZADA", today - timedelta(days=2)
+    )
+    for target, count in (("ENCERRADA", closed_count), ("REALIZADA", realized_count)):
+        if count:
+            counts[target] = count
+    newly_counted = [r for r in closed if r.status != "REALIZADA"] + realized
+
+    # 2. Fronteira: poucas sessões, avaliadas pelas mesmas regras da exibição
+    candidates = (
+        db.query(
+            models.MasonicSession.id,
+            models.MasonicSession.lodge_id,
+            models.MasonicSession.session_date,
+            models.MasonicSession.start_time,
+            models.MasonicSession.end_time,
+            models.MasonicSession.status,
+        )
+        .filter(
+            models.MasonicSession.status.in_(AUTOMATIC_STATUSES),
+            models.MasonicSession.session_date > closed_until,
+            models.MasonicSession.session_date <= today + timedelta(days=1),
+        )
+        .all()
+    )
+    due: Dict[Tuple[str, str], List] = {}
+    for row in candidates:
+        target = derive_status(row, now)
+        if target != row.status:
+            due.setdefault((row.status, target), []).append(row)
+
+    by_target: Dict[str, List] = {}
+    for (from_status, target), rows in due.items():
+        ids = [r.id for r in rows]
+        # O status lido faz parte do WHERE: uma ação do usuário (cancelar, aprovar a ata) feita
+        # depois da leitura não é sobrescrita pelo status derivado
+        result = db.execute(
+            update(models.MasonicSession)
+            .where(models.MasonicSession.id.in_(ids), models.MasonicSession.status == from_status)
+            .values(status=target),
+            execution_options={"synchronize_session": False},
+        )
+        if not result.rowcount:
+            continue
+        if result.rowcount < len(rows):
+            # Releitura (linhas já travadas por este UPDATE) para saber quais mudaram
+            changed = {
+                session_id
+                for (session_id,) in db.query(models.MasonicSession.id).filter(
+                    models.MasonicSession.id.in_(ids), models.MasonicSession.status == target
+                )
+            }
+            rows = [r for r in rows if r.id in changed]
+        by_target.setdefault(target, []).extend(rows)
+        counts[target] = counts.get(target, 0) + len(rows)
+
+    _create_attendance_records(db, by_target.get("EM_ANDAMENTO", []))
+    newly_counted += by_target.get("REALIZADA", []) + [
+        r for r in by_target.get("ENCERRADA", []) if r.status != "REALIZADA"
+    ]
+    for lodge_id, period_start in {
+        (r.lodge_id, attendance_rollup_service.month_start(r.session_date)) for r in newly_counted
+    }:
+        attendance_rollup_service.refresh_attendance_rollup(db, lodge_id, period_start)
+
+    db.commit()
+    return counts
+
+
+def apply_session_transitions(db: Session, session: models.MasonicSession, now: Optional[datetime] = None) -> Optional[str]:
+    """
+    Grava as transições vencidas de uma única sessão, com os mesmos efeitos do agendador (presenças
+    ao iniciar, consolidado ao passar a contar), e faz commit. As ações do usuário chamam antes de
+    validar o status, para nunca decidir sobre o status apenas derivado. Retorna o novo status ou None.
+    """
+    from_status = session.status
+    target = derive_status(session, now)
+    if target == from_status:
+        return None
+    result = db.execute(
+        update(models.MasonicSession)
+        .where(models.MasonicSession.id == session.id, models.MasonicSession.status == from_status)
+        .values(status=target),
+        execution_options={"synchronize_session": False},
+    )
+    if result.rowcount:
+        if target == "EM_ANDAMENTO":
+            _create_attendance_records(db, [session])
+        counted = attendance_rollup_service.COUNTED_SESSION_STATUSES
+        if target in counted and from_status not in counted:
+            attendance_rollup_service.refresh_session_rollup(db, session)
+    db.commit()
+    db.refresh(session)
+    return target if result.rowcount else None
+
+
+# Métricas da última execução do agendador (consultadas em logs/diagnóstico)
+last_run_metrics: Dict[str, Any] = {}
+
+
+def run_scheduled_transitions(db: Session, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Executa apply_due_transitions medindo a duração; guarda e devolve as métricas da execução."""
+    started = perf_counter()
+    transitions = apply_due_transitions(db, now)
+    metrics = {
+        "ran_at": (now or datetime.now()).isoformat(),
+        "rows_transitioned": sum(transitions.values()),
+        "transitions": transitions,
+        "duration_ms": round((perf_counter() - started) * 1000, 2),
+    }
+    last_run_metrics.clear()
+    last_run_metrics.update(metrics)
+    return metrics
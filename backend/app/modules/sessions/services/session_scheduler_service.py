@@ -1,15 +1,21 @@
 import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
 from dateutil.rrule import rrule, WEEKLY, MONTHLY, MO, TU, WE, TH, FR, SA, SU
+from database import SessionLocal
+from app.core.logger import get_logger
 from app.modules.core.models import Lodge
-from app.modules.sessions.models import MasonicSession, SessionTypeEnum, SessionSubtypeEnum
-from app.modules.sessions.services.holiday_service import should_suppress_session
+from app.modules.sessions.models import LodgeRecess, MasonicSession, SessionTypeEnum, SessionSubtypeEnum
+from app.modules.sessions.services.holiday_service import holiday_calendar, suppression_reason
+
+logger = get_logger(__name__)
 
 def generate_annual_sessions_for_lodge(db: Session, lodge: Lodge, year: int) -> int:
     """
     Gera sessões projetadas (PREVISTA/SUPRIMIDA) para uma loja para todo o ano especificado.
     Utiliza dateutil.rrule para lidar com recorrências complexas (ex: 1ª e 3ª sexta).
+    Recessos e datas ocupadas são carregados uma vez, feriados vêm do calendário memoizado; as sessões entram num único INSERT.
     Retorna o número de sessões criadas.
     """
     if not lodge.auto_schedule_sessions:
@@ -44,7 +50,6 @@ def generate_annual_sessions_for_lodge(db: Session, lodge: Lodge, year: int) ->
         MasonicSession.session_date >= start_of_year,
         MasonicSession.session_date <= end_of_year
     ).delete(synchronize_session=False)
-    db.commit()
 
     # 2. Configurar a regra de recorrência (RRULE)
     dtstart = datetime.datetime(year, 1, 1)
@@ -75,39 +80,96 @@ def generate_annual_sessions_for_lodge(db: Session, lodge: Lodge, year: int) ->
 
     # 3. Gerar as datas
     generated_dates = [dt.date() for dt in rule]
-    
-    sessions_created = 0
+
+    # 4. Contexto do ano carregado uma vez: recessos, datas já ocupadas e calendário de feriados da loja
+    recesses = db.query(LodgeRecess).filter(
+        LodgeRecess.lodge_id == lodge.id,
+        LodgeRecess.start_date <= end_of_year,
+        LodgeRecess.end_date >= start_of_year
+    ).all()
+    # Respeita sessões existentes (inclusive as modificadas manualmente) que caiam nas datas geradas
+    existing_dates = {
+        session_date for (session_date,) in db.query(MasonicSession.session_date).filter(
+            MasonicSession.lodge_id == lodge.id,
+            MasonicSession.session_date >= start_of_year,
+            MasonicSession.session_date <= end_of_year
+        )
+    }
+    lodge_holidays = holiday_calendar.for_lodge(lodge, year)
+
+    new_sessions = []
     for current_date in generated_dates:
+        if current_date in existing_dates:
+            continue
+
         # Determine status baseado em feriados e recessos
-        is_suppressed, reason = should_suppress_session(db, lodge.id, current_date)
+        is_suppressed, reason = suppression_reason(current_date, recesses, lodge_holidays)
         status = "SUPRIMIDA" if is_suppressed else "PREVISTA"
-        
-        # Check if any session already exists on this date to prevent duplicates
-        # We must respect manually modified sessions that might have fallen on this date
-        existing = db.query(MasonicSession).filter(
-            MasonicSession.lodge_id == lodge.id,
-            MasonicSession.session_date == current_date
-        ).first()
+        title_prefix = "Sessão Ordinária" if not is_suppressed else "Sessão Suprimida"
 
-        if not existing:
-            title_prefix = "Sessão Ordinária" if not is_suppressed else "Sessão Suprimida"
-            session_title = f"{title_prefix} - {current_date.strftime('%d/%m/%Y')}"
-            
-            new_session = MasonicSession(
-                title=session_title,
-                session_date=current_date,
-                start_time=lodge.session_time,
-                type=SessionTypeEnum.ORDINARY,
-                subtype=SessionSubtypeEnum.REGULAR,
-                status=status,
-                lodge_id=lodge.id,
-                agenda=f"Sessão projetada automaticamente. {reason}" if is_suppressed else "Sessão projetada automaticamente."
-            )
-            db.add(new_session)
-            sessions_created += 1
+        new_sessions.append({
+            "title": f"{title_prefix} - {current_date.strftime('%d/%m/%Y')}",
+            "session_date": current_date,
+            "start_time": lodge.session_time,
+            "type": SessionTypeEnum.ORDINARY,
+            "subtype": SessionSubtypeEnum.REGULAR,
+            "status": status,
+            "lodge_id": lodge.id,
+            "agenda": f"Sessão projetada automaticamente. {reason}" if is_suppressed else "Sessão projetada automaticamente.",
+        })
 
+    # 5. Um único INSERT em lote, na mesma transação da limpeza
+    if new_sessions:
+        db.execute(insert(MasonicSession), new_sessions)
     db.commit()
-    return sessions_created
+    return len(new_sessions)
+
+
+def _project_lodge(session_factory, lodge_id: int, year: int) -> int:
+    """Unidade de trabalho do pool: cada thread usa sua própria sessão do banco."""
+    db = session_factory()
+    try:
+        lodge = db.query(Lodge).filter(Lodge.id == lodge_id).first()
+        return generate_annual_sessions_for_lodge(db, lodge, year) if lodge else 0
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def generate_annual_sessions_for_all_lodges(
+    year: int, max_workers: int = 4, session_factory=SessionLocal
+) -> dict[int, int]:
+    """
+    Projeta o ano informado para todas as lojas ativas com agendamento automático,
+    distribuindo as lojas em um pool de threads (uma transação por loja).
+    Retorna {lodge_id: sessões criadas}; lojas com erro são logadas e ficam de fora.
+    """
+    db = session_factory()
+    try:
+        lodge_ids = [
+            lodge_id for (lodge_id,) in db.query(Lodge.id).filter(
+                Lodge.is_active == True,
+                Lodge.auto_schedule_sessions == True
+            )
+        ]
+    finally:
+        db.close()
+
+    # Aquece a tabela de feriados nacionais antes de abrir as threads
+    holiday_calendar.for_lodge(None, year)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(_project_lodge, session_factory, lodge_id, year): lodge_id for lodge_id in lodge_ids}
+        for future in as_completed(futures):
+            lodge_id = futures[future]
+            try:
+                results[lodge_id] = future.result()
+            except Exception as e:
+                logger.error(f"Erro ao projetar sessões de {year} da loja {lodge_id}: {e}", exc_info=True)
+    return results
 
 def confirm_monthly_sessions(db: Session, lodge_id: int, start_date: datetime.date, end_date: datetime.date):
     """
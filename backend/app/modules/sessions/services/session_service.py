@@ -1,4 +1,4 @@
-from datetime import date, datetime, timedelta
+from datetime import date
 
 from fastapi import BackgroundTasks, HTTPException, status
 from sqlalchemy import create_engine
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session, joinedload, sessionmaker
 from app.modules.core.services import geo_service
 from app.modules.core.services import lodge_service
 from app.modules.sessions.schemas import masonic_session_schema
+from app.modules.sessions.services import attendance_rollup_service, session_lifecycle_service
 from config import settings
 from models import models
 from app.core.logger import get_logger
@@ -51,63 +52,12 @@ def _create_attendance_records_task(db_url: str, session_id: int, lodge_id: int)
         db.close()
 
 
-def _update_session_status_based_on_rules(db: Session, session: models.MasonicSession):
-    """
-    Atualiza o status da sessão baseado nas regras de negócio de tempo.
-
-    Regras:
-    1. AGENDADA -> EM_ANDAMENTO: 2 horas antes do início.
-    2. EM_ANDAMENTO -> REALIZADA: 3 horas após o início.
-    3. REALIZADA -> ENCERRADA: 14 dias após a data da sessão (aprovação automática da ata).
-    """
-    if session.status in ["CANCELADA", "ENCERRADA"]:
-        return
-
-    now = datetime.now()
-
-    # Se não tiver horário definido, assume 20:00 como padrão para cálculos ou ignora transição de tempo curto
-    start_time = session.start_time or datetime.strptime("20:00", "%H:%M").time()
-
-    session_start_dt = datetime.combine(session.session_date, start_time)
-
-    # Janelas de tempo
-    start_window = session_start_dt - timedelta(hours=2)
-    end_window = session_start_dt + timedelta(hours=3)
-    auto_close_date = session_start_dt + timedelta(days=14)
-
-    # Transição para EM_ANDAMENTO
-    if session.status == "AGENDADA":
-        if start_window <= now <= end_window:
-            session.status = "EM_ANDAMENTO"
-            db.commit()
-            db.refresh(session)
-        # Se já passou muito do tempo e ainda está agendada (ex: sistema ficou off), move para REALIZADA
-        elif now > end_window:
-            session.status = "REALIZADA"
-            db.commit()
-            db.refresh(session)
-
-    # Transição para REALIZADA
-    if session.status == "EM_ANDAMENTO":
-        if now > end_window:
-            session.status = "REALIZADA"
-            db.commit()
-            db.refresh(session)
-
-    # Transição para ENCERRADA (Auto-aprovação da ata após 2 semanas)
-    if session.status == "REALIZADA":
-        if now > auto_close_date:
-            session.status = "ENCERRADA"
-            db.commit()
-            db.refresh(session)
-
-
 def approve_session_minutes(db: Session, session_id: int, current_user_payload: dict) -> models.MasonicSession:
     """
     Aprova manualmente a ata da sessão, mudando o status para ENCERRADA.
     Valida se o balaústre foi enviado.
     """
-    session = get_session_by_id(db, session_id, current_user_payload)
+    session = get_session_for_update(db, session_id, current_user_payload)
 
     if session.status != "REALIZADA":
         raise HTTPException(
@@ -131,7 +81,7 @@ def reopen_session(db: Session, session_id: int, current_user_payload: dict) ->
     """
     Reabre uma sessão encerrada (Apenas Webmaster/Admin), voltando para REALIZADA.
     """
-    session = get_session_by_id(db, session_id, current_user_payload)
+    session = get_session_for_update(db, session_id, current_user_payload)
 
     # TODO: Validar se é Webmaster ou Admin (assumindo que a rota fará essa validação ou payload tem roles)
     # Por enquanto, confiamos que a rota protege isso ou adicionamos verificação aqui se necessário.
@@ -268,10 +218,7 @@ def create_session(
     return db_session
 
 
-def get_session_by_id(db: Session, session_id: int, current_user_payload: dict) -> models.MasonicSession:
-    """
-    Busca uma sessão pelo ID, garantindo que pertença à loja do usuário.
-    """
+def _get_lodge_session(db: Session, session_id: int, current_user_payload: dict) -> models.MasonicSession:
     lodge_id = current_user_payload.get("lodge_id")
     session = (
         db.query(models.MasonicSession)
@@ -281,13 +228,31 @@ def get_session_by_id(db: Session, session_id: int, current_user_payload: dict)
 
     if not session:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sessão não encontrada.")
+    return session
+
+
+def get_session_by_id(db: Session, session_id: int, current_user_payload: dict) -> models.MasonicSession:
+    """
+    Busca uma sessão pelo ID, garantindo que pertença à loja do usuário.
+    """
+    session = _get_lodge_session(db, session_id, current_user_payload)
 
-    # Atualiza status baseado no tempo
-    _update_session_status_based_on_rules(db, session)
+    # Status exibido conforme o horário (as transições são gravadas pelo agendador)
+    session_lifecycle_service.apply_display_status([session])
 
     return session
 
 
+def get_session_for_update(db: Session, session_id: int, current_user_payload: dict) -> models.MasonicSession:
+    """
+    Busca a sessão para uma ação que altera dados: as transições vencidas são gravadas antes
+    (como faria o agendador), então o status validado pela ação é o status real do banco.
+    """
+    session = _get_lodge_session(db, session_id, current_user_payload)
+    session_lifecycle_service.apply_session_transitions(db, session)
+    return session
+
+
 def get_sessions_by_lodge(
     db: Session,
     current_user_payload: dict,
@@ -323,9 +288,8 @@ def get_sessions_by_lodge(
 
     sessions = query.all()
 
-    # Atualiza status de todas as sessões recuperadas
-    for session in sessions:
-        _update_session_status_based_on_rules(db, session)
+    # Leitura sem escrita: o status vencido é só derivado para exibição
+    session_lifecycle_service.apply_display_status(sessions)
 
     return sessions
 
@@ -340,7 +304,7 @@ def update_session(
     Atualiza uma sessão existente, garantindo que pertença à loja do usuário.
     Verifica conflitos de data se a data da sessão for alterada.
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)  # Valida propriedade
+    db_session = get_session_for_update(db, session_id, current_user_payload)  # Valida propriedade
 
     if db_session.status == "ENCERRADA":
         raise HTTPException(
@@ -407,7 +371,7 @@ def start_session(
     """
     Inicia uma sessão maçônica (chamado via API).
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)
+    db_session = get_session_for_update(db, session_id, current_user_payload)
     return _start_session_internal(db, db_session, background_tasks)
 
 
@@ -433,7 +397,7 @@ def end_session(
     Finaliza uma sessão maçônica, mudando seu status para 'REALIZADA'.
     Dispara a geração do Balaústre/Ata em background.
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)
+    db_session = get_session_for_update(db, session_id, current_user_payload)
 
     if db_session.status != "EM_ANDAMENTO":
         raise HTTPException(
@@ -442,6 +406,7 @@ def end_session(
         )
 
     db_session.status = "REALIZADA"
+    attendance_rollup_service.refresh_session_rollup(db, db_session)
     db.commit()
     db.refresh(db_session)
 
@@ -456,7 +421,7 @@ def cancel_session(db: Session, session_id: int, current_user_payload: dict) ->
     """
     Cancela uma sessão maçônica, mudando seu status para 'CANCELADA'.
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)
+    db_session = get_session_for_update(db, session_id, current_user_payload)
 
     if db_session.status == "REALIZADA":
         raise HTTPException(
@@ -473,7 +438,7 @@ def delete_session(db: Session, session_id: int, current_user_payload: dict) ->
     """
     Deleta uma sessão maçônica.
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)  # Valida propriedade
+    db_session = get_session_for_update(db, session_id, current_user_payload)  # Valida propriedade
 
     # Valida que sessões realizadas não podem ser excluídas
     if db_session.status == "REALIZADA":
@@ -569,7 +534,7 @@ def upload_balaustre(db: Session, session_id: int, file: UploadFile, current_use
     """
     Faz o upload do arquivo PDF do balaústre e salva o caminho no banco.
     """
-    db_session = get_session_by_id(db, session_id, current_user_payload)
+    db_session = get_session_for_update(db, session_id, current_user_payload)
     
     if db_session.status == "ENCERRADA":
         raise HTTPException(
@@ -1,18 +1,26 @@
 from contextlib import contextmanager
-from typing import Any, Generic, TypeVar
+from typing import Any, Generic, Iterable, Iterator, TypeVar
 
+from sqlalchemy import and_, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app.shared.base_model import BaseModel
 from app.shared.tenant_context import TenantContextManager
+from app.shared.utils.bulk import DEFAULT_CHUNK_SIZE, chunked
 
 ModelType = TypeVar("ModelType", bound=BaseModel)
 
+# INSERT ... ON CONFLICT is dialect specific; these are the databases the project runs on
+_UPSERT_INSERTS = {"postgresql": postgresql_insert, "sqlite": sqlite_insert}
+
 
 class BaseRepository(Generic[ModelType]):
-    def __init__(self, model: type[ModelType], db: Session):
+    def __init__(self, model: type[ModelType], db: Session, autocommit: bool = True):
         self.model = model
         self.db = db
+        self.autocommit = autocommit
         self._bypass_tenant = False
 
     @contextmanager
@@ -30,62 +38,196 @@ class BaseRepository(Generic[ModelType]):
         finally:
             self._bypass_tenant = original_state
 
-    def _apply_tenant_filter(self, query):
-        """Automatically applies lodge_id or obedience_id filters if applicable and not bypassed."""
+    @contextmanager
+    def unit_of_work(self):
+        """
+        Context manager that defers commits: writes inside the block are only flushed, and the
+        transaction is committed once when the block exits (rolled back if it raises).
+        Repositories created with autocommit=False never commit; the caller owns the transaction.
+        Usage:
+            with repo.unit_of_work():
+                repo.bulk_create(rows)
+                repo.bulk_update(changes)
+        """
+        original_state = self.autocommit
+        self.autocommit = False
+        try:
+            yield self
+        except Exception:
+            if original_state:
+                self.db.rollback()
+            raise
+        finally:
+            self.autocommit = original_state
+        if original_state:
+            self.db.commit()
+
+    def _tenant_values(self) -> dict[str, Any]:
+        """The tenant column of this model and its value in the current context (empty when not scoped)."""
         if self._bypass_tenant:
-            return query
+            return {}
 
         if hasattr(self.model, "lodge_id"):
             lodge_id = TenantContextManager.get_lodge_id()
-            if lodge_id is not None:
-                query = query.filter(self.model.lodge_id == lodge_id)
+            return {"lodge_id": lodge_id} if lodge_id is not None else {}
 
-        elif hasattr(self.model, "obedience_id"):
+        if hasattr(self.model, "obedience_id"):
             # Some models might be tied to obedience rather than lodge
             obedience_id = TenantContextManager.get_obedience_id()
-            if obedience_id is not None:
-                query = query.filter(self.model.obedience_id == obedience_id)
+            return {"obedience_id": obedience_id} if obedience_id is not None else {}
 
+        return {}
+
+    def _apply_tenant_filter(self, query):
+        """Automatically applies lodge_id or obedience_id filters if applicable and not bypassed."""
+        for field, value in self._tenant_values().items():
+            query = query.filter(getattr(self.model, field) == value)
         return query
 
+    def _prepare(self, obj_in: dict[str, Any] | BaseModel) -> dict[str, Any]:
+        """Converts the input to a dict and injects the tenant id if not explicitly provided."""
+        obj_data = dict(obj_in) if isinstance(obj_in, dict) else obj_in.model_dump()
+        for field, value in self._tenant_values().items():
+            obj_data.setdefault(field, value)
+        return obj_data
+
+    def _save(self, *objs: ModelType) -> None:
+        """Commits and refreshes, or only flushes when commits are deferred."""
+        if not self.autocommit:
+            self.db.flush()
+            return
+        self.db.commit()
+        for obj in objs:
+            self.db.refresh(obj)
+
     def get(self, id: Any) -> ModelType | None:
         query = self.db.query(self.model).filter(self.model.id == id)
         return self._apply_tenant_filter(query).first()
 
+    def get_many(self, ids: Iterable[Any]) -> list[ModelType]:
+        """Fetches the rows with the given ids that are visible to the tenant (in IN chunks)."""
+        query = self._apply_tenant_filter(self.db.query(self.model))
+        found = []
+        for chunk in chunked(set(ids)):
+            found.extend(query.filter(self.model.id.in_(chunk)))
+        return found
+
     def get_all(self, skip: int = 0, limit: int = 100) -> list[ModelType]:
         query = self.db.query(self.model)
         query = self._apply_tenant_filter(query)
         return query.offset(skip).limit(limit).all()
 
-    def create(self, obj_in: dict[str, Any] | BaseModel) -> ModelType:
-        obj_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump()
-
-        # Automatically inject tenant_id if not explicitly provided
-        if hasattr(self.model, "lodge_id") and "lodge_id" not in obj_data:
-            lodge_id = TenantContextManager.get_lodge_id()
-            if lodge_id is not None:
-                obj_data["lodge_id"] = lodge_id
+    def iter_all(self, batch_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[ModelType]:
+        """
+        Streams every row visible to the tenant in id order, one batch per query.
+        Uses keyset pagination (id > last id), so late batches cost the same as the first one.
+        """
+        last_id = None
+        while True:
+            query = self._apply_tenant_filter(self.db.query(self.model))
+            if last_id is not None:
+                query = query.filter(self.model.id > last_id)
+            batch = query.order_by(self.model.id).limit(batch_size).all()
+            yield from batch
+            if len(batch) < batch_size:
+                return
+            last_id = batch[-1].id
 
-        db_obj = self.model(**obj_data)
+    def create(self, obj_in: dict[str, Any] | BaseModel) -> ModelType:
+        db_obj = self.model(**self._prepare(obj_in))
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
         return db_obj
 
+    def bulk_create(self, objs_in: Iterable[dict[str, Any] | BaseModel]) -> list[ModelType]:
+        """
+        Inserts many rows with batched INSERT ... RETURNING statements and a single commit.
+        Like other bulk writes, ORM @validates hooks and relationship cascades are not run.
+        """
+        rows = [self._prepare(obj_in) for obj_in in objs_in]
+        if not rows:
+            return []
+        created = list(self.db.scalars(insert(self.model).returning(self.model), rows))
+        self._save()
+        return created
+
     def update(self, db_obj: ModelType, obj_in: dict[str, Any] | BaseModel) -> ModelType:
         update_data = obj_in if isinstance(obj_in, dict) else obj_in.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_obj, field, value)
 
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
         return db_obj
 
+    def bulk_update(self, objs_in: Iterable[dict[str, Any]]) -> int:
+        """
+        Updates many rows by primary key (each dict carries its "id") with a single commit.
+        Rows outside the current tenant are skipped and the tenant column itself is never changed.
+        Returns how many rows were updated.
+        """
+        tenant = self._tenant_values()
+        rows = [{k: v for k, v in row.items() if k not in tenant} for row in objs_in]
+        if tenant:
+            visible = set()
+            query = self._apply_tenant_filter(self.db.query(self.model.id))
+            for chunk in chunked({row["id"] for row in rows}):
+                visible.update(row_id for (row_id,) in query.filter(self.model.id.in_(chunk)))
+            rows = [row for row in rows if row["id"] in visible]
+        if not rows:
+            return 0
+        self.db.execute(update(self.model), rows)
+        self._save()
+        return len(rows)
+
+    def upsert_many(
+        self, objs_in: Iterable[dict[str, Any] | BaseModel], index_elements: list[str]
+    ) -> list[ModelType]:
+        """
+        Inserts or updates many rows with INSERT ... ON CONFLICT (`index_elements` must match a unique
+        constraint), in chunks and with a single commit. A conflicting row owned by another tenant is
+        left untouched and is not returned.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect not in _UPSERT_INSERTS:
+            raise NotImplementedError(f"upsert_many is not supported on {dialect}")
+
+        tenant = self._tenant_values()
+        groups: dict[frozenset, list[dict[str, Any]]] = {}
+        for obj_in in objs_in:
+            row = self._prepare(obj_in)
+            # A multi-row VALUES needs the same columns in every row
+            groups.setdefault(frozenset(row), []).append(row)
+
+        upserted = []
+        for columns, group in groups.items():
+            for chunk in chunked(group):
+                stmt = _UPSERT_INSERTS[dialect](self.model).values(chunk)
+                set_ = {
+                    column: stmt.excluded[column]
+                    for column in columns
+                    if column not in index_elements and column != "id" and column not in tenant
+                }
+                if not set_:
+                    stmt = stmt.on_conflict_do_nothing(index_elements=index_elements)
+                else:
+                    if hasattr(self.model, "updated_at"):
+                        # ON CONFLICT DO UPDATE does not fire the column's onupdate
+                        set_.setdefault("updated_at", func.now())
+                    where = and_(*(getattr(self.model, field) == value for field, value in tenant.items()))
+                    stmt = stmt.on_conflict_do_update(
+                        index_elements=index_elements, set_=set_, where=where if tenant else None
+                    )
+                upserted.extend(
+                    self.db.scalars(stmt.returning(self.model), execution_options={"populate_existing": True})
+                )
+        self._save()
+        return upserted
+
     def delete(self, id: Any) -> bool:
         obj = self.get(id)
         if not obj:
             return False
         self.db.delete(obj)
-        self.db.commit()
+        self._save()
         return True
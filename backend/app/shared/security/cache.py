@@ -1,5 +1,7 @@
 import logging
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
 import threading
 
 logger = logging.getLogger(__name__)
@@ -52,3 +54,82 @@ class PermissionCache:
 
 # Singleton global instance
 permission_cache = PermissionCache()
+
+
+class TTLCache:
+    """
+    Cache LRU com TTL, em memória do processo e thread-safe, com contadores de hits/misses.
+    Entradas expiram após `ttl_seconds` e as menos usadas são descartadas acima de `max_size`.
+    """
+
+    def __init__(self, max_size: int = 2048, ttl_seconds: float = 60.0):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Remove todas as entradas cuja chave satisfaz o predicado."""
+        with self._lock:
+            for key in [k for k in self._entries if predicate(k)]:
+                del self._entries[key]
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+class UserContextCache(TTLCache):
+    """
+    Cache das credenciais já resolvidas de um usuário (credencial ativa + exceções GRANT/REVOKE).
+
+    Chave: (user_type, user_id, lodge_id, obedience_id). O TTL curto cobre mudanças implícitas
+    (ex.: um cargo cujo end_date expira), enquanto as escritas em cargos/permissões/exceções
+    invalidam explicitamente via invalidate_user() / invalidate_all().
+    """
+
+    def invalidate_user(self, user_type: str, user_id: int) -> None:
+        """Remove todas as entradas de um usuário, em qualquer contexto de loja/obediência."""
+        self.invalidate_where(lambda k: k[0] == user_type and k[1] == user_id)
+
+
+# Instância global (por processo) do cache de contexto de usuário
+user_context_cache = UserContextCache()
@@ -0,0 +1,116 @@
+import logging
+import threading
+import time
+from datetime import UTC, datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """Normaliza datas vindas do banco (SQLite devolve naive) para UTC aware."""
+    return value.replace(tzinfo=UTC) if value.tzinfo is None else value.astimezone(UTC)
+
+
+class RevokedTokenIndex:
+    """
+    Índice em memória (por processo) dos JTIs de Access Tokens revogados.
+
+    - Carregado no startup com os JTIs ainda não expirados (load).
+    - Atualizado diretamente pelo logout (add).
+    - Sincronizado de forma incremental (id > último id visto) no máximo a cada
+      `sync_interval_seconds`, para enxergar revogações feitas por outros workers.
+    - Entradas expiradas são descartadas (prune): um token expirado já é recusado pelo JWT.
+
+    Assim, o caminho comum (token nunca revogado) não faz round trip ao banco.
+    """
+
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls, sync_interval_seconds: float = 30.0):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = super(RevokedTokenIndex, cls).__new__(cls)
+                cls._instance.sync_interval_seconds = sync_interval_seconds
+                cls._instance._reset_state()
+        return cls._instance
+
+    def _reset_state(self):
+        self._entries: Dict[str, datetime] = {}
+        self._last_seen_id = 0
+        self._last_sync = 0.0
+        self._is_loaded = False
+
+    def reset(self):
+        """Descarta todo o estado em memória (o próximo acesso recarrega do banco)."""
+        with self._lock:
+            self._reset_state()
+
+    def load(self, db_session):
+        """Carrega do banco todos os JTIs revogados que ainda não expiraram."""
+        from app.modules.access_control.models import RevokedAccessToken
+
+        now = datetime.now(UTC)
+        rows = (
+            db_session.query(RevokedAccessToken.id, RevokedAccessToken.jti, RevokedAccessToken.expires_at)
+            .filter(RevokedAccessToken.expires_at > now)
+            .all()
+        )
+        last_id = db_session.query(RevokedAccessToken.id).order_by(RevokedAccessToken.id.desc()).limit(1).scalar()
+
+        with self._lock:
+            self._entries = {jti: _as_utc(expires_at) for _, jti, expires_at in rows}
+            self._last_seen_id = last_id or 0
+            self._last_sync = time.monotonic()
+            self._is_loaded = True
+
+        logger.info(f"Índice de tokens revogados carregado. Total: {len(self._entries)} JTIs ativos.")
+
+    def sync(self, db_session, force: bool = False):
+        """Busca apenas as revogações novas (id > último visto) se o intervalo de sincronização expirou."""
+        if not self._is_loaded:
+            self.load(db_session)
+            return
+        if not force and time.monotonic() - self._last_sync < self.sync_interval_seconds:
+            return
+
+        from app.modules.access_control.models import RevokedAccessToken
+
+        rows = (
+            db_session.query(RevokedAccessToken.id, RevokedAccessToken.jti, RevokedAccessToken.expires_at)
+            .filter(RevokedAccessToken.id > self._last_seen_id)
+            .all()
+        )
+        with self._lock:
+            for row_id, jti, expires_at in rows:
+                self._entries[jti] = _as_utc(expires_at)
+                self._last_seen_id = max(self._last_seen_id, row_id)
+            self._last_sync = time.monotonic()
+        self.prune()
+
+    def add(self, jti: str, expires_at: datetime):
+        with self._lock:
+            self._entries[jti] = _as_utc(expires_at)
+
+    def prune(self) -> int:
+        """Remove JTIs cujo token já expirou. Retorna quantos foram removidos."""
+        now = datetime.now(UTC)
+        with self._lock:
+            expired = [jti for jti, expires_at in self._entries.items() if expires_at <= now]
+            for jti in expired:
+                del self._entries[jti]
+        return len(expired)
+
+    def is_revoked(self, jti: str, db_session: Optional[object] = None) -> bool:
+        if db_session is not None:
+            self.sync(db_session)
+        expires_at = self._entries.get(jti)
+        return expires_at is not None and expires_at > datetime.now(UTC)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton global instance
+revoked_token_index = RevokedTokenIndex()
@@ -50,8 +50,8 @@ class TenantContextManager:
 
         obedience_id = cls.get_obedience_id()
         if obedience_id:
-            from app.modules.core.services.obedience_service import get_all_subordinate_lodges
-            return get_all_subordinate_lodges(db, obedience_id)
+            from app.modules.core.services.obedience_hierarchy_service import get_subordinate_lodges
+            return sorted(get_subordinate_lodges(db, obedience_id))
 
         # Super Admin / Full Access
         return None
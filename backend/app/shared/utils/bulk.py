@@ -0,0 +1,24 @@
+"""Utilitários para operações em lote: blocos de tamanho fixo e consultas IN fatiadas."""
+
+from itertools import islice
+from typing import Iterable, Iterator, List, TypeVar
+
+from sqlalchemy.orm import Query
+
+T = TypeVar("T")
+
+# Mantém cada IN / executemany bem abaixo do limite de parâmetros por instrução dos bancos suportados
+DEFAULT_CHUNK_SIZE = 500
+
+
+def chunked(items: Iterable[T], size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[T]]:
+    """Divide um iterável em listas de até `size` itens."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def query_in(query: Query, column, values: Iterable, size: int = DEFAULT_CHUNK_SIZE) -> Iterator:
+    """Executa `query` filtrando `column IN values`, em fatias de até `size` valores."""
+    for chunk in chunked(set(values), size):
+        yield from query.filter(column.in_(chunk))
@@ -6,6 +6,7 @@ coordenadas geográficas e outros dados específicos do sistema.
 """
 
 import re
+import unicodedata
 
 
 def validate_cpf(cpf: str) -> bool:
@@ -324,3 +325,65 @@ def format_phone_e164(phone: str, default_country_code: str = "55") -> str:
 
     # Se não tem o código do país, adiciona
     return f"{default_country_code}{clean_phone}"
+
+
+def normalize_phone(phone: str | None) -> str | None:
+    """
+    Forma canônica (E.164 numérico) gravada em `phone_normalized`.
+
+    Celulares brasileiros são sempre gravados com o nono dígito, para que as duas grafias
+    do mesmo número (com e sem o 9) não possam ocupar cadastros diferentes.
+
+    Args:
+        phone: Telefone em qualquer formato
+
+    Returns:
+        Telefone em E.164 ou None se vazio/curto demais para ser um número completo (DDI + DDD + número)
+
+    Example:
+        >>> normalize_phone("556299991234")
+        '5562999991234'
+    """
+    e164 = format_phone_e164(phone) if phone else ""
+    if len(e164) < 12:
+        return None
+    if len(e164) == 12 and e164.startswith("55") and e164[4] in "6789":
+        e164 = e164[:4] + "9" + e164[4:]
+    return e164
+
+
+def phone_variants(phone: str | None) -> list[str]:
+    """
+    Formas E.164 equivalentes de um telefone, para busca exata em `phone_normalized`.
+
+    Celulares brasileiros aparecem com e sem o nono dígito (o WhatsApp ainda identifica
+    parte dos números antigos como 55 + DDD + 8 dígitos). A forma canônica vem primeiro;
+    a forma sem o nono dígito cobre registros gravados antes da canonicalização.
+
+    Example:
+        >>> phone_variants("556299991234")
+        ['5562999991234', '556299991234']
+    """
+    e164 = normalize_phone(phone)
+    if not e164:
+        return []
+    variants = [e164]
+    if e164.startswith("55") and len(e164) == 13 and e164[4] == "9":
+        variants.append(e164[:4] + e164[5:])
+    return variants
+
+
+def normalize_search_text(text: str | None) -> str | None:
+    """
+    Forma canônica para busca textual (colunas `search_name`): sem acentos, minúscula e
+    com espaços simples, para que "JOÃO  da Silva" e "joao da silva" coincidam.
+
+    Example:
+        >>> normalize_search_text("  Estrela do Oriente  Nº 7 ")
+        'estrela do oriente no 7'
+    """
+    if not text:
+        return None
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split()) or None
@@ -2,6 +2,8 @@ import os
 
 from dotenv import load_dotenv, find_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 Base = declarative_base()
@@ -20,6 +22,45 @@ if not DATABASE_URL:
 engine = create_engine(DATABASE_URL, pool_pre_ping=True, pool_recycle=300, connect_args={"connect_timeout": 60})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine assíncrona (mesmo banco, driver asyncio) para rotas `async def`: consultas com await não
+# bloqueiam o event loop. ASYNC_DATABASE_URL permite sobrescrever a URL derivada (ex.: parâmetros de SSL).
+# É criada no primeiro uso: um banco sem driver asyncio instalado não impede a subida da aplicação,
+# só as rotas que dependem de get_async_db falham.
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def to_async_url(url: str) -> str:
+    """Troca o driver síncrono da URL pelo equivalente asyncio (postgresql -> asyncpg, mysql -> aiomysql, sqlite -> aiosqlite)."""
+    scheme, separator, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}{separator}{rest}"
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+async_engine = None
+AsyncSessionLocal = None
+
+
+def get_async_engine():
+    """Engine assíncrona, criada na primeira chamada. Levanta RuntimeError se a URL não tiver driver asyncio."""
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        try:
+            async_engine = create_async_engine(ASYNC_DATABASE_URL, pool_pre_ping=True, pool_recycle=300)
+        except (ImportError, SQLAlchemyError) as e:
+            raise RuntimeError(
+                f"Sem driver asyncio para '{ASYNC_DATABASE_URL.partition('://')[0]}': instale o driver "
+                "(asyncpg, aiomysql ou aiosqlite) ou defina ASYNC_DATABASE_URL."
+            ) from e
+        # expire_on_commit=False: após o commit os atributos seguem acessíveis sem um novo await
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+
+async def dispose_async_engine():
+    """Fecha o pool da engine assíncrona, se ela chegou a ser criada."""
+    if async_engine is not None:
+        await async_engine.dispose()
+
 # Engine secundária (Oriente Data - Read Only)
 # Se não houver URL definida, usa a mesma do Sigma (assumindo mesmo banco em dev) ou None
 oriente_engine = None
@@ -38,6 +79,13 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency com AsyncSession, para rotas async que acessam o banco."""
+    get_async_engine()
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def get_oriente_db():
     """Dependency for accessing the Oriente Data database."""
     if OrienteSessionLocal is None:
@@ -6,7 +6,8 @@ from models.models import Member
 from app.modules.access_control.utils import auth_utils
 from app.shared.tenant_context import TenantContextManager
 from app.shared.security.constants import UserTypeEnum, CredentialLevel
-from app.shared.security.cache import permission_cache
+from app.shared.security.cache import permission_cache, user_context_cache
+from app.shared.security.token_revocation import revoked_token_index
 from datetime import date
 
 # This tells FastAPI which URL to check for the token
@@ -27,9 +28,8 @@ def get_current_user_payload(token: str = Depends(oauth2_scheme), db: Session =
 
     jti = payload.get("jti")
     if jti:
-        from app.modules.access_control.models import RevokedAccessToken
-        is_revoked = db.query(RevokedAccessToken).filter(RevokedAccessToken.jti == jti).first()
-        if is_revoked:
+        # Consulta o índice em memória; o banco só é tocado na sincronização incremental periódica
+        if revoked_token_index.is_revoked(jti, db):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has been revoked",
@@ -46,6 +46,16 @@ def get_current_user_payload(token: str = Depends(oauth2_scheme), db: Session =
         
     return payload
 
+async def get_tenant_user_payload(payload: dict = Depends(get_current_user_payload)) -> dict:
+    """
+    Same payload, with the tenant context set on the request itself. Sync dependencies run in a
+    worker thread, so the ContextVars set above do not reach the endpoint; routes that read
+    TenantContextManager must depend on this one.
+    """
+    TenantContextManager.set_lodge_id(payload.get("lodge_id"))
+    TenantContextManager.set_obedience_id(payload.get("obedience_id"))
+    return payload
+
 async def get_current_active_member(
     payload: dict = Depends(get_current_user_payload), db: Session = Depends(get_db)
 ) -> Member:
@@ -84,6 +94,54 @@ class UserContext:
         self.obedience_id = obedience_id
 
 
+def _resolve_member_grants(db: Session, member: Member, user_type, lodge_id, obedience_id):
+    """
+    Resolve a credencial ativa e as exceções GRANT/REVOKE de um membro no contexto atual.
+    O resultado é mantido no user_context_cache; escritas em cargos/exceções o invalidam.
+    """
+    cache_key = (user_type, member.id, lodge_id, obedience_id)
+    cached = user_context_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    credential = 0
+    granted_exceptions = set()
+    revoked_exceptions = set()
+
+    # Extract current credential dynamically from active roles
+    today = date.today()
+    active_roles = [
+        rh.role for rh in member.role_history
+        if (rh.lodge_id == lodge_id if lodge_id else True)
+        and (rh.end_date is None or rh.end_date >= today)
+    ]
+
+    # The member's credential is the maximum base_credential of their active roles
+    if active_roles:
+        credential = max((role.base_credential for role in active_roles if role.base_credential is not None), default=0)
+
+    # Fetch exceptions for the current context (action + type only, no lazy load per exception)
+    query = (
+        db.query(MemberPermissionException.exception_type, Permission.action)
+        .join(Permission, Permission.id == MemberPermissionException.permission_id)
+        .filter(MemberPermissionException.member_id == member.id)
+    )
+    if lodge_id:
+        query = query.filter(MemberPermissionException.lodge_id == lodge_id)
+    elif obedience_id:
+        query = query.filter(MemberPermissionException.obedience_id == obedience_id)
+
+    for exception_type, action in query.all():
+        if exception_type == ExceptionTypeEnum.GRANT:
+            granted_exceptions.add(action)
+        elif exception_type == ExceptionTypeEnum.REVOKE:
+            revoked_exceptions.add(action)
+
+    resolved = (credential, frozenset(granted_exceptions), frozenset(revoked_exceptions))
+    user_context_cache.set(cache_key, resolved)
+    return resolved
+
+
 async def get_current_active_user_with_permissions(
     payload: dict = Depends(get_current_user_payload), db: Session = Depends(get_db)
 ) -> UserContext:
@@ -94,8 +152,8 @@ async def get_current_active_user_with_permissions(
     
     credential = 0
     user = None
-    granted_exceptions = []
-    revoked_exceptions = []
+    granted_exceptions = frozenset()
+    revoked_exceptions = frozenset()
 
     if user_type == UserTypeEnum.SUPER_ADMIN:
         user = db.query(SuperAdmin).filter(SuperAdmin.id == user_id).first()
@@ -106,31 +164,9 @@ async def get_current_active_user_with_permissions(
     elif user_type == UserTypeEnum.MEMBER:
         user = db.query(Member).filter(Member.id == user_id).first()
         if user:
-            # Extract current credential dynamically from active roles
-            today = date.today()
-            active_roles = [
-                rh.role for rh in user.role_history 
-                if (rh.lodge_id == lodge_id if lodge_id else True) 
-                and (rh.end_date is None or rh.end_date >= today)
-            ]
-            
-            # The member's credential is the maximum base_credential of their active roles
-            if active_roles:
-                credential = max((role.base_credential for role in active_roles if role.base_credential is not None), default=0)
-
-            # Fetch exceptions for the current context
-            query = db.query(MemberPermissionException).filter(MemberPermissionException.member_id == user_id)
-            if lodge_id:
-                query = query.filter(MemberPermissionException.lodge_id == lodge_id)
-            elif obedience_id:
-                query = query.filter(MemberPermissionException.obedience_id == obedience_id)
-
-            exceptions = query.all()
-            for exc in exceptions:
-                if exc.exception_type == ExceptionTypeEnum.GRANT:
-                    granted_exceptions.append(exc.permission.action)
-                elif exc.exception_type == ExceptionTypeEnum.REVOKE:
-                    revoked_exceptions.append(exc.permission.action)
+            credential, granted_exceptions, revoked_exceptions = _resolve_member_grants(
+                db, user, user_type, lodge_id, obedience_id
+            )
 
     if user is None:
         raise HTTPException(status_code=404, detail="User not found.")
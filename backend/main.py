@@ -25,6 +25,7 @@ from app.modules.core.routes import (
     lodge_routes,
     obedience_routes,
     report_routes,
+    search_routes,
     super_admin_routes,
     import_template_routes,
 )
@@ -66,7 +67,8 @@ from scheduler import initialize_scheduler, shutdown_scheduler  # noqa: E402
 from app.core.middlewares.tenant_middleware import TenantMiddleware
 from app.core.middlewares.logging_middleware import LoggingMiddleware
 from app.shared.security.cache import permission_cache
-from database import SessionLocal
+from app.shared.security.token_revocation import revoked_token_index
+from database import SessionLocal, dispose_async_engine
 
 # Metadata para documentação da API
 description = """
@@ -205,6 +207,7 @@ def startup_event():
     try:
         db = SessionLocal()
         permission_cache.load_all_permissions(db)
+        revoked_token_index.load(db)
     except Exception as e:
         print(f"Warning: Could not load permission cache: {e}")
     finally:
@@ -279,6 +282,7 @@ app.include_router(publication_routes.router)
 app.include_router(notice_routes.router)
 app.include_router(administration_routes.router)
 app.include_router(report_routes.router)
+app.include_router(search_routes.router)
 app.include_router(library_routes.router)
 app.include_router(message_routes.router)
 app.include_router(whatsapp_routes.router)
@@ -313,7 +317,14 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     from app.jobs.scheduler import shutdown_scheduler
+    from app.modules.communication.services import whatsapp_webhook_service
+    from app.modules.communication.services.evolution_client import evolution_client
+    from app.modules.members.services import member_import_job_service
     shutdown_scheduler()
+    member_import_job_service.shutdown_parse_pool()
+    await whatsapp_webhook_service.stop_workers()
+    await evolution_client.aclose()
+    await dispose_async_engine()
 
 @app.get("/", tags=["Root"])
 def read_root():
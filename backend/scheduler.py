@@ -1,12 +1,12 @@
-from datetime import date, datetime, timedelta
-
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 
 # Importações do projeto
 from database import SessionLocal
-from models import models
+from app.modules.access_control.services import auth_service
+from app.modules.cashless import services as cashless_service
 from app.modules.communication.services import classified_service
-from app.modules.sessions.services import session_service
+from app.modules.members.services import anniversary_service
+from app.modules.sessions.services import session_lifecycle_service
 from app.core.logger import get_logger
 
 logger = get_logger(__name__)
@@ -18,69 +18,18 @@ scheduler = AsyncIOScheduler()
 def check_and_start_sessions_job():
     """
     Esta é a tarefa que o agendador executará.
-    Ela verifica por sessões que deveriam iniciar e as inicia.
-    Também verifica sessões que devem ser encerradas.
+    Aplica as transições vencidas do ciclo de vida das sessões (início, realização e
+    encerramento automático) com UPDATEs em faixa numa única transação, registrando
+    as métricas da execução (sessões alteradas e duração).
     """
     logger.info("Executando tarefa agendada: Verificando sessões...")
     db = SessionLocal()
     try:
-        now = datetime.now()
-
-        # 1. Iniciar Sessões
-        relevant_dates = [date.today(), date.today() - timedelta(days=1)]
-        sessions_to_start = (
-            db.query(models.MasonicSession)
-            .filter(models.MasonicSession.status == "AGENDADA", models.MasonicSession.session_date.in_(relevant_dates))
-            .all()
-        )
-
-        for session in sessions_to_start:
-            if not session.start_time:
-                continue
-            session_start_datetime = datetime.combine(session.session_date, session.start_time)
-            two_hours_before_start = session_start_datetime - timedelta(hours=2)
-
-            if two_hours_before_start <= now:
-                logger.info(f"Iniciando sessão agendada ID: {session.id} - {session.title}")
-                session_service.start_scheduled_session(db, session.id)
-
-        # 2. Encerrar Sessões
-        sessions_to_close = db.query(models.MasonicSession).filter(models.MasonicSession.status == "EM_ANDAMENTO").all()
-
-        for session in sessions_to_close:
-            # Determine reference end time
-            if session.end_time:
-                session_end_datetime = datetime.combine(session.session_date, session.end_time)
-            elif session.start_time:
-                # Fallback: assume 2h duration if no end time set
-                session_end_datetime = datetime.combine(session.session_date, session.start_time) + timedelta(hours=2)
-            else:
-                continue
-
-            two_hours_after_end = session_end_datetime + timedelta(hours=2)
-
-            if now >= two_hours_after_end:
-                logger.info(f"Finalizando sessão ID: {session.id} - {session.title}")
-                session_service.close_scheduled_session(db, session.id)
-
-        # 3. Auto-Encerrar Sessões (14 dias após realizada - Aprovação Tácita)
-        sessions_to_auto_close = (
-            db.query(models.MasonicSession).filter(models.MasonicSession.status == "REALIZADA").all()
+        metrics = session_lifecycle_service.run_scheduled_transitions(db)
+        logger.info(
+            f"Ciclo de vida das sessões: {metrics['rows_transitioned']} transições em {metrics['duration_ms']} ms",
+            extra={"extra_data": metrics},
         )
-
-        for session in sessions_to_auto_close:
-            # Define data de referência (início da sessão)
-            start_t = session.start_time or datetime.strptime("20:00", "%H:%M").time()
-            session_start_dt = datetime.combine(session.session_date, start_t)
-
-            auto_close_date = session_start_dt + timedelta(days=14)
-
-            if now > auto_close_date:
-                logger.info(f"Auto-encerrando sessão ID: {session.id} (Prazo de 14 dias expirado)")
-                session.status = "ENCERRADA"
-                db.add(session)
-                db.commit()
-
     except Exception as e:
         logger.error(f"Erro ao executar a tarefa agendada de sessões: {e}", exc_info=True)
     finally:
@@ -101,11 +50,66 @@ def check_classifieds_lifecycle_job():
         db.close()
 
 
+def reconcile_wallet_balances_job():
+    """
+    Tarefa agendada que re-deriva o saldo das carteiras cashless a partir do Ledger
+    e reporta (sem corrigir) qualquer divergência com o saldo materializado.
+    """
+    logger.info("Executando tarefa agendada: Reconciliação de saldos cashless...")
+    db = SessionLocal()
+    try:
+        drifts = cashless_service.reconcile_wallet_balances(db)
+        for drift in drifts:
+            logger.warning(
+                f"Divergência de saldo na carteira {drift['wallet_id']} (Loja {drift['lodge_id']}): "
+                f"materializado={drift['stored_balance']} ledger={drift['ledger_balance']} diferença={drift['drift']}"
+            )
+        if not drifts:
+            logger.info("Reconciliação cashless concluída sem divergências.")
+    except Exception as e:
+        logger.error(f"Erro ao executar a reconciliação de saldos cashless: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def purge_expired_tokens_job():
+    """
+    Tarefa agendada que apaga Access Tokens revogados e Refresh Tokens já expirados.
+    """
+    logger.info("Executando tarefa agendada: Limpeza de tokens expirados...")
+    db = SessionLocal()
+    try:
+        auth_service.purge_expired_tokens(db)
+    except Exception as e:
+        logger.error(f"Erro ao executar a limpeza de tokens expirados: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
+def rebuild_anniversary_index_job():
+    """
+    Tarefa agendada que reconstrói o índice de aniversários de todas as lojas.
+    Cobre alterações que não passam pelo ORM (updates em massa, scripts, SQL manual).
+    """
+    logger.info("Executando tarefa agendada: Reconstrução do índice de aniversários...")
+    db = SessionLocal()
+    try:
+        total = anniversary_service.rebuild_anniversary_index(db)
+        logger.info(f"Índice de aniversários reconstruído. Total: {total} datas.")
+    except Exception as e:
+        logger.error(f"Erro ao reconstruir o índice de aniversários: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
 def initialize_scheduler():
     """Inicializa o agendador e adiciona a tarefa."""
     # Adiciona a tarefa para ser executada a cada 5 minutos
     scheduler.add_job(check_and_start_sessions_job, "interval", minutes=5, id="check_sessions_job")
     scheduler.add_job(check_classifieds_lifecycle_job, "interval", hours=1, id="check_classifieds_job")
+    scheduler.add_job(reconcile_wallet_balances_job, "interval", hours=6, id="reconcile_wallet_balances_job")
+    scheduler.add_job(purge_expired_tokens_job, "interval", hours=1, id="purge_expired_tokens_job")
+    scheduler.add_job(rebuild_anniversary_index_job, "cron", hour=3, minute=0, id="rebuild_anniversary_index_job")
     if not scheduler.running:
         scheduler.start()
         logger.info("Agendador de tarefas iniciado. A verificação de sessões será executada a cada 5 minutos.")
@@ -0,0 +1,186 @@
+"""
+Index advisor: roda EXPLAIN sobre o catálogo de consultas quentes do projeto no banco configurado
+(DATABASE_URL) e aponta varreduras sequenciais (Seq Scan / SCAN sem índice).
+
+Uso (a partir de backend/):
+    python -m scripts.maintenance.index_advisor            # sai com código 1 se algo for sinalizado
+    python -m scripts.maintenance.index_advisor --verbose  # imprime o plano completo de cada consulta
+
+No PostgreSQL, enable_seqscan é desligado durante a análise: com tabelas pequenas (dev/homologação)
+o planner prefere Seq Scan mesmo havendo índice, e assim só sobra Seq Scan quando NÃO existe
+índice utilizável para o filtro. Use --allow-seqscan para ver o plano "real".
+"""
+
+import argparse
+import json
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import func, text, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.modules.core.services import search_service
+from app.modules.members.services import member_service
+from database import SessionLocal
+from models import models
+
+# Tabelas pequenas/de domínio em que Seq Scan é esperado e não deve ser sinalizado
+IGNORED_TABLES = {"lodges", "obediences", "permissions", "roles"}
+
+
+def _sample_ids(db) -> dict:
+    """Usa ids reais do banco (ou 1) para que os planos reflitam dados existentes."""
+    first = lambda column: db.query(column).order_by(column).limit(1).scalar() or 1  # noqa: E731
+    return {
+        "lodge_id": first(models.Lodge.id),
+        "member_id": first(models.Member.id),
+        "session_id": first(models.MasonicSession.id),
+        "visitor_id": first(models.Visitor.id),
+    }
+
+
+def hot_queries(db, ids: dict) -> dict:
+    """Catálogo das consultas quentes (mesmos filtros usados nos serviços)."""
+    today = date.today()
+    active_members = models.MemberLodgeAssociation.status == models.MemberStatusEnum.ACTIVE
+    counted_sessions = models.MasonicSession.status.in_(["REALIZADA", "ENCERRADA"])
+
+    queries = {
+        "check-in: presença do membro na sessão": db.query(models.SessionAttendance).filter(
+            models.SessionAttendance.session_id == ids["session_id"],
+            models.SessionAttendance.member_id == ids["member_id"],
+        ),
+        "check-in: presença do visitante na sessão": db.query(models.SessionAttendance).filter(
+            models.SessionAttendance.session_id == ids["session_id"],
+            models.SessionAttendance.visitor_id == ids["visitor_id"],
+        ),
+        "previsão/lista de presença da sessão": db.query(models.SessionAttendance).filter(
+            models.SessionAttendance.session_id == ids["session_id"]
+        ),
+        "histórico de presença do membro": db.query(models.SessionAttendance).filter(
+            models.SessionAttendance.member_id == ids["member_id"]
+        ),
+        "quadro ativo da loja (dashboard)": db.query(models.Member.degree, func.count(models.Member.id))
+        .join(models.MemberLodgeAssociation)
+        .filter(models.MemberLodgeAssociation.lodge_id == ids["lodge_id"], active_members)
+        .group_by(models.Member.degree),
+        "vínculo membro/loja (autorização)": db.query(models.MemberLodgeAssociation).filter(
+            models.MemberLodgeAssociation.member_id == ids["member_id"],
+            models.MemberLodgeAssociation.lodge_id == ids["lodge_id"],
+        ),
+        "próxima sessão da loja": db.query(models.MasonicSession)
+        .filter(
+            models.MasonicSession.lodge_id == ids["lodge_id"],
+            models.MasonicSession.session_date >= today,
+            models.MasonicSession.status != "CANCELADA",
+        )
+        .order_by(models.MasonicSession.session_date)
+        .limit(1),
+        "agendador: sessões vencidas por status/data": db.query(models.MasonicSession.id).filter(
+            models.MasonicSession.status.in_(["AGENDADA", "EM_ANDAMENTO"]),
+            models.MasonicSession.session_date <= today - timedelta(days=2),
+        ),
+        "obreiro por telefone (webhook/importação)": db.query(models.Member.id).filter(
+            models.Member.phone_normalized.in_(["5562999991234", "556299991234"])
+        ),
+        "listagem de obreiros por cursor": db.query(
+            models.Member.id, models.Member.full_name, member_service.active_role_subquery()
+        )
+        .filter(tuple_(models.Member.full_name, models.Member.id) > tuple_("M", 0))
+        .order_by(models.Member.full_name, models.Member.id)
+        .limit(51),
+        "estatísticas de presença da loja": db.query(
+            models.SessionAttendance.member_id, func.count(models.SessionAttendance.id)
+        )
+        .join(models.SessionAttendance.session)
+        .filter(
+            models.MasonicSession.lodge_id == ids["lodge_id"],
+            models.MasonicSession.session_date >= today - timedelta(days=365),
+            counted_sessions,
+            models.SessionAttendance.attendance_status == "Presente",
+        )
+        .group_by(models.SessionAttendance.member_id),
+        "aniversários do mês (índice)": db.query(models.AnniversaryIndex).filter(
+            models.AnniversaryIndex.lodge_id == ids["lodge_id"],
+            models.AnniversaryIndex.month == today.month,
+        ),
+        "assiduidade mensal do membro (rollup)": db.query(models.AttendanceMonthlyRollup).filter(
+            models.AttendanceMonthlyRollup.member_id == ids["member_id"],
+            models.AttendanceMonthlyRollup.period_start >= today.replace(day=1) - timedelta(days=365),
+        ),
+    }
+    if db.get_bind().dialect.name == "postgresql":
+        # LIKE '%termo%' só tem índice com pg_trgm; no SQLite a varredura é esperada
+        queries["busca de obreiros por nome (trigramas)"] = db.query(models.Member.id).filter(
+            search_service.text_match(db, models.Member.search_name, "silva")
+        )
+        queries["busca de visitantes por nome (trigramas)"] = db.query(models.Visitor.id).filter(
+            search_service.text_match(db, models.Visitor.search_name, "silva")
+        )
+    return queries
+
+
+def _compile(query, dialect_name: str) -> str:
+    dialect = postgresql.dialect() if dialect_name == "postgresql" else sqlite.dialect()
+    return str(query.statement.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+
+
+def _postgres_seq_scans(plan: dict) -> list[str]:
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") not in IGNORED_TABLES:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(_postgres_seq_scans(child))
+    return found
+
+
+def explain(db, sql: str, dialect_name: str) -> tuple[list[str], str]:
+    """Retorna (tabelas varridas sequencialmente, plano em texto)."""
+    if dialect_name == "postgresql":
+        raw = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        plan = (raw if isinstance(raw, list) else json.loads(raw))[0]["Plan"]
+        return _postgres_seq_scans(plan), json.dumps(plan, indent=2)
+
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    details = [row[-1] for row in rows]
+    scans = []
+    for detail in details:
+        # SQLite: "SCAN <tabela>" sem índice é varredura completa; "SEARCH ... USING INDEX" é ok
+        if detail.startswith("SCAN ") and "USING" not in detail:
+            table = detail.split()[1]
+            if table not in IGNORED_TABLES:
+                scans.append(table)
+    return scans, "\n".join(details)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Aponta varreduras sequenciais nas consultas quentes.")
+    parser.add_argument("--verbose", action="store_true", help="Imprime o plano completo de cada consulta.")
+    parser.add_argument("--allow-seqscan", action="store_true", help="Não desliga enable_seqscan no PostgreSQL.")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql" and not args.allow_seqscan:
+            db.execute(text("SET LOCAL enable_seqscan = off"))
+
+        ids = _sample_ids(db)
+        flagged = 0
+        for name, query in hot_queries(db, ids).items():
+            scans, plan = explain(db, _compile(query, dialect_name), dialect_name)
+            status = "SEQ SCAN em " + ", ".join(sorted(set(scans))) if scans else "ok"
+            print(f"[{'!!' if scans else 'ok'}] {name}: {status}")
+            if args.verbose:
+                print(plan + "\n")
+            flagged += bool(scans)
+
+        print(f"\n{flagged} de {len(hot_queries(db, ids))} consultas com varredura sequencial.")
+        return 1 if flagged else 0
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -243,6 +243,56 @@ def setup_base_permissions(db_session):
     db_session.commit()
 
 
+@pytest.fixture(autouse=True)
+def clear_user_context_cache():
+    """Os IDs se repetem entre testes (rollback), então o cache de credenciais é limpo a cada teste."""
+    from app.shared.security.cache import user_context_cache
+
+    user_context_cache.invalidate_all()
+    yield
+    user_context_cache.invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_obedience_hierarchy_cache():
+    """Os IDs de obediências também se repetem entre testes; as lojas subordinadas são recalculadas."""
+    from app.modules.core.services.obedience_hierarchy_service import hierarchy_cache
+
+    hierarchy_cache.invalidate_all()
+    yield
+    hierarchy_cache.invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def reset_revoked_token_index():
+    """O índice de JTIs revogados é por processo; cada teste parte de um índice vazio."""
+    from app.shared.security.token_revocation import revoked_token_index
+
+    revoked_token_index.reset()
+    yield
+    revoked_token_index.reset()
+
+
+@pytest.fixture(autouse=True)
+def clear_dashboard_cache():
+    """O snapshot do dashboard é cacheado por loja; cada teste parte de um cache vazio."""
+    from app.modules.core.services.dashboard_service import dashboard_cache
+
+    dashboard_cache.invalidate_all()
+    yield
+    dashboard_cache.invalidate_all()
+
+
+@pytest.fixture(autouse=True)
+def clear_holiday_calendar():
+    """O calendário de feriados é memoizado por (loja, ano) e os ids de loja se repetem entre testes."""
+    from app.modules.sessions.services.holiday_service import holiday_calendar
+
+    holiday_calendar.invalidate_all()
+    yield
+    holiday_calendar.invalidate_all()
+
+
 @pytest.fixture
 def sample_role(db_session):
     """Cria um cargo de teste."""
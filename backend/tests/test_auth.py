@@ -36,3 +36,15 @@ def test_access_protected_route_with_token(client, super_admin_token):
     # Deve haver pelo menos o super admin criado pela fixture
     assert len(data) >= 1
     assert data[0]["email"] == "admin@test.com"
+
+
+@pytest.mark.integration
+def test_logout_revokes_access_token(client, super_admin_token):
+    """Após o logout, o mesmo Access Token deve ser recusado (índice de JTIs revogados)."""
+    headers = {"Authorization": f"Bearer {super_admin_token}"}
+    response = client.post("/auth/logout", headers=headers)
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+
+    response = client.get("/super-admins/", headers=headers)
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
+    assert response.json()["detail"] == "Token has been revoked"
@@ -0,0 +1,68 @@
+from datetime import date
+
+import pytest
+
+from app.shared.base_repository import BaseRepository
+from app.shared.tenant_context import TenantContextManager
+from models.models import AttendanceMonthlyRollup, Notice
+
+
+@pytest.fixture
+def lodge_context(sample_lodge):
+    token = TenantContextManager.set_lodge_id(sample_lodge.id)
+    yield sample_lodge
+    TenantContextManager.reset_lodge_id(token)
+
+
+def test_bulk_operations_are_tenant_scoped(db_session, lodge_context, sample_lodge_2):
+    """Injeção de lodge_id, filtro por tenant em get_many/iter_all/bulk_update e upsert sem invadir outra loja."""
+    notices = BaseRepository(Notice, db_session)
+    created = notices.bulk_create([{"title": f"Aviso {i}", "content": "x"} for i in range(5)])
+    assert {notice.lodge_id for notice in created} == {lodge_context.id}
+    foreign = Notice(title="Outra loja", content="x", lodge_id=sample_lodge_2.id)
+    db_session.add(foreign)
+    db_session.commit()
+
+    ids = [notice.id for notice in created]
+    assert sorted(notice.id for notice in notices.get_many([*ids, foreign.id])) == ids
+    assert [notice.id for notice in notices.iter_all(batch_size=2)] == ids
+
+    updated = notices.bulk_update([{"id": ids[0], "title": "Editado"}, {"id": foreign.id, "title": "Invadido"}])
+    assert updated == 1
+    db_session.refresh(foreign)
+    assert foreign.title == "Outra loja"
+
+    rollups = BaseRepository(AttendanceMonthlyRollup, db_session)
+    key = {"member_id": 1, "period_start": date(2025, 1, 1)}
+    with rollups.bypass_tenant():
+        rollups.create({**key, "lodge_id": sample_lodge_2.id, "sessions_held": 9})
+    rollups.upsert_many([{**key, "sessions_held": 1}], index_elements=["lodge_id", "member_id", "period_start"])
+    rollups.upsert_many([{**key, "sessions_held": 4}], index_elements=["lodge_id", "member_id", "period_start"])
+    with rollups.bypass_tenant():
+        assert sorted((row.lodge_id, row.sessions_held) for row in rollups.iter_all()) == [
+            (lodge_context.id, 4), (sample_lodge_2.id, 9)
+        ]
+
+
+def test_unit_of_work_commits_once_and_rolls_back_on_error(db_session, lodge_context):
+    """Dentro do bloco as escritas só fazem flush; o commit acontece uma vez, ao sair (rollback se falhar)."""
+    from sqlalchemy import event
+
+    commits = []
+    event.listen(db_session, "after_commit", lambda session: commits.append(True))
+    notices = BaseRepository(Notice, db_session)
+
+    with notices.unit_of_work():
+        notices.bulk_create([{"title": "A", "content": "x"}, {"title": "B", "content": "x"}])
+        notices.create({"title": "C", "content": "x"})
+        assert commits == []
+    assert len(commits) == 1
+    assert notices.autocommit is True
+    assert sorted(notice.title for notice in notices.get_all()) == ["A", "B", "C"]
+
+    with pytest.raises(RuntimeError):
+        with notices.unit_of_work():
+            notices.create({"title": "Descartado", "content": "x"})
+            raise RuntimeError
+    assert len(commits) == 1
+    assert "Descartado" not in {notice.title for notice in notices.get_all()}
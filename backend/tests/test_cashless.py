@@ -0,0 +1,73 @@
+"""
+Testes do saldo materializado das carteiras cashless.
+
+Execute com: pytest tests/test_cashless.py -v
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from app.modules.cashless import services as cashless_service
+from app.modules.cashless.models import CashlessProfileTypeEnum, CashlessUser, Wallet
+from app.modules.cashless.schemas import CashlessUserCreate, ManualTransactionRequest, OrderCreate, ProductCreate
+
+
+@pytest.fixture
+def cashless_client(db_session, sample_lodge):
+    return cashless_service.create_cashless_user_and_wallet(
+        db_session, CashlessUserCreate(name="Cliente Teste", identification_key="00011122233"), sample_lodge.id
+    )
+
+
+@pytest.fixture
+def cashless_operator(db_session):
+    operator = CashlessUser(name="Caixa Teste", identification_key="caixa-01", profile_type=CashlessProfileTypeEnum.CAIXA)
+    db_session.add(operator)
+    db_session.commit()
+    return operator
+
+
+def _credit(db_session, lodge_id, user, operator, value):
+    return cashless_service.process_manual_transaction(
+        db_session,
+        ManualTransactionRequest(
+            usuario_id=user.id, operador_id=operator.id, tipo="Crédito Maquininha", valor=Decimal(value)
+        ),
+        lodge_id,
+    )
+
+
+@pytest.mark.unit
+class TestWalletBalance:
+    """Saldo materializado deve acompanhar o Ledger."""
+
+    def test_credit_and_order_update_materialized_balance(
+        self, db_session, sample_lodge, cashless_client, cashless_operator
+    ):
+        _credit(db_session, sample_lodge.id, cashless_client, cashless_operator, "50.00")
+        product = cashless_service.create_product(
+            db_session,
+            ProductCreate(name="Água", price=Decimal("7.50"), stock=10, min_stock=1, is_active=True),
+            sample_lodge.id,
+        )
+        cashless_service.process_order(
+            db_session,
+            OrderCreate(usuario_id=cashless_client.id, canal="PDV Balcão", itens=[{"produto_id": product.id, "quantidade": 2}]),
+            sample_lodge.id,
+        )
+
+        balance = cashless_service.get_dynamic_balance(db_session, cashless_client.id, sample_lodge.id)
+        ledger = cashless_service.get_dynamic_balance(db_session, cashless_client.id, sample_lodge.id, from_ledger=True)
+        assert balance == Decimal("35.00")
+        assert ledger == balance
+
+    def test_reconcile_reports_and_fixes_drift(self, db_session, sample_lodge, cashless_client, cashless_operator):
+        _credit(db_session, sample_lodge.id, cashless_client, cashless_operator, "20.00")
+        db_session.query(Wallet).filter(Wallet.cashless_user_id == cashless_client.id).update({Wallet.balance: 5})
+        db_session.commit()
+
+        drifts = cashless_service.reconcile_wallet_balances(db_session, lodge_id=sample_lodge.id, fix=True)
+        assert len(drifts) == 1
+        assert drifts[0]["ledger_balance"] == Decimal("20.00")
+        assert cashless_service.reconcile_wallet_balances(db_session, lodge_id=sample_lodge.id) == []
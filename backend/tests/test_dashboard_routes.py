@@ -40,3 +40,44 @@ def test_get_calendar_events_missing_params(client, webmaster_token):
     # Tests that the calendar endpoint fails without month and year
     response = client.get("/dashboard/calendar", headers={"Authorization": f"Bearer {webmaster_token}"})
     assert response.status_code == 422  # Validation Error
+
+
+def test_get_dashboard_stats_invalidated_on_notice_commit(client, db_session, webmaster_token, sample_lodge):
+    # O snapshot é cacheado por loja e invalidado no commit de um novo aviso
+    from models.models import Notice
+
+    headers = {"Authorization": f"Bearer {webmaster_token}"}
+    before = client.get("/dashboard/stats", headers=headers).json()["active_notices_count"]
+
+    db_session.add(Notice(title="Aviso", content="Sessão adiada", lodge_id=sample_lodge.id))
+    db_session.commit()
+
+    after = client.get("/dashboard/stats", headers=headers).json()["active_notices_count"]
+    assert after == before + 1
+
+
+def test_get_calendar_events_reads_anniversary_index(client, db_session, webmaster_token, sample_member):
+    # O índice de aniversários é mantido no commit do obreiro e alimenta o calendário
+    from models.models import AnniversaryIndex
+
+    sample_member.birth_date = date(1990, 3, 15)
+    db_session.commit()
+
+    assert db_session.query(AnniversaryIndex).filter(AnniversaryIndex.member_id == sample_member.id).count() == 1
+
+    response = client.get("/dashboard/calendar?month=3&year=2030", headers={"Authorization": f"Bearer {webmaster_token}"})
+    assert response.status_code == 200
+    birthdays = [e for e in response.json() if e["type"] == "aniversario"]
+    assert any(e["date"] == 15 and sample_member.full_name in e["title"] for e in birthdays)
+
+
+def test_get_lodge_members_rejects_invalid_limit(client, webmaster_token, sample_member):
+    # limit fora de 1..200 é recusado na validação, antes de chegar à paginação
+    headers = {"Authorization": f"Bearer {webmaster_token}"}
+    for limit in (0, -1, 201):
+        response = client.get(f"/dashboard/members?limit={limit}", headers=headers)
+        assert response.status_code == 422
+
+    response = client.get("/dashboard/members?limit=1", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 1
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import pytest
+
+from app.modules.members.services.import_gobgo_parser import (
+    clean_garbage,
+    extract_gob_go_data,
+    split_sections,
+    to_title_case,
+)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def load_sample_fichas() -> list[str]:
+    """Fichas GOB-GO de exemplo do repositório: texto extraído limpo e o capturado no console (UTF-16)."""
+    fichas = [(REPO_ROOT / "ficha_content.txt").read_text(encoding="utf-8")]
+    console = (REPO_ROOT / "parser_result.txt").read_text(encoding="utf-16")
+    fichas.append(console.split("--- RAW TEXT ---", 1)[1].split("--- EXTRACTED DATA ---", 1)[0])
+    return fichas
+
+
+@pytest.mark.unit
+def test_text_helpers():
+    assert clean_garbage("0 2 ALAN DIVINO MONTEIRO DA ROCHA 0 2") == "ALAN DIVINO MONTEIRO DA ROCHA"
+    assert clean_garbage("Goiânia - GO 1 2") == "Goiânia - GO"
+    assert to_title_case("MARIA DAS DORES E SILVA") == "Maria das Dores e Silva"
+    assert to_title_case("goiânia - go (centro)") == "Goiânia - Go (Centro)"
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("text", load_sample_fichas(), ids=["ficha_content", "parser_result"])
+def test_extract_sample_fichas(text):
+    sections = split_sections(text)
+    assert list(sections) == sorted(sections, key=sections.get)
+    assert "INITIATION" in sections and "FAMILY" in sections
+
+    data = extract_gob_go_data(text)
+
+    assert data.cim == "333786"
+    assert data.name == "Alan Divino Monteiro da Rocha"
+    assert data.email == "alanmonteiro13@gmail.com"
+    assert data.degree == "3"
+    assert data.birth_date == "1980-09-13"
+    assert data.phone == "+5562981105899"
+    assert data.initiation_certificate == "4864"
+    assert [e["event_type"] for e in data.masonic_history][:2] == ["INITIATION", "ELEVATION"]
+    assert data.masonic_history[1]["process_number"] == "GSGO - 16034"
+    assert [(f["relationship_type"], f["full_name"], f["birth_date"]) for f in data.family_members] == [
+        ("Esposa", "Ana Luiza Aparecida Bernardes", "1989-09-11"),
+        ("Filho", "Ana Monteiro Mendes", "2007-08-13"),
+        ("Filho", "Maria Clara Monteiro da Fonseca", "2012-09-24"),
+    ]
@@ -0,0 +1,38 @@
+"""
+Benchmarks do parser de fichas GOB-GO (pytest-benchmark). Ignorados se o plugin não estiver instalado.
+
+    pytest tests/test_import_gobgo_parser_benchmark.py --benchmark-only --benchmark-autosave
+    pytest tests/test_import_gobgo_parser_benchmark.py --benchmark-only --benchmark-compare --benchmark-compare-fail=mean:20%
+"""
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from app.modules.members.services.import_gobgo_parser import extract_gob_go_data, split_sections  # noqa: E402
+from tests.test_import_gobgo_parser import load_sample_fichas  # noqa: E402
+
+FICHAS = load_sample_fichas()
+IDS = ["ficha_content", "parser_result"]
+# Um PDF de lote da GOB-GO costuma trazer algumas centenas de fichas
+BATCH_SIZE = 200
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("text", FICHAS, ids=IDS)
+def test_benchmark_extract_ficha(benchmark, text):
+    data = benchmark(extract_gob_go_data, text)
+    assert data.cim == "333786"
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("text", FICHAS, ids=IDS)
+def test_benchmark_split_sections(benchmark, text):
+    sections = benchmark(split_sections, text)
+    assert "FAMILY" in sections
+
+
+@pytest.mark.slow
+def test_benchmark_extract_batch(benchmark):
+    batch = (FICHAS * BATCH_SIZE)[:BATCH_SIZE]
+    results = benchmark.pedantic(lambda: [extract_gob_go_data(text) for text in batch], rounds=5, iterations=1)
+    assert len(results) == BATCH_SIZE
@@ -0,0 +1,138 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.attributes import set_committed_value
+
+from datetime import date
+
+from app.modules.members.schemas.import_schemas import ImportMemberRow
+from app.modules.members.services import member_import_job_service
+from app.modules.members.services.member_bulk_upsert_service import MemberBulkUpsertService
+from models.models import (
+    FamilyMember,
+    MasonicEvent,
+    Member,
+    MemberImportJob,
+    MemberImportStagingRow,
+    MemberLodgeAssociation,
+)
+
+
+def _stage(db_session, job, **data):
+    row = member_import_job_service.validate_import_row(member_import_job_service.ImportMemberRow(**data))
+    db_session.add(MemberImportStagingRow(job_id=job.id, file_name="fichas.pdf", data=row.model_dump(), is_valid=row.is_valid))
+
+
+def test_confirm_job_upserts_rows_in_chunks(db_session, sample_lodge, sample_member):
+    job = MemberImportJob(lodge_id=sample_lodge.id, status="PRONTO", total_files=1, total_rows=4, valid_rows=3)
+    db_session.add(job)
+    db_session.flush()
+    _stage(db_session, job, cim=sample_member.cim, name="João Pedro da Silva", degree="3")
+    _stage(
+        db_session, job, cim="333786", name="Alan Divino", email="alan@test.com", phone="+5562981105899",
+        family_members=[{"relationship_type": "Filho", "full_name": "Davi", "birth_date": "2015-04-02"}],
+    )
+    # Ficha repetida no mesmo lote: atualiza o cadastro recém-criado em vez de duplicar
+    _stage(db_session, job, cim="333786", name="Alan Divino Monteiro", email="alan@test.com")
+    _stage(db_session, job, email="sem.nome@test.com")
+    db_session.commit()
+
+    member_import_job_service.start_confirmation(db_session, job)
+    member_import_job_service.run_confirm_job(job.id, session_factory=sessionmaker(bind=db_session.get_bind()))
+    db_session.expire_all()
+
+    assert (job.status, job.processed_rows, job.created_count, job.updated_count, job.skipped_count) == (
+        "CONCLUIDO", 4, 1, 2, 1
+    )
+    assert sample_member.full_name == "João Pedro da Silva"
+    alan = db_session.query(Member).filter(Member.cim == "333786").one()
+    assert alan.full_name == "Alan Divino Monteiro"
+    assert alan.phone_normalized == "5562981105899"
+    assert [fm.full_name for fm in db_session.query(FamilyMember).filter(FamilyMember.member_id == alan.id)] == ["Davi"]
+    assert db_session.query(MemberLodgeAssociation).filter(MemberLodgeAssociation.member_id == alan.id).count() == 1
+
+
+def test_start_confirmation_claims_job_once(db_session, sample_lodge):
+    """Duplo clique: a segunda confirmação encontra o job já em IMPORTANDO, mesmo com o objeto desatualizado."""
+    job = MemberImportJob(lodge_id=sample_lodge.id, status="PRONTO", total_files=1, total_rows=1, valid_rows=1)
+    db_session.add(job)
+    db_session.commit()
+
+    # Outra requisição já confirmou; o objeto em memória ainda diz PRONTO
+    db_session.query(MemberImportJob).filter(MemberImportJob.id == job.id).update(
+        {MemberImportJob.status: "IMPORTANDO"}, synchronize_session=False
+    )
+    db_session.commit()
+    set_committed_value(job, "status", "PRONTO")
+
+    with pytest.raises(ValueError):
+        member_import_job_service.start_confirmation(db_session, job)
+    assert job.status == "IMPORTANDO"
+
+
+def test_bulk_upsert_merges_child_collections(db_session, sample_lodge, sample_member):
+    initiation = MasonicEvent(member_id=sample_member.id, event_type="INITIATION", session_date=date(2000, 1, 1))
+    elevation = MasonicEvent(member_id=sample_member.id, event_type="ELEVATION", session_date=date(2001, 1, 1))
+    db_session.add_all([initiation, elevation, FamilyMember(member_id=sample_member.id, relationship_type="Esposa", full_name="Maria")])
+    db_session.commit()
+
+    rows = [
+        ImportMemberRow(
+            cim=sample_member.cim, name="João Pedro da Silva", degree="3", is_valid=True,
+            masonic_history=[
+                {"event_type": "INITIATION", "session_date": "2000-01-01", "process_number": "GSGO - 1"},
+                {"event_type": "EXALTATION", "session_date": "2002-01-01"},
+            ],
+            family_members=[{"relationship_type": "Esposa", "full_name": "MARIA", "birth_date": "1975-05-05"}],
+        ),
+        ImportMemberRow(email="novo@test.com", name="Obreiro Novo", phone="+5562981105899", is_valid=True),
+        ImportMemberRow(name="Sem e-mail", cim="1234", is_valid=True),
+    ]
+    service = MemberBulkUpsertService(db_session, lodge_id=sample_lodge.id, chunk_size=2)
+    outcomes = service.upsert(rows)
+    db_session.commit()
+    db_session.expire_all()
+
+    assert service.counts == {"created": 1, "updated": 1, "skipped": 1}
+    assert outcomes[0].member_id == sample_member.id and outcomes[2].member_id is None
+    assert (sample_member.full_name, sample_member.degree) == ("João Pedro da Silva", 3)
+    # Evento igual é atualizado no lugar, o ausente da ficha sai e o novo entra
+    events = {ev.event_type.name: ev for ev in db_session.query(MasonicEvent).filter(MasonicEvent.member_id == sample_member.id)}
+    assert set(events) == {"INITIATION", "EXALTATION"}
+    assert (events["INITIATION"].id, events["INITIATION"].process_number) == (initiation.id, "GSGO - 1")
+    spouse = db_session.query(FamilyMember).filter(FamilyMember.member_id == sample_member.id).one()
+    assert (spouse.full_name, spouse.birth_date) == ("MARIA", date(1975, 5, 5))
+    new_member = db_session.get(Member, outcomes[1].member_id)
+    assert new_member.phone_normalized == "5562981105899"
+    assert db_session.query(MemberLodgeAssociation).filter(MemberLodgeAssociation.lodge_id == sample_lodge.id).count() == 2
+
+
+def test_bulk_upsert_keeps_cpf_owned_by_another_member(db_session, sample_lodge, sample_member):
+    """CPF que já pertence a outro cadastro não é copiado (violaria o índice único) e o lote segue."""
+    other = Member(full_name="Outro Irmão", email="outro@test.com", cpf="111.444.777-35", cim="900001", password_hash="x")
+    db_session.add(other)
+    db_session.commit()
+
+    rows = [
+        ImportMemberRow(cim=sample_member.cim, name="João Pedro Silva", cpf=other.cpf, is_valid=True),
+        ImportMemberRow(email="cpf.novo@test.com", name="Obreiro Novo", cpf=other.cpf, is_valid=True),
+        ImportMemberRow(email="cpf.livre@test.com", name="Obreiro Livre", cpf="529.982.247-25", is_valid=True),
+    ]
+    service = MemberBulkUpsertService(db_session, lodge_id=sample_lodge.id)
+    outcomes = service.upsert(rows)
+    db_session.commit()
+    db_session.expire_all()
+
+    assert service.counts == {"created": 2, "updated": 1, "skipped": 0}
+    assert sample_member.cpf != other.cpf
+    assert db_session.get(Member, outcomes[1].member_id).cpf is None
+    assert db_session.get(Member, outcomes[2].member_id).cpf == "529.982.247-25"
+
+
+def test_import_storage_dir_does_not_depend_on_cwd(tmp_path, monkeypatch):
+    """Os arquivos do job ficam no storage do módulo, qualquer que seja o diretório de trabalho."""
+    from pathlib import Path
+
+    monkeypatch.chdir(tmp_path)
+    storage_dir = member_import_job_service.IMPORT_STORAGE_DIR
+    assert storage_dir.is_absolute()
+    assert storage_dir == Path(member_import_job_service.__file__).resolve().parent.parent / "storage" / "imports" / "members"
@@ -156,3 +156,181 @@ def test_read_members_standard_member(client, standard_member_token, sample_memb
     member_ids = [m["id"] for m in data]
     assert sample_member.id in member_ids
 
+
+
+def test_phone_normalized_kept_in_sync_and_used_for_lookup(db_session, sample_member):
+    """phone_normalized acompanha phone e a busca exata aceita o JID sem o nono dígito."""
+    from app.modules.members.services import member_service
+
+    assert sample_member.phone_normalized == "5561999999999"
+    assert member_service.get_member_id_by_phone(db_session, "556199999999") == sample_member.id
+    assert member_service.get_member_by_phone(db_session, "+55 (61) 99999-9999").id == sample_member.id
+
+    sample_member.phone = "(62) 3333-4444"
+    db_session.commit()
+    assert sample_member.phone_normalized == "556233334444"
+    assert member_service.get_member_id_by_phone(db_session, "61999999999") is None
+
+
+def test_phone_normalized_always_stores_ninth_digit(db_session, sample_member):
+    """As grafias com e sem o nono dígito convergem para a mesma forma canônica."""
+    from app.shared.utils.validators import normalize_phone, phone_variants
+
+    assert normalize_phone("556299991234") == normalize_phone("5562999991234") == "5562999991234"
+    assert normalize_phone("(62) 3333-4444") == "556233334444"
+    assert phone_variants("556299991234") == ["5562999991234", "556299991234"]
+
+    sample_member.phone = "556199999999"
+    db_session.commit()
+    assert sample_member.phone_normalized == "5561999999999"
+
+
+@pytest.mark.integration
+def test_update_member_phone_owned_by_another_member(client, webmaster_token, db_session, sample_lodge, sample_member):
+    """Atualizar para o telefone de outro membro (em qualquer grafia) retorna 409, sem erro de integridade."""
+    from models.models import Member, MemberLodgeAssociation
+
+    other = Member(full_name="Outro Irmão", email="outro@test.com", cpf="52998224725", password_hash="x", phone="62999991234")
+    db_session.add(other)
+    db_session.flush()
+    db_session.add(MemberLodgeAssociation(member_id=other.id, lodge_id=sample_lodge.id))
+    db_session.commit()
+
+    for phone in ("(61) 99999-9999", "556199999999"):
+        response = client.put(
+            f"/members/{other.id}",
+            json={"phone": phone},
+            headers={"Authorization": f"Bearer {webmaster_token}"},
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.json()["detail"] == "Telefone já cadastrado."
+
+    response = client.put(
+        f"/members/{other.id}",
+        json={"phone": "(62) 99999-1234"},
+        headers={"Authorization": f"Bearer {webmaster_token}"},
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+
+def test_member_list_page_uses_keyset_cursor_and_projection(db_session, sample_lodge, sample_member):
+    """Páginas por cursor em (full_name, id), cargo ativo resolvido no SQL e projeção por fields."""
+    from datetime import date
+
+    from app.modules.members.services import member_service
+    from models.models import Member, MemberLodgeAssociation, Role, RoleHistory
+
+    for i, name in enumerate(["Carlos Alves", "Bruno Lima", "Bruno Lima"]):
+        member = Member(full_name=name, email=f"pag{i}@test.com", cpf=f"0000000000{i}", password_hash="x")
+        db_session.add(member)
+        db_session.flush()
+        db_session.add(MemberLodgeAssociation(member_id=member.id, lodge_id=sample_lodge.id))
+    role = Role(name="Venerável Mestre", role_type="Loja")
+    db_session.add(role)
+    db_session.flush()
+    db_session.add_all([
+        RoleHistory(member_id=sample_member.id, role_id=role.id, lodge_id=sample_lodge.id, start_date=date(2020, 1, 1), end_date=date(2021, 1, 1)),
+        RoleHistory(member_id=sample_member.id, role_id=role.id, lodge_id=sample_lodge.id, start_date=date(2024, 1, 1)),
+    ])
+    db_session.commit()
+
+    pages, cursor = [], None
+    while True:
+        items, cursor = member_service.list_members_page(
+            db_session, cursor=cursor, limit=2, fields=["full_name", "active_role"], lodge_id=sample_lodge.id
+        )
+        pages.append(items)
+        if cursor is None:
+            break
+
+    assert [len(page) for page in pages] == [2, 2]
+    assert [item["full_name"] for page in pages for item in page] == [
+        "Bruno Lima", "Bruno Lima", "Carlos Alves", sample_member.full_name
+    ]
+    assert set(pages[0][0]) == {"full_name", "active_role"}
+    assert pages[1][1]["active_role"] == "Venerável Mestre"
+    with pytest.raises(ValueError):
+        member_service.list_members_page(db_session, cursor="nao-e-um-cursor")
+    with pytest.raises(ValueError):
+        member_service.list_members_page(db_session, limit=0, lodge_id=sample_lodge.id)
+
+
+def test_upload_profile_picture_uses_async_session(client, tmp_path):
+    """A rota async da foto consulta e grava pelo AsyncSession (get_async_db), sem bloquear o event loop."""
+    import io
+    import shutil
+    from pathlib import Path
+
+    from PIL import Image
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from sqlalchemy.orm import Session
+
+    import database
+    import dependencies
+    from app.modules.members.routes import member_routes
+    from main import app
+    from models.models import Base, Lodge, Member, MemberLodgeAssociation, Obedience
+
+    # Banco em arquivo: a sessão síncrona semeia e a assíncrona (aiosqlite) atende a rota
+    db_file = tmp_path / "async.db"
+    sync_engine = create_engine(f"sqlite:///{db_file}")
+    Base.metadata.create_all(sync_engine)
+    with Session(sync_engine) as db:
+        obedience = Obedience(name="Async", type="Federal", technical_contact_name="t", technical_contact_email="t@t.com")
+        db.add(obedience)
+        db.flush()
+        lodge = Lodge(lodge_name="Loja Async", lodge_number="async-test", lodge_code="async", obedience_id=obedience.id,
+                      technical_contact_name="t", technical_contact_email="t@t.com")
+        member = Member(full_name="Irmão Async", email="async@test.com", cim="424242", password_hash="x")
+        db.add_all([lodge, member])
+        db.flush()
+        db.add(MemberLodgeAssociation(member_id=member.id, lodge_id=lodge.id))
+        db.commit()
+        member_id, lodge_id = member.id, lodge.id
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}")
+    async_session = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session() as db:
+            yield db
+
+    app.dependency_overrides[database.get_async_db] = override_get_async_db
+    app.dependency_overrides[dependencies.get_current_user_payload] = lambda: {
+        "user_type": "webmaster", "lodge_id": lodge_id
+    }
+    image = io.BytesIO()
+    Image.new("RGB", (120, 120)).save(image, format="PNG")
+    storage_dir = Path(member_routes.__file__).parent.parent / "storage" / "lodges" / "loja_async-test"
+    try:
+        response = client.post(f"/members/{member_id}/photo", files={"file": ("foto.png", image.getvalue(), "image/png")})
+    finally:
+        shutil.rmtree(storage_dir, ignore_errors=True)
+
+    assert response.status_code == 200, response.text
+    assert response.json()["path"] == "/storage/lodges/loja_async-test/users/profile_pictures/424242.png"
+    with Session(sync_engine) as db:
+        assert db.get(Member, member_id).profile_picture_path == response.json()["path"]
+
+
+def test_async_engine_is_created_on_first_use(monkeypatch):
+    """A engine assíncrona só nasce em get_async_db; sem driver asyncio a falha fica restrita a ela."""
+    import asyncio
+
+    import database
+
+    assert database.to_async_url("mysql+pymysql://u:p@db:3306/sigma") == "mysql+aiomysql://u:p@db:3306/sigma"
+    assert database.to_async_url("postgresql://u:p@db/sigma") == "postgresql+asyncpg://u:p@db/sigma"
+
+    monkeypatch.setattr(database, "ASYNC_DATABASE_URL", "mysql+pymysql://u:p@db:3306/sigma")
+    monkeypatch.setattr(database, "async_engine", None)
+    monkeypatch.setattr(database, "AsyncSessionLocal", None)
+
+    async def open_session():
+        async for _db in database.get_async_db():
+            pass
+
+    with pytest.raises(RuntimeError, match="driver asyncio"):
+        asyncio.run(open_session())
+    assert database.async_engine is None
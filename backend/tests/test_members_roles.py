@@ -89,3 +89,69 @@ def test_assign_role_member_not_found(client, webmaster_token, sample_role, samp
     )
     assert response.status_code == status.HTTP_404_NOT_FOUND
     assert "Member not found" in response.json()["detail"]
+
+
+@pytest.mark.unit
+def test_administration_officers_invalidate_user_context(db_session, sample_member, sample_role, sample_lodge):
+    """Compor ou trocar a diretoria invalida o contexto em cache de quem entra e de quem sai."""
+    from app.modules.core.schemas import administration_schema
+    from app.modules.core.services import administration_service
+    from app.shared.security.cache import user_context_cache
+    from app.shared.security.constants import UserTypeEnum
+    from models.models import Member
+
+    other = Member(full_name="Irmão Secretário", email="secretario@test.com", cpf="52998224725", password_hash="x")
+    db_session.add(other)
+    db_session.commit()
+
+    def cache_context(member_id):
+        user_context_cache.set((UserTypeEnum.MEMBER, member_id, sample_lodge.id, None), (0, frozenset(), frozenset()))
+
+    cache_context(sample_member.id)
+    admin = administration_service.create_administration(
+        db_session,
+        administration_schema.AdministrationCreate(
+            identifier="2026-2027", start_date=date(2026, 1, 1), end_date=date(2027, 12, 31),
+            officers=[{"role_id": sample_role.id, "member_id": sample_member.id}],
+        ),
+        {"lodge_id": sample_lodge.id},
+    )
+    assert user_context_cache.get((UserTypeEnum.MEMBER, sample_member.id, sample_lodge.id, None)) is None
+
+    cache_context(sample_member.id)
+    cache_context(other.id)
+    administration_service.update_administration(
+        db_session,
+        admin.id,
+        administration_schema.AdministrationUpdate(officers=[{"role_id": sample_role.id, "member_id": other.id}]),
+        {"lodge_id": sample_lodge.id},
+    )
+    assert user_context_cache.get((UserTypeEnum.MEMBER, sample_member.id, sample_lodge.id, None)) is None
+    assert user_context_cache.get((UserTypeEnum.MEMBER, other.id, sample_lodge.id, None)) is None
+
+
+def test_administration_officers_invalidated_after_commit(db_session, sample_member, sample_role, sample_lodge, monkeypatch):
+    """Um contexto recarregado antes do commit (diretoria antiga) não sobrevive à gravação."""
+    from app.modules.core.schemas import administration_schema
+    from app.modules.core.services import administration_service
+    from app.shared.security.cache import user_context_cache
+    from app.shared.security.constants import UserTypeEnum
+
+    key = (UserTypeEnum.MEMBER, sample_member.id, sample_lodge.id, None)
+    commit = db_session.commit
+
+    def commit_after_concurrent_read():
+        # Outra requisição lê o banco ainda sem a diretoria e grava o contexto no cache
+        user_context_cache.set(key, (0, frozenset(), frozenset()))
+        commit()
+
+    monkeypatch.setattr(db_session, "commit", commit_after_concurrent_read)
+    administration_service.create_administration(
+        db_session,
+        administration_schema.AdministrationCreate(
+            identifier="2026-2027", start_date=date(2026, 1, 1), end_date=date(2027, 12, 31),
+            officers=[{"role_id": sample_role.id, "member_id": sample_member.id}],
+        ),
+        {"lodge_id": sample_lodge.id},
+    )
+    assert user_context_cache.get(key) is None
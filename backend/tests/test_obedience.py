@@ -134,3 +134,59 @@ def test_create_obedience_unauthorized(client):
         },
     )
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+def test_hierarchy_resolves_all_levels_and_invalidates_on_commit(db_session, sample_obedience, sample_lodge):
+    """Lojas de subobediências em qualquer nível, cache por obediência e fecho regravado no commit."""
+    from app.modules.core.services import obedience_hierarchy_service
+    from models.models import Lodge, Obedience, ObedienceLodgeClosure
+
+    obedience_hierarchy_service.invalidate_hierarchy()
+    state = Obedience(name="Estadual", type="Estadual", parent_obedience_id=sample_obedience.id,
+                      technical_contact_name="t", technical_contact_email="e@t.com")
+    db_session.add(state)
+    db_session.flush()
+    region = Obedience(name="Regional", type="Estadual", parent_obedience_id=state.id,
+                       technical_contact_name="t", technical_contact_email="r@t.com")
+    db_session.add(region)
+    db_session.flush()
+    deep = Lodge(lodge_name="Loja Regional", lodge_code="deep", obedience_id=state.id, subobedience_id=region.id,
+                 technical_contact_name="t", technical_contact_email="d@t.com")
+    db_session.add(deep)
+    db_session.commit()
+
+    lodges = obedience_hierarchy_service.get_subordinate_lodges(db_session, sample_obedience.id)
+    assert lodges == {sample_lodge.id, deep.id}
+    assert obedience_hierarchy_service.get_subordinate_lodges(db_session, region.id) == {deep.id}
+    closure = {(row.obedience_id, row.lodge_id): row.depth for row in db_session.query(ObedienceLodgeClosure)}
+    assert closure[(sample_obedience.id, deep.id)] == 1
+    assert closure[(region.id, deep.id)] == 0
+
+    # Mover a subobediência para fora da árvore invalida o cache de todos os níveis acima dela
+    state.parent_obedience_id = None
+    db_session.commit()
+    assert obedience_hierarchy_service.get_subordinate_lodges(db_session, sample_obedience.id) == {sample_lodge.id}
+    assert (sample_obedience.id, deep.id) not in {
+        (row.obedience_id, row.lodge_id) for row in db_session.query(ObedienceLodgeClosure)
+    }
+
+
+def test_hierarchy_cache_ignores_uncommitted_changes(db_session, sample_obedience, sample_lodge, sample_lodge_2):
+    """Mudança não commitada é vista pela própria sessão, mas não vai para o cache do processo."""
+    from app.modules.core.services import obedience_hierarchy_service
+    from models.models import Obedience
+
+    other = Obedience(name="Outra", type="Federal", technical_contact_name="t", technical_contact_email="o@t.com")
+    db_session.add(other)
+    db_session.commit()
+    original = obedience_hierarchy_service.get_subordinate_lodges(db_session, sample_obedience.id)
+    obedience_hierarchy_service.invalidate_hierarchy()
+
+    savepoint = db_session.begin_nested()
+    sample_lodge.obedience_id = other.id
+    db_session.flush()
+    assert sample_lodge.id not in obedience_hierarchy_service.get_subordinate_lodges(db_session, sample_obedience.id)
+    savepoint.rollback()
+
+    assert obedience_hierarchy_service.hierarchy_cache.get(sample_obedience.id) is None
+    assert obedience_hierarchy_service.get_subordinate_lodges(db_session, sample_obedience.id) == original
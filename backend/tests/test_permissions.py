@@ -1,6 +1,8 @@
 import pytest
 from fastapi import status
 
+from app.shared.security.cache import UserContextCache
+
 
 @pytest.mark.integration
 def test_create_permission_success(client, super_admin_token):
@@ -117,3 +119,27 @@ def test_create_permission_forbidden_member(client, standard_member_token):
         headers={"Authorization": f"Bearer {standard_member_token}"},
     )
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.unit
+def test_user_context_cache_lru_ttl_and_invalidation():
+    """Cache de credenciais respeita LRU, TTL, invalidação por usuário e contabiliza hits/misses."""
+    cache = UserContextCache(max_size=2, ttl_seconds=60)
+    cache.set(("member", 1, 10, None), (50, frozenset(), frozenset()))
+    cache.set(("member", 2, 10, None), (10, frozenset(), frozenset()))
+
+    assert cache.get(("member", 1, 10, None))[0] == 50
+    cache.set(("member", 3, 10, None), (0, frozenset(), frozenset()))  # Expulsa o membro 2 (menos recente)
+    assert cache.get(("member", 2, 10, None)) is None
+
+    cache.invalidate_user("member", 1)
+    assert cache.get(("member", 1, 10, None)) is None
+
+    expired = UserContextCache(ttl_seconds=0)
+    expired.set(("member", 1, 10, None), (50, frozenset(), frozenset()))
+    assert expired.get(("member", 1, 10, None)) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["size"] == 1
@@ -0,0 +1,67 @@
+from app.modules.core.services import search_service
+from models.models import Member, MemberLodgeAssociation, Visitor
+
+
+def test_search_is_accent_insensitive_ranked_and_scoped(db_session, sample_lodge, sample_lodge_2, sample_member):
+    """Busca sem acentos pela coluna normalizada, exato/prefixo antes de trecho e restrita às lojas do usuário."""
+    other = Member(full_name="Antônio João Ramos", email="outro@test.com", cpf="00000000001", password_hash="x")
+    isolated = Member(full_name="João Isolado", email="isolado@test.com", cpf="00000000002", password_hash="x")
+    db_session.add_all([other, isolated])
+    db_session.flush()
+    db_session.add_all([
+        MemberLodgeAssociation(member_id=other.id, lodge_id=sample_lodge.id),
+        MemberLodgeAssociation(member_id=isolated.id, lodge_id=sample_lodge_2.id),
+        Visitor(full_name="JOÃO Visitante", cim="555"),
+    ])
+    db_session.commit()
+
+    assert sample_member.search_name == "joao pedro silva"
+    assert sample_lodge.search_name == "acacia do cerrado de teste 9999"
+
+    results = search_service.search(db_session, "joao", types=["member"], lodge_ids=[sample_lodge.id])
+    assert [item["title"] for item in results] == ["João Pedro Silva", "Antônio João Ramos"]
+    assert results[0]["score"] > results[1]["score"]
+
+    by_cim = search_service.search(db_session, "272875", types=["member"], lodge_ids=[sample_lodge.id])
+    assert [item["id"] for item in by_cim] == [sample_member.id]
+
+    lodges = search_service.search(db_session, "ACACIA", lodge_ids=[sample_lodge.id])
+    assert [(item["type"], item["id"]) for item in lodges] == [("lodge", sample_lodge.id)]
+    external = search_service.search(db_session, "isolada", types=["lodge", "external_lodge"], lodge_ids=[sample_lodge.id])
+    assert [(item["type"], item["id"]) for item in external] == [("external_lodge", sample_lodge_2.id)]
+
+    # Visitante sem passagem pelas lojas do escopo só aparece para quem não tem restrição
+    assert search_service.search(db_session, "visitante", types=["visitor"], lodge_ids=[sample_lodge.id]) == []
+    assert [item["type"] for item in search_service.search(db_session, "visitante")] == ["visitor"]
+    assert search_service.search(db_session, "j") == []
+
+
+def test_search_subtitle_omits_missing_cim(db_session, sample_lodge):
+    """Sem CIM, o subtítulo não exibe "CIM None"."""
+    db_session.add_all([
+        Member(full_name="Irmão Sem Cim", email="semcim@test.com", cpf="00000000003", password_hash="x"),
+        Visitor(full_name="Visitante Sem Cim", cim="", manual_lodge_name="Loja Visitante"),
+    ])
+    db_session.commit()
+
+    subtitles = {item["title"]: item["subtitle"] for item in search_service.search(db_session, "sem cim")}
+    assert subtitles == {
+        "Irmão Sem Cim": None,
+        "Visitante Sem Cim": "Loja Visitante",
+    }
+
+
+def test_search_route_uses_tenant_scope(client, db_session, webmaster_token, super_admin_token, sample_lodge_2):
+    """A rota restringe a busca às lojas do tenant do token; o super admin vê todas."""
+    isolated = Member(full_name="João Isolado", email="isolado@test.com", cpf="00000000002", password_hash="x")
+    db_session.add(isolated)
+    db_session.flush()
+    db_session.add(MemberLodgeAssociation(member_id=isolated.id, lodge_id=sample_lodge_2.id))
+    db_session.commit()
+
+    scoped = client.get("/search?q=isolado&types=member", headers={"Authorization": f"Bearer {webmaster_token}"})
+    assert scoped.status_code == 200
+    assert scoped.json() == []
+
+    unscoped = client.get("/search?q=isolado&types=member", headers={"Authorization": f"Bearer {super_admin_token}"})
+    assert [item["id"] for item in unscoped.json()] == [isolated.id]
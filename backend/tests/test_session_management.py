@@ -82,3 +82,163 @@ def test_list_sessions_filter(client: TestClient, webmaster_token: str):
 
     # Verify types are returned
     assert any(s["type"] == SessionTypeEnum.ORDINARY.value for s in data)
+
+
+def test_lodges_attendance_stats_grouped_by_lodge(db_session, sample_lodge, sample_lodge_2, sample_member):
+    from app.modules.sessions.services import attendance_service
+    from models.models import MasonicSession, SessionAttendance
+
+    sessions = [
+        MasonicSession(title=f"Sessão {i}", session_date=date.today() - timedelta(days=i + 1), lodge_id=sample_lodge.id, status="REALIZADA")
+        for i in range(2)
+    ]
+    db_session.add_all(sessions)
+    db_session.flush()
+    db_session.add(SessionAttendance(session_id=sessions[0].id, member_id=sample_member.id, attendance_status="Presente"))
+    db_session.commit()
+
+    stats = attendance_service.get_lodges_attendance_stats(db_session, [sample_lodge.id, sample_lodge_2.id])
+
+    assert stats[sample_lodge.id]["total_sessions"] == 2
+    assert stats[sample_lodge.id]["average_attendance"] == 0.5
+    member_stat = next(m for m in stats[sample_lodge.id]["member_stats"] if m["member_id"] == sample_member.id)
+    assert member_stat["present_sessions"] == 1
+    assert member_stat["attendance_rate"] == 50.0
+    assert stats[sample_lodge_2.id] == {"total_sessions": 0, "average_attendance": 0.0, "member_stats": []}
+
+
+def test_attendance_rollup_feeds_member_analytics(db_session, sample_lodge, sample_member):
+    from app.modules.sessions.services import attendance_analytics_service, attendance_rollup_service
+    from models.models import AttendanceMonthlyRollup, MasonicSession, SessionAttendance
+
+    sessions = [
+        MasonicSession(title=f"Sessão {i}", session_date=date.today().replace(day=1), lodge_id=sample_lodge.id, status="REALIZADA")
+        for i in range(2)
+    ]
+    db_session.add_all(sessions)
+    db_session.flush()
+    db_session.add(SessionAttendance(session_id=sessions[0].id, member_id=sample_member.id, attendance_status="Presente"))
+    attendance_rollup_service.refresh_session_rollup(db_session, sessions[0])
+    db_session.commit()
+
+    rollup = db_session.query(AttendanceMonthlyRollup).filter(AttendanceMonthlyRollup.member_id == sample_member.id).one()
+    assert (rollup.sessions_held, rollup.present_count, rollup.absent_count) == (2, 1, 1)
+
+    stats = attendance_analytics_service.get_member_attendance_stats(db_session, sample_member.id)
+    assert stats["total_sessions"] == 2
+    assert stats["present_sessions"] == 1
+
+
+def test_session_lifecycle_derived_on_read_and_applied_in_bulk(db_session, sample_lodge):
+    from datetime import datetime, time
+
+    from app.modules.sessions.services import session_lifecycle_service
+    from models.models import MasonicSession
+
+    now = datetime.combine(date.today(), time(19, 0))
+    tonight = MasonicSession(title="Hoje", session_date=now.date(), start_time=time(20, 0), lodge_id=sample_lodge.id, status="AGENDADA")
+    forgotten = MasonicSession(title="Antiga", session_date=now.date() - timedelta(days=30), lodge_id=sample_lodge.id, status="AGENDADA")
+    db_session.add_all([tonight, forgotten])
+    db_session.commit()
+
+    # Leitura: status derivado só para exibição, nada é gravado
+    session_lifecycle_service.apply_display_status([tonight, forgotten], now)
+    assert (tonight.status, forgotten.status) == ("EM_ANDAMENTO", "ENCERRADA")
+    db_session.commit()
+    assert (tonight.status, forgotten.status) == ("AGENDADA", "AGENDADA")
+
+    # Agendador: transições vencidas aplicadas em lote
+    assert session_lifecycle_service.apply_due_transitions(db_session, now) == {"EM_ANDAMENTO": 1, "ENCERRADA": 1}
+    db_session.expire_all()
+    assert (tonight.status, forgotten.status) == ("EM_ANDAMENTO", "ENCERRADA")
+    assert session_lifecycle_service.apply_due_transitions(db_session, now) == {}
+
+
+
+def test_scheduler_keeps_status_changed_after_its_read(db_session, sample_lodge, monkeypatch):
+    from datetime import datetime, time
+
+    from app.modules.sessions.services import session_lifecycle_service
+    from models.models import MasonicSession
+
+    now = datetime.combine(date.today(), time(19, 0))
+    session = MasonicSession(title="Hoje", session_date=now.date(), start_time=time(20, 0), lodge_id=sample_lodge.id, status="AGENDADA")
+    db_session.add(session)
+    db_session.commit()
+
+    derive_status = session_lifecycle_service.derive_status
+
+    def cancel_then_derive(row, when=None):
+        # O usuário cancela a sessão entre a leitura do agendador e o UPDATE
+        db_session.query(MasonicSession).filter(MasonicSession.id == row.id).update(
+            {MasonicSession.status: "CANCELADA"}, synchronize_session=False
+        )
+        return derive_status(row, when)
+
+    monkeypatch.setattr(session_lifecycle_service, "derive_status", cancel_then_derive)
+    assert session_lifecycle_service.apply_due_transitions(db_session, now) == {}
+    db_session.expire_all()
+    assert session.status == "CANCELADA"
+
+
+def test_session_actions_persist_due_transitions_first(db_session, sample_lodge, sample_member):
+    from datetime import time
+
+    from app.modules.sessions.services import session_service
+    from models.models import AttendanceMonthlyRollup, MasonicSession
+
+    # O agendador atrasou: no banco ainda EM_ANDAMENTO, mas a sessão já terminou
+    session = MasonicSession(
+        title="Atrasada", session_date=date.today() - timedelta(days=3), start_time=time(20, 0),
+        lodge_id=sample_lodge.id, status="EM_ANDAMENTO", balaustre_file_path="balaustre.pdf",
+    )
+    db_session.add(session)
+    db_session.commit()
+
+    approved = session_service.approve_session_minutes(db_session, session.id, {"lodge_id": sample_lodge.id})
+    assert approved.status == "ENCERRADA"
+    # A passagem por REALIZADA foi gravada com seus efeitos: o mês entrou no consolidado
+    rollup = db_session.query(AttendanceMonthlyRollup).filter(AttendanceMonthlyRollup.member_id == sample_member.id).one()
+    assert (rollup.period_start, rollup.sessions_held) == (session.session_date.replace(day=1), 1)
+
+
+def test_annual_projection_batches_suppression_and_skips_existing_dates(db_session, sample_lodge):
+    from datetime import time
+
+    from app.modules.sessions.services import session_scheduler_service
+    from models.models import LodgeRecess, MasonicSession
+
+    sample_lodge.auto_schedule_sessions = True
+    sample_lodge.session_day = "Sextas-feiras"
+    sample_lodge.periodicity = "Semanal"
+    sample_lodge.session_time = time(20, 0)
+    db_session.add(LodgeRecess(lodge_id=sample_lodge.id, start_date=date(2027, 1, 1), end_date=date(2027, 1, 31), description="Verão"))
+    db_session.add(MasonicSession(title="Magna", session_date=date(2027, 3, 5), lodge_id=sample_lodge.id, status="AGENDADA"))
+    db_session.commit()
+
+    created = session_scheduler_service.generate_annual_sessions_for_lodge(db_session, sample_lodge, 2027)
+
+    assert created == 52  # 53 sextas-feiras em 2027, uma já ocupada
+    suppressed = {
+        s.session_date
+        for s in db_session.query(MasonicSession).filter(MasonicSession.lodge_id == sample_lodge.id, MasonicSession.status == "SUPRIMIDA")
+    }
+    assert suppressed == {date(2027, 1, d) for d in (1, 8, 15, 22, 29)} | {date(2027, 3, 26)}  # recesso + Sexta-feira Santa
+
+
+def test_holiday_calendar_merges_custom_holidays_and_invalidates_on_commit(db_session, sample_lodge):
+    from app.modules.sessions.services.holiday_service import holiday_calendar, is_custom_holiday
+
+    sample_lodge.custom_holidays = [{"month": 8, "day": 20, "name": "Dia do Maçom"}]
+    db_session.commit()
+
+    calendar = holiday_calendar.for_lodge(sample_lodge, 2027)
+    assert calendar[date(2027, 8, 20)] == "Feriado Maçônico: Dia do Maçom"
+    assert calendar[date(2027, 9, 7)].startswith("Feriado Nacional")
+    assert holiday_calendar.for_lodge(sample_lodge, 2027) is calendar  # memoizado
+
+    sample_lodge.custom_holidays = [{"month": 7, "day": 16, "name": "Fundação da Loja"}]
+    db_session.commit()
+
+    assert not holiday_calendar.is_holiday(sample_lodge, date(2027, 8, 20))
+    assert is_custom_holiday(date(2027, 7, 16), sample_lodge) == (True, "Fundação da Loja")
@@ -0,0 +1,160 @@
+from datetime import date, datetime, time, timedelta
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.modules.access_control.utils.auth_utils import create_access_token
+from app.modules.sessions.schemas.attendance_schema import TotemBulkRequest
+from app.modules.sessions.services import attendance_service
+from models import models
+
+# ============================================================================
+# Fixtures Específicas
+# ============================================================================
+
+
+@pytest.fixture
+def totem_session(db_session, sample_lodge):
+    """Sessão em andamento na loja do Totem."""
+    session = models.MasonicSession(
+        lodge_id=sample_lodge.id,
+        title="Sessão do Totem",
+        session_date=date.today(),
+        start_time=time(20, 0),
+        status="EM_ANDAMENTO",
+    )
+    db_session.add(session)
+    db_session.commit()
+    db_session.refresh(session)
+    return session
+
+
+@pytest.fixture
+def outsider(db_session, sample_lodge_2):
+    """Obreiro de outra loja: no Totem é registrado como visitante."""
+    member = models.Member(
+        full_name="Irmão Visitante Totem", email="visitante.totem@test.com", cim="777001", password_hash="x"
+    )
+    db_session.add(member)
+    db_session.flush()
+    db_session.add(models.MemberLodgeAssociation(member_id=member.id, lodge_id=sample_lodge_2.id))
+    db_session.commit()
+    return member
+
+
+def _token(user_id: int) -> str:
+    # O Totem sincroniza leituras antigas: o token pode já ter expirado
+    return create_access_token({"user_id": user_id, "user_type": "member"}, expires_delta=timedelta(minutes=-5))
+
+
+def _bulk(lodge_id: int, *tokens: str) -> TotemBulkRequest:
+    read_at = datetime(2026, 1, 10, 20, 5)
+    return TotemBulkRequest(
+        lodge_id=lodge_id,
+        check_ins=[{"jwt_token": token, "timestamp_local": read_at + timedelta(minutes=i)} for i, token in enumerate(tokens)],
+    )
+
+
+def _attendances(db_session, session):
+    return db_session.query(models.SessionAttendance).filter(models.SessionAttendance.session_id == session.id).all()
+
+
+# ============================================================================
+# Testes Unitários: record_bulk_totem_attendance
+# ============================================================================
+
+
+def test_bulk_totem_outsider_twice_creates_one_visitor(db_session, sample_lodge, totem_session, outsider):
+    """O mesmo obreiro de fora lido duas vezes no lote gera um único visitante e uma única presença."""
+    result = attendance_service.record_bulk_totem_attendance(
+        db_session, _bulk(sample_lodge.id, _token(outsider.id), _token(outsider.id))
+    )
+
+    assert result["success"] == 2
+    visitors = db_session.query(models.Visitor).filter(models.Visitor.cim == outsider.cim).all()
+    assert len(visitors) == 1
+    assert visitors[0].trust_level == "Certificado"
+
+    records = _attendances(db_session, totem_session)
+    assert len(records) == 1
+    assert records[0].visitor_id == visitors[0].id
+    assert records[0].member_id is None
+    # Vale a primeira leitura
+    assert records[0].check_in_datetime == datetime(2026, 1, 10, 20, 5)
+
+
+def test_bulk_totem_isolates_invalid_items(db_session, sample_lodge, totem_session, sample_member, outsider):
+    """Token inválido e usuário inexistente viram erro no próprio item; os demais são gravados."""
+    result = attendance_service.record_bulk_totem_attendance(
+        db_session,
+        _bulk(sample_lodge.id, _token(sample_member.id), "token-invalido", _token(999999), _token(outsider.id)),
+    )
+
+    assert result["processed"] == 4
+    assert result["success"] == 2
+    assert len(result["errors"]) == 2
+
+    records = _attendances(db_session, totem_session)
+    assert {record.member_id for record in records if record.member_id} == {sample_member.id}
+    assert len([record for record in records if record.visitor_id]) == 1
+    assert all(record.attendance_status == "Presente" and record.check_in_method == "TOTEM" for record in records)
+
+
+def test_bulk_totem_rerun_is_idempotent(db_session, sample_lodge, totem_session, sample_member, outsider):
+    """Reenviar o mesmo lote (Totem sem confirmação da sincronização) não duplica nada."""
+    bulk = _bulk(sample_lodge.id, _token(sample_member.id), _token(outsider.id))
+
+    first = attendance_service.record_bulk_totem_attendance(db_session, bulk)
+    snapshot = {(r.member_id, r.visitor_id, r.check_in_datetime) for r in _attendances(db_session, totem_session)}
+    second = attendance_service.record_bulk_totem_attendance(db_session, bulk)
+
+    assert first["success"] == second["success"] == 2
+    assert {(r.member_id, r.visitor_id, r.check_in_datetime) for r in _attendances(db_session, totem_session)} == snapshot
+    assert len(snapshot) == 2
+    assert db_session.query(models.Visitor).filter(models.Visitor.cim == outsider.cim).count() == 1
+
+
+def test_bulk_totem_results_payload(db_session, sample_lodge, totem_session, sample_member):
+    """Cada item do lote tem seu resultado, na ordem de envio."""
+    result = attendance_service.record_bulk_totem_attendance(
+        db_session, _bulk(sample_lodge.id, _token(sample_member.id), "token-invalido", _token(999999))
+    )
+
+    assert [(r["index"], r["user_id"], r["status"]) for r in result["results"]] == [
+        (0, sample_member.id, "ok"),
+        (1, None, "error"),
+        (2, 999999, "error"),
+    ]
+    assert result["results"][0]["detail"] is None
+    assert result["results"][1]["detail"].startswith("Erro ao processar token")
+    assert result["results"][2]["detail"] == "Usuário não encontrado: 999999"
+    assert result["errors"] == [result["results"][1]["detail"], result["results"][2]["detail"]]
+
+
+def test_bulk_totem_replay_recreates_records_of_failed_savepoint(db_session, sample_lodge, totem_session, outsider, monkeypatch):
+    """No modo item a item, um savepoint desfeito não deixa objetos descartados para as leituras seguintes."""
+    # Sessão própria sobre a mesma conexão: o rollback da reaplicação não desfaz as fixtures
+    db = Session(bind=db_session.connection(), join_transaction_mode="create_savepoint")
+    apply_check_in = attendance_service._apply_totem_check_in
+    calls = []
+
+    def flaky_apply(db, session, context, user_id, timestamp_local):
+        calls.append(user_id)
+        record = apply_check_in(db, session, context, user_id, timestamp_local)
+        if len(calls) == 1:
+            # Quebra o flush do caminho rápido, forçando a reaplicação item a item
+            db.add(models.Visitor(full_name="Sem CIM", cim=None))
+        elif len(calls) == 3:
+            raise RuntimeError("falha no savepoint")
+        return record
+
+    monkeypatch.setattr(attendance_service, "_apply_totem_check_in", flaky_apply)
+    result = attendance_service.record_bulk_totem_attendance(
+        db, _bulk(sample_lodge.id, _token(outsider.id), _token(outsider.id))
+    )
+
+    assert [r["status"] for r in result["results"]] == ["error", "ok"]
+    visitor = db.query(models.Visitor).filter(models.Visitor.cim == outsider.cim).one()
+    records = _attendances(db, totem_session)
+    assert [(r.visitor_id, r.attendance_status) for r in records] == [(visitor.id, "Presente")]
+    db.close()
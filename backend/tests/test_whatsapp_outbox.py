@@ -0,0 +1,48 @@
+import asyncio
+from datetime import UTC, datetime, timedelta
+
+from sqlalchemy.orm import sessionmaker
+
+from app.modules.communication.services import whatsapp_outbox_service
+from models.models import WhatsAppOutboundMessage
+
+
+class FakeEvolutionClient:
+    """Responde conforme o destino: 'down' falha temporariamente, 'auth' falha de forma definitiva."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def post_text(self, payload, instance_name=None):
+        number = payload["number"]
+        if number.startswith("down"):
+            return False, "503 Service Unavailable", True
+        if number.startswith("auth"):
+            return False, "401 Unauthorized", False
+        self.sent.append(number)
+        return True, None, False
+
+
+def test_outbox_retries_with_exponential_backoff(db_session):
+    factory = sessionmaker(bind=db_session.get_bind())
+    for number, retryable in (("5562999990000@s.whatsapp.net", True), ("down@s.whatsapp.net", True), ("auth@s.whatsapp.net", False)):
+        whatsapp_outbox_service.enqueue_failed_message(
+            "sigma_central", {"number": number, "text": "Tfa!"}, "timeout", retryable, session_factory=factory
+        )
+
+    client = FakeEvolutionClient()
+    # Antes do backoff nada é reenviado
+    assert asyncio.run(whatsapp_outbox_service.retry_pending_messages(factory, client)) == {"sent": 0, "retrying": 0, "failed": 0}
+
+    later = datetime.now(UTC) + timedelta(minutes=1)
+    summary = asyncio.run(whatsapp_outbox_service.retry_pending_messages(factory, client, now=later))
+
+    assert summary == {"sent": 1, "retrying": 1, "failed": 0}
+    assert client.sent == ["5562999990000@s.whatsapp.net"]
+    statuses = {m.remote_jid: (m.status, m.attempts) for m in db_session.query(WhatsAppOutboundMessage)}
+    assert statuses == {
+        "5562999990000@s.whatsapp.net": ("SENT", 2),
+        "down@s.whatsapp.net": ("PENDING", 2),
+        "auth@s.whatsapp.net": ("FAILED", 1),
+    }
+    assert whatsapp_outbox_service.backoff_delay(2) == timedelta(minutes=1)
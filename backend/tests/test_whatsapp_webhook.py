@@ -0,0 +1,36 @@
+from app.modules.communication.services import whatsapp_webhook_service
+from app.modules.communication.services.whatsapp_webhook_service import WhatsAppLookupCache, parse_command
+from models.models import Member
+
+
+def _payload(text, remote_jid="120363000001@g.us", participant="556299991234@s.whatsapp.net"):
+    return {
+        "event": "messages.upsert",
+        "data": {"key": {"remoteJid": remote_jid, "participant": participant, "id": "MSG1"}, "message": {"conversation": text}},
+    }
+
+
+def test_parse_command_recognizes_group_commands_only():
+    assert parse_command(_payload("#VOU +2"))["guests_count"] == 2
+    assert parse_command(_payload("#agenda jantar"))["action"] == "agenda"
+    assert parse_command(_payload("bom dia, irmãos")) is None
+    assert parse_command(_payload("#vou", remote_jid="5562999991234@s.whatsapp.net")) is None
+    assert parse_command({"event": "connection.update"}) is None
+
+
+def test_lookup_cache_matches_e164_phones_and_invalidates_on_commit(db_session, sample_lodge):
+    sample_lodge.whatsapp_group_id = "120363000001"
+    member = Member(full_name="Irmão Teste", email="tel@test.com", cim="777", cpf="12345678909", password_hash="x", phone="(62) 99999-1234")
+    db_session.add(member)
+    db_session.commit()
+
+    cache = WhatsAppLookupCache()
+    assert cache.lodge_for_group(db_session, "120363000001@g.us") == sample_lodge.id
+    # Com e sem o nono dígito, como o WhatsApp pode identificar o remetente
+    assert cache.member_for_phone(db_session, "5562999991234") == member.id
+    assert cache.member_for_phone(db_session, "556299991234") == member.id
+
+    whatsapp_webhook_service.lookup_cache.lodge_for_group(db_session, "120363000001@g.us")
+    sample_lodge.whatsapp_group_id = "120363000002"
+    db_session.commit()
+    assert whatsapp_webhook_service.lookup_cache.lodge_for_group(db_session, "120363000001@g.us") is None